@@ -16,6 +16,7 @@ Usage:
 """
 import argparse
 import asyncio
+import contextlib
 import json
 import logging
 import os
@@ -26,6 +27,7 @@ from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
 import aiohttp
+from redis.asyncio import Redis
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -50,6 +52,7 @@ from src.apeg_core.feedback.version_control import (
 from src.apeg_core.metrics.schema import init_database
 from src.apeg_core.schemas.bulk_ops import ProductUpdateSpec
 from src.apeg_core.shopify.graphql_strings import QUERY_PRODUCT_BY_ID
+from src.apeg_core.shopify.throttle import ShopifyCostThrottle
 
 
 def setup_logging(verbose: bool = False) -> None:
@@ -85,6 +88,7 @@ def load_config() -> dict:
         "shop_domain": os.getenv("SHOPIFY_STORE_DOMAIN", ""),
         "shopify_access_token": os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN", ""),
         "shopify_api_version": os.getenv("SHOPIFY_API_VERSION", "2024-10"),
+        "redis_url": os.getenv("REDIS_URL", ""),
         "api_base_url": os.getenv("APEG_API_BASE_URL", "http://localhost:8000"),
         "apeg_api_key": os.getenv("APEG_API_KEY", ""),
         "dry_run": os.getenv("APEG_ALLOW_WRITES", "NO").upper() != "YES",
@@ -241,6 +245,7 @@ async def _fetch_product_snapshot(
     session: aiohttp.ClientSession,
     config: dict,
     product_id: str,
+    throttle: ShopifyCostThrottle | None = None,
 ) -> dict:
     _require_config_value(config["shop_domain"], "SHOPIFY_STORE_DOMAIN")
     _require_config_value(
@@ -255,10 +260,16 @@ async def _fetch_product_snapshot(
     payload = {"query": QUERY_PRODUCT_BY_ID, "variables": {"id": product_id}}
     headers = {"X-Shopify-Access-Token": config["shopify_access_token"]}
 
+    if throttle is not None:
+        await throttle.acquire(QUERY_PRODUCT_BY_ID)
+
     async with session.post(endpoint, json=payload, headers=headers) as resp:
         resp.raise_for_status()
         response_data = await resp.json()
 
+    if throttle is not None:
+        await throttle.record(QUERY_PRODUCT_BY_ID, response_data)
+
     if response_data.get("errors"):
         raise ValueError(f"Shopify GraphQL errors: {response_data['errors']}")
 
@@ -335,7 +346,13 @@ async def run_propose(db_conn: sqlite3.Connection, config: dict, run_id: str) ->
     log_path = config["log_dir"] / f"feedback_propose_{run_id}.jsonl"
     version_control = SEOVersionControl(db_conn)
 
-    async with aiohttp.ClientSession() as session:
+    async with contextlib.AsyncExitStack() as stack:
+        redis = Redis.from_url(config["redis_url"]) if config["redis_url"] else None
+        if redis is not None:
+            stack.push_async_callback(redis.aclose)
+        throttle = ShopifyCostThrottle(config["shop_domain"], redis=redis)
+        session = await stack.enter_async_context(aiohttp.ClientSession())
+
         for idx, target in enumerate(targets, start=1):
             product_id = target.product_metrics.product_id
             candidate = target.candidate
@@ -349,7 +366,7 @@ async def run_propose(db_conn: sqlite3.Connection, config: dict, run_id: str) ->
                 )
             else:
                 champion = await _fetch_product_snapshot(
-                    session, config, product_id
+                    session, config, product_id, throttle
                 )
 
             prompt = SEOChallengerPrompt.build_refinement_prompt(
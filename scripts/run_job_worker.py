@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""CLI entry point for out-of-process SEO update job workers.
+
+Consumes jobs enqueued by the API when APEG_JOB_BACKEND=redis. Run one
+process per host (or give each process its own --worker-id) and scale
+horizontally by adding processes or hosts.
+
+Usage:
+    PYTHONPATH=. python scripts/run_job_worker.py --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.apeg_core.api.resources import AppResources
+from src.apeg_core.jobs.store import RedisJobStore
+from src.apeg_core.jobs.worker import JobWorker
+from src.apeg_core.telemetry import tracing
+
+
+def setup_logging(verbose: bool = False) -> None:
+    """Configure logging."""
+    level = logging.DEBUG if verbose else logging.INFO
+
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+async def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="APEG job worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("APEG_JOB_WORKER_CONCURRENCY", "4")),
+        help="Jobs executed concurrently by this process (default 4)",
+    )
+    parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=os.getenv("APEG_JOB_WORKER_ID") or socket.gethostname(),
+        help="Stable, unique worker ID used for crash recovery (default hostname)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Enable debug logging",
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(args.verbose)
+    tracing.configure_from_env()
+
+    resources = AppResources.from_env()
+    redis = resources.get_redis()
+    worker = JobWorker(
+        store=RedisJobStore(
+            redis, result_ttl_seconds=resources.job_result_ttl_seconds
+        ),
+        session=resources.get_session(),
+        redis=redis,
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        coalesce_window_seconds=float(
+            os.getenv("APEG_COALESCE_WINDOW_SECONDS", JobWorker.COALESCE_WINDOW_SECONDS)
+        ),
+        coalesce_max_jobs=int(
+            os.getenv("APEG_COALESCE_MAX_JOBS", JobWorker.COALESCE_MAX_JOBS)
+        ),
+        coalesce_max_products=int(
+            os.getenv("APEG_COALESCE_MAX_PRODUCTS", JobWorker.COALESCE_MAX_PRODUCTS)
+        ),
+    )
+
+    # Stop taking new jobs on SIGINT/SIGTERM; in-flight jobs run to completion
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await worker.run(stop_event)
+    finally:
+        await resources.aclose()
+        tracing.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""CLI entry point for the local product state mirror.
+
+Usage:
+    # Seed (or fully rebuild) the mirror from a bulk export
+    PYTHONPATH=. python scripts/run_product_mirror_sync.py --seed
+
+    # Pull products updated since the last sync
+    PYTHONPATH=. python scripts/run_product_mirror_sync.py
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+import aiohttp
+from redis.asyncio import Redis
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+from src.apeg_core.shopify.product_mirror import ProductMirror
+from src.apeg_core.shopify.throttle import ShopifyCostThrottle
+
+
+def setup_logging(verbose: bool = False) -> None:
+    """Configure logging."""
+    level = logging.DEBUG if verbose else logging.INFO
+
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+async def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="APEG product mirror sync")
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="Rebuild the mirror from a full bulk export",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Enable debug logging",
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(args.verbose)
+
+    shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
+    access_token = os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN")
+    api_version = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    mirror_path = os.getenv("PRODUCT_MIRROR_DB_PATH", "data/product_mirror.db")
+
+    if not shop_domain or not access_token:
+        raise RuntimeError("SHOPIFY_STORE_DOMAIN and SHOPIFY_ADMIN_ACCESS_TOKEN must be set")
+
+    mirror = ProductMirror.open(mirror_path, shop_domain)
+    redis = Redis.from_url(redis_url, decode_responses=False)
+    timeout = aiohttp.ClientTimeout(total=300, connect=30)
+
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            bulk_client = ShopifyBulkClient(
+                shop_domain=shop_domain,
+                admin_access_token=access_token,
+                api_version=api_version,
+                session=session,
+                redis=redis,
+                throttle=ShopifyCostThrottle(shop_domain, redis=redis),
+            )
+
+            if args.seed or not mirror.is_seeded:
+                await mirror.seed(bulk_client)
+            else:
+                await mirror.refresh_incremental(bulk_client)
+    finally:
+        await redis.aclose()
+        mirror.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,16 @@
 """APEG API layer for n8n integration."""
 from .auth import require_api_key
+from .metrics import RequestMetricsMiddleware
+from .metrics import router as metrics_router
 from .routes import router
+from .webhooks import router as webhooks_router
+from .webhooks import verify_shopify_hmac
 
-__all__ = ["require_api_key", "router"]
+__all__ = [
+    "require_api_key",
+    "router",
+    "verify_shopify_hmac",
+    "webhooks_router",
+    "metrics_router",
+    "RequestMetricsMiddleware",
+]
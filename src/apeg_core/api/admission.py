@@ -0,0 +1,234 @@
+"""Admission control for the job submission API.
+
+Every accepted job costs this process memory until it leaves: with the inline
+backend the request body and background task live until the job finishes,
+with the Redis backend until it is enqueued. The controller caps jobs per shop
+and overall, request bytes in flight, and products per job. Over-limit
+submissions are rejected with 429 and a ``Retry-After`` derived from how fast
+the queue has been draining, so callers back off instead of piling on.
+"""
+import logging
+import math
+import os
+from collections import deque
+from dataclasses import dataclass
+from time import monotonic
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+@dataclass
+class AdmissionTicket:
+    """One admitted job, held until ``AdmissionController.release``."""
+
+    shop_domain: str
+    body_bytes: int
+
+
+class AdmissionController:
+    """Queue depth, size, and bytes-in-flight limits for job submissions."""
+
+    MAX_QUEUED_JOBS = 200
+    MAX_QUEUED_JOBS_PER_SHOP = 50
+    MAX_PRODUCTS_PER_JOB = 100_000
+    MAX_INFLIGHT_BYTES = 256 * 1024 * 1024  # 256 MB
+    DRAIN_WINDOW_SECONDS = 300.0  # drain rate is measured over this window
+    DEFAULT_RETRY_AFTER = 30  # seconds, before any drain has been observed
+    MAX_RETRY_AFTER = 600  # seconds
+
+    def __init__(
+        self,
+        max_queued_jobs: int = MAX_QUEUED_JOBS,
+        max_queued_jobs_per_shop: int = MAX_QUEUED_JOBS_PER_SHOP,
+        max_products_per_job: int = MAX_PRODUCTS_PER_JOB,
+        max_inflight_bytes: int = MAX_INFLIGHT_BYTES,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize admission controller.
+
+        Args:
+            max_queued_jobs: Jobs queued or running at once (0 = unlimited)
+            max_queued_jobs_per_shop: Same, per shop (0 = unlimited)
+            max_products_per_job: Largest accepted job (0 = unlimited)
+            max_inflight_bytes: Request bytes held by admitted jobs
+                (0 = unlimited)
+            logger: Optional logger instance
+        """
+        self.max_queued_jobs = max_queued_jobs
+        self.max_queued_jobs_per_shop = max_queued_jobs_per_shop
+        self.max_products_per_job = max_products_per_job
+        self.max_inflight_bytes = max_inflight_bytes
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._jobs_by_shop: dict[str, int] = {}
+        self._inflight_bytes = 0
+        self._drained: deque[tuple[float, int]] = deque()
+        self._started_at = monotonic()
+        self._queue_depth: Optional[int] = None
+        self._admitted_since_depth = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build limits from APEG_ADMISSION_* environment variables."""
+        return cls(
+            max_queued_jobs=int(
+                os.getenv("APEG_ADMISSION_MAX_QUEUED_JOBS", cls.MAX_QUEUED_JOBS)
+            ),
+            max_queued_jobs_per_shop=int(
+                os.getenv(
+                    "APEG_ADMISSION_MAX_QUEUED_JOBS_PER_SHOP", cls.MAX_QUEUED_JOBS_PER_SHOP
+                )
+            ),
+            max_products_per_job=int(
+                os.getenv("APEG_ADMISSION_MAX_PRODUCTS_PER_JOB", cls.MAX_PRODUCTS_PER_JOB)
+            ),
+            max_inflight_bytes=int(
+                os.getenv("APEG_ADMISSION_MAX_INFLIGHT_BYTES", cls.MAX_INFLIGHT_BYTES)
+            ),
+        )
+
+    def admit(
+        self,
+        shop_domain: str,
+        product_count: int,
+        body_bytes: int,
+        queue_depth: Optional[int] = None,
+    ) -> AdmissionTicket:
+        """Admit a job or raise the HTTP error the caller should return.
+
+        Args:
+            shop_domain: Target shop
+            product_count: Products in the job
+            body_bytes: Request body size (Content-Length)
+            queue_depth: Jobs waiting in a shared queue (Redis backend); the
+                API only accepts its configured shop, so this is checked
+                against both the shop and the global limit. Jobs admitted by
+                this process are counted when None.
+
+        Returns:
+            Ticket to pass to ``release`` once the job leaves this process
+
+        Raises:
+            HTTPException: 413 if the job is too large; 429 with
+                ``Retry-After`` if a queue or byte limit is reached
+        """
+        if self.max_products_per_job and product_count > self.max_products_per_job:
+            # 413 by number: its constant was renamed across Starlette versions
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"Job has {product_count} products; the limit is "
+                    f"{self.max_products_per_job} per job"
+                ),
+            )
+
+        if queue_depth is not None:
+            self._observe_queue_depth(queue_depth)
+            shop_depth = total_depth = queue_depth
+        else:
+            shop_depth = self._jobs_by_shop.get(shop_domain, 0)
+            total_depth = self.queued_jobs
+
+        if self.max_queued_jobs_per_shop and shop_depth >= self.max_queued_jobs_per_shop:
+            self._reject(
+                f"{shop_depth} jobs queued for {shop_domain}",
+                shop_depth - self.max_queued_jobs_per_shop + 1,
+            )
+        if self.max_queued_jobs and total_depth >= self.max_queued_jobs:
+            self._reject(
+                f"{total_depth} jobs queued", total_depth - self.max_queued_jobs + 1
+            )
+        if (
+            self.max_inflight_bytes
+            and self._inflight_bytes
+            and self._inflight_bytes + body_bytes > self.max_inflight_bytes
+        ):
+            # A single oversized body is still admitted when nothing else is
+            # in flight; max_products_per_job bounds it
+            self._reject(f"{self._inflight_bytes} request bytes in flight", 1)
+
+        self._jobs_by_shop[shop_domain] = self._jobs_by_shop.get(shop_domain, 0) + 1
+        self._inflight_bytes += body_bytes
+        self._admitted_since_depth += 1
+        return AdmissionTicket(shop_domain=shop_domain, body_bytes=body_bytes)
+
+    def release(self, ticket: AdmissionTicket, drained: bool = True) -> None:
+        """Return a ticket's capacity.
+
+        Args:
+            ticket: Ticket from ``admit``
+            drained: Count the job toward the drain rate (False when the job
+                only moved on to a shared queue whose depth is observed)
+        """
+        remaining = self._jobs_by_shop.get(ticket.shop_domain, 0) - 1
+        if remaining > 0:
+            self._jobs_by_shop[ticket.shop_domain] = remaining
+        else:
+            self._jobs_by_shop.pop(ticket.shop_domain, None)
+        self._inflight_bytes = max(0, self._inflight_bytes - ticket.body_bytes)
+        if drained:
+            self._record_drained(1)
+
+    @property
+    def queued_jobs(self) -> int:
+        return sum(self._jobs_by_shop.values())
+
+    def drain_rate(self) -> float:
+        """Jobs per second that left the queue over the drain window."""
+        self._trim_drained()
+        if not self._drained:
+            return 0.0
+        elapsed = min(self.DRAIN_WINDOW_SECONDS, monotonic() - self._started_at)
+        return sum(count for _, count in self._drained) / max(elapsed, 1.0)
+
+    def retry_after(self, excess_jobs: int) -> int:
+        """Seconds until ``excess_jobs`` should have drained at the current rate."""
+        rate = self.drain_rate()
+        if rate <= 0:
+            return self.DEFAULT_RETRY_AFTER
+        return min(self.MAX_RETRY_AFTER, max(1, math.ceil(excess_jobs / rate)))
+
+    def stats(self) -> dict:
+        """Return current depth, bytes in flight, drain rate, and limits."""
+        return {
+            "queued_jobs": (
+                self._queue_depth if self._queue_depth is not None else self.queued_jobs
+            ),
+            "in_process_jobs_by_shop": dict(self._jobs_by_shop),
+            "inflight_bytes": self._inflight_bytes,
+            "drain_rate_per_second": round(self.drain_rate(), 4),
+            "limits": {
+                "max_queued_jobs": self.max_queued_jobs,
+                "max_queued_jobs_per_shop": self.max_queued_jobs_per_shop,
+                "max_products_per_job": self.max_products_per_job,
+                "max_inflight_bytes": self.max_inflight_bytes,
+            },
+        }
+
+    def _reject(self, reason: str, excess_jobs: int) -> None:
+        retry_after = self.retry_after(excess_jobs)
+        self.logger.warning("Rejected job submission: %s (retry in %ss)", reason, retry_after)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Job queue is full: {reason}",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _observe_queue_depth(self, depth: int) -> None:
+        """Infer jobs drained from a shared queue since the last sample."""
+        if self._queue_depth is not None:
+            drained = self._queue_depth + self._admitted_since_depth - depth
+            if drained > 0:
+                self._record_drained(drained)
+        self._queue_depth = depth
+        self._admitted_since_depth = 0
+
+    def _record_drained(self, count: int) -> None:
+        self._drained.append((monotonic(), count))
+        self._trim_drained()
+
+    def _trim_drained(self) -> None:
+        cutoff = monotonic() - self.DRAIN_WINDOW_SECONDS
+        while self._drained and self._drained[0][0] < cutoff:
+            self._drained.popleft()
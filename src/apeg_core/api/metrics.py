@@ -0,0 +1,84 @@
+"""Prometheus scrape endpoint and API request metrics."""
+import logging
+from time import monotonic
+
+from fastapi import APIRouter, Depends, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..jobs.store import RedisJobStore
+from ..telemetry.metrics import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_SECONDS,
+    JOB_INFLIGHT_BYTES,
+    JOB_QUEUE_DEPTH,
+    REGISTRY,
+)
+from .auth import require_api_key
+from .resources import AppResources, get_resources
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+
+class RequestMetricsMiddleware:
+    """Record each HTTP request's latency by method, route template, and status.
+
+    Routes are labelled by their template (``/api/v1/jobs/{job_id}``), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = monotonic()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(
+                monotonic() - started,
+                method=scope["method"],
+                route=route,
+                status=status_code,
+            )
+
+
+@router.get(
+    "/metrics",
+    dependencies=[Depends(require_api_key)],
+    summary="Prometheus metrics",
+    description="This process's metrics in the Prometheus text exposition format.",
+    response_class=Response,
+)
+async def get_metrics(
+    resources: AppResources = Depends(get_resources),
+) -> Response:
+    """Refresh queue gauges and render the registry."""
+    stats = resources.admission.stats()
+    queue_depth = stats["queued_jobs"]
+    store = resources.get_job_store()
+    if isinstance(store, RedisJobStore):
+        try:
+            queue_depth = await store.queue_depth()
+        except Exception as exc:
+            # A scrape should still return everything else
+            logger.warning("Failed to read job queue depth: %s", exc)
+    JOB_QUEUE_DEPTH.set(queue_depth)
+    JOB_INFLIGHT_BYTES.set(stats["inflight_bytes"])
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,212 @@
+"""Process-wide pooled HTTP and Redis clients for the API worker.
+
+Jobs and webhooks share one aiohttp connector (keep-alive, DNS cache) and one
+Redis connection pool instead of opening and tearing down their own per
+request. Resources are created lazily on first use, so handlers work whether
+or not the ASGI lifespan ran; the lifespan closes them on shutdown.
+"""
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+from fastapi import Request
+from redis.asyncio import ConnectionPool, Redis
+
+from ..jobs.store import JobStore, MemoryJobStore, RedisJobStore
+from .admission import AdmissionController
+
+
+class AppResources:
+    """Shared aiohttp session and Redis pool with connection statistics."""
+
+    HTTP_POOL_LIMIT = 100
+    HTTP_POOL_LIMIT_PER_HOST = 20
+    HTTP_KEEPALIVE_SECONDS = 30.0
+    DNS_CACHE_TTL_SECONDS = 300
+    REDIS_MAX_CONNECTIONS = 50
+    JOB_BACKENDS = ("inline", "redis")
+
+    def __init__(
+        self,
+        redis_url: str,
+        http_pool_limit: int = HTTP_POOL_LIMIT,
+        http_pool_limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        redis_max_connections: int = REDIS_MAX_CONNECTIONS,
+        job_backend: str = "inline",
+        job_result_ttl_seconds: int = RedisJobStore.RESULT_TTL_SECONDS,
+        admission: Optional[AdmissionController] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize resource holder (no connections are opened here).
+
+        Args:
+            redis_url: Redis connection string
+            http_pool_limit: Total simultaneous HTTP connections
+            http_pool_limit_per_host: Simultaneous connections per host
+            redis_max_connections: Redis connection pool size
+            job_backend: "inline" (background tasks in this process) or
+                "redis" (durable queue consumed by run_job_worker.py)
+            job_result_ttl_seconds: How long a completed job answers
+                repeated submissions of its run_id
+            admission: Optional job submission limits (defaults if None)
+            logger: Optional logger instance
+        """
+        self.redis_url = redis_url
+        self.http_pool_limit = http_pool_limit
+        self.http_pool_limit_per_host = http_pool_limit_per_host
+        self.redis_max_connections = redis_max_connections
+        if job_backend not in self.JOB_BACKENDS:
+            raise ValueError(
+                f"Unknown job backend {job_backend!r}; expected one of {self.JOB_BACKENDS}"
+            )
+        self.job_backend = job_backend
+        self.job_result_ttl_seconds = job_result_ttl_seconds
+        self.admission = admission or AdmissionController()
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._redis_pool: Optional[ConnectionPool] = None
+        self._redis: Optional[Redis] = None
+        self._job_store: Optional[JobStore] = None
+        self._http_counters = {
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "AppResources":
+        """Build resources from REDIS_URL and APEG_*_POOL_*, _JOB_*, _ADMISSION_*."""
+        return cls(
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
+            http_pool_limit=int(os.getenv("APEG_HTTP_POOL_LIMIT", cls.HTTP_POOL_LIMIT)),
+            http_pool_limit_per_host=int(
+                os.getenv("APEG_HTTP_POOL_LIMIT_PER_HOST", cls.HTTP_POOL_LIMIT_PER_HOST)
+            ),
+            redis_max_connections=int(
+                os.getenv("APEG_REDIS_POOL_MAX_CONNECTIONS", cls.REDIS_MAX_CONNECTIONS)
+            ),
+            job_backend=os.getenv("APEG_JOB_BACKEND", "inline"),
+            job_result_ttl_seconds=int(
+                os.getenv("APEG_JOB_RESULT_TTL_SECONDS", RedisJobStore.RESULT_TTL_SECONDS)
+            ),
+            admission=AdmissionController.from_env(),
+        )
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.http_pool_limit,
+                limit_per_host=self.http_pool_limit_per_host,
+                keepalive_timeout=self.HTTP_KEEPALIVE_SECONDS,
+                ttl_dns_cache=self.DNS_CACHE_TTL_SECONDS,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=aiohttp.ClientTimeout(total=300, connect=30),
+                trace_configs=[self._trace_config()],
+            )
+            self.logger.info(
+                "Created shared HTTP pool: limit=%s, limit_per_host=%s",
+                self.http_pool_limit,
+                self.http_pool_limit_per_host,
+            )
+        return self._session
+
+    def get_redis(self) -> Redis:
+        """Return a Redis client backed by the shared connection pool."""
+        if self._redis is None:
+            self._redis_pool = ConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.redis_max_connections,
+                decode_responses=False,
+            )
+            self._redis = Redis(connection_pool=self._redis_pool)
+            self.logger.info(
+                "Created shared Redis pool: max_connections=%s",
+                self.redis_max_connections,
+            )
+        return self._redis
+
+    def get_job_store(self) -> JobStore:
+        """Return the job store for the configured backend."""
+        if self._job_store is None:
+            if self.job_backend == "redis":
+                self._job_store = RedisJobStore(
+                    self.get_redis(), result_ttl_seconds=self.job_result_ttl_seconds
+                )
+            else:
+                self._job_store = MemoryJobStore(
+                    result_ttl_seconds=self.job_result_ttl_seconds
+                )
+        return self._job_store
+
+    def pool_stats(self) -> dict:
+        """Return current HTTP and Redis pool statistics."""
+        http: dict = {
+            "open": self._session is not None and not self._session.closed,
+            "limit": self.http_pool_limit,
+            "limit_per_host": self.http_pool_limit_per_host,
+            **self._http_counters,
+        }
+        if self._connector is not None:
+            # aiohttp does not expose pool occupancy publicly
+            acquired = getattr(self._connector, "_acquired", ())
+            idle = getattr(self._connector, "_conns", {})
+            http["in_use"] = len(acquired)
+            http["idle"] = sum(len(conns) for conns in idle.values())
+
+        redis: dict = {
+            "open": self._redis_pool is not None,
+            "max_connections": self.redis_max_connections,
+        }
+        if self._redis_pool is not None:
+            redis["in_use"] = len(getattr(self._redis_pool, "_in_use_connections", ()))
+            redis["idle"] = len(getattr(self._redis_pool, "_available_connections", ()))
+
+        return {"http": http, "redis": redis}
+
+    async def aclose(self) -> None:
+        """Close the shared session and disconnect the Redis pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._redis is not None:
+            await self._redis.aclose()
+        if self._redis_pool is not None:
+            await self._redis_pool.disconnect()
+        self._session = None
+        self._connector = None
+        self._redis = None
+        self._redis_pool = None
+        if isinstance(self._job_store, RedisJobStore):
+            self._job_store = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        counters = self._http_counters
+
+        def counter(name: str):
+            async def _increment(session, ctx, params) -> None:
+                counters[name] += 1
+
+            return _increment
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(counter("connections_created"))
+        trace.on_connection_reuseconn.append(counter("connections_reused"))
+        trace.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace
+
+
+def get_resources(request: Request) -> AppResources:
+    """FastAPI dependency returning the app's shared resources."""
+    resources = getattr(request.app.state, "resources", None)
+    if resources is None:
+        resources = AppResources.from_env()
+        request.app.state.resources = resources
+    return resources
@@ -1,17 +1,28 @@
 """FastAPI routes for APEG job submission API."""
+import hashlib
+import json
 import logging
 import os
 import uuid
-from typing import Optional
+from collections.abc import Awaitable, Callable
+from typing import Optional, Union
 
-import aiohttp
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
-from pydantic import BaseModel, Field
-from redis.asyncio import Redis
+import aiofiles
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from pydantic import BaseModel, Field, ValidationError
 
-from ..schemas.bulk_ops import ProductSEO, ProductUpdateSpec
-from ..shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from ..jobs.runner import (
+    JobCancelConflictError,
+    cancel_seo_update_job,
+    run_seo_update_job,
+)
+from ..jobs.spool import remove_spool_file, spool_path
+from ..jobs.store import JobStore, RedisJobStore
+from ..schemas.jobs import JobRecord
+from ..shopify.exceptions import ShopifyBulkClientError, ShopifyBulkGraphQLError
+from .admission import AdmissionController, AdmissionTicket
 from .auth import require_api_key
+from .resources import AppResources, get_resources
 
 
 logger = logging.getLogger(__name__)
@@ -60,125 +71,190 @@ class SEOUpdateJobRequest(BaseModel):
     )
 
 
+class SEOUpdateStreamHeader(BaseModel):
+    """First line of an NDJSON job stream; product lines follow."""
+
+    run_id: str = Field(
+        ..., description="Client-provided run identifier for idempotency tracking"
+    )
+    shop_domain: str = Field(
+        ..., description="Target Shopify store domain (must match configured store)"
+    )
+    dry_run: bool = Field(
+        False, description="If true, validate and log actions without executing writes"
+    )
+
+
 class SEOUpdateJobResponse(BaseModel):
     """Immediate response for queued job."""
 
     job_id: str = Field(..., description="Server-generated job ID")
-    status: str = Field(..., description="Job status (always 'queued' on acceptance)")
+    status: str = Field(
+        ..., description="Job status ('queued' for new jobs, current status for repeats)"
+    )
     run_id: str = Field(..., description="Echo of client-provided run_id")
     received_count: int = Field(..., description="Number of products received")
+    duplicate: bool = Field(
+        False, description="True if run_id was already submitted; no new job was queued"
+    )
 
 
-async def _run_seo_update_job(job_id: str, payload: SEOUpdateJobRequest) -> None:
-    """Background task: Execute SEO update job with safe-write pipeline.
+def _payload_hash(body: dict) -> str:
+    """Hash the request body so repeats of a run_id can be told from reuse."""
+    canonical = _dumps(body)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
-    This function MUST be exception-safe; all errors are caught and logged.
-    """
+
+async def _run_admitted_job(
+    admission: AdmissionController, ticket: AdmissionTicket, *args
+) -> None:
+    """Run an inline job, returning its admission capacity when it ends."""
     try:
-        logger.info(
-            "Starting SEO update job: job_id=%s, run_id=%s, products=%s, dry_run=%s",
-            job_id,
-            payload.run_id,
-            len(payload.products),
-            payload.dry_run,
-        )
-
-        if payload.dry_run:
-            logger.info("DRY RUN MODE: Would update %s products", len(payload.products))
-            for product in payload.products:
-                logger.info(
-                    "  Product %s: tags_add=%s, tags_remove=%s, seo=%s",
-                    product.product_id,
-                    product.tags_add,
-                    product.tags_remove,
-                    product.seo,
-                )
-            logger.info("Job %s completed (dry run)", job_id)
-            return
+        await run_seo_update_job(*args)
+    finally:
+        admission.release(ticket)
 
-        shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
-        access_token = os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN")
-        api_version = os.getenv("SHOPIFY_API_VERSION", "2024-10")
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
 
-        if not shop_domain or not access_token:
-            raise RuntimeError(
-                "SHOPIFY_STORE_DOMAIN and SHOPIFY_ADMIN_ACCESS_TOKEN must be set"
-            )
+def _configured_store() -> str:
+    configured_store = os.getenv("SHOPIFY_STORE_DOMAIN")
+    if not configured_store:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="SHOPIFY_STORE_DOMAIN is not configured",
+        )
+    return configured_store
 
-        timeout = aiohttp.ClientTimeout(total=300, connect=30)
-
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            redis = Redis.from_url(redis_url, decode_responses=False)
-            try:
-                mutation_client = ShopifyBulkMutationClient(
-                    shop_domain=shop_domain,
-                    access_token=access_token,
-                    api_version=api_version,
-                    session=session,
-                    redis=redis,
-                )
 
-                update_specs: list[ProductUpdateSpec] = []
-                for product in payload.products:
-                    seo_input = None
-                    if product.seo:
-                        seo_input = ProductSEO(
-                            title=product.seo.title,
-                            description=product.seo.description,
-                        )
-
-                    update_specs.append(
-                        ProductUpdateSpec(
-                            product_id=product.product_id,
-                            tags_add=product.tags_add,
-                            tags_remove=product.tags_remove,
-                            seo=seo_input,
-                        )
-                    )
-
-                logger.info("Submitting bulk mutation for %s products", len(update_specs))
-
-                bulk_ref = await mutation_client.run_product_update_bulk(
-                    run_id=payload.run_id,
-                    updates=update_specs,
-                    dry_run=payload.dry_run,
-                )
+def _check_shop_domain(shop_domain: str) -> None:
+    """Reject jobs for any shop other than SHOPIFY_STORE_DOMAIN."""
+    configured_store = _configured_store()
+    if shop_domain != configured_store:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"shop_domain mismatch: expected '{configured_store}', "
+                f"got '{shop_domain}'"
+            ),
+        )
 
-                logger.info("Bulk operation submitted: %s", bulk_ref.bulk_op_id)
 
-                result = await mutation_client.poll_to_terminal(
-                    bulk_ref.bulk_op_id,
-                    timeout_s=3600,
-                )
+async def _admit(
+    resources: AppResources,
+    store: JobStore,
+    shop_domain: str,
+    product_count: int,
+    body_bytes: int,
+) -> AdmissionTicket:
+    """Apply admission limits (413/429) against the backend's queue depth."""
+    queue_depth = None
+    if isinstance(store, RedisJobStore):
+        queue_depth = await store.queue_depth()
+    return resources.admission.admit(
+        shop_domain, product_count, body_bytes, queue_depth=queue_depth
+    )
 
-                if result.is_success:
-                    logger.info(
-                        "Job %s completed successfully: bulk_op=%s, objects=%s",
-                        job_id,
-                        bulk_ref.bulk_op_id,
-                        result.object_count,
-                    )
-                else:
-                    logger.error(
-                        "Job %s failed: status=%s, error=%s",
-                        job_id,
-                        result.status,
-                        result.error_code,
-                    )
-
-            finally:
-                await redis.aclose()
 
-    except Exception as exc:
+def _run_conflict(run_id: str, existing: JobRecord) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=(
+            f"run_id '{run_id}' was already submitted with a "
+            f"different payload (job {existing.job_id})"
+        ),
+    )
+
+
+def _answer_repeat(existing: JobRecord, record: JobRecord) -> SEOUpdateJobResponse:
+    """Answer a repeated run_id for the job that holds it (409 on a new body)."""
+    if existing.payload_hash != record.payload_hash:
+        raise _run_conflict(record.run_id, existing)
+    logger.info(
+        "Repeated submission: run_id=%s, job_id=%s, status=%s",
+        record.run_id,
+        existing.job_id,
+        existing.status,
+    )
+    return SEOUpdateJobResponse(
+        job_id=existing.job_id,
+        status=existing.status,
+        run_id=existing.run_id,
+        received_count=existing.product_count,
+        duplicate=True,
+    )
+
+
+async def _find_repeat(
+    store: JobStore, record: JobRecord
+) -> Optional[SEOUpdateJobResponse]:
+    """Reserve the record's run_id, or answer for the job that holds it.
+
+    Returns:
+        None if ``record`` should be submitted; otherwise the response for
+        the existing job
+
+    Raises:
+        HTTPException: 409 if the run_id was submitted with another body
+    """
+    existing = await store.claim_run(record)
+    if existing is None:
+        return None
+    return _answer_repeat(existing, record)
+
+
+async def _release_claim(store: JobStore, record: JobRecord, exc: BaseException) -> None:
+    """Free the run_id of a claimed job that was rejected before it was queued."""
+    reason = exc.detail if isinstance(exc, HTTPException) else str(exc)
+    try:
+        await store.release_run(record, str(reason) or type(exc).__name__)
+    except Exception as release_exc:
         logger.error(
-            "Job %s (run_id=%s) failed with exception: %s",
-            job_id,
-            payload.run_id,
-            exc,
-            exc_info=True,
+            "Failed to release run_id=%s: %s", record.run_id, release_exc
+        )
+
+
+async def _submit(
+    record: JobRecord,
+    ticket: AdmissionTicket,
+    store: JobStore,
+    resources: AppResources,
+    background_tasks: BackgroundTasks,
+) -> SEOUpdateJobResponse:
+    """Enqueue (Redis backend) or schedule (inline) an admitted job."""
+    admission = resources.admission
+    if isinstance(store, RedisJobStore):
+        try:
+            await store.enqueue(record)
+        finally:
+            admission.release(ticket, drained=False)
+    else:
+        try:
+            await store.save(record)
+        except Exception:
+            admission.release(ticket, drained=False)
+            raise
+        background_tasks.add_task(
+            _run_admitted_job,
+            admission,
+            ticket,
+            record.job_id,
+            store,
+            resources.get_session(),
+            resources.get_redis(),
         )
 
+    logger.info(
+        "Queued SEO update job: job_id=%s, run_id=%s, products_count=%s",
+        record.job_id,
+        record.run_id,
+        record.product_count,
+    )
+    return SEOUpdateJobResponse(
+        job_id=record.job_id,
+        status="queued",
+        run_id=record.run_id,
+        received_count=record.product_count,
+    )
+
 
 @router.post(
     "/jobs/seo-update",
@@ -189,12 +265,16 @@ async def _run_seo_update_job(job_id: str, payload: SEOUpdateJobRequest) -> None
     description=(
         "Enqueue a bulk product SEO and tag update job. "
         "Returns immediately (202 Accepted) with job_id. "
-        "Job executes in background using safe-write tag merge."
+        "Repeating a run_id with the same body returns the existing job. "
+        "Job executes in background (in-process, or on a job worker when "
+        "APEG_JOB_BACKEND=redis) using safe-write tag merge."
     ),
 )
 async def create_seo_update_job(
     payload: SEOUpdateJobRequest,
+    request: Request,
     background_tasks: BackgroundTasks,
+    resources: AppResources = Depends(get_resources),
 ) -> SEOUpdateJobResponse:
     """Submit SEO update job for background processing.
 
@@ -202,45 +282,374 @@ async def create_seo_update_job(
     - API key (X-APEG-API-KEY header) - returns 401 if missing/invalid
     - shop_domain matches configured SHOPIFY_STORE_DOMAIN
     - products list is non-empty
+    - run_id is new, or repeats an earlier submission with the same body
+      (409 if the body differs)
+    - admission limits: 413 if the job has too many products, 429 with
+      Retry-After if the queue or request bytes in flight are at their limit
 
     Returns immediately with job_id; actual work happens in background.
     """
-    configured_store = os.getenv("SHOPIFY_STORE_DOMAIN")
-    if not configured_store:
+    _check_shop_domain(payload.shop_domain)
+
+    if not payload.products:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="SHOPIFY_STORE_DOMAIN is not configured",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="products must be non-empty",
         )
 
-    if payload.shop_domain != configured_store:
+    body = payload.model_dump()
+    record = JobRecord(
+        job_id=str(uuid.uuid4()),
+        run_id=payload.run_id,
+        shop_domain=payload.shop_domain,
+        dry_run=payload.dry_run,
+        product_count=len(payload.products),
+        payload=body,
+        payload_hash=_payload_hash(body),
+    )
+
+    store = resources.get_job_store()
+    repeat = await _find_repeat(store, record)
+    if repeat is not None:
+        return repeat
+
+    # Repeats above are answered even when the queue is full. A rejected job
+    # is marked failed, so a retry of its run_id takes the reservation over.
+    try:
+        ticket = await _admit(
+            resources,
+            store,
+            payload.shop_domain,
+            len(payload.products),
+            int(request.headers.get("content-length") or 0),
+        )
+        return await _submit(record, ticket, store, resources, background_tasks)
+    except Exception as exc:
+        await _release_claim(store, record, exc)
+        raise
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+MAX_STREAM_LINE_BYTES = 1024 * 1024  # 1 MB per product line
+
+
+def _dumps(value: object) -> str:
+    """Serialize exactly as ``_payload_hash`` does."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+async def _spool_job_stream(
+    request: Request,
+    path: str,
+    max_products: int,
+    on_header: Callable[[SEOUpdateStreamHeader], Awaitable[bool]],
+) -> tuple[SEOUpdateStreamHeader, int, str]:
+    """Validate an NDJSON job stream line by line and spool its products.
+
+    The payload hash is built incrementally over the same canonical body
+    ``create_seo_update_job`` hashes, so a run_id repeated across the two
+    endpoints is still recognized. ``on_header`` is awaited once the header
+    line is read; if it returns False the products are validated and hashed
+    but not written to ``path``.
+
+    Returns:
+        (header, product count, payload hash)
+
+    Raises:
+        HTTPException: 400 if the header or products are missing, 413 if a
+            line or the product count is over its limit, 422 with the line
+            number if a line is invalid
+    """
+    header: Optional[SEOUpdateStreamHeader] = None
+    spooling: Optional[bool] = None
+    count = 0
+    line_number = 0
+    hasher = hashlib.sha256()
+
+    def parse(line: bytes, spooled: list[str]) -> None:
+        nonlocal header, count, line_number
+        line_number += 1
+        if not line.strip():
+            return
+        try:
+            if header is None:
+                header = SEOUpdateStreamHeader.model_validate_json(line)
+                _check_shop_domain(header.shop_domain)
+                hasher.update(
+                    f'{{"dry_run":{_dumps(header.dry_run)},"products":['.encode("utf-8")
+                )
+                return
+            product = SEOUpdateProduct.model_validate_json(line)
+        except ValidationError as exc:
+            # 422 by number, like 413: renamed across Starlette versions
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "line": line_number,
+                    "errors": json.loads(exc.json(include_url=False)),
+                },
+            )
+
+        count += 1
+        if max_products and count > max_products:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Job has more than {max_products} products (limit per job)",
+            )
+        canonical = _dumps(product.model_dump())
+        hasher.update(("," if count > 1 else "").encode("utf-8"))
+        hasher.update(canonical.encode("utf-8"))
+        spooled.append(canonical + "\n")
+
+    def check_length(line: Union[bytes, bytearray], number: int) -> None:
+        if len(line) > MAX_STREAM_LINE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Line {number} exceeds {MAX_STREAM_LINE_BYTES} bytes",
+            )
+
+    pending = bytearray()
+    async with aiofiles.open(path, "w", encoding="utf-8") as spool:
+        async for chunk in request.stream():
+            pending += chunk
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                end = len(pending) - len(chunk) + newline
+                *lines, _ = pending[:end + 1].split(b"\n")
+                del pending[:end + 1]
+                spooled: list[str] = []
+                for line in lines:
+                    check_length(line, line_number + 1)
+                    parse(bytes(line), spooled)
+                    if spooling is None and header is not None:
+                        spooling = await on_header(header)
+                if spooling:
+                    await spool.write("".join(spooled))
+            check_length(pending, line_number + 1)
+
+        spooled = []
+        parse(bytes(pending), spooled)
+        if spooling is None and header is not None:
+            spooling = await on_header(header)
+        if spooling:
+            await spool.write("".join(spooled))
+
+    if header is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=(
-                f"shop_domain mismatch: expected '{configured_store}', "
-                f"got '{payload.shop_domain}'"
-            ),
+            detail="First line must be the job header (run_id, shop_domain, dry_run)",
         )
-
-    if not payload.products:
+    if not count:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="products must be non-empty",
         )
+    hasher.update(
+        f"],\"run_id\":{_dumps(header.run_id)},"
+        f"\"shop_domain\":{_dumps(header.shop_domain)}}}".encode("utf-8")
+    )
+    return header, count, hasher.hexdigest()
+
+
+@router.post(
+    "/jobs/seo-update:stream",
+    response_model=SEOUpdateJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_api_key)],
+    summary="Submit SEO/tag update job as an NDJSON stream",
+    description=(
+        "Stream a large job as application/x-ndjson: a header line "
+        '({"run_id", "shop_domain", "dry_run"}) followed by one product per '
+        "line in the seo-update product format. Lines are validated and "
+        "spooled to disk as they arrive; returns 202 with job_id once the "
+        "stream ends."
+    ),
+)
+async def stream_seo_update_job(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    resources: AppResources = Depends(get_resources),
+) -> SEOUpdateJobResponse:
+    """Submit a job whose products are streamed instead of buffered.
+
+    Memory use does not grow with the job: each line is validated and
+    written to a spool file, and the job record names the file instead of
+    carrying the products. Validation, idempotency, and admission match
+    ``create_seo_update_job``; the queue limits are checked before the
+    body is read, and the run_id as soon as the header line is. A run_id
+    held by a live or finished job is answered from that job once the
+    stream's hash is known, without spooling the products again.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected one of {', '.join(NDJSON_MEDIA_TYPES)}",
+        )
 
+    store = resources.get_job_store()
+    # Spooled products do not stay in memory, so no request bytes are held
+    ticket = await _admit(resources, store, _configured_store(), 0, 0)
     job_id = str(uuid.uuid4())
+    path = spool_path(job_id)
+    holder: Optional[JobRecord] = None
+
+    async def check_run(header: SEOUpdateStreamHeader) -> bool:
+        nonlocal holder
+        holder = await store.get_run(header.shop_domain, header.run_id)
+        if holder is None:
+            return True
+        if holder.dry_run != header.dry_run:
+            raise _run_conflict(header.run_id, holder)
+        # Only a failed or canceled run can be taken over by this submission
+        return holder.status in store.RERUNNABLE
 
-    background_tasks.add_task(_run_seo_update_job, job_id, payload)
+    try:
+        header, count, payload_hash = await _spool_job_stream(
+            request, path, resources.admission.max_products_per_job, check_run
+        )
+        record = JobRecord(
+            job_id=job_id,
+            run_id=header.run_id,
+            shop_domain=header.shop_domain,
+            dry_run=header.dry_run,
+            product_count=count,
+            payload={
+                "run_id": header.run_id,
+                "shop_domain": header.shop_domain,
+                "dry_run": header.dry_run,
+                "products_file": path,
+            },
+            payload_hash=payload_hash,
+        )
+        if holder is not None and holder.status not in store.RERUNNABLE:
+            repeat = _answer_repeat(holder, record)
+        else:
+            repeat = await _find_repeat(store, record)
+    except BaseException:
+        resources.admission.release(ticket, drained=False)
+        remove_spool_file(path)
+        raise
+
+    if repeat is not None:
+        resources.admission.release(ticket, drained=False)
+        remove_spool_file(path)
+        return repeat
+    try:
+        return await _submit(record, ticket, store, resources, background_tasks)
+    except BaseException as exc:
+        # Nothing will read the spool file of a job that was not queued
+        remove_spool_file(path)
+        await _release_claim(store, record, exc)
+        raise
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobRecord,
+    response_model_exclude={"payload"},
+    dependencies=[Depends(require_api_key)],
+    summary="Get job status",
+    description="Report a job's current state, per-state timings, and outcome.",
+)
+async def get_job(
+    job_id: str,
+    resources: AppResources = Depends(get_resources),
+) -> JobRecord:
+    """Return the stored record for ``job_id`` (404 if unknown or expired)."""
+    record = await resources.get_job_store().get(job_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    return record
 
-    logger.info(
-        "Queued SEO update job: job_id=%s, run_id=%s, products_count=%s",
-        job_id,
-        payload.run_id,
-        len(payload.products),
-    )
 
-    return SEOUpdateJobResponse(
-        job_id=job_id,
-        status="queued",
-        run_id=payload.run_id,
-        received_count=len(payload.products),
-    )
+@router.delete(
+    "/jobs/{job_id}",
+    response_model=JobRecord,
+    response_model_exclude={"payload"},
+    dependencies=[Depends(require_api_key)],
+    summary="Cancel job",
+    description=(
+        "Cancel a job that has not finished. A submitted bulk operation is "
+        "canceled on Shopify, freeing the shop for the next job; one shared "
+        "with coalesced jobs is not, and the request returns 409."
+    ),
+)
+async def cancel_job(
+    job_id: str,
+    resources: AppResources = Depends(get_resources),
+) -> JobRecord:
+    """Cancel ``job_id`` (404 if unknown, 409 if finished or coalesced)."""
+    store = resources.get_job_store()
+    record = await store.get(job_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    if record.is_terminal:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} already {record.status}",
+        )
+
+    try:
+        canceled = await cancel_seo_update_job(
+            record, store, resources.get_session(), resources.get_redis()
+        )
+    except JobCancelConflictError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} cannot be canceled alone: {exc}",
+        )
+    except ShopifyBulkGraphQLError as exc:
+        # Shopify refuses to cancel operations that already finished
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Bulk operation {record.bulk_op_id} could not be canceled: {exc}",
+        )
+    except (ShopifyBulkClientError, RuntimeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to cancel bulk operation {record.bulk_op_id}: {exc}",
+        )
+
+    if canceled is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    return canceled
+
+
+@router.get(
+    "/stats/queue",
+    dependencies=[Depends(require_api_key)],
+    summary="Job queue depth and admission limits",
+    description="Queued jobs, request bytes in flight, drain rate, and limits.",
+)
+async def get_queue_stats(
+    resources: AppResources = Depends(get_resources),
+) -> dict:
+    """Return admission state, with the shared queue depth on the Redis backend."""
+    stats = resources.admission.stats()
+    store = resources.get_job_store()
+    if isinstance(store, RedisJobStore):
+        stats["queued_jobs"] = await store.queue_depth()
+    return stats
+
+
+@router.get(
+    "/stats/pools",
+    dependencies=[Depends(require_api_key)],
+    summary="Connection pool statistics",
+    description="Shared HTTP and Redis connection pool usage for this worker.",
+)
+async def get_pool_stats(
+    resources: AppResources = Depends(get_resources),
+) -> dict:
+    """Return pooled HTTP/Redis connection statistics."""
+    return resources.pool_stats()
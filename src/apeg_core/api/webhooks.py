@@ -0,0 +1,158 @@
+"""FastAPI routes for Shopify webhook delivery."""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from ..shopify.bulk_notifier import BulkOperationNotifier
+from ..shopify.product_mirror import ProductMirror
+from .resources import AppResources, get_resources
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/webhooks/shopify", tags=["webhooks"])
+
+
+def verify_shopify_hmac(body: bytes, hmac_header: Optional[str], secret: str) -> bool:
+    """Verify X-Shopify-Hmac-Sha256 against the raw request body.
+
+    Args:
+        body: Raw request body bytes (must not be re-serialized)
+        hmac_header: Base64 HMAC-SHA256 digest sent by Shopify
+        secret: App webhook shared secret
+
+    Returns:
+        True if the digest matches
+    """
+    if not hmac_header:
+        return False
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    expected = base64.b64encode(digest).decode("utf-8")
+    return hmac.compare_digest(expected, hmac_header)
+
+
+async def _read_verified_body(request: Request, hmac_header: Optional[str]) -> dict:
+    """Read webhook body, verify HMAC, and parse JSON."""
+    secret = os.getenv("SHOPIFY_WEBHOOK_SHARED_SECRET")
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="SHOPIFY_WEBHOOK_SHARED_SECRET is not configured",
+        )
+
+    body = await request.body()
+    if not verify_shopify_hmac(body, hmac_header, secret):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature",
+        )
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be JSON",
+        )
+
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be a JSON object",
+        )
+    return payload
+
+
+def _apply_product_webhook(mirror_path: str, shop_domain: str, payload: dict) -> bool:
+    """Open the mirror, apply one products/update payload, and close it."""
+    mirror = ProductMirror.open(mirror_path, shop_domain)
+    try:
+        return mirror.apply_webhook(payload)
+    finally:
+        mirror.close()
+
+
+@router.post(
+    "/bulk-operations-finish",
+    summary="Receive bulk_operations/finish webhook",
+    description=(
+        "Verifies the Shopify HMAC signature and wakes any job waiting on the "
+        "bulk operation through Redis pub/sub."
+    ),
+)
+async def bulk_operations_finish(
+    request: Request,
+    x_shopify_hmac_sha256: Optional[str] = Header(None),
+    x_shopify_shop_domain: Optional[str] = Header(None),
+    resources: AppResources = Depends(get_resources),
+) -> dict:
+    """Handle Shopify ``bulk_operations/finish`` webhook delivery."""
+    payload = await _read_verified_body(request, x_shopify_hmac_sha256)
+
+    configured_store = os.getenv("SHOPIFY_STORE_DOMAIN")
+    if configured_store and x_shopify_shop_domain not in (None, configured_store):
+        logger.warning(
+            "Ignoring bulk finish webhook for unexpected shop=%s",
+            x_shopify_shop_domain,
+        )
+        return {"status": "ignored"}
+
+    operation_id = payload.get("admin_graphql_api_id")
+    if not operation_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="admin_graphql_api_id missing from webhook body",
+        )
+
+    notifier = BulkOperationNotifier(resources.get_redis())
+    await notifier.publish_finished(operation_id, payload)
+
+    return {"status": "accepted"}
+
+
+@router.post(
+    "/products-update",
+    summary="Receive products/update webhook",
+    description=(
+        "Verifies the Shopify HMAC signature and applies the product's tags "
+        "to the local product mirror when PRODUCT_MIRROR_DB_PATH is set."
+    ),
+)
+async def products_update(
+    request: Request,
+    x_shopify_hmac_sha256: Optional[str] = Header(None),
+    x_shopify_shop_domain: Optional[str] = Header(None),
+) -> dict:
+    """Handle Shopify ``products/update`` webhook delivery."""
+    payload = await _read_verified_body(request, x_shopify_hmac_sha256)
+
+    mirror_path = os.getenv("PRODUCT_MIRROR_DB_PATH")
+    shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN") or x_shopify_shop_domain
+    if not mirror_path or not shop_domain:
+        return {"status": "ignored"}
+
+    if x_shopify_shop_domain not in (None, shop_domain):
+        logger.warning(
+            "Ignoring products/update webhook for unexpected shop=%s",
+            x_shopify_shop_domain,
+        )
+        return {"status": "ignored"}
+
+    # SQLite blocks; keep it off the event loop
+    applied = await asyncio.to_thread(
+        _apply_product_webhook, mirror_path, shop_domain, payload
+    )
+
+    if not applied:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="admin_graphql_api_id missing from webhook body",
+        )
+    return {"status": "accepted"}
@@ -0,0 +1,12 @@
+"""APEG durable job store, runner, and worker."""
+from .runner import run_seo_update_job
+from .store import JobStore, MemoryJobStore, RedisJobStore
+from .worker import JobWorker
+
+__all__ = [
+    "JobStore",
+    "JobWorker",
+    "MemoryJobStore",
+    "RedisJobStore",
+    "run_seo_update_job",
+]
@@ -0,0 +1,131 @@
+"""Coalesce small SEO update jobs into one bulk mutation per shop.
+
+Only one bulk mutation may run per shop, so many tiny jobs arriving together
+each pay for a full hydrate/upload/run/poll cycle in series. The worker
+gathers queued jobs for a short window and submits their updates together.
+
+Conflicts are resolved deterministically by applying jobs in submission order
+(``created_at``, then ``job_id``), exactly as if they had run one after
+another: tag adds/removes compose, ``tags_full`` resets the tag set, and each
+SEO field takes the last non-null value.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..schemas.bulk_ops import ProductSEO, ProductUpdateSpec
+from ..schemas.jobs import JobRecord
+from .store import RedisJobStore
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _MergedProduct:
+    tags_add: set[str] = field(default_factory=set)
+    tags_remove: set[str] = field(default_factory=set)
+    tags_full: Optional[set[str]] = None
+    seo_title: Optional[str] = None
+    seo_description: Optional[str] = None
+
+    def apply(self, spec: ProductUpdateSpec) -> None:
+        if spec.tags_full is not None:
+            self.tags_full = set(spec.tags_full)
+            self.tags_add.clear()
+            self.tags_remove.clear()
+        elif self.tags_full is not None:
+            self.tags_full = (self.tags_full | set(spec.tags_add)) - set(spec.tags_remove)
+        else:
+            add, remove = set(spec.tags_add), set(spec.tags_remove)
+            # (((C | A1) - R1) | A2) - R2 == (C | A) - R
+            self.tags_add = (self.tags_add - self.tags_remove) | add
+            self.tags_remove = (self.tags_remove - add) | remove
+
+        if spec.seo is not None:
+            if spec.seo.title is not None:
+                self.seo_title = spec.seo.title
+            if spec.seo.description is not None:
+                self.seo_description = spec.seo.description
+
+    def to_spec(self, product_id: str) -> ProductUpdateSpec:
+        seo = None
+        if self.seo_title is not None or self.seo_description is not None:
+            seo = ProductSEO(title=self.seo_title, description=self.seo_description)
+        return ProductUpdateSpec(
+            product_id=product_id,
+            tags_add=sorted(self.tags_add),
+            tags_remove=sorted(self.tags_remove),
+            tags_full=sorted(self.tags_full) if self.tags_full is not None else None,
+            seo=seo,
+        )
+
+
+def merge_update_specs(
+    batches: list[tuple[JobRecord, list[ProductUpdateSpec]]],
+) -> list[ProductUpdateSpec]:
+    """Merge several jobs' update specs into one spec per product.
+
+    Args:
+        batches: (job record, its update specs) pairs, in any order
+
+    Returns:
+        One spec per product, in first-seen order
+    """
+    ordered = sorted(batches, key=lambda item: (item[0].created_at, item[0].job_id))
+    merged: dict[str, _MergedProduct] = {}
+
+    for _record, specs in ordered:
+        for spec in specs:
+            merged.setdefault(spec.product_id, _MergedProduct()).apply(spec)
+
+    return [state.to_spec(product_id) for product_id, state in merged.items()]
+
+
+async def collect_batch(
+    store: RedisJobStore,
+    slot_id: str,
+    first_job_id: str,
+    window_seconds: float,
+    max_jobs: int,
+    max_products: int,
+) -> list[str]:
+    """Gather more queued jobs behind ``first_job_id`` for one bulk mutation.
+
+    Stops when the window closes, ``max_jobs`` are held, or the batch reaches
+    ``max_products``. Jobs that cannot join (dry runs, other shops) are still
+    returned; the runner executes them separately.
+
+    Returns:
+        Job IDs claimed into the slot's processing list, first job first
+    """
+    job_ids = [first_job_id]
+    first = await store.get(first_job_id)
+    if window_seconds <= 0 or first is None or first.dry_run:
+        return job_ids
+
+    products = first.product_count
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + window_seconds
+
+    while len(job_ids) < max_jobs and products < max_products:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        job_id = await store.dequeue(slot_id, timeout=remaining)
+        if job_id is None:
+            break
+        job_ids.append(job_id)
+        record = await store.get(job_id)
+        if record is not None and not record.dry_run:
+            products += record.product_count
+
+    if len(job_ids) > 1:
+        logger.info(
+            "Coalesced %s jobs (%s products) behind %s",
+            len(job_ids),
+            products,
+            first_job_id,
+        )
+    return job_ids
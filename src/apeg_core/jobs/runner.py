@@ -0,0 +1,870 @@
+"""Execute SEO update jobs and record their progress in a job store."""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Optional
+
+import aiohttp
+from redis.asyncio import Redis
+
+from ..schemas.bulk_ops import (
+    BulkShardResult,
+    ProductUpdateSpec,
+    ShardedBulkOperationRef,
+)
+from ..schemas.jobs import JobRecord, JobStatus
+from ..shopify.bulk_client import ShopifyBulkClient
+from ..shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from ..shopify.bulk_notifier import BulkOperationNotifier
+from ..shopify.bulk_reaper import BulkOperationReaper
+from ..shopify.exceptions import ShopifyBulkOperationFailedError
+from ..shopify.bulk_status import BulkStatusMultiplexer
+from ..shopify.job_queue import ShopifyBulkJobQueue
+from ..shopify.hydration_singleflight import HydrationSingleFlight
+from ..shopify.mutation_outcomes import MutationOutcomeStore
+from ..shopify.product_mirror import ProductMirror
+from ..shopify.product_update_runner import ProductUpdateRunner
+from ..shopify.throttle import ShopifyCostThrottle
+from ..telemetry import tracing
+from .coalescer import merge_update_specs
+from .spool import iter_payload_products, remove_spool
+from .store import JobStore
+
+
+logger = logging.getLogger(__name__)
+
+BULK_POLL_TIMEOUT_SECONDS = 3600
+
+
+class JobCanceledError(RuntimeError):
+    """Raised to stop a run once every job it is executing was canceled."""
+
+
+class JobCancelConflictError(RuntimeError):
+    """Raised when a job's bulk operation also carries other, uncanceled jobs."""
+
+
+class _GroupChangedError(RuntimeError):
+    """Raised before submission when some of a group's jobs were canceled."""
+
+
+def build_update_specs(record: JobRecord) -> list[ProductUpdateSpec]:
+    """Convert the stored request body (or spooled stream) into update specs."""
+    return [
+        ProductUpdateSpec(
+            product_id=product["product_id"],
+            tags_add=product.get("tags_add") or [],
+            tags_remove=product.get("tags_remove") or [],
+            seo=product.get("seo"),
+        )
+        for product in iter_payload_products(record)
+    ]
+
+
+async def run_seo_update_job(
+    job_id: str,
+    store: JobStore,
+    session: aiohttp.ClientSession,
+    redis: Redis,
+) -> Optional[JobRecord]:
+    """Execute a single SEO update job (see ``run_seo_update_batch``).
+
+    Returns:
+        Final job record, or None if the job is unknown
+    """
+    records = await run_seo_update_batch([job_id], store, session, redis)
+    return records[0] if records else None
+
+
+async def run_seo_update_batch(
+    job_ids: list[str],
+    store: JobStore,
+    session: aiohttp.ClientSession,
+    redis: Redis,
+    live: Optional["LiveJobResources"] = None,
+) -> list[JobRecord]:
+    """Execute SEO update jobs, coalescing live ones into one bulk mutation.
+
+    Each pipeline step is recorded on every job in the batch (hydrating,
+    uploading, running) before each ends in completed or failed. Small
+    batches are sent as direct productUpdate calls; updates too large for
+    one bulk mutation run as sequential shards. Products left unprocessed
+    are retried in smaller follow-up operations, and a job fails only if
+    one of its products was never applied. Dry runs complete individually.
+    Jobs that already have a bulk operation (their worker died while
+    polling) resume polling instead of submitting again. This function MUST
+    be exception-safe; all errors are caught, logged, and recorded on the
+    affected jobs.
+
+    Args:
+        job_ids: Jobs to execute
+        store: Job store holding the records
+        session: Shared aiohttp session
+        redis: Shared Redis client
+        live: Shopify resources shared across batches (a worker builds
+            them once); built from the environment for this batch if None
+
+    Returns:
+        Final records of the known jobs, in ``job_ids`` order
+    """
+    # Every span under this batch carries its job IDs
+    with tracing.correlate(**{"apeg.job_ids": list(job_ids)}), tracing.span(
+        "jobs.run_batch", **{"apeg.job_count": len(job_ids)}
+    ):
+        return await _run_batch(job_ids, store, session, redis, live)
+
+
+async def _run_batch(
+    job_ids: list[str],
+    store: JobStore,
+    session: aiohttp.ClientSession,
+    redis: Redis,
+    live: Optional["LiveJobResources"],
+) -> list[JobRecord]:
+    records: list[JobRecord] = []
+    for job_id in job_ids:
+        record = await store.get(job_id)
+        if record is None:
+            logger.error("Job %s not found in store", job_id)
+            continue
+        if record.is_terminal:
+            logger.info("Job %s already %s; skipping", job_id, record.status)
+            records.append(record)
+            continue
+
+        claimed = await store.transition(
+            job_id,
+            record.status,
+            expected_status=record.status,
+            attempts=record.attempts + 1,
+        )
+        if claimed is None or claimed.attempts != record.attempts + 1:
+            # Canceled or moved on since it was read; leave it to its writer
+            logger.info("Job %s changed while starting; skipping", job_id)
+            if claimed is not None and claimed.is_terminal:
+                records.append(claimed)
+            continue
+        record = claimed
+        records.append(record)
+
+        logger.info(
+            "Starting SEO update job: job_id=%s, run_id=%s, products=%s, dry_run=%s",
+            job_id,
+            record.run_id,
+            record.product_count,
+            record.dry_run,
+        )
+
+    pending = [r for r in records if not r.is_terminal]
+    for record in [r for r in pending if r.dry_run]:
+        await _run_dry(record, store)
+
+    live_records = [r for r in pending if not r.dry_run]
+    if live_records:
+        await _run_live(live_records, store, session, redis, live)
+
+    final = {}
+    for record in records:
+        final[record.job_id] = await store.get(record.job_id) or record
+        if final[record.job_id].is_terminal:
+            remove_spool(final[record.job_id])
+    return [final[record.job_id] for record in records]
+
+
+async def _run_dry(record: JobRecord, store: JobStore) -> None:
+    with tracing.span("jobs.dry_run", **{"apeg.job_id": record.job_id}):
+        update_specs = build_update_specs(record)
+        logger.info("DRY RUN MODE: Would update %s products", len(update_specs))
+        for spec in update_specs:
+            logger.info(
+                "  Product %s: tags_add=%s, tags_remove=%s, seo=%s",
+                spec.product_id,
+                spec.tags_add,
+                spec.tags_remove,
+                spec.seo,
+            )
+        logger.info("Job %s completed (dry run)", record.job_id)
+        await store.transition(record.job_id, JobStatus.COMPLETED)
+
+
+async def _transition_all(
+    records: list[JobRecord], store: JobStore, status: str, **fields
+) -> None:
+    for record in records:
+        await store.transition(record.job_id, status, **fields)
+
+
+async def _fail_all(records: list[JobRecord], store: JobStore, exc: Exception) -> None:
+    for record in records:
+        logger.error(
+            "Job %s (run_id=%s) failed with exception: %s",
+            record.job_id,
+            record.run_id,
+            exc,
+            exc_info=exc,
+        )
+        try:
+            await store.transition(record.job_id, JobStatus.FAILED, error=str(exc))
+        except Exception as store_exc:
+            logger.error("Failed to record job %s failure: %s", record.job_id, store_exc)
+
+
+def bulk_client_from_env(
+    session: aiohttp.ClientSession, redis: Redis
+) -> ShopifyBulkClient:
+    """Build a bulk client for the configured store.
+
+    Raises:
+        RuntimeError: If SHOPIFY_STORE_DOMAIN or SHOPIFY_ADMIN_ACCESS_TOKEN
+            is not set
+    """
+    shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
+    access_token = os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN")
+    if not shop_domain or not access_token:
+        raise RuntimeError("SHOPIFY_STORE_DOMAIN and SHOPIFY_ADMIN_ACCESS_TOKEN must be set")
+
+    return ShopifyBulkClient(
+        shop_domain=shop_domain,
+        admin_access_token=access_token,
+        api_version=os.getenv("SHOPIFY_API_VERSION", "2024-10"),
+        session=session,
+        redis=redis,
+        throttle=ShopifyCostThrottle(shop_domain, redis=redis),
+    )
+
+
+async def cancel_seo_update_job(
+    record: JobRecord,
+    store: JobStore,
+    session: aiohttp.ClientSession,
+    redis: Redis,
+) -> Optional[JobRecord]:
+    """Cancel a job that has not finished, including its bulk operation.
+
+    A submitted bulk operation is canceled on Shopify first; if Shopify
+    rejects that (the operation already finished) the job is left alone.
+    An operation shared by coalesced jobs is never canceled for one of
+    them. A job that has not submitted yet is only marked canceled; its
+    runner leaves it out of the group before submitting the rest.
+
+    Raises:
+        JobCancelConflictError: If the job's operation was submitted
+            together with other jobs
+        ShopifyBulkClientError: If the bulk operation could not be canceled
+        RuntimeError: If Shopify credentials are not configured
+
+    Returns:
+        Canceled record, or None if the job is unknown
+    """
+    if record.bulk_op_id and record.batch_id:
+        raise JobCancelConflictError(
+            f"Bulk operation {record.bulk_op_id} is shared with batch {record.batch_id}"
+        )
+    if record.bulk_op_id:
+        client = bulk_client_from_env(session, redis)
+        await client.cancel_operation(record.bulk_op_id)
+
+    logger.warning(
+        "Job %s canceled (bulk_op=%s, status was %s)",
+        record.job_id,
+        record.bulk_op_id,
+        record.status,
+    )
+    return await store.transition(
+        record.job_id, JobStatus.CANCELED, error="Canceled by request"
+    )
+
+
+async def run_bulk_reaper(
+    session: aiohttp.ClientSession,
+    redis: Redis,
+    stop_event: asyncio.Event,
+) -> None:
+    """Reconcile the configured store's bulk locks until ``stop_event`` is set.
+
+    Does nothing when Shopify credentials are not configured or
+    SHOPIFY_BULK_REAPER_INTERVAL_SECONDS is 0.
+    """
+    interval = float(
+        os.getenv(
+            "SHOPIFY_BULK_REAPER_INTERVAL_SECONDS",
+            BulkOperationReaper.INTERVAL_SECONDS,
+        )
+    )
+    if interval <= 0:
+        return
+    try:
+        bulk_client = bulk_client_from_env(session, redis)
+    except RuntimeError as exc:
+        logger.info("Bulk operation reaper disabled: %s", exc)
+        return
+
+    reaper = BulkOperationReaper(
+        bulk_client,
+        redis,
+        max_runtime_seconds=float(
+            os.getenv(
+                "SHOPIFY_BULK_MAX_RUNTIME_SECONDS",
+                BulkOperationReaper.MAX_RUNTIME_SECONDS,
+            )
+        ),
+    )
+    await reaper.run(stop_event, interval)
+
+
+class LiveJobResources:
+    """Shopify clients and caches shared by every live batch of a worker.
+
+    The status multiplexer, product mirror, hydration single-flight and
+    outcome store are built once and reused; each batch still gets its own
+    ``ShopifyBulkMutationClient``, since the client holds the mutation lock
+    of the run it is executing.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        redis: Redis,
+        shop_domain: str,
+        access_token: str,
+        api_version: str = "2024-10",
+        product_mirror: Optional[ProductMirror] = None,
+        outcome_store: Optional[MutationOutcomeStore] = None,
+        nodes_hydration_threshold: int = (
+            ShopifyBulkMutationClient.NODES_HYDRATION_THRESHOLD
+        ),
+        shard_max_lines: int = ProductUpdateRunner.SHARD_MAX_LINES,
+        shard_max_bytes: int = ProductUpdateRunner.SHARD_MAX_BYTES,
+        direct_mutation_threshold: int = ProductUpdateRunner.DIRECT_MUTATION_THRESHOLD,
+        max_retries: int = ProductUpdateRunner.RETRY_MAX_ATTEMPTS,
+        snapshot_ttl_seconds: float = HydrationSingleFlight.SNAPSHOT_TTL_SECONDS,
+    ):
+        """Initialize shared live-job resources.
+
+        Args:
+            session: Shared aiohttp session
+            redis: Shared Redis client
+            shop_domain: Configured store domain
+            access_token: Admin API access token
+            api_version: Admin API version
+            product_mirror: Optional local product state mirror (closed by
+                ``close``)
+            outcome_store: Optional outcome store (closed by ``close``)
+            nodes_hydration_threshold: See ``ShopifyBulkMutationClient``
+            shard_max_lines: See ``ProductUpdateRunner``
+            shard_max_bytes: See ``ProductUpdateRunner``
+            direct_mutation_threshold: See ``ProductUpdateRunner``
+            max_retries: See ``ProductUpdateRunner``
+            snapshot_ttl_seconds: See ``HydrationSingleFlight``
+        """
+        self.session = session
+        self.redis = redis
+        self.shop_domain = shop_domain
+        self.access_token = access_token
+        self.api_version = api_version
+        self.product_mirror = product_mirror
+        self.outcome_store = outcome_store
+        self.nodes_hydration_threshold = nodes_hydration_threshold
+        self.shard_max_lines = shard_max_lines
+        self.shard_max_bytes = shard_max_bytes
+        self.direct_mutation_threshold = direct_mutation_threshold
+        self.max_retries = max_retries
+        self.notifier = BulkOperationNotifier(redis)
+        self.throttle = ShopifyCostThrottle(shop_domain, redis=redis)
+        self.job_queue = ShopifyBulkJobQueue(redis)
+        self.hydration_flight = HydrationSingleFlight(
+            redis, shop_domain, snapshot_ttl_seconds=snapshot_ttl_seconds
+        )
+        self.status_multiplexer = BulkStatusMultiplexer(
+            shop_domain, redis=redis, notifier=self.notifier
+        )
+
+    @classmethod
+    def from_env(cls, session: aiohttp.ClientSession, redis: Redis) -> "LiveJobResources":
+        """Build resources for the configured store.
+
+        Raises:
+            RuntimeError: If SHOPIFY_STORE_DOMAIN or SHOPIFY_ADMIN_ACCESS_TOKEN
+                is not set
+            ValueError: If a numeric setting does not parse
+        """
+        shop_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
+        access_token = os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN")
+        if not shop_domain or not access_token:
+            raise RuntimeError(
+                "SHOPIFY_STORE_DOMAIN and SHOPIFY_ADMIN_ACCESS_TOKEN must be set"
+            )
+        mirror_path = os.getenv("PRODUCT_MIRROR_DB_PATH")
+        outcomes_path = os.getenv("MUTATION_OUTCOMES_DB_PATH")
+
+        settings = dict(
+            nodes_hydration_threshold=int(
+                os.getenv(
+                    "SHOPIFY_NODES_HYDRATION_THRESHOLD",
+                    ShopifyBulkMutationClient.NODES_HYDRATION_THRESHOLD,
+                )
+            ),
+            shard_max_lines=int(
+                os.getenv(
+                    "SHOPIFY_BULK_SHARD_MAX_LINES",
+                    ProductUpdateRunner.SHARD_MAX_LINES,
+                )
+            ),
+            shard_max_bytes=int(
+                os.getenv(
+                    "SHOPIFY_BULK_SHARD_MAX_BYTES",
+                    ProductUpdateRunner.SHARD_MAX_BYTES,
+                )
+            ),
+            max_retries=int(
+                os.getenv(
+                    "SHOPIFY_BULK_RETRY_MAX_ATTEMPTS",
+                    ProductUpdateRunner.RETRY_MAX_ATTEMPTS,
+                )
+            ),
+            direct_mutation_threshold=int(
+                os.getenv(
+                    "SHOPIFY_DIRECT_MUTATION_THRESHOLD",
+                    ProductUpdateRunner.DIRECT_MUTATION_THRESHOLD,
+                )
+            ),
+            snapshot_ttl_seconds=float(
+                os.getenv(
+                    "SHOPIFY_HYDRATION_SNAPSHOT_TTL_SECONDS",
+                    HydrationSingleFlight.SNAPSHOT_TTL_SECONDS,
+                )
+            ),
+        )
+        product_mirror = (
+            ProductMirror.open(mirror_path, shop_domain) if mirror_path else None
+        )
+        try:
+            outcome_store = (
+                MutationOutcomeStore.open(outcomes_path) if outcomes_path else None
+            )
+        except Exception:
+            if product_mirror is not None:
+                product_mirror.close()
+            raise
+        return cls(
+            session,
+            redis,
+            shop_domain,
+            access_token,
+            api_version=os.getenv("SHOPIFY_API_VERSION", "2024-10"),
+            product_mirror=product_mirror,
+            outcome_store=outcome_store,
+            **settings,
+        )
+
+    def mutation_client(self) -> ShopifyBulkMutationClient:
+        """Return a new mutation client wired to the shared resources."""
+        return ShopifyBulkMutationClient(
+            shop_domain=self.shop_domain,
+            access_token=self.access_token,
+            api_version=self.api_version,
+            session=self.session,
+            redis=self.redis,
+            throttle=self.throttle,
+            notifier=self.notifier,
+            job_queue=self.job_queue,
+            product_mirror=self.product_mirror,
+            nodes_hydration_threshold=self.nodes_hydration_threshold,
+            outcome_store=self.outcome_store,
+            hydration_flight=self.hydration_flight,
+            status_multiplexer=self.status_multiplexer,
+        )
+
+    def update_runner(self, client: ShopifyBulkMutationClient) -> ProductUpdateRunner:
+        """Return a product update runner for ``client`` with the configured limits."""
+        return ProductUpdateRunner(
+            client,
+            shard_max_lines=self.shard_max_lines,
+            shard_max_bytes=self.shard_max_bytes,
+            direct_mutation_threshold=self.direct_mutation_threshold,
+            max_retries=self.max_retries,
+            poll_timeout_s=BULK_POLL_TIMEOUT_SECONDS,
+        )
+
+    def close(self) -> None:
+        if self.product_mirror is not None:
+            self.product_mirror.close()
+        if self.outcome_store is not None:
+            self.outcome_store.close()
+
+
+async def _run_live(
+    records: list[JobRecord],
+    store: JobStore,
+    session: aiohttp.ClientSession,
+    redis: Redis,
+    live: Optional[LiveJobResources] = None,
+) -> None:
+    """Submit (or resume) bulk mutations for non-dry-run jobs."""
+    owned = live is None
+    if live is None:
+        try:
+            live = LiveJobResources.from_env(session, redis)
+        except Exception as exc:
+            await _fail_all(records, store, exc)
+            return
+
+    try:
+        shop_domain = live.shop_domain
+        mismatched = [r for r in records if r.shop_domain != shop_domain]
+        if mismatched:
+            await _fail_all(
+                mismatched,
+                store,
+                RuntimeError(f"Job shop_domain does not match configured {shop_domain}"),
+            )
+            records = [r for r in records if r.shop_domain == shop_domain]
+
+        mutation_client = live.mutation_client()
+        update_runner = live.update_runner(mutation_client)
+
+        resumed: dict[str, list[JobRecord]] = defaultdict(list)
+        fresh: list[JobRecord] = []
+        for record in records:
+            if record.bulk_op_id:
+                resumed[record.bulk_op_id].append(record)
+            else:
+                fresh.append(record)
+
+        for bulk_op_id, group in resumed.items():
+            if (group[0].shard_count or 1) > 1:
+                # Later shards were never submitted; polling the last one
+                # would report the whole job on a fraction of its products.
+                await _fail_all(
+                    group,
+                    store,
+                    RuntimeError(
+                        f"Sharded run interrupted at {bulk_op_id}; resubmit the job"
+                    ),
+                )
+                continue
+            logger.info(
+                "Resuming poll of %s for %s jobs", bulk_op_id, len(group)
+            )
+            await _poll_group(mutation_client, group, store, bulk_op_id)
+
+        if fresh:
+            await _submit_group(update_runner, fresh, store)
+    finally:
+        if owned:
+            live.close()
+
+
+async def _submit_group(
+    update_runner: ProductUpdateRunner,
+    records: list[JobRecord],
+    store: JobStore,
+) -> None:
+    """Run ``records`` as one mutation, leaving out jobs canceled before submission.
+
+    A job canceled while the group hydrates or uploads restarts the group
+    without it, since nothing has been written yet. Once the operation is
+    submitted it is shared: it is canceled only if every job in it was.
+    """
+    while True:
+        remaining = await _drop_canceled(records, store)
+        if len(remaining) < len(records):
+            logger.warning(
+                "Leaving %s canceled jobs out of the group",
+                len(records) - len(remaining),
+            )
+        records = remaining
+        if not records:
+            return
+        lead = records[0]
+        try:
+            result = await _run_group(update_runner, records, store)
+        except _GroupChangedError as exc:
+            logger.warning("Restarting run %s: %s", lead.run_id, exc)
+            continue
+        except JobCanceledError as exc:
+            logger.warning("Stopped canceled run %s: %s", lead.run_id, exc)
+            return
+        except Exception as exc:
+            await _fail_all(records, store, exc)
+            return
+        break
+
+    with tracing.span("jobs.record_result"):
+        await _record_sharded_result(records, store, result)
+
+
+async def _drop_canceled(records: list[JobRecord], store: JobStore) -> list[JobRecord]:
+    """Return the records whose stored job is still known and not canceled."""
+    kept = []
+    for record in records:
+        current = await store.get(record.job_id)
+        if current is not None and current.status != JobStatus.CANCELED:
+            kept.append(record)
+    return kept
+
+
+async def _run_group(
+    update_runner: ProductUpdateRunner,
+    records: list[JobRecord],
+    store: JobStore,
+) -> ShardedBulkOperationRef:
+    lead = records[0]
+    with tracing.span("jobs.build_update_specs"):
+        if len(records) == 1:
+            update_specs = build_update_specs(lead)
+        else:
+            update_specs = merge_update_specs(
+                [(record, build_update_specs(record)) for record in records]
+            )
+
+    async def check_canceled(bulk_op_id: Optional[str] = None) -> None:
+        remaining = {r.job_id for r in await _drop_canceled(records, store)}
+        canceled = [r.job_id for r in records if r.job_id not in remaining]
+        if not canceled:
+            return
+        if len(canceled) < len(records):
+            if bulk_op_id is None:
+                raise _GroupChangedError(f"Jobs {canceled} were canceled")
+            # Their products already went out with the others' operation
+            logger.warning(
+                "Jobs %s were canceled after %s was submitted", canceled, bulk_op_id
+            )
+            return
+        if bulk_op_id:
+            try:
+                await update_runner.client.bulk_client.cancel_operation(bulk_op_id)
+            except Exception as exc:
+                logger.error("Failed to cancel %s: %s", bulk_op_id, exc)
+        raise JobCanceledError(f"Jobs {canceled} were canceled")
+
+    async def on_stage(stage: str) -> None:
+        await check_canceled()
+        await _transition_all(records, store, stage)
+
+    batch_id = lead.job_id if len(records) > 1 else None
+    submitted = False
+
+    async def before_write() -> None:
+        if not submitted:
+            await check_canceled()
+            return
+        # Earlier shards already carry every job's products: only a cancel
+        # of the whole group stops the shards still to come
+        if not await _drop_canceled(records, store):
+            raise JobCanceledError(f"Jobs of run {lead.run_id} were canceled")
+
+    async def on_shard_submitted(shard: BulkShardResult, shard_count: int) -> None:
+        nonlocal submitted
+        submitted = True
+        await check_canceled(shard.bulk_op_id)
+        logger.info(
+            "Bulk operation submitted: %s (shard %s/%s)",
+            shard.bulk_op_id,
+            shard.index + 1,
+            shard_count,
+        )
+        await _transition_all(
+            records,
+            store,
+            JobStatus.RUNNING,
+            bulk_op_id=shard.bulk_op_id,
+            batch_id=batch_id,
+            shard_count=shard_count,
+        )
+
+    logger.info(
+        "Submitting bulk mutation for %s products (%s jobs)",
+        len(update_specs),
+        len(records),
+    )
+
+    return await update_runner.run(
+        run_id=lead.run_id,
+        updates=update_specs,
+        on_stage=on_stage,
+        on_shard_submitted=on_shard_submitted,
+        check_canceled=before_write,
+    )
+
+
+async def _record_sharded_result(
+    records: list[JobRecord],
+    store: JobStore,
+    result: ShardedBulkOperationRef,
+) -> None:
+    """Fail only the jobs with products in shards that did not complete.
+
+    Jobs whose products were all applied but some rejected with user errors
+    finish as partial rather than completed.
+    """
+    not_applied = set(result.failed_product_ids)
+    user_errors = set(result.rejected_product_ids)
+    unchanged = set(result.skipped_product_ids) - not_applied - user_errors
+    ingested = all(
+        shard.outcomes is not None for shard in result.shards if shard.is_success
+    )
+    shard_errors = "; ".join(
+        f"shard {shard.index + 1}/{len(result.shards)} {shard.status}: {shard.error}"
+        for shard in result.failed_shards
+    )
+
+    for record in records:
+        product_ids = _job_product_ids(record)
+        job_failed_ids, outcome_summary = _job_outcomes(
+            product_ids, not_applied, user_errors, ingested, unchanged
+        )
+        skipped_count = sum(1 for pid in product_ids if pid in unchanged)
+        if not any(pid in not_applied for pid in job_failed_ids):
+            status = JobStatus.PARTIAL if job_failed_ids else JobStatus.COMPLETED
+            logger.info(
+                "Job %s %s: shards=%s, objects=%s, unchanged=%s, outcomes=%s",
+                record.job_id,
+                status,
+                len(result.shards),
+                result.object_count,
+                skipped_count,
+                outcome_summary,
+            )
+            await store.transition(
+                record.job_id,
+                status,
+                object_count=result.object_count,
+                shard_count=len(result.shards),
+                skipped_count=skipped_count,
+                failed_product_ids=job_failed_ids,
+                outcome_summary=outcome_summary,
+            )
+        else:
+            logger.error(
+                "Job %s failed: %s products in failed shards (%s)",
+                record.job_id,
+                len(job_failed_ids),
+                shard_errors,
+            )
+            await store.transition(
+                record.job_id,
+                JobStatus.FAILED,
+                object_count=result.object_count,
+                shard_count=len(result.shards),
+                skipped_count=skipped_count,
+                failed_product_ids=job_failed_ids,
+                outcome_summary=outcome_summary,
+                error=f"Bulk operation {shard_errors}",
+            )
+
+
+def _job_product_ids(record: JobRecord) -> list[str]:
+    """Read a job's product IDs without building its update specs."""
+    return [product["product_id"] for product in iter_payload_products(record)]
+
+
+def _job_outcomes(
+    product_ids: list[str],
+    not_applied: set[str],
+    user_errors: set[str],
+    ingested: bool,
+    unchanged: Optional[set[str]] = None,
+) -> tuple[list[str], Optional[dict[str, int]]]:
+    """Split a job's products into failed IDs and per-status counts.
+
+    Counts are only reported when every completed shard's result file was
+    ingested; otherwise "succeeded" would include unverified products.
+    Products already in the desired state were never written and count as
+    "unchanged".
+    """
+    unchanged = unchanged or set()
+    failed_ids: list[str] = []
+    skipped = errored = noop = 0
+    for pid in product_ids:
+        if pid in not_applied:
+            failed_ids.append(pid)
+            skipped += 1
+        elif pid in user_errors:
+            failed_ids.append(pid)
+            errored += 1
+        if pid in unchanged:
+            noop += 1
+    if not ingested:
+        return failed_ids, None
+
+    return failed_ids, {
+        "succeeded": len(product_ids) - skipped - errored - noop,
+        "user_errors": errored,
+        "not_applied": skipped,
+        "unchanged": noop,
+    }
+
+
+async def _poll_group(
+    mutation_client: ShopifyBulkMutationClient,
+    records: list[JobRecord],
+    store: JobStore,
+    bulk_op_id: str,
+) -> None:
+    with tracing.correlate(**{"shopify.bulk_op_id": bulk_op_id}), tracing.span(
+        "jobs.resume_poll"
+    ):
+        await _resume_poll(mutation_client, records, store, bulk_op_id)
+
+
+async def _resume_poll(
+    mutation_client: ShopifyBulkMutationClient,
+    records: list[JobRecord],
+    store: JobStore,
+    bulk_op_id: str,
+) -> None:
+    try:
+        result = await mutation_client.poll_to_terminal(
+            bulk_op_id,
+            timeout_s=BULK_POLL_TIMEOUT_SECONDS,
+        )
+    except ShopifyBulkOperationFailedError as exc:
+        # Ended FAILED, CANCELED, or EXPIRED; partial data is still ingested
+        result = exc.operation
+    except Exception as exc:
+        await _fail_all(records, store, exc)
+        return
+
+    outcomes = await mutation_client.ingest_outcomes(result, records[0].run_id)
+    user_errors = set(outcomes.failed_product_ids) if outcomes else set()
+
+    for record in records:
+        if result.is_success:
+            job_failed_ids, outcome_summary = _job_outcomes(
+                _job_product_ids(record), set(), user_errors, outcomes is not None
+            )
+            status = JobStatus.PARTIAL if job_failed_ids else JobStatus.COMPLETED
+            logger.info(
+                "Job %s %s: bulk_op=%s, objects=%s, outcomes=%s",
+                record.job_id,
+                status,
+                bulk_op_id,
+                result.object_count,
+                outcome_summary,
+            )
+            await store.transition(
+                record.job_id,
+                status,
+                object_count=result.object_count,
+                failed_product_ids=job_failed_ids,
+                outcome_summary=outcome_summary,
+            )
+        else:
+            status = (
+                JobStatus.CANCELED if result.status == "CANCELED" else JobStatus.FAILED
+            )
+            logger.error(
+                "Job %s %s: status=%s, error=%s",
+                record.job_id,
+                status,
+                result.status,
+                result.error_code,
+            )
+            await store.transition(
+                record.job_id,
+                status,
+                object_count=result.object_count,
+                error=f"Bulk operation {result.status}: {result.error_code}",
+            )
@@ -0,0 +1,68 @@
+"""On-disk product spools for jobs submitted as NDJSON streams.
+
+A streamed job's products are validated line by line and written to a spool
+file instead of being held in the job record, so neither the API process nor
+Redis keeps the full request in memory. The record's payload names the file
+(``products_file``); the runner reads it when it builds update specs and
+removes it once the job is finished. With the Redis backend the spool
+directory must be shared with the job workers.
+"""
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterator
+from typing import Any
+
+from ..schemas.jobs import JobRecord
+
+
+logger = logging.getLogger(__name__)
+
+
+def spool_dir() -> str:
+    """Return the spool directory (APEG_JOB_SPOOL_DIR), creating it if needed."""
+    path = os.getenv("APEG_JOB_SPOOL_DIR") or os.path.join(
+        tempfile.gettempdir(), "apeg-job-spool"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool_path(job_id: str) -> str:
+    """Spool file for ``job_id``'s products."""
+    return os.path.join(spool_dir(), f"{job_id}.ndjson")
+
+
+def iter_spooled_products(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the product objects of a spool file, one per line."""
+    with open(path, "rb") as spool:
+        for line in spool:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_payload_products(record: JobRecord) -> Iterator[dict[str, Any]]:
+    """Yield a job's products from its stored body or its spool file."""
+    products_file = record.payload.get("products_file")
+    if products_file:
+        yield from iter_spooled_products(products_file)
+    else:
+        yield from record.payload.get("products", [])
+
+
+def remove_spool_file(path: str) -> None:
+    """Delete a spool file (best-effort)."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    except OSError as exc:
+        logger.warning("Failed to remove spool %s: %s", path, exc)
+
+
+def remove_spool(record: JobRecord) -> None:
+    """Delete a finished job's spool file, if it has one."""
+    products_file = record.payload.get("products_file")
+    if products_file:
+        remove_spool_file(products_file)
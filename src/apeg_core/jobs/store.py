@@ -0,0 +1,383 @@
+"""Job record stores: in-process (inline mode) and Redis (durable queue).
+
+The Redis store keeps each record as JSON under ``apeg:jobs:record:{job_id}``
+and queues job IDs on a list. Workers claim jobs with BLMOVE into their own
+processing list, so a job claimed by a worker that dies is still on Redis and
+is re-queued when that worker slot restarts.
+
+Both stores map each client ``run_id`` to the job it started, so a retried
+submission finds the existing job instead of enqueueing a duplicate bulk run.
+"""
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from time import monotonic
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+
+from ..schemas.jobs import JobRecord, JobStatus
+
+
+# Set the run's job if it is unset or still names ARGV[2], saving the job's
+# record (ARGV[4]) with it; else return the owner
+_SWAP_RUN_OWNER_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == false or owner == ARGV[2] then
+  redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+  redis.call('SET', KEYS[2], ARGV[4], 'EX', ARGV[3])
+  return false
+end
+return owner
+"""
+
+# Shorten the run entry to the result TTL if it still names this job
+_EXPIRE_RUN_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Save the record only if the stored copy still hashes to ARGV[1]
+_SAVE_IF_UNCHANGED_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == false or redis.sha1hex(current) ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class JobStore(ABC):
+    """Base job store: persistence plus status transitions."""
+
+    # Jobs in these states are started again by a repeated submission
+    RERUNNABLE = frozenset({JobStatus.FAILED, JobStatus.CANCELED})
+
+    @abstractmethod
+    async def save(self, record: JobRecord) -> None:
+        """Persist ``record`` unconditionally."""
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        loaded = await self._load(job_id)
+        return loaded[0] if loaded is not None else None
+
+    @abstractmethod
+    async def _load(self, job_id: str) -> Optional[tuple[JobRecord, Any]]:
+        """Return a record and a version token for ``_save_if_unchanged``."""
+
+    @abstractmethod
+    async def _save_if_unchanged(self, record: JobRecord, version: Any) -> bool:
+        """Save ``record`` unless the stored copy changed since ``version``.
+
+        Returns:
+            False if another writer got there first (or the record is gone)
+        """
+
+    @abstractmethod
+    async def _swap_run_owner(
+        self, record: JobRecord, previous: Optional[str]
+    ) -> Optional[str]:
+        """Point ``record.run_id`` at ``record`` if unset or still at ``previous``.
+
+        On success ``record`` is saved in the same step, so the run never
+        names a job that cannot be loaded.
+
+        Returns:
+            None on success, else the job ID ``run_id`` currently points at
+        """
+
+    @abstractmethod
+    async def _run_owner(self, shop_domain: str, run_id: str) -> Optional[str]:
+        """Return the job ID ``run_id`` points at, if any."""
+
+    async def _expire_run(self, record: JobRecord) -> None:
+        """Start the result TTL of a finished job's ``run_id`` entry."""
+
+    async def get_run(self, shop_domain: str, run_id: str) -> Optional[JobRecord]:
+        """Return the job currently holding ``run_id``, without claiming it."""
+        owner = await self._run_owner(shop_domain, run_id)
+        return await self.get(owner) if owner is not None else None
+
+    async def claim_run(self, record: JobRecord) -> Optional[JobRecord]:
+        """Reserve ``record.run_id`` for ``record`` before it is enqueued.
+
+        ``record`` is saved along with the claim, so a concurrent submission
+        of the run finds it (call ``release_run`` if it is not enqueued). A
+        run whose job expired, or failed or was canceled with the same
+        payload, is taken over so a client retry starts a fresh job.
+
+        Returns:
+            None if the caller should enqueue ``record``; otherwise the
+            existing job for the run (compare ``payload_hash`` to tell a
+            retry from a conflicting reuse of the run_id)
+        """
+        previous: Optional[str] = None
+        while True:
+            owner = await self._swap_run_owner(record, previous)
+            if owner is None:
+                return None
+            existing = await self.get(owner)
+            if existing is not None and (
+                existing.status not in self.RERUNNABLE
+                or existing.payload_hash != record.payload_hash
+            ):
+                return existing
+            previous = owner
+
+    async def release_run(self, record: JobRecord, reason: str) -> None:
+        """Fail a claimed job that was never enqueued, freeing its run_id.
+
+        A later submission with the same payload takes the run over.
+        """
+        await self.transition(
+            record.job_id, JobStatus.FAILED, error=f"Not submitted: {reason}"
+        )
+
+    async def transition(
+        self,
+        job_id: str,
+        status: str,
+        expected_status: Optional[str] = None,
+        **fields: Any,
+    ) -> Optional[JobRecord]:
+        """Load a record, move it to ``status``, and save it.
+
+        The save is a compare-and-set against the loaded copy and is retried
+        on conflict, so concurrent writers (a runner and a cancel request)
+        never overwrite each other. Canceled jobs are final: later
+        transitions from a runner that has not noticed the cancel yet are
+        ignored.
+
+        Args:
+            job_id: Job to update
+            status: Status to move to
+            expected_status: If set, the record is left unchanged unless it
+                is currently in this status
+            **fields: Record fields to set along with the status
+
+        Returns:
+            Current record (unchanged if it was canceled or not in
+            ``expected_status``), or None if the job is unknown
+        """
+        while True:
+            loaded = await self._load(job_id)
+            if loaded is None:
+                return None
+            record, version = loaded
+            if record.status == JobStatus.CANCELED:
+                return record
+            if expected_status is not None and record.status != expected_status:
+                return record
+            record.transition(status, **fields)
+            if await self._save_if_unchanged(record, version):
+                break
+        if status in JobStatus.FINISHED:
+            await self._expire_run(record)
+        return record
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store used when jobs run inline as background tasks."""
+
+    RESULT_TTL_SECONDS = 24 * 3600  # 1 day
+
+    def __init__(self, result_ttl_seconds: float = RESULT_TTL_SECONDS):
+        self.result_ttl_seconds = result_ttl_seconds
+        self._records: dict[str, JobRecord] = {}
+        # (shop_domain, run_id) -> (job_id, monotonic expiry or None)
+        self._runs: dict[tuple[str, str], tuple[str, Optional[float]]] = {}
+
+    async def save(self, record: JobRecord) -> None:
+        self._records[record.job_id] = record.model_copy(deep=True)
+
+    async def _load(self, job_id: str) -> Optional[tuple[JobRecord, Any]]:
+        record = self._records.get(job_id)
+        if record is None:
+            return None
+        # Saves store a fresh copy, so the stored object is the version
+        return record.model_copy(deep=True), record
+
+    async def _save_if_unchanged(self, record: JobRecord, version: Any) -> bool:
+        if self._records.get(record.job_id) is not version:
+            return False
+        await self.save(record)
+        return True
+
+    async def _swap_run_owner(
+        self, record: JobRecord, previous: Optional[str]
+    ) -> Optional[str]:
+        key = (record.shop_domain, record.run_id)
+        owner, expires_at = self._runs.get(key, (None, None))
+        if expires_at is not None and monotonic() >= expires_at:
+            owner = None
+        if owner is not None and owner != previous:
+            return owner
+        self._runs[key] = (record.job_id, None)
+        await self.save(record)
+        return None
+
+    async def _run_owner(self, shop_domain: str, run_id: str) -> Optional[str]:
+        owner, expires_at = self._runs.get((shop_domain, run_id), (None, None))
+        if expires_at is not None and monotonic() >= expires_at:
+            return None
+        return owner
+
+    async def _expire_run(self, record: JobRecord) -> None:
+        key = (record.shop_domain, record.run_id)
+        if self._runs.get(key, (None, None))[0] == record.job_id:
+            self._runs[key] = (record.job_id, monotonic() + self.result_ttl_seconds)
+
+
+class RedisJobStore(JobStore):
+    """Redis-backed durable job store and FIFO work queue."""
+
+    KEY_PREFIX = "apeg:jobs"
+    RECORD_TTL_SECONDS = 7 * 24 * 3600  # 7 days
+    RESULT_TTL_SECONDS = 24 * 3600  # 1 day
+
+    def __init__(
+        self,
+        redis: Redis,
+        logger: Optional[logging.Logger] = None,
+        result_ttl_seconds: int = RESULT_TTL_SECONDS,
+    ):
+        """Initialize Redis job store.
+
+        Args:
+            redis: Injected redis.asyncio.Redis client
+            logger: Optional logger instance
+            result_ttl_seconds: How long a completed job answers repeated
+                submissions of its run_id
+        """
+        self.redis = redis
+        self.logger = logger or logging.getLogger(__name__)
+        self.result_ttl_seconds = result_ttl_seconds
+
+    @classmethod
+    def record_key(cls, job_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:record:{job_id}"
+
+    @classmethod
+    def run_key(cls, shop_domain: str, run_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:run:{shop_domain}:{run_id}"
+
+    @classmethod
+    def queue_key(cls) -> str:
+        return f"{cls.KEY_PREFIX}:queue"
+
+    @classmethod
+    def processing_key(cls, worker_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:processing:{worker_id}"
+
+    async def save(self, record: JobRecord) -> None:
+        await self.redis.set(
+            self.record_key(record.job_id),
+            record.model_dump_json(),
+            ex=self.RECORD_TTL_SECONDS,
+        )
+
+    async def _load(self, job_id: str) -> Optional[tuple[JobRecord, Any]]:
+        raw = await self.redis.get(self.record_key(job_id))
+        if raw is None:
+            return None
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        return JobRecord.model_validate_json(raw), hashlib.sha1(raw).hexdigest()
+
+    async def _save_if_unchanged(self, record: JobRecord, version: Any) -> bool:
+        saved = await self.redis.eval(
+            _SAVE_IF_UNCHANGED_SCRIPT,
+            1,
+            self.record_key(record.job_id),
+            version,
+            record.model_dump_json(),
+            self.RECORD_TTL_SECONDS,
+        )
+        return bool(int(saved))
+
+    async def _swap_run_owner(
+        self, record: JobRecord, previous: Optional[str]
+    ) -> Optional[str]:
+        owner = await self.redis.eval(
+            _SWAP_RUN_OWNER_SCRIPT,
+            2,
+            self.run_key(record.shop_domain, record.run_id),
+            self.record_key(record.job_id),
+            record.job_id,
+            previous or "",
+            self.RECORD_TTL_SECONDS,
+            record.model_dump_json(),
+        )
+        if owner is None:
+            return None
+        return owner.decode("utf-8") if isinstance(owner, bytes) else owner
+
+    async def _run_owner(self, shop_domain: str, run_id: str) -> Optional[str]:
+        owner = await self.redis.get(self.run_key(shop_domain, run_id))
+        if owner is None:
+            return None
+        return owner.decode("utf-8") if isinstance(owner, bytes) else owner
+
+    async def _expire_run(self, record: JobRecord) -> None:
+        try:
+            await self.redis.eval(
+                _EXPIRE_RUN_SCRIPT,
+                1,
+                self.run_key(record.shop_domain, record.run_id),
+                record.job_id,
+                self.result_ttl_seconds,
+            )
+        except Exception as exc:
+            self.logger.warning(
+                "Failed to set result TTL for run_id=%s: %s", record.run_id, exc
+            )
+
+    async def enqueue(self, record: JobRecord) -> None:
+        """Persist a new record and append it to the work queue."""
+        await self.save(record)
+        await self.redis.lpush(self.queue_key(), record.job_id)
+
+    async def queue_depth(self) -> int:
+        return int(await self.redis.llen(self.queue_key()))
+
+    async def dequeue(self, worker_id: str, timeout: float = 5.0) -> Optional[str]:
+        """Claim the oldest queued job into the worker's processing list.
+
+        Returns:
+            Job ID, or None if nothing was queued within ``timeout``
+        """
+        job_id = await self.redis.blmove(
+            self.queue_key(),
+            self.processing_key(worker_id),
+            timeout,
+            "RIGHT",
+            "LEFT",
+        )
+        if job_id is None:
+            return None
+        return job_id.decode("utf-8") if isinstance(job_id, bytes) else job_id
+
+    async def ack(self, worker_id: str, job_id: str) -> None:
+        """Remove a finished job from the worker's processing list."""
+        await self.redis.lrem(self.processing_key(worker_id), 1, job_id)
+
+    async def requeue_inflight(self, worker_id: str) -> int:
+        """Return jobs left in a worker's processing list to the queue head.
+
+        Called when a worker slot starts, recovering jobs it held when the
+        previous process died.
+        """
+        count = 0
+        while await self.redis.lmove(
+            self.processing_key(worker_id), self.queue_key(), "RIGHT", "RIGHT"
+        ):
+            count += 1
+        if count:
+            self.logger.warning(
+                "Re-queued %s in-flight jobs from worker %s", count, worker_id
+            )
+        return count
+
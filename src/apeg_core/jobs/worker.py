@@ -0,0 +1,125 @@
+"""Out-of-process job worker consuming the Redis job queue."""
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+from redis.asyncio import Redis
+
+from .coalescer import collect_batch
+from .runner import LiveJobResources, run_bulk_reaper, run_seo_update_batch
+from .store import RedisJobStore
+
+
+class JobWorker:
+    """Runs ``concurrency`` job slots against a shared Redis job queue.
+
+    Each slot claims jobs into its own processing list (``{worker_id}:{slot}``)
+    and re-queues anything left there by a previous process on startup, so
+    worker IDs must be stable across restarts and unique per process.
+    """
+
+    DEQUEUE_TIMEOUT_SECONDS = 5.0
+    COALESCE_WINDOW_SECONDS = 2.0
+    COALESCE_MAX_JOBS = 50
+    COALESCE_MAX_PRODUCTS = 5000
+
+    def __init__(
+        self,
+        store: RedisJobStore,
+        session: aiohttp.ClientSession,
+        redis: Redis,
+        worker_id: str,
+        concurrency: int = 4,
+        coalesce_window_seconds: float = COALESCE_WINDOW_SECONDS,
+        coalesce_max_jobs: int = COALESCE_MAX_JOBS,
+        coalesce_max_products: int = COALESCE_MAX_PRODUCTS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize job worker.
+
+        Args:
+            store: Redis job store to consume
+            session: Shared aiohttp session for Shopify calls
+            redis: Shared Redis client for locks, throttling and notifications
+            worker_id: Stable, unique identifier for this worker process
+            concurrency: Number of jobs executed concurrently
+            coalesce_window_seconds: How long a slot gathers further queued
+                jobs to submit as one bulk mutation (0 disables coalescing)
+            coalesce_max_jobs: Maximum jobs per coalesced batch
+            coalesce_max_products: Stop gathering once a batch has this many
+                products
+            logger: Optional logger instance
+        """
+        self.store = store
+        self.session = session
+        self.redis = redis
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.coalesce_window_seconds = coalesce_window_seconds
+        self.coalesce_max_jobs = coalesce_max_jobs
+        self.coalesce_max_products = coalesce_max_products
+        self.logger = logger or logging.getLogger(__name__)
+        self.live: Optional[LiveJobResources] = None
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Process jobs until ``stop_event`` is set (in-flight jobs finish)."""
+        stop_event = stop_event or asyncio.Event()
+        try:
+            # One mirror, outcome store and status multiplexer for all slots
+            self.live = LiveJobResources.from_env(self.session, self.redis)
+        except Exception as exc:
+            # Each batch retries the setup and records the error on its jobs
+            self.logger.warning("Shopify resources unavailable: %s", exc)
+        self.logger.info(
+            "Job worker %s started with %s slots", self.worker_id, self.concurrency
+        )
+        slots = [
+            self._run_slot(f"{self.worker_id}:{slot}", stop_event)
+            for slot in range(self.concurrency)
+        ]
+        # Frees the shop from hung bulk operations while the slots wait on it
+        reaper = run_bulk_reaper(self.session, self.redis, stop_event)
+        try:
+            await asyncio.gather(*slots, reaper)
+        finally:
+            if self.live is not None:
+                self.live.close()
+                self.live = None
+        self.logger.info("Job worker %s stopped", self.worker_id)
+
+    async def _run_slot(self, slot_id: str, stop_event: asyncio.Event) -> None:
+        await self.store.requeue_inflight(slot_id)
+
+        while not stop_event.is_set():
+            try:
+                job_id = await self.store.dequeue(
+                    slot_id, timeout=self.DEQUEUE_TIMEOUT_SECONDS
+                )
+            except Exception as exc:
+                self.logger.error("Slot %s failed to dequeue: %s", slot_id, exc)
+                await asyncio.sleep(self.DEQUEUE_TIMEOUT_SECONDS)
+                continue
+
+            if job_id is None:
+                continue
+
+            self.logger.info("Slot %s picked up job %s", slot_id, job_id)
+            job_ids = [job_id]
+            try:
+                job_ids = await collect_batch(
+                    self.store,
+                    slot_id,
+                    job_id,
+                    window_seconds=self.coalesce_window_seconds,
+                    max_jobs=self.coalesce_max_jobs,
+                    max_products=self.coalesce_max_products,
+                )
+                await run_seo_update_batch(
+                    job_ids, self.store, self.session, self.redis, live=self.live
+                )
+            except Exception as exc:
+                self.logger.error("Slot %s failed to run %s: %s", slot_id, job_ids, exc)
+            finally:
+                for claimed in job_ids:
+                    await self.store.ack(slot_id, claimed)
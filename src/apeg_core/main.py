@@ -1,9 +1,19 @@
 """APEG FastAPI application entry point."""
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Optional
 
 from fastapi import FastAPI
 
+from .api.metrics import RequestMetricsMiddleware
+from .api.metrics import router as metrics_router
+from .api.resources import AppResources
 from .api.routes import router as api_router
+from .api.webhooks import router as webhooks_router
+from .jobs.runner import run_bulk_reaper
+from .telemetry import tracing
 
 
 # Configure logging
@@ -13,15 +23,45 @@ logging.basicConfig(
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Share pooled HTTP/Redis resources for the worker's lifetime.
+
+    With the inline job backend, jobs run in this process, so it also runs
+    the bulk operation reaper (job workers run it otherwise).
+    """
+    tracing.configure_from_env()
+    resources = AppResources.from_env()
+    app.state.resources = resources
+    stop_reaper = asyncio.Event()
+    reaper: Optional[asyncio.Task] = None
+    if resources.job_backend == "inline":
+        reaper = asyncio.create_task(
+            run_bulk_reaper(resources.get_session(), resources.get_redis(), stop_reaper)
+        )
+    try:
+        yield
+    finally:
+        stop_reaper.set()
+        if reaper is not None:
+            await asyncio.gather(reaper, return_exceptions=True)
+        await resources.aclose()
+        tracing.shutdown()
+
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
     app = FastAPI(
         title="APEG API",
         version="0.1.0",
         description="Async Product Enhancement Gateway for Shopify bulk operations",
+        lifespan=lifespan,
     )
 
     app.include_router(api_router)
+    app.include_router(webhooks_router)
+    app.include_router(metrics_router)
+    app.add_middleware(RequestMetricsMiddleware)
 
     return app
 
@@ -9,11 +9,15 @@ import os
 import sqlite3
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from time import monotonic
 from typing import Optional
 from zoneinfo import ZoneInfo
 
 import aiohttp
+from redis.asyncio import Redis
 
+from ..shopify.throttle import ShopifyCostThrottle
+from ..telemetry.metrics import COLLECTOR_RUN_SECONDS
 from .meta_collector import MetaInsightsCollector
 from .schema import (
     init_database,
@@ -78,6 +82,7 @@ class MetricsCollectorService:
         self.shopify_domain = os.getenv("SHOPIFY_STORE_DOMAIN")
         self.shopify_token = os.getenv("SHOPIFY_ADMIN_ACCESS_TOKEN")
         self.shopify_api_version = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+        self.redis_url = os.getenv("REDIS_URL")
 
         catalog_path = os.getenv(
             "STRATEGY_TAG_CATALOG", "data/metrics/strategy_tags.json"
@@ -145,6 +150,7 @@ class MetricsCollectorService:
             logger.info("Skipping Meta collection for %s (already collected)", date_str)
             return
 
+        started = monotonic()
         try:
             collector = MetaInsightsCollector(
                 access_token=self.meta_access_token,
@@ -167,8 +173,14 @@ class MetricsCollectorService:
             )
 
             logger.info("Meta collection successful for %s", date_str)
+            COLLECTOR_RUN_SECONDS.observe(
+                monotonic() - started, collector="meta", outcome="success"
+            )
 
         except Exception as exc:
+            COLLECTOR_RUN_SECONDS.observe(
+                monotonic() - started, collector="meta", outcome="failure"
+            )
             logger.error(
                 "Meta collection failed for %s: %s",
                 date_str,
@@ -199,6 +211,10 @@ class MetricsCollectorService:
             )
             return
 
+        # Share the per-shop cost bucket with API workers when Redis is configured
+        redis = Redis.from_url(self.redis_url) if self.redis_url else None
+
+        started = monotonic()
         try:
             collector = ShopifyOrdersCollector(
                 shop_domain=self.shopify_domain,
@@ -207,6 +223,7 @@ class MetricsCollectorService:
                 session=session,
                 raw_dir=self.raw_dir,
                 strategy_catalog=self.strategy_catalog,
+                throttle=ShopifyCostThrottle(self.shopify_domain, redis=redis),
             )
 
             orders = await collector.fetch_orders(target_date)
@@ -220,8 +237,14 @@ class MetricsCollectorService:
             )
 
             logger.info("Shopify collection successful for %s", date_str)
+            COLLECTOR_RUN_SECONDS.observe(
+                monotonic() - started, collector="shopify", outcome="success"
+            )
 
         except Exception as exc:
+            COLLECTOR_RUN_SECONDS.observe(
+                monotonic() - started, collector="shopify", outcome="failure"
+            )
             logger.error(
                 "Shopify collection failed for %s: %s",
                 date_str,
@@ -237,6 +260,10 @@ class MetricsCollectorService:
                 )
             raise
 
+        finally:
+            if redis is not None:
+                await redis.aclose()
+
     async def run_forever(self) -> None:
         """Run collection service continuously (daily schedule).
 
@@ -7,9 +7,13 @@ import logging
 import sqlite3
 from datetime import date, datetime, timezone
 from pathlib import Path
+from time import monotonic
+from typing import Optional
 
 import aiohttp
 
+from ..shopify.throttle import ShopifyCostThrottle
+from ..telemetry.metrics import GRAPHQL_REQUEST_SECONDS, graphql_operation_name
 from .attribution import choose_attribution, match_strategy_tag
 
 
@@ -33,6 +37,7 @@ class ShopifyOrdersCollector:
         session: aiohttp.ClientSession,
         raw_dir: Path,
         strategy_catalog: list[str],
+        throttle: Optional[ShopifyCostThrottle] = None,
     ) -> None:
         """Initialize Shopify orders collector.
 
@@ -43,6 +48,7 @@ class ShopifyOrdersCollector:
             session: aiohttp session
             raw_dir: Directory for raw JSONL audit logs
             strategy_catalog: List of strategy tags for matching
+            throttle: Optional shared cost governor (in-process if None)
         """
         self.shop_domain = shop_domain
         self._access_token = access_token
@@ -51,6 +57,7 @@ class ShopifyOrdersCollector:
         self.raw_dir = Path(raw_dir)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.strategy_catalog = strategy_catalog
+        self.throttle = throttle or ShopifyCostThrottle(shop_domain)
 
     async def fetch_orders(self, target_date: date) -> list[dict]:
         """Fetch orders created on target date.
@@ -145,6 +152,7 @@ class ShopifyOrdersCollector:
             "Content-Type": "application/json",
         }
 
+        operation = graphql_operation_name(query)
         all_orders: list[dict] = []
         cursor = None
 
@@ -154,9 +162,17 @@ class ShopifyOrdersCollector:
                 "variables": {"query": query_filter, "cursor": cursor},
             }
 
+            await self.throttle.acquire(query)
+
+            request_started = monotonic()
             async with self.session.post(
                 url, json=payload, headers=headers
             ) as response:
+                GRAPHQL_REQUEST_SECONDS.observe(
+                    monotonic() - request_started,
+                    operation=operation,
+                    status=response.status,
+                )
                 if response.status != 200:
                     error_body = await response.text()
                     logger.error(
@@ -169,6 +185,7 @@ class ShopifyOrdersCollector:
                     )
 
                 result = await response.json()
+                await self.throttle.record(query, result)
 
                 if "errors" in result and result["errors"]:
                     logger.error("GraphQL errors: %s", result["errors"])
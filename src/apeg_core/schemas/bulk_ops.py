@@ -1,4 +1,5 @@
 """Pydantic models for Shopify Bulk Operations API responses."""
+from collections.abc import Callable
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -22,6 +23,10 @@ class BulkOperation(BaseModel):
     partial_data_url: Optional[str] = Field(
         None, description="Partial JSONL URL if job failed mid-run"
     )
+    created_at: Optional[str] = Field(None, description="Shopify createdAt (ISO 8601)")
+    completed_at: Optional[str] = Field(
+        None, description="Shopify completedAt (ISO 8601), once terminal"
+    )
 
     @property
     def is_terminal(self) -> bool:
@@ -64,6 +69,17 @@ class ProductSEO(BaseModel):
     description: Optional[str] = None
 
 
+class ProductState(BaseModel):
+    """Current product state used to hydrate the safe-write merge."""
+
+    id: str = Field(..., description="Product GID")
+    tags: list[str] = Field(default_factory=list, description="Current tags")
+    seo: Optional[ProductSEO] = Field(
+        None, description="Current SEO fields (None if unknown)"
+    )
+    updated_at: Optional[str] = Field(None, description="Shopify updatedAt (ISO 8601)")
+
+
 class ProductUpdateSpec(BaseModel):
     """Product update specification (input to safe-write merger)."""
 
@@ -97,3 +113,150 @@ class BulkOperationRef(BaseModel):
     bulk_op_id: str
     run_id: str
     shop_domain: str
+    skipped_product_ids: list[str] = Field(
+        default_factory=list,
+        description="Products already up to date; nothing is written for them",
+    )
+
+
+class MutationOutcomeSummary(BaseModel):
+    """Per-line outcome counts ingested from a bulk mutation result file."""
+
+    bulk_op_id: str
+    succeeded: int = 0
+    user_errors: int = 0
+    missing: int = Field(0, description="Input lines with no result line")
+    rejected_product_ids: list[str] = Field(
+        default_factory=list, description="Products Shopify returned user errors for"
+    )
+    missing_product_ids: list[str] = Field(
+        default_factory=list, description="Products with no result line (unprocessed)"
+    )
+
+    @property
+    def failed_product_ids(self) -> list[str]:
+        return self.rejected_product_ids + self.missing_product_ids
+
+
+class BulkShardResult(BaseModel):
+    """Outcome of one shard of a sharded bulk mutation."""
+
+    index: int = Field(..., description="Zero-based shard position across attempts")
+    attempt: int = Field(0, description="0 for the first pass, then retry number")
+    executor: str = Field(
+        "bulk", description="bulk (staged bulk mutation) or direct (productUpdate calls)"
+    )
+    product_ids: list[str] = Field(default_factory=list)
+    line_count: int = Field(0, description="JSONL lines in the shard")
+    byte_count: int = Field(0, description="JSONL bytes in the shard")
+    bulk_op_id: Optional[str] = Field(None, description="None if never submitted")
+    status: str = Field(
+        "PENDING",
+        description="BulkOperation status, or UPLOAD_FAILED|SUBMIT_FAILED|"
+        "POLL_FAILED|SKIPPED when the shard did not reach Shopify or finish",
+    )
+    object_count: Optional[int] = None
+    error: Optional[str] = None
+    outcomes: Optional[MutationOutcomeSummary] = Field(
+        None, description="Per-product results, when ingested"
+    )
+
+    @property
+    def is_success(self) -> bool:
+        return self.status == "COMPLETED"
+
+    @property
+    def is_canceled(self) -> bool:
+        return self.status == "CANCELED"
+
+    @property
+    def unapplied_product_ids(self) -> list[str]:
+        """Products Shopify did not process (the whole shard if unknown)."""
+        if self.outcomes is not None:
+            return self.outcomes.missing_product_ids
+        return [] if self.is_success else list(self.product_ids)
+
+    @property
+    def rejected_product_ids(self) -> list[str]:
+        return self.outcomes.rejected_product_ids if self.outcomes is not None else []
+
+
+class ShardedBulkOperationRef(BaseModel):
+    """Combined result of a bulk mutation split across staged uploads.
+
+    Retry shards are appended after the shards they retry; per-product
+    properties report each product's latest shard.
+    """
+
+    run_id: str
+    shop_domain: str
+    shards: list[BulkShardResult] = Field(default_factory=list)
+    skipped_product_ids: dict[str, int] = Field(
+        default_factory=dict,
+        description="Products already in the desired state, with the attempt "
+        "that found them unchanged; nothing is written for them",
+    )
+
+    @property
+    def is_success(self) -> bool:
+        return not self.failed_product_ids
+
+    @property
+    def skipped_count(self) -> int:
+        return len(self.skipped_product_ids)
+
+    @property
+    def object_count(self) -> int:
+        return sum(shard.object_count or 0 for shard in self.shards)
+
+    @property
+    def attempts(self) -> int:
+        return max((shard.attempt for shard in self.shards), default=0) + 1
+
+    @property
+    def is_canceled(self) -> bool:
+        """True once any shard was canceled (by request or by the reaper)."""
+        return any(shard.is_canceled for shard in self.shards)
+
+    @property
+    def failed_shards(self) -> list[BulkShardResult]:
+        return [shard for shard in self.shards if not shard.is_success]
+
+    @property
+    def failed_product_ids(self) -> list[str]:
+        """Products whose latest shard did not apply them."""
+        return self._latest_ids(lambda shard: shard.unapplied_product_ids)
+
+    @property
+    def rejected_product_ids(self) -> list[str]:
+        """Products whose latest shard returned user errors for them."""
+        return self._latest_ids(lambda shard: shard.rejected_product_ids)
+
+    def retry_product_ids(self, include_rejected: bool = False) -> list[str]:
+        """Products a follow-up operation should resubmit.
+
+        None once a shard was canceled: the cancel is deliberate (and skips
+        the shards after it), and a retry would undo it.
+        """
+        if self.is_canceled:
+            return []
+        ids = self.failed_product_ids
+        if include_rejected:
+            ids += self.rejected_product_ids
+        return ids
+
+    def _latest_ids(
+        self, select: Callable[[BulkShardResult], list[str]]
+    ) -> list[str]:
+        latest: dict[str, int] = {}
+        for position, shard in enumerate(self.shards):
+            for pid in shard.product_ids:
+                latest[pid] = position
+        selected = [set(select(shard)) for shard in self.shards]
+        return [
+            pid
+            for pid, position in latest.items()
+            if pid in selected[position]
+            # A later pass found the product already in the desired state
+            and self.skipped_product_ids.get(pid, -1) <= self.shards[position].attempt
+        ]
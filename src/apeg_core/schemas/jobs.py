@@ -0,0 +1,96 @@
+"""Pydantic models for durable APEG job records."""
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobStatus:
+    """Job lifecycle states."""
+
+    QUEUED = "queued"
+    HYDRATING = "hydrating"
+    UPLOADING = "uploading"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    # Every product was processed but Shopify rejected some with userErrors
+    PARTIAL = "partial"
+    FAILED = "failed"
+    CANCELED = "canceled"
+
+    TERMINAL = frozenset({COMPLETED, PARTIAL, FAILED, CANCELED})
+    # Terminal states in which the job's writes were applied
+    FINISHED = frozenset({COMPLETED, PARTIAL})
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobRecord(BaseModel):
+    """Persisted state of one SEO update job."""
+
+    job_id: str = Field(..., description="Server-generated job ID")
+    run_id: str = Field(..., description="Client-provided run identifier")
+    shop_domain: str = Field(..., description="Target Shopify store domain")
+    status: str = Field(JobStatus.QUEUED, description="Current lifecycle state")
+    dry_run: bool = Field(False, description="Validate and log only")
+    product_count: int = Field(0, description="Number of products in the request")
+    payload: dict[str, Any] = Field(
+        default_factory=dict, description="Original request body"
+    )
+    payload_hash: Optional[str] = Field(
+        None, description="SHA-256 of the request body, for run_id idempotency"
+    )
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
+    started_at: Optional[datetime] = Field(None, description="First non-queued state")
+    finished_at: Optional[datetime] = Field(None, description="Terminal state reached")
+    timings: dict[str, float] = Field(
+        default_factory=dict, description="Seconds spent in each completed state"
+    )
+    attempts: int = Field(0, description="Times a worker picked up the job")
+    bulk_op_id: Optional[str] = Field(None, description="Submitted bulk operation GID")
+    batch_id: Optional[str] = Field(
+        None, description="Lead job ID when coalesced with other jobs"
+    )
+    shard_count: Optional[int] = Field(
+        None, description="Bulk mutations the update was split across"
+    )
+    object_count: Optional[int] = Field(None, description="Objects processed by Shopify")
+    skipped_count: Optional[int] = Field(
+        None, description="Products already in the desired state; not written"
+    )
+    failed_product_ids: list[str] = Field(
+        default_factory=list,
+        description="Products not applied (failed shard) or rejected (user errors); "
+        "a job whose products were all applied but some rejected is partial",
+    )
+    outcome_summary: Optional[dict[str, int]] = Field(
+        None,
+        description="Per-product counts (succeeded, user_errors, not_applied, "
+        "unchanged) from the ingested result file",
+    )
+    error: Optional[str] = Field(None, description="Failure reason")
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in JobStatus.TERMINAL
+
+    def transition(self, status: str, **fields: Any) -> None:
+        """Move to ``status``, recording time spent in the previous state."""
+        now = utc_now()
+        if status != self.status:
+            elapsed = (now - self.updated_at).total_seconds()
+            self.timings[self.status] = round(
+                self.timings.get(self.status, 0.0) + elapsed, 3
+            )
+        if self.started_at is None and status != JobStatus.QUEUED:
+            self.started_at = now
+        if status in JobStatus.TERMINAL:
+            self.finished_at = now
+
+        self.status = status
+        self.updated_at = now
+        for name, value in fields.items():
+            setattr(self, name, value)
@@ -1,22 +1,52 @@
 """Shopify integration modules."""
 from .bulk_client import ShopifyBulkClient
 from .bulk_mutation_client import ShopifyBulkMutationClient
+from .bulk_notifier import BulkOperationNotifier
+from .bulk_download import BulkResultDownloader
+from .bulk_reader import iter_bulk_file, iter_bulk_results, reassemble_bulk_objects
+from .bulk_status import BulkStatusMultiplexer
 from .exceptions import (
     ShopifyBulkApiError,
     ShopifyBulkClientError,
     ShopifyBulkGraphQLError,
     ShopifyBulkJobLockedError,
+    ShopifyBulkLeaseLostError,
     ShopifyBulkMutationLockedError,
+    ShopifyBulkOperationFailedError,
+    ShopifyBulkQueueTimeoutError,
     ShopifyStagedUploadError,
 )
+from .hydration_singleflight import HydrationSingleFlight
+from .job_queue import ShopifyBulkJobQueue
+from .lock_lease import LockLease
+from .mutation_outcomes import MutationOutcomeStore
+from .product_mirror import ProductMirror
+from .product_update_runner import ProductUpdateRunner
+from .throttle import ShopifyCostThrottle
 
 __all__ = [
     "ShopifyBulkClient",
     "ShopifyBulkMutationClient",
+    "ProductUpdateRunner",
+    "ShopifyCostThrottle",
+    "ShopifyBulkJobQueue",
+    "LockLease",
+    "ProductMirror",
+    "HydrationSingleFlight",
+    "MutationOutcomeStore",
+    "BulkOperationNotifier",
+    "BulkStatusMultiplexer",
+    "BulkResultDownloader",
+    "iter_bulk_file",
+    "iter_bulk_results",
+    "reassemble_bulk_objects",
     "ShopifyBulkClientError",
     "ShopifyBulkJobLockedError",
     "ShopifyBulkMutationLockedError",
+    "ShopifyBulkLeaseLostError",
     "ShopifyBulkApiError",
+    "ShopifyBulkOperationFailedError",
     "ShopifyBulkGraphQLError",
+    "ShopifyBulkQueueTimeoutError",
     "ShopifyStagedUploadError",
 ]
@@ -10,40 +10,49 @@ from redis.asyncio import Redis
 from redis.asyncio.lock import Lock as AsyncRedisLock
 
 from ..schemas.bulk_ops import BulkOperation
+from ..telemetry import tracing
+from ..telemetry.metrics import (
+    BULK_LOCK_HOLD_SECONDS,
+    BULK_LOCK_WAIT_SECONDS,
+    BULK_PHASE_SECONDS,
+    GRAPHQL_REQUEST_SECONDS,
+    GRAPHQL_RETRIES,
+    THROTTLE_WAIT_SECONDS,
+    graphql_operation_name,
+)
+from .bulk_notifier import BulkOperationNotifier
+from .bulk_status import BulkStatusMultiplexer, bulk_operation_from_node
 from .exceptions import (
     ShopifyBulkApiError,
     ShopifyBulkGraphQLError,
     ShopifyBulkJobLockedError,
+    ShopifyBulkOperationFailedError,
+    ShopifyBulkQueueTimeoutError,
+)
+from .graphql_strings import (
+    MUTATION_BULK_CANCEL,
+    MUTATION_BULK_RUN_QUERY,
+    QUERY_BULK_OP_BY_ID,
+    QUERY_CURRENT_BULK_OPERATIONS,
 )
-from .graphql_strings import MUTATION_BULK_RUN_QUERY, QUERY_BULK_OP_BY_ID
-
-MUTATION_BULK_CANCEL = """
-mutation BulkCancel($id: ID!) {
-  bulkOperationCancel(id: $id) {
-    bulkOperation {
-      id
-      status
-    }
-    userErrors {
-      field
-      message
-    }
-  }
-}
-"""
+from .job_queue import ShopifyBulkJobQueue
+from .lock_lease import LockLease
+from .throttle import ShopifyCostThrottle
 
 
 class ShopifyBulkClient:
     """Async client for Shopify GraphQL Admin Bulk Operations API.
 
-    Enforces 1 concurrent job per shop via Redis locks.
+    Enforces 1 concurrent job per shop via Redis locks, kept alive by a
+    heartbeat lease while held.
     Implements defensive retry logic for 429/5xx/network errors.
     """
 
-    LOCK_TTL_SECONDS = 1800  # 30 minutes
-    LOCK_REFRESH_INTERVAL = 300  # 5 minutes
+    LOCK_TTL_SECONDS = LockLease.TTL_SECONDS  # renewed by the lease heartbeat
     DEFAULT_POLL_INTERVAL = 2.0  # seconds
     DEFAULT_POLL_TIMEOUT = 3600  # 1 hour
+    FALLBACK_POLL_MULTIPLIER = 2.0  # backoff when webhooks are available
+    FALLBACK_POLL_MAX_INTERVAL = 120.0  # seconds
 
     MAX_RETRY_ATTEMPTS = 6
     RETRY_BASE_DELAY = 0.5  # seconds
@@ -59,6 +68,10 @@ class ShopifyBulkClient:
         session: aiohttp.ClientSession,
         redis: Redis,
         logger: Optional[logging.Logger] = None,
+        throttle: Optional[ShopifyCostThrottle] = None,
+        notifier: Optional[BulkOperationNotifier] = None,
+        job_queue: Optional[ShopifyBulkJobQueue] = None,
+        status_multiplexer: Optional[BulkStatusMultiplexer] = None,
     ):
         """Initialize Shopify Bulk Client.
 
@@ -69,6 +82,13 @@ class ShopifyBulkClient:
             session: Injected aiohttp ClientSession
             redis: Injected redis.asyncio.Redis client
             logger: Optional logger instance
+            throttle: Optional shared cost governor (in-process if None)
+            notifier: Optional webhook notifier; polling becomes a slow
+                exponential-backoff fallback when provided
+            job_queue: Optional per-shop FIFO queue; jobs wait for the lock
+                instead of failing fast when provided
+            status_multiplexer: Optional shared per-shop status poller;
+                ``poll_status`` waits on it instead of polling on its own
         """
         self.shop_domain = shop_domain
         self._access_token = admin_access_token
@@ -76,28 +96,37 @@ class ShopifyBulkClient:
         self.session = session
         self.redis = redis
         self.logger = logger or logging.getLogger(__name__)
+        self.throttle = throttle or ShopifyCostThrottle(
+            shop_domain, redis=redis, logger=self.logger
+        )
+        self.notifier = notifier
+        self.job_queue = job_queue
+        self.status_multiplexer = status_multiplexer
 
         self.graphql_endpoint = (
             f"https://{shop_domain}/admin/api/{api_version}/graphql.json"
         )
         self._lock_key = f"apeg:shopify:bulk_query_lock:{shop_domain}"
         self._current_lock: Optional[AsyncRedisLock] = None
+        self._lock_acquired_at = 0.0
+        self._lease: Optional[LockLease] = None
 
-    async def submit_job(self, bulk_query: str) -> BulkOperation:
+    async def submit_job(self, bulk_query: str, priority: int = 0) -> BulkOperation:
         """Submit a bulk operation query job to Shopify.
 
         Args:
             bulk_query: GraphQL query string for bulk operation
+            priority: Queue priority (higher first) when a job queue is set
 
         Returns:
             BulkOperation with id and initial status
 
         Raises:
-            ShopifyBulkJobLockedError: If lock cannot be acquired
+            ShopifyBulkJobLockedError: If lock cannot be acquired (or the
+                queue wait timed out)
             ShopifyBulkGraphQLError: If GraphQL returns userErrors
             ShopifyBulkApiError: For other API errors
         """
-        # Acquire Redis lock (fail fast)
         lock = AsyncRedisLock(
             self.redis,
             name=self._lock_key,
@@ -105,29 +134,58 @@ class ShopifyBulkClient:
             blocking=False,
         )
 
-        acquired = await lock.acquire(blocking=False)
-        if not acquired:
-            raise ShopifyBulkJobLockedError(self.shop_domain, self._lock_key)
+        wait_started = monotonic()
+        if self.job_queue is not None:
+            # Wait our turn in the per-shop queue
+            try:
+                await self.job_queue.acquire(lock, priority=priority)
+            except ShopifyBulkQueueTimeoutError:
+                BULK_LOCK_WAIT_SECONDS.observe(
+                    monotonic() - wait_started, lock="query", outcome="timeout"
+                )
+                raise ShopifyBulkJobLockedError(self.shop_domain, self._lock_key)
+        else:
+            # Acquire Redis lock (fail fast)
+            acquired = await lock.acquire(blocking=False)
+            if not acquired:
+                BULK_LOCK_WAIT_SECONDS.observe(
+                    monotonic() - wait_started, lock="query", outcome="locked"
+                )
+                raise ShopifyBulkJobLockedError(self.shop_domain, self._lock_key)
 
+        self._lock_acquired_at = monotonic()
+        BULK_LOCK_WAIT_SECONDS.observe(
+            self._lock_acquired_at - wait_started, lock="query", outcome="acquired"
+        )
         self._current_lock = lock
         self.logger.info(f"Acquired bulk lock for shop={self.shop_domain}")
 
         try:
+            self._lease = LockLease(
+                self.redis, lock, self.LOCK_TTL_SECONDS, logger=self.logger
+            )
+            await self._lease.start()
+
             payload = {
                 "query": MUTATION_BULK_RUN_QUERY,
                 "variables": {"query": bulk_query},
             }
 
-            resp_data = await self._post_graphql(payload, retry=True)
+            with BULK_PHASE_SECONDS.time(
+                operation_type="QUERY", phase="submit"
+            ), tracing.span("shopify.bulk_run_query") as span:
+                resp_data = await self.post_graphql(payload, retry=True)
+                mutation_result = resp_data["data"]["bulkOperationRunQuery"]
 
-            # Check for GraphQL userErrors
-            mutation_result = resp_data["data"]["bulkOperationRunQuery"]
-            user_errors = mutation_result.get("userErrors", [])
-            if user_errors:
-                raise ShopifyBulkGraphQLError(user_errors)
+                # Check for GraphQL userErrors (recorded on the span)
+                user_errors = mutation_result.get("userErrors", [])
+                if user_errors:
+                    raise ShopifyBulkGraphQLError(user_errors)
+
+                # Extract bulkOperation
+                op_data = mutation_result["bulkOperation"]
+                span.set_attribute("shopify.bulk_op_id", op_data["id"])
 
-            # Extract bulkOperation
-            op_data = mutation_result["bulkOperation"]
             operation = BulkOperation(
                 id=op_data["id"],
                 status=op_data["status"],
@@ -138,6 +196,7 @@ class ShopifyBulkClient:
             self.logger.info(
                 f"Submitted bulk job: id={operation.id}, status={operation.status}"
             )
+            await self._lease.record_operation(operation.id)
             return operation
 
         except Exception:
@@ -150,13 +209,20 @@ class ShopifyBulkClient:
         operation_id: str,
         poll_interval: float = DEFAULT_POLL_INTERVAL,
         timeout: float = DEFAULT_POLL_TIMEOUT,
+        operation_type: str = "QUERY",
     ) -> BulkOperation:
         """Poll bulk operation status until terminal state.
 
+        With a notifier configured, each wait between polls is cut short by
+        the ``bulk_operations/finish`` webhook and the interval backs off
+        exponentially, so polls only act as a fallback.
+
         Args:
             operation_id: GID of bulk operation (from submit_job)
-            poll_interval: Seconds between poll requests
+            poll_interval: Seconds between poll requests (initial interval
+                when a notifier is configured)
             timeout: Maximum seconds to poll before raising timeout error
+            operation_type: "QUERY" or "MUTATION", for the run phase metric
 
         Returns:
             BulkOperation in terminal state (COMPLETED/FAILED/CANCELED/EXPIRED)
@@ -164,8 +230,29 @@ class ShopifyBulkClient:
         Raises:
             ShopifyBulkApiError: On timeout, missing data, or terminal failure
         """
+        attributes = {
+            "shopify.bulk_op_id": operation_id,
+            "shopify.operation_type": operation_type,
+        }
+        with BULK_PHASE_SECONDS.time(
+            operation_type=operation_type, phase="run"
+        ), tracing.span("shopify.poll_status", **attributes) as span:
+            operation = await self._poll_until_terminal(
+                operation_id, poll_interval, timeout
+            )
+            span.set_attribute("shopify.bulk_status", operation.status)
+            return operation
+
+    async def _poll_until_terminal(
+        self, operation_id: str, poll_interval: float, timeout: float
+    ) -> BulkOperation:
         start_time = monotonic()
-        last_lock_refresh = monotonic()
+        interval = poll_interval
+        notified: Optional[dict] = None
+
+        if self.status_multiplexer is not None:
+            operation = await self._wait_multiplexed(operation_id, timeout)
+            return await self._handle_terminal(operation)
 
         while True:
             # Check timeout
@@ -176,18 +263,13 @@ class ShopifyBulkClient:
                     f"Bulk poll timeout after {elapsed:.1f}s for op={operation_id}"
                 )
 
-            # Refresh lock TTL every LOCK_REFRESH_INTERVAL
-            if monotonic() - last_lock_refresh > self.LOCK_REFRESH_INTERVAL:
-                await self._refresh_lock_ttl()
-                last_lock_refresh = monotonic()
-
             # Poll via node(id) query
             payload = {
                 "query": QUERY_BULK_OP_BY_ID,
                 "variables": {"id": operation_id},
             }
 
-            resp_data = await self._post_graphql(payload, retry=True)
+            resp_data = await self.post_graphql(payload, retry=True)
             node = resp_data["data"].get("node")
 
             if node is None:
@@ -211,28 +293,124 @@ class ShopifyBulkClient:
             )
 
             # Check terminal states
-            if operation.status == "COMPLETED":
-                await self._release_lock_best_effort()
-                if not operation.url:
-                    raise ShopifyBulkApiError(
-                        f"Bulk operation COMPLETED but url missing: {operation.id}"
-                    )
-                self.logger.info(f"Bulk operation completed: {operation.id}")
-                return operation
+            if operation.is_terminal:
+                return await self._handle_terminal(operation)
+
+            # Still in progress: CREATED, RUNNING, CANCELING. Once the finish
+            # webhook has arrived its stored payload would end every wait at
+            # once, so status lag behind the webhook falls back to sleeping.
+            if self.notifier is None or notified is not None:
+                await asyncio.sleep(poll_interval)
+                continue
 
-            if operation.status in {"FAILED", "CANCELED", "EXPIRED"}:
-                await self._release_lock_best_effort()
+            wait = min(interval, max(0.0, timeout - (monotonic() - start_time)))
+            try:
+                notified = await self.notifier.wait_for_finish(operation_id, wait)
+            except Exception as e:
+                self.logger.warning(f"Bulk finish notifier unavailable: {e}")
+                notified = None
+                await asyncio.sleep(wait)
+
+            if notified is not None:
+                self.logger.debug(
+                    f"Webhook finish received for op={operation_id}: "
+                    f"status={notified.get('status')}"
+                )
+            else:
+                interval = min(
+                    interval * self.FALLBACK_POLL_MULTIPLIER,
+                    self.FALLBACK_POLL_MAX_INTERVAL,
+                )
+
+    async def cancel_operation(self, operation_id: str) -> BulkOperation:
+        """Request cancellation of a running bulk query or mutation.
+
+        Shopify moves the operation to CANCELING and then CANCELED; the
+        waiting ``poll_status`` sees the terminal state and releases its lock.
+
+        Args:
+            operation_id: GID of bulk operation
+
+        Returns:
+            BulkOperation with the status reported by the cancel request
+
+        Raises:
+            ShopifyBulkGraphQLError: If Shopify rejects the cancel (e.g. the
+                operation already finished)
+        """
+        resp_data = await self.post_graphql(
+            {"query": MUTATION_BULK_CANCEL, "variables": {"id": operation_id}},
+            retry=True,
+        )
+        result = resp_data["data"]["bulkOperationCancel"]
+        user_errors = result.get("userErrors", [])
+        if user_errors:
+            raise ShopifyBulkGraphQLError(user_errors)
+
+        operation = BulkOperation(
+            id=result["bulkOperation"]["id"],
+            status=result["bulkOperation"]["status"],
+        )
+        self.logger.warning(
+            f"Requested cancel of bulk operation: id={operation.id}, "
+            f"status={operation.status}"
+        )
+        return operation
+
+    async def current_operations(self) -> dict[str, Optional[BulkOperation]]:
+        """Return the shop's latest bulk operation of each type.
+
+        Returns:
+            ``{"QUERY": op, "MUTATION": op}``; None where the shop has none
+        """
+        resp_data = await self.post_graphql(
+            {"query": QUERY_CURRENT_BULK_OPERATIONS, "variables": {"ids": []}},
+            retry=True,
+        )
+        data = resp_data["data"]
+        return {
+            op_type: bulk_operation_from_node(node) if node else None
+            for op_type, node in (
+                ("QUERY", data.get("currentQuery")),
+                ("MUTATION", data.get("currentMutation")),
+            )
+        }
+
+    async def _wait_multiplexed(self, operation_id: str, timeout: float) -> BulkOperation:
+        """Wait on the shared status poller (the lease keeps the lock alive)."""
+        start_time = monotonic()
+
+        try:
+            return await self.status_multiplexer.wait(
+                operation_id, self.post_graphql, timeout=timeout, since=start_time
+            )
+        except asyncio.TimeoutError:
+            await self._release_lock_best_effort()
+            raise ShopifyBulkApiError(
+                f"Bulk poll timeout after {monotonic() - start_time:.1f}s "
+                f"for op={operation_id}"
+            )
+        except ShopifyBulkApiError:
+            # Operation not found
+            await self._release_lock_best_effort()
+            raise
+
+    async def _handle_terminal(self, operation: BulkOperation) -> BulkOperation:
+        """Release the lock and return a completed operation, or raise."""
+        await self._release_lock_best_effort()
+
+        if operation.status == "COMPLETED":
+            if not operation.url:
                 raise ShopifyBulkApiError(
-                    f"Bulk operation terminal failure: status={operation.status}, "
-                    f"error_code={operation.error_code}, "
-                    f"partial_data_url={operation.partial_data_url}"
+                    f"Bulk operation COMPLETED but url missing: {operation.id}"
                 )
+            self.logger.info(f"Bulk operation completed: {operation.id}")
+            return operation
 
-            # Still in progress: CREATED, RUNNING, CANCELING
-            await asyncio.sleep(poll_interval)
+        raise ShopifyBulkOperationFailedError(operation)
 
-    async def _post_graphql(self, payload: dict, retry: bool = True) -> dict:
-        """Execute GraphQL POST with retry logic.
+    async def post_graphql(self, payload: dict, retry: bool = True) -> dict:
+        """Execute GraphQL POST with cost throttling and retry logic.
 
         Args:
             payload: GraphQL query/mutation payload
@@ -244,14 +422,34 @@ class ShopifyBulkClient:
         Raises:
             ShopifyBulkApiError: On non-retryable errors or max retries exceeded
         """
+        operation = graphql_operation_name(payload.get("query", ""))
+        with tracing.span("shopify.graphql", **{"graphql.operation": operation}) as span:
+            return await self._send_graphql(payload, retry, operation, span)
+
+    async def _send_graphql(
+        self, payload: dict, retry: bool, operation: str, span: tracing.Span
+    ) -> dict:
+        """Retry loop behind ``post_graphql``."""
         headers = {
             "Content-Type": "application/json",
             "X-Shopify-Access-Token": self._access_token,
         }
 
+        query = payload.get("query", "")
+
         attempt = 0
         while True:
             attempt += 1
+            span.set_attribute("graphql.attempts", attempt)
+
+            throttle_started = monotonic()
+            await self.throttle.acquire(query)
+            request_started = monotonic()
+            response_status: Optional[int] = None
+            if request_started - throttle_started > 0.001:
+                THROTTLE_WAIT_SECONDS.inc(
+                    request_started - throttle_started, operation=operation, source="cost"
+                )
 
             try:
                 timeout = aiohttp.ClientTimeout(total=60, connect=10)
@@ -262,6 +460,13 @@ class ShopifyBulkClient:
                     timeout=timeout,
                 ) as resp:
                     response_text = await resp.text()
+                    response_status = resp.status
+                    span.set_attribute("http.status_code", response_status)
+                    GRAPHQL_REQUEST_SECONDS.observe(
+                        monotonic() - request_started,
+                        operation=operation,
+                        status=response_status,
+                    )
 
                     # Handle 429 (Rate Limit)
                     if resp.status == 429:
@@ -277,11 +482,15 @@ class ShopifyBulkClient:
                                 f"HTTP 429, Retry-After={delay}s, attempt={attempt}"
                             )
                         else:
-                            delay = self._calculate_backoff(attempt)
+                            delay = self.calculate_backoff(attempt)
                             self.logger.warning(
                                 f"HTTP 429, backoff={delay:.2f}s, attempt={attempt}"
                             )
 
+                        GRAPHQL_RETRIES.inc(operation=operation, reason="rate_limited")
+                        THROTTLE_WAIT_SECONDS.inc(
+                            delay, operation=operation, source="http_429"
+                        )
                         await asyncio.sleep(delay)
                         continue
 
@@ -292,10 +501,11 @@ class ShopifyBulkClient:
                                 f"HTTP {resp.status} after {attempt} attempts: {response_text[:200]}"
                             )
 
-                        delay = self._calculate_backoff(attempt)
+                        delay = self.calculate_backoff(attempt)
                         self.logger.warning(
                             f"HTTP {resp.status}, backoff={delay:.2f}s, attempt={attempt}"
                         )
+                        GRAPHQL_RETRIES.inc(operation=operation, reason="server_error")
                         await asyncio.sleep(delay)
                         continue
 
@@ -308,6 +518,24 @@ class ShopifyBulkClient:
                     # Success: parse JSON
                     resp.raise_for_status()
                     json_data = await resp.json()
+                    await self.throttle.record(query, json_data)
+
+                    # Cost-limit rejections arrive as HTTP 200 with THROTTLED errors
+                    if self._is_throttled(json_data) and retry:
+                        if attempt > self.MAX_RETRY_ATTEMPTS:
+                            raise ShopifyBulkApiError(
+                                f"GraphQL THROTTLED after {attempt} attempts"
+                            )
+                        delay = self.calculate_backoff(attempt)
+                        self.logger.warning(
+                            f"GraphQL THROTTLED, backoff={delay:.2f}s, attempt={attempt}"
+                        )
+                        GRAPHQL_RETRIES.inc(operation=operation, reason="throttled")
+                        THROTTLE_WAIT_SECONDS.inc(
+                            delay, operation=operation, source="throttled"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
 
                     # CRITICAL BUG FIX: Check root-level errors BEFORE accessing data
                     if "errors" in json_data and json_data["errors"]:
@@ -321,19 +549,38 @@ class ShopifyBulkClient:
                     return json_data
 
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if response_status is None:
+                    GRAPHQL_REQUEST_SECONDS.observe(
+                        monotonic() - request_started,
+                        operation=operation,
+                        status="network_error",
+                    )
                 if not retry or attempt > self.MAX_RETRY_ATTEMPTS:
                     raise ShopifyBulkApiError(
                         f"Network error after {attempt} attempts: {e}"
                     )
 
-                delay = self._calculate_backoff(attempt)
+                delay = self.calculate_backoff(attempt)
                 self.logger.warning(
                     f"Network error: {e}, backoff={delay:.2f}s, attempt={attempt}"
                 )
+                GRAPHQL_RETRIES.inc(operation=operation, reason="network_error")
                 await asyncio.sleep(delay)
                 continue
 
-    def _calculate_backoff(self, attempt: int) -> float:
+    @staticmethod
+    def _is_throttled(json_data: dict) -> bool:
+        """Check whether root-level errors report a THROTTLED cost rejection."""
+        errors = json_data.get("errors")
+        if not isinstance(errors, list):
+            return False
+        return any(
+            isinstance(e, dict)
+            and (e.get("extensions") or {}).get("code") == "THROTTLED"
+            for e in errors
+        )
+
+    def calculate_backoff(self, attempt: int) -> float:
         """Calculate exponential backoff with jitter.
 
         Args:
@@ -349,26 +596,24 @@ class ShopifyBulkClient:
         jitter = random.uniform(0, self.RETRY_JITTER_MS / 1000.0)
         return delay + jitter
 
-    async def _refresh_lock_ttl(self) -> None:
-        """Extend Redis lock TTL to prevent expiry during long-running polls."""
-        if self._current_lock:
-            try:
-                await self._current_lock.reacquire()
-                self.logger.debug(
-                    f"Refreshed bulk lock TTL for shop={self.shop_domain}"
-                )
-            except Exception as e:
-                self.logger.error(f"Failed to refresh lock TTL: {e}")
-
     async def _release_lock_best_effort(self) -> None:
         """Release Redis lock with error suppression."""
+        if self._lease is not None:
+            await self._lease.stop()
+            self._lease = None
         if self._current_lock:
             try:
-                await self._current_lock.release()
+                if self.job_queue is not None:
+                    await self.job_queue.release(self._current_lock)
+                else:
+                    await self._current_lock.release()
                 self.logger.info(f"Released bulk lock for shop={self.shop_domain}")
             except Exception as e:
                 self.logger.error(f"Failed to release lock: {e}")
             finally:
+                BULK_LOCK_HOLD_SECONDS.observe(
+                    monotonic() - self._lock_acquired_at, lock="query"
+                )
                 self._current_lock = None
 
     @staticmethod
@@ -0,0 +1,211 @@
+"""Resumable download of Shopify bulk operation result files.
+
+Result files for large catalogs can be hundreds of MB. Downloads are spooled
+to a ``.part`` file with a byte-offset checkpoint next to it; after a network
+error the download resumes with an HTTP ``Range`` request instead of
+re-running the bulk query.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+import aiofiles.os
+import aiohttp
+
+from .exceptions import ShopifyBulkApiError
+
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class BulkResultDownloader:
+    """Download bulk result URLs to disk, resuming after dropped connections."""
+
+    CHUNK_SIZE_BYTES = 256 * 1024
+    CHECKPOINT_INTERVAL_BYTES = 8 * 1024 * 1024
+    MAX_ATTEMPTS = 8
+    RETRY_BASE_DELAY = 0.5  # seconds
+    RETRY_MAX_DELAY = 30.0  # seconds
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_attempts: int = MAX_ATTEMPTS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize downloader.
+
+        Args:
+            session: Injected aiohttp ClientSession
+            max_attempts: Connection attempts before giving up
+            logger: Optional logger instance
+        """
+        self.session = session
+        self.max_attempts = max_attempts
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def download(self, url: str, dest_path: str | Path) -> Path:
+        """Download ``url`` to ``dest_path``, resuming from any checkpoint.
+
+        Args:
+            url: Bulk operation result URL
+            dest_path: Final file path (written atomically on completion)
+
+        Returns:
+            Path of the completed file
+
+        Raises:
+            ShopifyBulkApiError: On non-retryable HTTP status or when
+                attempts are exhausted
+        """
+        dest = Path(dest_path)
+        part_path = dest.with_name(dest.name + ".part")
+        checkpoint_path = dest.with_name(dest.name + ".ckpt")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        offset = self._load_checkpoint(checkpoint_path, part_path, url)
+        total: Optional[int] = None
+        attempt = 0
+
+        while True:
+            attempt += 1
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+            try:
+                async with self.session.get(url, headers=headers) as resp:
+                    if resp.status == 416 and offset:
+                        # Nothing left to fetch: the previous attempt got it all
+                        total = self._parse_total(resp.headers.get("Content-Range"))
+                        if total is None or total == offset:
+                            break
+
+                    if resp.status == 200 and offset:
+                        self.logger.warning(
+                            "Server ignored Range header, restarting download at 0"
+                        )
+                        offset = 0
+                    elif resp.status == 206:
+                        start = self._parse_start(resp.headers.get("Content-Range"))
+                        if start != offset:
+                            raise ShopifyBulkApiError(
+                                f"Unexpected Content-Range start {start}, expected {offset}"
+                            )
+                    elif resp.status != 200:
+                        body = await resp.text()
+                        raise ShopifyBulkApiError(
+                            f"Bulk result download failed: HTTP {resp.status}, "
+                            f"body={body[:200]}"
+                        )
+
+                    if resp.status == 206:
+                        total = self._parse_total(resp.headers.get("Content-Range"))
+                    elif resp.content_length is not None:
+                        total = resp.content_length
+
+                    offset = await self._write_body(
+                        resp, part_path, checkpoint_path, url, offset
+                    )
+
+                if total is not None and offset != total:
+                    raise aiohttp.ClientPayloadError(
+                        f"Download ended at byte {offset} of {total}"
+                    )
+                break
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                # Bytes already flushed to the spool file are the resume point
+                if part_path.exists():
+                    offset = part_path.stat().st_size
+                self._write_checkpoint(checkpoint_path, url, offset)
+                if attempt >= self.max_attempts:
+                    raise ShopifyBulkApiError(
+                        f"Bulk result download failed after {attempt} attempts "
+                        f"at byte {offset}: {exc}"
+                    )
+                delay = min(
+                    self.RETRY_BASE_DELAY * (2 ** (attempt - 1)), self.RETRY_MAX_DELAY
+                )
+                delay += random.uniform(0, 0.25)
+                self.logger.warning(
+                    f"Bulk result download interrupted at byte {offset}: {exc}, "
+                    f"resuming in {delay:.2f}s (attempt={attempt})"
+                )
+                await asyncio.sleep(delay)
+
+        os.replace(part_path, dest)
+        await self._remove_best_effort(checkpoint_path)
+        self.logger.info(f"Downloaded bulk result: {dest} ({offset} bytes)")
+        return dest
+
+    async def _write_body(
+        self,
+        resp: aiohttp.ClientResponse,
+        part_path: Path,
+        checkpoint_path: Path,
+        url: str,
+        offset: int,
+    ) -> int:
+        """Append response body to the spool file, checkpointing periodically."""
+        mode = "r+b" if offset and part_path.exists() else "wb"
+        last_checkpoint = offset
+
+        async with aiofiles.open(part_path, mode=mode) as f:
+            await f.seek(offset)
+            await f.truncate()
+            try:
+                async for chunk in resp.content.iter_chunked(self.CHUNK_SIZE_BYTES):
+                    await f.write(chunk)
+                    offset += len(chunk)
+                    if offset - last_checkpoint >= self.CHECKPOINT_INTERVAL_BYTES:
+                        await f.flush()
+                        self._write_checkpoint(checkpoint_path, url, offset)
+                        last_checkpoint = offset
+            finally:
+                await f.flush()
+
+        return offset
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: Path, part_path: Path, url: str) -> int:
+        """Return resume offset from a previous run of the same URL."""
+        if not checkpoint_path.exists() or not part_path.exists():
+            return 0
+        try:
+            data = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        if data.get("url") != url:
+            return 0
+        return min(int(data.get("offset", 0)), part_path.stat().st_size)
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_path: Path, url: str, offset: int) -> None:
+        checkpoint_path.write_text(
+            json.dumps({"url": url, "offset": offset}), encoding="utf-8"
+        )
+
+    @staticmethod
+    def _parse_start(content_range: Optional[str]) -> Optional[int]:
+        match = _CONTENT_RANGE_RE.match(content_range or "")
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _parse_total(content_range: Optional[str]) -> Optional[int]:
+        if not content_range:
+            return None
+        _, _, total = content_range.rpartition("/")
+        return int(total) if total.isdigit() else None
+
+    async def _remove_best_effort(self, path: Path) -> None:
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            return
+        except Exception as exc:
+            self.logger.error(f"Failed to remove download checkpoint: {exc}")
@@ -1,9 +1,12 @@
 """Async Shopify Bulk Mutation Client with Staged Upload workflow."""
+import asyncio
 import json
 import logging
 import os
 import tempfile
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from time import monotonic
 from typing import Optional
 
 import aiofiles
@@ -15,35 +18,67 @@ from redis.asyncio.lock import Lock as AsyncRedisLock
 from ..schemas.bulk_ops import (
     BulkOperation,
     BulkOperationRef,
+    MutationOutcomeSummary,
     ProductSEO,
+    ProductState,
     ProductUpdateInput,
     ProductUpdateSpec,
     StagedTarget,
     StagedUploadParameter,
 )
+from ..telemetry import tracing
+from ..telemetry.metrics import (
+    BULK_LOCK_HOLD_SECONDS,
+    BULK_LOCK_WAIT_SECONDS,
+    BULK_PHASE_SECONDS,
+)
 from .bulk_client import ShopifyBulkClient
+from .bulk_notifier import BulkOperationNotifier
+from .bulk_download import BulkResultDownloader
+from .bulk_reader import iter_bulk_file
+from .bulk_status import BulkStatusMultiplexer
 from .exceptions import (
     ShopifyBulkApiError,
     ShopifyBulkGraphQLError,
     ShopifyBulkMutationLockedError,
+    ShopifyBulkQueueTimeoutError,
     ShopifyStagedUploadError,
 )
 from .graphql_strings import (
     MUTATION_BULK_OPERATION_RUN_MUTATION,
     MUTATION_PRODUCT_UPDATE,
     MUTATION_STAGED_UPLOADS_CREATE,
+    QUERY_PRODUCTS_BY_IDS,
     QUERY_PRODUCTS_CURRENT_STATE,
 )
+from .hydration_singleflight import HydrationSingleFlight
+from .job_queue import ShopifyBulkJobQueue
+from .lock_lease import LockLease
+from .mutation_outcomes import MutationOutcomeStore, diff_result_file
+from .product_mirror import ProductMirror, product_state_from_node
+from .throttle import ShopifyCostThrottle
 
 
 logger = logging.getLogger(__name__)
 
 
 class ShopifyBulkMutationClient:
-    """Async client for Shopify bulk mutations with safe tag hydration."""
+    """Async client for Shopify bulk mutations with safe tag hydration.
+
+    ``run_product_update_bulk`` runs a whole update as one operation. The
+    steps it is built from (lock, hydrate, merge, stage, submit, collect
+    outcomes) are public so ``ProductUpdateRunner`` can shard and retry.
+    """
 
-    MUTATION_LOCK_TTL_SECONDS = 1800  # 30 minutes
+    MUTATION_LOCK_TTL_SECONDS = LockLease.TTL_SECONDS  # renewed by the lease heartbeat
     FILE_CHUNK_SIZE_BYTES = 64 * 1024
+    STREAM_CHUNK_SIZE_BYTES = 1024 * 1024
+    UPLOAD_MAX_ATTEMPTS = 3
+    MIRROR_MAX_AGE_SECONDS = 300  # 5 minutes
+    NODES_HYDRATION_THRESHOLD = 500  # above this, a bulk export is cheaper
+    NODES_PAGE_SIZE = 250  # Shopify nodes(ids:) limit
+    NODES_CONCURRENCY = 4
+    NO_CHANGES_OP_ID = "no-changes-no-op"  # nothing left to write after hydration
 
     def __init__(
         self,
@@ -55,6 +90,16 @@ class ShopifyBulkMutationClient:
         bulk_client: Optional[ShopifyBulkClient] = None,
         lock_ttl_seconds: int = MUTATION_LOCK_TTL_SECONDS,
         logger_instance: Optional[logging.Logger] = None,
+        throttle: Optional[ShopifyCostThrottle] = None,
+        notifier: Optional[BulkOperationNotifier] = None,
+        spool_dir: Optional[str] = None,
+        job_queue: Optional[ShopifyBulkJobQueue] = None,
+        product_mirror: Optional[ProductMirror] = None,
+        mirror_max_age_seconds: float = MIRROR_MAX_AGE_SECONDS,
+        nodes_hydration_threshold: int = NODES_HYDRATION_THRESHOLD,
+        outcome_store: Optional[MutationOutcomeStore] = None,
+        hydration_flight: Optional[HydrationSingleFlight] = None,
+        status_multiplexer: Optional[BulkStatusMultiplexer] = None,
     ):
         """Initialize Bulk Mutation Client.
 
@@ -65,8 +110,26 @@ class ShopifyBulkMutationClient:
             session: Injected aiohttp ClientSession
             redis: Injected redis.asyncio.Redis client
             bulk_client: Optional Phase 1 client (created if None)
-            lock_ttl_seconds: Redis lock TTL
+            lock_ttl_seconds: Mutation lock lease TTL; a crashed holder
+                frees the shop after this long
             logger_instance: Optional logger
+            throttle: Optional shared cost governor for the created bulk client
+            notifier: Optional webhook notifier for the created bulk client
+            spool_dir: Directory for downloaded bulk results (temp dir if None)
+            job_queue: Optional per-shop FIFO queue shared with the bulk
+                client; jobs wait for locks instead of failing fast
+            product_mirror: Optional seeded local product state mirror used
+                instead of a full-catalog export for safe-write hydration
+            mirror_max_age_seconds: Mirror staleness that triggers an
+                incremental refresh before it is read
+            nodes_hydration_threshold: Largest batch hydrated with targeted
+                nodes(ids:) queries; larger batches use a bulk export
+            outcome_store: Optional store that per-product results are
+                ingested into once each operation finishes
+            hydration_flight: Optional single-flight shared by concurrent
+                jobs so one full-catalog export serves all of them
+            status_multiplexer: Optional shared per-shop status poller for
+                the created bulk client
         """
         self.shop_domain = shop_domain
         self._access_token = access_token
@@ -75,6 +138,13 @@ class ShopifyBulkMutationClient:
         self.redis = redis
         self.lock_ttl_seconds = lock_ttl_seconds
         self.logger = logger_instance or logger
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+        self.job_queue = job_queue
+        self.product_mirror = product_mirror
+        self.mirror_max_age_seconds = mirror_max_age_seconds
+        self.nodes_hydration_threshold = nodes_hydration_threshold
+        self.outcome_store = outcome_store
+        self.hydration_flight = hydration_flight
 
         # Reuse or create Phase 1 client
         self.bulk_client = bulk_client or ShopifyBulkClient(
@@ -84,37 +154,51 @@ class ShopifyBulkMutationClient:
             session=session,
             redis=redis,
             logger=self.logger,
+            throttle=throttle,
+            notifier=notifier,
+            job_queue=job_queue,
+            status_multiplexer=status_multiplexer,
         )
 
         self._mutation_lock_key = f"apeg:shopify:bulk_mutation_lock:{shop_domain}"
         self._current_lock: Optional[AsyncRedisLock] = None
+        self._lock_acquired_at = 0.0
+        self._lease: Optional[LockLease] = None
 
     async def run_product_update_bulk(
         self,
         run_id: str,
         updates: list[ProductUpdateSpec],
         dry_run: bool = False,
+        priority: int = 0,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> BulkOperationRef:
         """Execute bulk product update with safe-write pipeline.
 
         Pipeline:
         1. Acquire Redis lock
         2. Fetch current product state
-        3. Merge tags (safe-write)
-        4. Generate JSONL
-        5. Staged upload dance
-        6. Trigger bulk mutation
+        3. Merge tags (safe-write) and drop products already up to date
+        4. Stream JSONL straight into the staged upload
+        5. Trigger bulk mutation
+
+        If every product is already up to date nothing is submitted: the
+        lock is released and ``bulk_op_id`` is ``NO_CHANGES_OP_ID``.
 
         Args:
             run_id: Client identifier for idempotency
             updates: Product update specifications
             dry_run: If true, log actions without executing
+            priority: Queue priority (higher first) when a job queue is set
+            on_stage: Optional async callback invoked with "hydrating" and
+                "uploading" as the pipeline reaches those steps
 
         Returns:
-            BulkOperationRef with bulk_op_id
+            BulkOperationRef with bulk_op_id and the skipped product IDs
 
         Raises:
-            ShopifyBulkMutationLockedError: If lock unavailable
+            ShopifyBulkMutationLockedError: If lock unavailable (or the queue
+                wait timed out)
             ShopifyBulkGraphQLError: On GraphQL errors
             ShopifyStagedUploadError: On upload failure
         """
@@ -126,39 +210,52 @@ class ShopifyBulkMutationClient:
                 shop_domain=self.shop_domain,
             )
 
-        lock = AsyncRedisLock(
-            self.redis,
-            name=self._mutation_lock_key,
-            timeout=self.lock_ttl_seconds,
-            blocking=False,
-        )
-
-        acquired = await lock.acquire(blocking=False)
-        if not acquired:
-            raise ShopifyBulkMutationLockedError(
-                self.shop_domain, self._mutation_lock_key
-            )
-
-        self._current_lock = lock
-        self.logger.info(f"Acquired mutation lock: run_id={run_id}")
-
-        jsonl_path: Optional[str] = None
-        try:
-            product_ids = [spec.product_id for spec in updates]
-            current_tags_map = await self.fetch_current_tags(product_ids)
-
-            merged_updates = self._merge_product_updates(updates, current_tags_map)
-            jsonl_path = await self._generate_mutation_jsonl(merged_updates)
+        with tracing.span(
+            "shopify.run_product_update_bulk",
+            **{"apeg.run_id": run_id, "shopify.products": len(updates)},
+        ) as span:
+            await self.acquire_mutation_lock(run_id, priority)
 
             try:
-                staged_target = await self._staged_uploads_create()
-                await self._upload_jsonl_to_staged_target(staged_target, jsonl_path)
-
-                bulk_op = await self._bulk_operation_run_mutation(
+                if on_stage is not None:
+                    await on_stage("hydrating")
+                product_ids = [spec.product_id for spec in updates]
+                with BULK_PHASE_SECONDS.time(operation_type="MUTATION", phase="hydrate"):
+                    current_states = await self.fetch_current_state(product_ids)
+
+                merged_updates, unchanged = self.drop_unchanged_updates(
+                    self.merge_product_updates(
+                        updates,
+                        {pid: state.tags for pid, state in current_states.items()},
+                    ),
+                    current_states,
+                )
+                if unchanged:
+                    self.logger.info(
+                        "Skipping %s unchanged products: run_id=%s",
+                        len(unchanged),
+                        run_id,
+                    )
+                if not merged_updates:
+                    await self.release_mutation_lock()
+                    return BulkOperationRef(
+                        bulk_op_id=self.NO_CHANGES_OP_ID,
+                        run_id=run_id,
+                        shop_domain=self.shop_domain,
+                        skipped_product_ids=unchanged,
+                    )
+
+                if on_stage is not None:
+                    await on_stage("uploading")
+                staged_target = await self.stage_upload(merged_updates)
+
+                bulk_op = await self.bulk_operation_run_mutation(
                     mutation=MUTATION_PRODUCT_UPDATE,
                     staged_upload_path=staged_target.staged_upload_path,
                     client_identifier=f"apeg-phase2:{run_id}",
                 )
+                span.set_attribute("shopify.bulk_op_id", bulk_op.id)
+                await self.invalidate_mirror(update.id for update in merged_updates)
 
                 self.logger.info(
                     "Submitted bulk mutation: op_id=%s, run_id=%s, updates=%s",
@@ -171,14 +268,12 @@ class ShopifyBulkMutationClient:
                     bulk_op_id=bulk_op.id,
                     run_id=run_id,
                     shop_domain=self.shop_domain,
+                    skipped_product_ids=unchanged,
                 )
-            finally:
-                if jsonl_path:
-                    await self._remove_file_best_effort(jsonl_path)
 
-        except Exception:
-            await self._release_lock_best_effort()
-            raise
+            except Exception:
+                await self.release_mutation_lock()
+                raise
 
     async def poll_to_terminal(
         self,
@@ -187,51 +282,248 @@ class ShopifyBulkMutationClient:
     ) -> BulkOperation:
         """Poll bulk operation until terminal state.
 
-        Uses Phase 1 client for polling. Releases lock when complete.
+        Uses Phase 1 client for polling. Releases lock when complete. A run
+        that had nothing to write (``NO_CHANGES_OP_ID``) is reported as a
+        completed operation with no objects.
         """
+        if bulk_op_id == self.NO_CHANGES_OP_ID:
+            return BulkOperation(id=bulk_op_id, status="COMPLETED", object_count=0)
         try:
             return await self.bulk_client.poll_status(
                 operation_id=bulk_op_id,
                 poll_interval=5.0,
                 timeout=timeout_s,
+                operation_type="MUTATION",
             )
         finally:
-            await self._release_lock_best_effort()
+            await self.release_mutation_lock()
+
+    async def ingest_outcomes(
+        self,
+        operation: BulkOperation,
+        run_id: str,
+        product_ids: Optional[list[str]] = None,
+    ) -> Optional[MutationOutcomeSummary]:
+        """Stream a finished operation's result file into the outcome store.
+
+        Best-effort: failures are logged, never raised, so a result file
+        problem cannot fail an operation that Shopify already applied.
+
+        Args:
+            operation: Terminal bulk operation (``url`` or ``partial_data_url``)
+            run_id: Client run identifier
+            product_ids: Submitted product IDs in JSONL line order, if known
+
+        Returns:
+            Outcome summary, or None if no store, no result file, or failure
+        """
+        if self.outcome_store is None:
+            return None
+        return await self.collect_outcomes(operation, run_id, product_ids)
+
+    async def collect_outcomes(
+        self,
+        operation: BulkOperation,
+        run_id: str,
+        product_ids: Optional[list[str]] = None,
+    ) -> Optional[MutationOutcomeSummary]:
+        """Diff a result file against its input, persisting it if a store is set.
+
+        Args:
+            operation: Finished operation with a result or partial-data URL
+            run_id: Run the operation belongs to
+            product_ids: Products submitted, in line order
+
+        Returns:
+            Outcome summary, or None if there is no result file or it failed
+        """
+        url = operation.url or operation.partial_data_url
+        if not url:
+            return None
+        try:
+            with BULK_PHASE_SECONDS.time(
+                operation_type="MUTATION", phase="outcomes"
+            ), tracing.span(
+                "shopify.collect_outcomes", **{"shopify.bulk_op_id": operation.id}
+            ):
+                if self.outcome_store is not None:
+                    return await self.outcome_store.ingest(
+                        self.session,
+                        url,
+                        bulk_op_id=operation.id,
+                        run_id=run_id,
+                        shop_domain=self.shop_domain,
+                        product_ids=product_ids,
+                    )
+                return await diff_result_file(
+                    self.session, url, operation.id, product_ids or []
+                )
+        except Exception as exc:
+            self.logger.error(f"Failed to ingest outcomes for {operation.id}: {exc}")
+            return None
 
     async def fetch_current_tags(
         self,
         product_ids: list[str],
     ) -> dict[str, list[str]]:
-        """Fetch current tags for safe-write merge (Phase 1 bulk query)."""
+        """Fetch current tags for safe-write merge (see ``fetch_current_state``)."""
+        states = await self.fetch_current_state(product_ids)
+        return {pid: state.tags for pid, state in states.items()}
+
+    async def fetch_current_state(
+        self,
+        product_ids: list[str],
+    ) -> dict[str, ProductState]:
+        """Fetch current tags and SEO for safe-write merge.
+
+        Reads the local product mirror when one is seeded (refreshing it
+        first if stale). Remaining products are hydrated with targeted
+        nodes(ids:) queries when there are at most
+        ``nodes_hydration_threshold`` of them, otherwise via a Phase 1 bulk
+        query, which holds the shop's bulk query lock while it runs.
+        """
         if not product_ids:
             return {}
 
-        target_ids = set(product_ids)
+        with tracing.span(
+            "shopify.fetch_current_state", **{"shopify.products": len(product_ids)}
+        ) as span:
+            target_ids = set(product_ids)
+            states: dict[str, ProductState] = {}
 
-        operation = await self.bulk_client.submit_job(QUERY_PRODUCTS_CURRENT_STATE)
-        result = await self.bulk_client.poll_status(operation.id)
+            mirror = self.product_mirror
+            # SQLite blocks; keep it off the event loop
+            if mirror is not None and await asyncio.to_thread(lambda: mirror.is_seeded):
+                if not await asyncio.to_thread(
+                    mirror.is_fresh, self.mirror_max_age_seconds
+                ):
+                    await mirror.refresh_incremental(self.bulk_client)
 
-        tags_map: dict[str, list[str]] = {}
-        async with self.session.get(result.url) as resp:
-            resp.raise_for_status()
-            async for raw_line in resp.content:
-                line = raw_line.decode("utf-8").strip()
-                if not line:
-                    continue
+                states = await asyncio.to_thread(mirror.get_states, target_ids)
+                target_ids -= states.keys()
 
-                node = json.loads(line)
-                product_id = node.get("id")
-                if product_id and product_id in target_ids:
-                    tags_map[product_id] = node.get("tags", [])
+                self.logger.info(
+                    "Hydrated %s products from mirror, %s missing",
+                    len(states),
+                    len(target_ids),
+                )
+                if not target_ids:
+                    return states
 
-        return tags_map
+            if len(target_ids) <= self.nodes_hydration_threshold:
+                strategy = "nodes"
+                fetched = await self._fetch_state_via_nodes(target_ids)
+            else:
+                strategy = "bulk"
+                fetched = await self._fetch_state_via_bulk_query(target_ids)
+            span.set_attribute("shopify.hydration_strategy", strategy)
+
+            self.logger.info(
+                "Hydrated %s products via %s (threshold=%s)",
+                len(target_ids),
+                strategy,
+                self.nodes_hydration_threshold,
+            )
+            states.update(fetched)
+            return states
 
-    def _merge_product_updates(
+    async def invalidate_mirror(self, product_ids: Iterable[str]) -> None:
+        """Drop mirrored state for products this client just wrote.
+
+        Args:
+            product_ids: Products submitted for update
+        """
+        if self.product_mirror is None:
+            return
+        try:
+            await asyncio.to_thread(self.product_mirror.invalidate, list(product_ids))
+        except Exception as exc:
+            self.logger.warning(f"Failed to invalidate product mirror rows: {exc}")
+
+    async def _fetch_state_via_nodes(
+        self,
+        target_ids: set[str],
+    ) -> dict[str, ProductState]:
+        """Fetch state with concurrent, cost-throttled nodes(ids:) queries."""
+        ids = sorted(target_ids)
+        pages = [
+            ids[i : i + self.NODES_PAGE_SIZE]
+            for i in range(0, len(ids), self.NODES_PAGE_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(self.NODES_CONCURRENCY)
+
+        async def fetch_page(page: list[str]) -> list[dict]:
+            async with semaphore:
+                resp_data = await self.bulk_client.post_graphql(
+                    {"query": QUERY_PRODUCTS_BY_IDS, "variables": {"ids": page}}
+                )
+            return resp_data["data"]["nodes"]
+
+        states: dict[str, ProductState] = {}
+        for nodes in await asyncio.gather(*(fetch_page(page) for page in pages)):
+            # Unknown or deleted IDs come back as null
+            for node in nodes:
+                if node and node.get("id"):
+                    states[node["id"]] = product_state_from_node(node)
+
+        return states
+
+    async def _fetch_state_via_bulk_query(
+        self,
+        target_ids: set[str],
+    ) -> dict[str, ProductState]:
+        """Export all products and keep state for ``target_ids``.
+
+        With a hydration single-flight, concurrent callers for this shop
+        share one export (and reuse its snapshot for a few seconds).
+        """
+        with tracing.span("shopify.catalog_bulk_query"):
+            if self.hydration_flight is not None:
+                return await self.hydration_flight.get_states(
+                    QUERY_PRODUCTS_CURRENT_STATE, target_ids, self._iter_catalog_states
+                )
+
+            return {
+                state.id: state
+                async for state in self._iter_catalog_states()
+                if state.id in target_ids
+            }
+
+    async def _iter_catalog_states(self) -> AsyncIterator[ProductState]:
+        """Run a Phase 1 export of every product and yield its state."""
+        operation = await self.bulk_client.submit_job(QUERY_PRODUCTS_CURRENT_STATE)
+        result = await self.bulk_client.poll_status(operation.id)
+
+        result_path = os.path.join(
+            self.spool_dir, f"apeg_bulk_result_{uuid.uuid4().hex}.jsonl"
+        )
+        try:
+            await BulkResultDownloader(self.session, logger=self.logger).download(
+                result.url, result_path
+            )
+            async for node in iter_bulk_file(
+                result_path,
+                projections={"Product": ("tags", "seo")},
+            ):
+                if node.get("id"):
+                    yield product_state_from_node(node)
+        finally:
+            await self._remove_file_best_effort(result_path)
+
+    def merge_product_updates(
         self,
         updates: list[ProductUpdateSpec],
         current_tags_map: dict[str, list[str]],
     ) -> list[ProductUpdateInput]:
-        """Merge current tags with desired updates (safe-write pattern)."""
+        """Merge current tags with desired updates (safe-write pattern).
+
+        Args:
+            updates: Requested changes
+            current_tags_map: Current tags by product ID
+
+        Returns:
+            Full update inputs, one per spec
+        """
         merged: list[ProductUpdateInput] = []
 
         for spec in updates:
@@ -254,19 +546,80 @@ class ShopifyBulkMutationClient:
 
         return merged
 
+    def drop_unchanged_updates(
+        self,
+        merged: list[ProductUpdateInput],
+        current_states: dict[str, ProductState],
+    ) -> tuple[list[ProductUpdateInput], list[str]]:
+        """Strip fields that already match current state; drop empty updates.
+
+        Tags compare as sets. SEO fields compare individually, and only
+        when the current SEO is known (the mirror stores None when it is
+        not), so an unknown value is always written.
+
+        Args:
+            merged: Update inputs from ``merge_product_updates``
+            current_states: Current product state by ID
+
+        Returns:
+            (updates still to write, IDs of products left unchanged)
+        """
+        changed: list[ProductUpdateInput] = []
+        unchanged: list[str] = []
+
+        for update in merged:
+            state = current_states.get(update.id)
+            if state is None:
+                changed.append(update)
+                continue
+
+            tags = update.tags
+            if tags is not None and set(tags) == set(state.tags):
+                tags = None
+
+            seo = update.seo
+            if seo is not None and state.seo is not None:
+                wanted = seo.model_dump(exclude_none=True)
+                current = state.seo.model_dump()
+                if all(current.get(field) == value for field, value in wanted.items()):
+                    seo = None
+
+            if tags is None and seo is None:
+                unchanged.append(update.id)
+            else:
+                changed.append(update.model_copy(update={"tags": tags, "seo": seo}))
+
+        return changed, unchanged
+
+    async def stage_upload(self, updates: list[ProductUpdateInput]) -> StagedTarget:
+        """Create a staged upload target and stream ``updates`` into it.
+
+        Args:
+            updates: Lines of the bulk mutation
+
+        Returns:
+            Staged target holding the uploaded JSONL
+        """
+        with BULK_PHASE_SECONDS.time(
+            operation_type="MUTATION", phase="upload"
+        ), tracing.span("shopify.staged_upload", **{"shopify.lines": len(updates)}):
+            staged_target = await self._staged_uploads_create()
+            await self._upload_updates_to_staged_target(staged_target, updates)
+        return staged_target
+
     async def _generate_mutation_jsonl(
         self,
         updates: list[ProductUpdateInput],
     ) -> str:
-        """Generate JSONL file for bulk mutation variables."""
+        """Spill JSONL for bulk mutation variables to a temp file (upload replay)."""
         temp_dir = tempfile.gettempdir()
         filename = f"apeg_bulk_mutation_{uuid.uuid4().hex}.jsonl"
         temp_path = os.path.join(temp_dir, filename)
 
-        async with aiofiles.open(temp_path, mode="w", encoding="utf-8") as f:
-            for update in updates:
-                jsonl_line = json.dumps(update.to_jsonl_dict(), ensure_ascii=False)
-                await f.write(jsonl_line + "\n")
+        with tracing.span("shopify.generate_jsonl", **{"shopify.lines": len(updates)}):
+            async with aiofiles.open(temp_path, mode="wb") as f:
+                for chunk in self._serialize_jsonl_chunks(updates):
+                    await f.write(chunk)
 
         self.logger.debug(
             "Generated JSONL: %s, lines=%s",
@@ -288,7 +641,7 @@ class ShopifyBulkMutationClient:
             ]
         }
 
-        resp_data = await self.bulk_client._post_graphql(
+        resp_data = await self.bulk_client.post_graphql(
             {"query": MUTATION_STAGED_UPLOADS_CREATE, "variables": variables}
         )
 
@@ -313,21 +666,83 @@ class ShopifyBulkMutationClient:
             ],
         )
 
+    async def _upload_updates_to_staged_target(
+        self,
+        staged_target: StagedTarget,
+        updates: list[ProductUpdateInput],
+    ) -> None:
+        """Step B: Stream JSONL from memory into the staged upload.
+
+        The first attempt serializes updates into large chunks fed directly
+        into the multipart body, with no temp file. Only if that attempt
+        fails with a retryable error (network, HTTP 429/5xx) is the JSONL
+        spilled to disk once and replayed from the file.
+        """
+        try:
+            await self._post_staged_upload(
+                staged_target, self._iter_jsonl_chunks(updates)
+            )
+            return
+        except (aiohttp.ClientError, asyncio.TimeoutError, ShopifyStagedUploadError) as exc:
+            if not self._is_retryable_upload_error(exc) or self.UPLOAD_MAX_ATTEMPTS < 2:
+                raise
+            self.logger.warning(
+                "Streamed staged upload failed (%s); spilling JSONL for replay", exc
+            )
+
+        jsonl_path = await self._generate_mutation_jsonl(updates)
+        try:
+            attempt = 1
+            while True:
+                attempt += 1
+                await asyncio.sleep(self.bulk_client.calculate_backoff(attempt - 1))
+                try:
+                    await self._upload_jsonl_to_staged_target(staged_target, jsonl_path)
+                    return
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    ShopifyStagedUploadError,
+                ) as exc:
+                    if (
+                        not self._is_retryable_upload_error(exc)
+                        or attempt >= self.UPLOAD_MAX_ATTEMPTS
+                    ):
+                        raise
+                    self.logger.warning(
+                        "Staged upload replay failed: attempt=%s, error=%s", attempt, exc
+                    )
+        finally:
+            await self._remove_file_best_effort(jsonl_path)
+
+    @staticmethod
+    def _is_retryable_upload_error(exc: Exception) -> bool:
+        if isinstance(exc, ShopifyStagedUploadError):
+            return exc.status == 429 or exc.status >= 500
+        return True
+
     async def _upload_jsonl_to_staged_target(
         self,
         staged_target: StagedTarget,
         jsonl_path: str,
     ) -> None:
-        """Step B: Upload JSONL via multipart (CRITICAL: file field LAST)."""
+        """Upload a JSONL file via multipart (spill/replay path)."""
+        await self._post_staged_upload(staged_target, self._iter_file_chunks(jsonl_path))
+
+    async def _post_staged_upload(
+        self,
+        staged_target: StagedTarget,
+        body_chunks: AsyncIterator[bytes],
+    ) -> None:
+        """POST multipart form to the staged target (CRITICAL: file field LAST)."""
         form = aiohttp.FormData()
 
         for param in staged_target.parameters:
             form.add_field(param.name, param.value)
 
-        file_iter = self._iter_file_chunks(jsonl_path)
         form.add_field(  # Add file field LAST (mandatory ordering)
             name="file",
-            value=file_iter,
+            value=body_chunks,
             filename="bulk_op_vars.jsonl",
             content_type="text/jsonl",
         )
@@ -339,31 +754,54 @@ class ShopifyBulkMutationClient:
 
             self.logger.info("Uploaded JSONL: status=%s", resp.status)
 
-    async def _bulk_operation_run_mutation(
+    async def bulk_operation_run_mutation(
         self,
         mutation: str,
         staged_upload_path: str,
         client_identifier: str,
     ) -> BulkOperation:
-        """Step C: Trigger bulk mutation run."""
+        """Step C: Trigger bulk mutation run.
+
+        Args:
+            mutation: GraphQL mutation run for each line
+            staged_upload_path: Key of the staged upload
+            client_identifier: Identifier reported back on the operation
+
+        Returns:
+            Submitted operation
+
+        Raises:
+            ShopifyBulkLeaseLostError: If the mutation lock is no longer held
+        """
+        if self._lease is not None:
+            await self._lease.check()
+
         variables = {
             "mutation": mutation,
             "stagedUploadPath": staged_upload_path,
             "clientIdentifier": client_identifier,
         }
 
-        resp_data = await self.bulk_client._post_graphql(
-            {"query": MUTATION_BULK_OPERATION_RUN_MUTATION, "variables": variables}
-        )
-
-        mutation_result = resp_data["data"]["bulkOperationRunMutation"]
-        user_errors = mutation_result.get("userErrors", [])
-        if user_errors:
-            raise ShopifyBulkGraphQLError(
-                f"bulkOperationRunMutation userErrors: {user_errors}"
+        with BULK_PHASE_SECONDS.time(
+            operation_type="MUTATION", phase="submit"
+        ), tracing.span(
+            "shopify.bulk_run_mutation", **{"shopify.client_identifier": client_identifier}
+        ) as span:
+            resp_data = await self.bulk_client.post_graphql(
+                {"query": MUTATION_BULK_OPERATION_RUN_MUTATION, "variables": variables}
             )
+            mutation_result = resp_data["data"]["bulkOperationRunMutation"]
+            user_errors = mutation_result.get("userErrors", [])
+            if user_errors:
+                raise ShopifyBulkGraphQLError(
+                    f"bulkOperationRunMutation userErrors: {user_errors}"
+                )
 
-        op_data = mutation_result["bulkOperation"]
+            op_data = mutation_result["bulkOperation"]
+            span.set_attribute("shopify.bulk_op_id", op_data["id"])
+
+        if self._lease is not None:
+            await self._lease.record_operation(op_data["id"])
         return BulkOperation(
             id=op_data["id"],
             status=op_data["status"],
@@ -371,15 +809,80 @@ class ShopifyBulkMutationClient:
             object_count=None,
         )
 
-    async def _release_lock_best_effort(self) -> None:
-        """Release mutation lock with error suppression."""
+    async def acquire_mutation_lock(self, run_id: str, priority: int) -> None:
+        """Acquire the per-shop mutation lock (via the job queue if set).
+
+        The lock is kept alive by a lease until ``release_mutation_lock``.
+
+        Args:
+            run_id: Run taking the lock, for logging
+            priority: Queue priority when a job queue is set
+
+        Raises:
+            ShopifyBulkMutationLockedError: If lock unavailable (or the queue
+                wait timed out)
+        """
+        lock = AsyncRedisLock(
+            self.redis,
+            name=self._mutation_lock_key,
+            timeout=self.lock_ttl_seconds,
+            blocking=False,
+        )
+
+        wait_started = monotonic()
+        if self.job_queue is not None:
+            try:
+                await self.job_queue.acquire(lock, priority=priority)
+            except ShopifyBulkQueueTimeoutError:
+                BULK_LOCK_WAIT_SECONDS.observe(
+                    monotonic() - wait_started, lock="mutation", outcome="timeout"
+                )
+                raise ShopifyBulkMutationLockedError(
+                    self.shop_domain, self._mutation_lock_key
+                )
+        else:
+            acquired = await lock.acquire(blocking=False)
+            if not acquired:
+                BULK_LOCK_WAIT_SECONDS.observe(
+                    monotonic() - wait_started, lock="mutation", outcome="locked"
+                )
+                raise ShopifyBulkMutationLockedError(
+                    self.shop_domain, self._mutation_lock_key
+                )
+
+        self._lock_acquired_at = monotonic()
+        BULK_LOCK_WAIT_SECONDS.observe(
+            self._lock_acquired_at - wait_started, lock="mutation", outcome="acquired"
+        )
+        self._current_lock = lock
+        self.logger.info(f"Acquired mutation lock: run_id={run_id}")
+
+        # Kept alive through hydration and upload, however long they take
+        self._lease = LockLease(self.redis, lock, self.lock_ttl_seconds, logger=self.logger)
+        try:
+            await self._lease.start()
+        except Exception:
+            await self.release_mutation_lock()
+            raise
+
+    async def release_mutation_lock(self) -> None:
+        """Release the mutation lock, logging instead of raising on failure."""
+        if self._lease is not None:
+            await self._lease.stop()
+            self._lease = None
         if self._current_lock:
             try:
-                await self._current_lock.release()
+                if self.job_queue is not None:
+                    await self.job_queue.release(self._current_lock)
+                else:
+                    await self._current_lock.release()
                 self.logger.info("Released mutation lock")
             except Exception as e:
                 self.logger.error(f"Failed to release lock: {e}")
             finally:
+                BULK_LOCK_HOLD_SECONDS.observe(
+                    monotonic() - self._lock_acquired_at, lock="mutation"
+                )
                 self._current_lock = None
 
     async def _remove_file_best_effort(self, path: str) -> None:
@@ -391,6 +894,28 @@ class ShopifyBulkMutationClient:
         except Exception as exc:
             self.logger.error(f"Failed to remove temp JSONL file: {exc}")
 
+    def _serialize_jsonl_chunks(self, updates: list[ProductUpdateInput]) -> Iterator[bytes]:
+        """Serialize updates to JSONL, batched into ~STREAM_CHUNK_SIZE_BYTES chunks."""
+        lines: list[bytes] = []
+        size = 0
+        for update in updates:
+            line = json.dumps(update.to_jsonl_dict(), ensure_ascii=False).encode("utf-8")
+            lines.append(line)
+            size += len(line) + 1
+            if size >= self.STREAM_CHUNK_SIZE_BYTES:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+                size = 0
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+    async def _iter_jsonl_chunks(
+        self, updates: list[ProductUpdateInput]
+    ) -> AsyncIterator[bytes]:
+        """Yield serialized JSONL chunks for a streamed multipart upload."""
+        for chunk in self._serialize_jsonl_chunks(updates):
+            yield chunk
+
     async def _iter_file_chunks(self, path: str):
         """Yield file chunks asynchronously for multipart upload."""
         async with aiofiles.open(path, mode="rb") as f:
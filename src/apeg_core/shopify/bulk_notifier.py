@@ -0,0 +1,111 @@
+"""Redis pub/sub fan-out for Shopify ``bulk_operations/finish`` webhooks."""
+import json
+import logging
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio import Redis
+
+
+class BulkOperationNotifier:
+    """Publishes and awaits bulk operation completion notifications.
+
+    The webhook receiver stores the finish payload under a short-lived key
+    and publishes it on a per-operation channel, so a waiter that subscribes
+    after delivery still observes the completion.
+    """
+
+    CHANNEL_PREFIX = "apeg:shopify:bulk_op_finished"
+    RESULT_TTL_SECONDS = 3600
+
+    def __init__(self, redis: Redis, logger: Optional[logging.Logger] = None):
+        """Initialize notifier.
+
+        Args:
+            redis: Injected redis.asyncio.Redis client
+            logger: Optional logger instance
+        """
+        self.redis = redis
+        self.logger = logger or logging.getLogger(__name__)
+
+    def channel_for(self, operation_id: str) -> str:
+        """Return pub/sub channel (and result key) for an operation GID."""
+        return f"{self.CHANNEL_PREFIX}:{operation_id}"
+
+    async def publish_finished(self, operation_id: str, payload: dict) -> None:
+        """Record and broadcast that a bulk operation reached a terminal state.
+
+        Args:
+            operation_id: GID of bulk operation
+            payload: Webhook body (status, error_code, type, timestamps)
+        """
+        channel = self.channel_for(operation_id)
+        message = json.dumps(payload, separators=(",", ":"))
+
+        await self.redis.set(channel, message, ex=self.RESULT_TTL_SECONDS)
+        receivers = await self.redis.publish(channel, message)
+        self.logger.info(
+            "Published bulk finish: op_id=%s, status=%s, receivers=%s",
+            operation_id,
+            payload.get("status"),
+            receivers,
+        )
+
+    async def wait_for_finish(
+        self,
+        operation_id: str,
+        timeout: float,
+    ) -> Optional[dict]:
+        """Wait up to ``timeout`` seconds for a finish notification.
+
+        Returns:
+            Webhook payload if notified, otherwise None
+        """
+        channel = self.channel_for(operation_id)
+
+        stored = await self._get_stored(channel)
+        if stored is not None:
+            return stored
+
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+
+            # Close the race between the first check and subscribing
+            stored = await self._get_stored(channel)
+            if stored is not None:
+                return stored
+
+            deadline = monotonic() + timeout
+            while True:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return None
+
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+                if message and message.get("type") == "message":
+                    return self._decode(message.get("data"))
+        finally:
+            try:
+                await pubsub.unsubscribe(channel)
+                await pubsub.aclose()
+            except Exception as exc:
+                self.logger.debug(f"Failed to close bulk finish subscription: {exc}")
+
+    async def _get_stored(self, channel: str) -> Optional[dict]:
+        raw = await self.redis.get(channel)
+        if raw is None:
+            return None
+        return self._decode(raw)
+
+    @staticmethod
+    def _decode(raw) -> Optional[dict]:
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
@@ -0,0 +1,189 @@
+"""Streaming reader for Shopify bulk operation JSONL results.
+
+Bulk query results flatten nested connections: each child node is emitted on
+its own line after its parent, with ``__parentId`` pointing back to it. The
+reader streams the file in fixed-size chunks, rebuilds one top-level object
+at a time, and yields it as soon as the next top-level line begins, so memory
+is bounded by the largest single object tree rather than the file size.
+"""
+import json
+import logging
+from collections.abc import AsyncIterator, Collection, Mapping
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE_BYTES = 256 * 1024
+PARENT_ID_KEY = "__parentId"
+
+
+def resource_type(gid: Optional[str]) -> Optional[str]:
+    """Extract resource type from a GID (gid://shopify/ProductVariant/1 -> ProductVariant)."""
+    if not isinstance(gid, str) or not gid.startswith("gid://"):
+        return None
+    parts = gid.split("/")
+    if len(parts) < 5:
+        return None
+    return parts[3]
+
+
+def default_connection_name(type_name: str) -> str:
+    """Default key children are attached under (ProductVariant -> productVariants)."""
+    return type_name[:1].lower() + type_name[1:] + "s"
+
+
+async def iter_jsonl_records(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[dict]:
+    """Split a stream of byte chunks into decoded JSONL records.
+
+    Args:
+        chunks: Async iterator of raw bytes (arbitrary boundaries)
+
+    Yields:
+        One dict per non-empty line
+    """
+    buffer = bytearray()
+
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline == -1:
+                break
+            line = bytes(buffer[start:newline]).strip()
+            start = newline + 1
+            if line:
+                yield json.loads(line)
+        del buffer[:start]
+
+    tail = bytes(buffer).strip()
+    if tail:
+        yield json.loads(tail)
+
+
+async def reassemble_bulk_objects(
+    records: AsyncIterator[dict],
+    projections: Optional[Mapping[str, Collection[str]]] = None,
+    connection_names: Optional[Mapping[str, str]] = None,
+) -> AsyncIterator[dict]:
+    """Rebuild parent objects from flattened ``__parentId`` records.
+
+    Args:
+        records: Decoded JSONL records in Shopify result order
+        projections: Optional fields to keep per resource type
+            (e.g. ``{"Product": ("id", "tags")}``); ``id`` is always kept
+        connection_names: Key to attach children under per child resource
+            type (e.g. ``{"ProductVariant": "variants"}``); defaults to the
+            lower-camel plural of the type name
+
+    Yields:
+        Top-level objects with children attached as lists
+    """
+    projections = projections or {}
+    connection_names = connection_names or {}
+
+    root: Optional[dict] = None
+    index: dict[str, dict] = {}
+
+    async for record in records:
+        parent_id = record.pop(PARENT_ID_KEY, None)
+        node_id = record.get("id")
+        type_name = resource_type(node_id)
+
+        fields = projections.get(type_name) if type_name else None
+        if fields is not None:
+            record = {k: v for k, v in record.items() if k == "id" or k in fields}
+
+        if parent_id is None:
+            if root is not None:
+                yield root
+            root = record
+            index = {node_id: record} if node_id else {}
+            continue
+
+        parent = index.get(parent_id)
+        if parent is None:
+            logger.warning(
+                "Bulk result child %s references unknown parent %s; skipping",
+                node_id,
+                parent_id,
+            )
+            continue
+
+        key = connection_names.get(type_name) if type_name else None
+        if key is None:
+            key = default_connection_name(type_name) if type_name else "children"
+        parent.setdefault(key, []).append(record)
+        if node_id:
+            index[node_id] = record
+
+    if root is not None:
+        yield root
+
+
+async def iter_response_chunks(
+    session: aiohttp.ClientSession,
+    url: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[bytes]:
+    """Stream a bulk result URL as raw byte chunks."""
+    async with session.get(url) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.content.iter_chunked(chunk_size):
+            yield chunk
+
+
+async def iter_bulk_results(
+    session: aiohttp.ClientSession,
+    url: str,
+    projections: Optional[Mapping[str, Collection[str]]] = None,
+    connection_names: Optional[Mapping[str, str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[dict]:
+    """Stream a bulk result URL and yield reassembled top-level objects.
+
+    Args:
+        session: aiohttp session used for the download
+        url: Bulk operation result (or partial data) URL
+        projections: Optional fields to keep per resource type
+        connection_names: Optional child attachment keys per resource type
+        chunk_size: Download chunk size in bytes
+
+    Yields:
+        Top-level objects with nested children reattached
+    """
+    records = iter_jsonl_records(iter_response_chunks(session, url, chunk_size))
+    async for obj in reassemble_bulk_objects(records, projections, connection_names):
+        yield obj
+
+
+async def iter_file_chunks(
+    path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[bytes]:
+    """Read a spooled bulk result file as raw byte chunks."""
+    async with aiofiles.open(path, mode="rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def iter_bulk_file(
+    path: str | Path,
+    projections: Optional[Mapping[str, Collection[str]]] = None,
+    connection_names: Optional[Mapping[str, str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES,
+) -> AsyncIterator[dict]:
+    """Yield reassembled top-level objects from a downloaded bulk result file."""
+    records = iter_jsonl_records(iter_file_chunks(path, chunk_size))
+    async for obj in reassemble_bulk_objects(records, projections, connection_names):
+        yield obj
@@ -0,0 +1,183 @@
+"""Reconcile per-shop bulk locks against Shopify's current bulk operations.
+
+A hung or runaway bulk operation keeps its lock held until the lock TTL or
+the poll timeout runs out, blocking every queued job for the shop. The
+reaper compares each lock with ``currentBulkOperation`` for its type:
+
+- an operation running past ``max_runtime_seconds`` is canceled, and once
+  Shopify reports it CANCELED the lock recorded for it is freed at once;
+- a lock whose recorded operation finished more than
+  ``release_grace_seconds`` ago (its holder died or stopped polling) is
+  freed.
+
+Locks are only freed when they still name the reaped operation, so a new
+holder that has not submitted anything yet is never disturbed.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from ..schemas.bulk_ops import BulkOperation
+from .bulk_client import ShopifyBulkClient
+from .exceptions import ShopifyBulkGraphQLError
+from .job_queue import ShopifyBulkJobQueue, lock_operation_key
+
+
+# Delete the lock and its operation record only if the record still names
+# the operation being reaped.
+_FREE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+  redis.call('DEL', KEYS[1], KEYS[2])
+  return 1
+end
+return 0
+"""
+
+
+def _age_seconds(timestamp: Optional[str]) -> Optional[float]:
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (datetime.now(timezone.utc) - parsed).total_seconds()
+
+
+class BulkOperationReaper:
+    """Cancels overdue bulk operations and frees the locks they strand."""
+
+    MAX_RUNTIME_SECONDS = 3600  # matches the default poll timeout
+    RELEASE_GRACE_SECONDS = 120  # time a live holder needs to see a finish
+    CANCEL_WAIT_SECONDS = 30
+    CANCEL_POLL_INTERVAL = 2.0
+    INTERVAL_SECONDS = 60
+
+    def __init__(
+        self,
+        bulk_client: ShopifyBulkClient,
+        redis: Redis,
+        max_runtime_seconds: float = MAX_RUNTIME_SECONDS,
+        release_grace_seconds: float = RELEASE_GRACE_SECONDS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize reaper.
+
+        Args:
+            bulk_client: Client for the shop whose locks are reconciled
+            redis: Injected redis.asyncio.Redis client holding the locks
+            max_runtime_seconds: Running operations older than this are
+                canceled
+            release_grace_seconds: How long after an operation finishes its
+                lock may stay held before it is freed
+            logger: Optional logger instance
+        """
+        self.bulk_client = bulk_client
+        self.redis = redis
+        self.max_runtime_seconds = max_runtime_seconds
+        self.release_grace_seconds = release_grace_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+        shop_domain = bulk_client.shop_domain
+        self.lock_names = {
+            "QUERY": f"apeg:shopify:bulk_query_lock:{shop_domain}",
+            "MUTATION": f"apeg:shopify:bulk_mutation_lock:{shop_domain}",
+        }
+
+    async def run(
+        self,
+        stop_event: asyncio.Event,
+        interval: float = INTERVAL_SECONDS,
+    ) -> None:
+        """Reconcile at startup, then every ``interval`` until stopped."""
+        while not stop_event.is_set():
+            try:
+                await self.reconcile()
+            except Exception as exc:
+                self.logger.error("Bulk operation reconcile failed: %s", exc)
+            try:
+                await asyncio.wait_for(stop_event.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def reconcile(self) -> list[str]:
+        """Run one reconcile pass.
+
+        Returns:
+            Descriptions of the actions taken (empty if nothing was stuck)
+        """
+        actions: list[str] = []
+        current = await self.bulk_client.current_operations()
+
+        for op_type, lock_name in self.lock_names.items():
+            operation = current.get(op_type)
+            if operation is None:
+                continue
+
+            if not operation.is_terminal:
+                age = _age_seconds(operation.created_at)
+                if age is None or age <= self.max_runtime_seconds:
+                    continue
+                self.logger.warning(
+                    "Bulk %s %s running for %.0fs (limit %ss); canceling",
+                    op_type.lower(),
+                    operation.id,
+                    age,
+                    self.max_runtime_seconds,
+                )
+                operation = await self._cancel(op_type, operation)
+                actions.append(f"canceled {operation.id}")
+                if not operation.is_terminal:
+                    # Still CANCELING; the lock is freed on a later pass
+                    continue
+            else:
+                finished = _age_seconds(operation.completed_at)
+                if finished is None or finished <= self.release_grace_seconds:
+                    continue
+
+            if await self._free_lock(lock_name, operation.id):
+                actions.append(f"freed {lock_name}")
+
+        return actions
+
+    async def _cancel(self, op_type: str, operation: BulkOperation) -> BulkOperation:
+        """Cancel ``operation`` and wait briefly for it to become terminal."""
+        try:
+            await self.bulk_client.cancel_operation(operation.id)
+        except ShopifyBulkGraphQLError as exc:
+            # Usually the operation finished in the meantime
+            self.logger.warning("Cancel of %s rejected: %s", operation.id, exc)
+
+        deadline = monotonic() + self.CANCEL_WAIT_SECONDS
+        while monotonic() < deadline:
+            latest = (await self.bulk_client.current_operations()).get(op_type)
+            if latest is None or latest.id != operation.id:
+                break
+            operation = latest
+            if operation.is_terminal:
+                break
+            await asyncio.sleep(self.CANCEL_POLL_INTERVAL)
+        return operation
+
+    async def _free_lock(self, lock_name: str, operation_id: str) -> bool:
+        """Free ``lock_name`` if it is still held for ``operation_id``."""
+        freed = await self.redis.eval(
+            _FREE_LOCK_SCRIPT,
+            2,
+            lock_name,
+            lock_operation_key(lock_name),
+            operation_id,
+        )
+        if not int(freed or 0):
+            return False
+
+        self.logger.warning("Freed %s held for finished %s", lock_name, operation_id)
+        # Wake jobs queued for the lock instead of leaving them to re-check
+        await self.redis.publish(
+            ShopifyBulkJobQueue.release_channel(lock_name), "released"
+        )
+        return True
@@ -0,0 +1,368 @@
+"""Shared per-shop status polling for in-flight bulk operations.
+
+Shopify runs at most one bulk query and one bulk mutation per shop, so a
+single ``currentBulkOperation`` request per interval reports on every job
+that is waiting for one. Waiters register an asyncio future with the shop's
+multiplexer instead of running their own ``poll_status`` loop.
+
+With Redis, multiplexers in different processes elect one leader per shop.
+Followers add the operations they await to a shared waiting set and listen
+on the shop's status channel; only the leader sends GraphQL requests and it
+publishes every status it reads. Poll traffic is one request per shop per
+interval however many jobs are waiting.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from time import monotonic, time
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+
+from ..schemas.bulk_ops import BulkOperation
+from .bulk_notifier import BulkOperationNotifier
+from .exceptions import ShopifyBulkApiError
+from .graphql_strings import QUERY_CURRENT_BULK_OPERATIONS
+
+
+PostGraphQL = Callable[[dict], Awaitable[dict]]
+
+
+def bulk_operation_from_node(node: dict[str, Any]) -> BulkOperation:
+    """Build a BulkOperation from a BulkOperation GraphQL node."""
+    object_count = node.get("objectCount")
+    try:
+        object_count = int(object_count) if object_count is not None else None
+    except (TypeError, ValueError):
+        object_count = None
+
+    return BulkOperation(
+        id=node["id"],
+        status=node["status"],
+        url=node.get("url"),
+        object_count=object_count,
+        error_code=node.get("errorCode"),
+        partial_data_url=node.get("partialDataUrl"),
+        created_at=node.get("createdAt"),
+        completed_at=node.get("completedAt"),
+    )
+
+
+class BulkStatusMultiplexer:
+    """One status poller per shop, fanned out to every waiting job."""
+
+    MIN_INTERVAL = 1.0  # seconds, right after submission
+    MAX_INTERVAL = 30.0  # seconds, for long-running operations
+    BACKOFF_FRACTION = 0.1  # poll interval as a share of the youngest wait
+    LEADER_TTL_SECONDS = 90  # outlives MAX_INTERVAL plus a slow request
+    WAITING_TTL_SECONDS = 120  # followers refresh their entries every tick
+    CHANNEL_PREFIX = "apeg:shopify:bulk_status"
+
+    def __init__(
+        self,
+        shop_domain: str,
+        redis: Optional[Redis] = None,
+        notifier: Optional[BulkOperationNotifier] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize status multiplexer.
+
+        Args:
+            shop_domain: e.g., "mystore.myshopify.com"
+            redis: Optional redis.asyncio.Redis client; shares one poller per
+                shop across processes when provided
+            notifier: Optional webhook notifier; a finish webhook cuts the
+                leader's wait short so the next poll happens at once
+            logger: Optional logger instance
+        """
+        self.shop_domain = shop_domain
+        self.redis = redis
+        self.notifier = notifier
+        self.logger = logger or logging.getLogger(__name__)
+        self.poll_count = 0
+
+        self._channel = f"{self.CHANNEL_PREFIX}:{shop_domain}"
+        self._waiting_key = f"{self._channel}:waiting"
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+        self._since: dict[str, float] = {}
+        # Operations whose finish webhook already arrived; its stored payload
+        # would end every later wait at once
+        self._notified: set[str] = set()
+        self._current_ids: set[str] = set()
+        self._post_graphql: Optional[PostGraphQL] = None
+        self._task: Optional[asyncio.Task] = None
+        self._leader_lock = None
+        self._pubsub = None
+
+    async def wait(
+        self,
+        operation_id: str,
+        post_graphql: PostGraphQL,
+        timeout: float,
+        since: Optional[float] = None,
+    ) -> BulkOperation:
+        """Wait for an operation to reach a terminal state.
+
+        Args:
+            operation_id: GID of bulk operation
+            post_graphql: Transport for status requests (the caller's
+                throttled GraphQL client)
+            timeout: Maximum seconds to wait
+            since: ``time.monotonic()`` the caller started waiting; sets the
+                poll interval across repeated calls
+
+        Returns:
+            BulkOperation in terminal state (COMPLETED/FAILED/CANCELED/EXPIRED)
+
+        Raises:
+            asyncio.TimeoutError: If the operation is still running at timeout
+            ShopifyBulkApiError: If the operation does not exist
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(operation_id, []).append(future)
+        self._since.setdefault(operation_id, since if since is not None else monotonic())
+        self._post_graphql = post_graphql
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            futures = self._waiters.get(operation_id, [])
+            if future in futures:
+                futures.remove(future)
+            if not futures:
+                self._waiters.pop(operation_id, None)
+                self._since.pop(operation_id, None)
+                self._notified.discard(operation_id)
+
+    def next_interval(self) -> float:
+        """Seconds until the next poll: short for new waits, longer for old."""
+        if not self._since:
+            return self.MIN_INTERVAL
+        youngest = monotonic() - max(self._since.values())
+        interval = youngest * self.BACKOFF_FRACTION
+        return min(self.MAX_INTERVAL, max(self.MIN_INTERVAL, interval))
+
+    async def _run(self) -> None:
+        # The outer check runs after the last await, so a wait registered
+        # while leadership was being released is not stranded
+        while self._waiters:
+            try:
+                while self._waiters:
+                    interval = self.next_interval()
+                    if self.redis is None or not await self._coordinate():
+                        await self._poll_and_dispatch(set(self._waiters))
+                        await self._sleep(interval)
+                    elif self._leader_lock is not None:
+                        await self._poll_and_dispatch(await self._shared_ids())
+                        await self._sleep(interval)
+                    else:
+                        await self._listen(interval)
+            finally:
+                await self._stop_coordinating()
+
+    async def _coordinate(self) -> bool:
+        """Register local waits and take or renew leadership.
+
+        Returns:
+            False if Redis is unavailable (this process then polls alone)
+        """
+        try:
+            now = time()
+            await self.redis.zadd(
+                self._waiting_key, {op_id: now for op_id in self._waiters}
+            )
+            await self.redis.expire(self._waiting_key, self.WAITING_TTL_SECONDS)
+
+            if self._leader_lock is not None:
+                try:
+                    await self._leader_lock.reacquire()
+                except Exception:
+                    self.logger.info("Lost bulk status leadership for %s", self.shop_domain)
+                    self._leader_lock = None
+
+            if self._leader_lock is None:
+                lock = self.redis.lock(
+                    f"{self._channel}:leader", timeout=self.LEADER_TTL_SECONDS
+                )
+                if await lock.acquire(blocking=False):
+                    self._leader_lock = lock
+                    await self._close_pubsub()
+                    self.logger.info("Polling bulk status for %s", self.shop_domain)
+
+            if self._leader_lock is None and self._pubsub is None:
+                self._pubsub = self.redis.pubsub()
+                await self._pubsub.subscribe(self._channel)
+            return True
+        except Exception as exc:
+            self.logger.warning("Bulk status coordination unavailable: %s", exc)
+            return False
+
+    async def _shared_ids(self) -> set[str]:
+        """Return local waits plus those other processes registered recently."""
+        ids = set(self._waiters)
+        try:
+            cutoff = time() - self.WAITING_TTL_SECONDS
+            await self.redis.zremrangebyscore(self._waiting_key, "-inf", cutoff)
+            for member in await self.redis.zrangebyscore(self._waiting_key, cutoff, "+inf"):
+                ids.add(member.decode("utf-8") if isinstance(member, bytes) else member)
+        except Exception as exc:
+            self.logger.warning("Failed to read shared bulk waits: %s", exc)
+        return ids
+
+    async def _poll_and_dispatch(self, operation_ids: set[str]) -> None:
+        try:
+            operations, missing = await self._poll(operation_ids)
+        except Exception as exc:
+            # Same contract as a failed poll_status request
+            for futures in self._waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+
+        for operation_id in missing:
+            self._reject(
+                operation_id,
+                ShopifyBulkApiError(f"Bulk operation not found: id={operation_id}"),
+            )
+        self._dispatch(operations)
+
+        if self.redis is not None and self._leader_lock is not None:
+            await self._publish(operations, missing)
+
+    async def _poll(
+        self, operation_ids: set[str]
+    ) -> tuple[list[BulkOperation], list[str]]:
+        """Send one status request for the shop.
+
+        Returns:
+            (operations read, awaited IDs that do not exist)
+        """
+        # Waits that matched a current operation last time are covered by
+        # currentBulkOperation; only the others are looked up by ID
+        lookups = sorted(operation_ids - self._current_ids)
+        resp_data = await self._post_graphql(
+            {"query": QUERY_CURRENT_BULK_OPERATIONS, "variables": {"ids": lookups}}
+        )
+        self.poll_count += 1
+        data = resp_data["data"]
+
+        current = [data.get("currentQuery"), data.get("currentMutation")]
+        self._current_ids = {node["id"] for node in current if node}
+
+        operations = [bulk_operation_from_node(node) for node in current if node]
+        missing: list[str] = []
+        for operation_id, node in zip(lookups, data.get("nodes") or []):
+            if node and node.get("id"):
+                operations.append(bulk_operation_from_node(node))
+            elif operation_id not in self._current_ids:
+                missing.append(operation_id)
+
+        self.logger.debug(
+            "Bulk status poll for %s: %s",
+            self.shop_domain,
+            {op.id: op.status for op in operations},
+        )
+        return operations, missing
+
+    def _dispatch(self, operations: list[BulkOperation]) -> None:
+        for operation in operations:
+            if not operation.is_terminal:
+                continue
+            for future in self._waiters.get(operation.id, []):
+                if not future.done():
+                    future.set_result(operation)
+
+    def _reject(self, operation_id: str, exc: Exception) -> None:
+        for future in self._waiters.get(operation_id, []):
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _publish(self, operations: list[BulkOperation], missing: list[str]) -> None:
+        message = json.dumps(
+            {
+                "operations": [op.model_dump() for op in operations],
+                "missing": missing,
+            },
+            separators=(",", ":"),
+        )
+        try:
+            await self.redis.publish(self._channel, message)
+            finished = [op.id for op in operations if op.is_terminal] + missing
+            if finished:
+                await self.redis.zrem(self._waiting_key, *finished)
+        except Exception as exc:
+            self.logger.warning("Failed to publish bulk status: %s", exc)
+
+    async def _listen(self, interval: float) -> None:
+        """Follower tick: apply the leader's published statuses."""
+        deadline = monotonic() + interval
+        while self._waiters:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+            except Exception as exc:
+                self.logger.warning("Bulk status subscription failed: %s", exc)
+                await self._close_pubsub()
+                return
+            if not message or message.get("type") != "message":
+                continue
+
+            raw = message.get("data")
+            try:
+                payload = json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+                operations = [BulkOperation(**op) for op in payload["operations"]]
+            except (TypeError, ValueError, KeyError) as exc:
+                self.logger.warning("Ignoring malformed bulk status message: %s", exc)
+                continue
+
+            for operation_id in payload.get("missing", []):
+                self._reject(
+                    operation_id,
+                    ShopifyBulkApiError(f"Bulk operation not found: id={operation_id}"),
+                )
+            self._dispatch(operations)
+
+    async def _sleep(self, interval: float) -> None:
+        pending = {
+            op_id: since
+            for op_id, since in self._since.items()
+            if op_id not in self._notified
+        }
+        if self.notifier is None or not pending:
+            await asyncio.sleep(interval)
+            return
+        try:
+            # A finish webhook for the newest wait ends the sleep early
+            newest = max(pending, key=pending.get)
+            if await self.notifier.wait_for_finish(newest, interval) is not None:
+                self._notified.add(newest)
+        except Exception as exc:
+            self.logger.warning(f"Bulk finish notifier unavailable: {exc}")
+            await asyncio.sleep(interval)
+
+    async def _stop_coordinating(self) -> None:
+        if self._leader_lock is not None:
+            try:
+                await self._leader_lock.release()
+            except Exception as exc:
+                self.logger.warning("Failed to release bulk status leadership: %s", exc)
+            self._leader_lock = None
+        await self._close_pubsub()
+
+    async def _close_pubsub(self) -> None:
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(self._channel)
+                await self._pubsub.aclose()
+            except Exception as exc:
+                self.logger.debug(f"Failed to close bulk status subscription: {exc}")
+            self._pubsub = None
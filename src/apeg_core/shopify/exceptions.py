@@ -20,6 +20,22 @@ class ShopifyBulkApiError(ShopifyBulkClientError):
     """Raised for Shopify API errors (HTTP 4xx/5xx, missing data)."""
 
 
+class ShopifyBulkOperationFailedError(ShopifyBulkApiError):
+    """Raised when a bulk operation ends FAILED, CANCELED, or EXPIRED.
+
+    Unlike other API errors the operation's state is known: ``operation``
+    carries its terminal status, error code, and any ``partial_data_url``.
+    """
+
+    def __init__(self, operation: object):
+        self.operation = operation
+        super().__init__(
+            f"Bulk operation terminal failure: status={operation.status}, "
+            f"error_code={operation.error_code}, "
+            f"partial_data_url={operation.partial_data_url}"
+        )
+
+
 class ShopifyBulkGraphQLError(ShopifyBulkClientError):
     """Raised when GraphQL returns userErrors or root-level errors."""
 
@@ -43,6 +59,19 @@ class ShopifyBulkMutationLockedError(ShopifyBulkClientError):
         )
 
 
+class ShopifyBulkLeaseLostError(ShopifyBulkClientError):
+    """Raised when a held bulk lock expired or was taken by a newer holder."""
+
+    def __init__(self, lock_key: str, fence: object):
+        self.lock_key = lock_key
+        self.fence = fence
+        super().__init__(f"Lease lost on bulk lock key={lock_key}, fence={fence}")
+
+
+class ShopifyBulkQueueTimeoutError(ShopifyBulkClientError):
+    """Raised when a queued job does not reach the bulk lock in time."""
+
+
 class ShopifyStagedUploadError(ShopifyBulkClientError):
     """Raised for staged upload failures (multipart POST errors)."""
 
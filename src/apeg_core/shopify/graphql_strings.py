@@ -31,6 +31,48 @@ query BulkOpById($id: ID!) {
 }
 """
 
+# Shop-wide status poll: the latest bulk query and mutation, plus any awaited
+# operations that are no longer the shop's current one
+QUERY_CURRENT_BULK_OPERATIONS = """
+query CurrentBulkOperations($ids: [ID!]!) {
+  currentQuery: currentBulkOperation(type: QUERY) {
+    ...BulkOperationStatus
+  }
+  currentMutation: currentBulkOperation(type: MUTATION) {
+    ...BulkOperationStatus
+  }
+  nodes(ids: $ids) {
+    ...BulkOperationStatus
+  }
+}
+
+fragment BulkOperationStatus on BulkOperation {
+  id
+  status
+  errorCode
+  objectCount
+  url
+  partialDataUrl
+  createdAt
+  completedAt
+}
+"""
+
+MUTATION_BULK_CANCEL = """
+mutation BulkCancel($id: ID!) {
+  bulkOperationCancel(id: $id) {
+    bulkOperation {
+      id
+      status
+    }
+    userErrors {
+      field
+      message
+    }
+  }
+}
+"""
+
 # Phase 2: Bulk Mutation Operations
 MUTATION_STAGED_UPLOADS_CREATE = """
 mutation StagedUploadsCreateForBulkMutation($input: [StagedUploadInput!]!) {
@@ -104,3 +146,59 @@ query ProductById($id: ID!) {
   }
 }
 """
+
+# Targeted hydration for small batches (up to 250 IDs per request)
+QUERY_PRODUCTS_BY_IDS = """
+query ProductsByIds($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on Product {
+      id
+      tags
+      updatedAt
+      seo {
+        title
+        description
+      }
+    }
+  }
+}
+"""
+
+# Product mirror (local current-state cache)
+QUERY_PRODUCTS_MIRROR_STATE = """
+{
+  products {
+    edges {
+      node {
+        id
+        tags
+        updatedAt
+        seo {
+          title
+          description
+        }
+      }
+    }
+  }
+}
+"""
+
+QUERY_PRODUCTS_UPDATED_SINCE = """
+query ProductsUpdatedSince($query: String!, $cursor: String) {
+  products(first: 250, query: $query, after: $cursor, sortKey: UPDATED_AT) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      id
+      tags
+      updatedAt
+      seo {
+        title
+        description
+      }
+    }
+  }
+}
+"""
@@ -0,0 +1,237 @@
+"""Redis-coordinated single-flight for full-catalog state hydration.
+
+Large safe-write batches hydrate current state with a Phase 1 bulk export of
+every product. Shopify runs one bulk query per shop at a time, so when several
+mutation jobs start together each would queue (or fail) behind an identical
+export. Callers are keyed by shop and query hash: the first one to take the
+leader lock runs the export and publishes every parsed product state to a
+Redis hash with a short TTL; the others wait on a completion channel and read
+just their products from that snapshot. A job that starts within the TTL
+reuses the snapshot instead of exporting again.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..schemas.bulk_ops import ProductState
+
+
+class HydrationSingleFlight:
+    """Shares one in-flight catalog export and its result across callers."""
+
+    SNAPSHOT_TTL_SECONDS = 15
+    LEADER_TTL_SECONDS = 1800  # 30 minutes, bounds a crashed leader
+    POLL_INTERVAL_SECONDS = 1.0  # fallback if a completion message is missed
+    WRITE_BATCH_SIZE = 1000
+    READ_BATCH_SIZE = 1000
+    SNAPSHOT_MARKER_FIELD = "__snapshot_at__"
+
+    def __init__(
+        self,
+        redis: Redis,
+        shop_domain: str,
+        snapshot_ttl_seconds: float = SNAPSHOT_TTL_SECONDS,
+        leader_ttl_seconds: int = LEADER_TTL_SECONDS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize hydration single-flight.
+
+        Args:
+            redis: Injected redis.asyncio.Redis client
+            shop_domain: e.g., "mystore.myshopify.com"
+            snapshot_ttl_seconds: How long a finished export may be reused
+            leader_ttl_seconds: Leader lock TTL; a crashed leader blocks
+                followers for at most this long
+            logger: Optional logger instance
+        """
+        self.redis = redis
+        self.shop_domain = shop_domain
+        self.snapshot_ttl_seconds = max(1, int(snapshot_ttl_seconds))
+        self.leader_ttl_seconds = leader_ttl_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _key(self, query: str) -> str:
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+        return f"apeg:shopify:hydration:{self.shop_domain}:{query_hash}"
+
+    async def get_states(
+        self,
+        query: str,
+        target_ids: set[str],
+        export: Callable[[], AsyncIterator[ProductState]],
+    ) -> dict[str, ProductState]:
+        """Return state for ``target_ids`` from a shared export of ``query``.
+
+        Args:
+            query: Bulk query text; identical queries share one export
+            target_ids: Product IDs the caller needs
+            export: Runs the export and yields every product state; only
+                called by the leader
+
+        Returns:
+            Product ID to state for the target IDs found in the catalog
+        """
+        key = self._key(query)
+        exported = False
+
+        def tracked_export() -> AsyncIterator[ProductState]:
+            nonlocal exported
+            exported = True
+            return export()
+
+        try:
+            return await self._get_states(key, target_ids, tracked_export)
+        except RedisError as exc:
+            if exported:
+                # The export itself failed; running it again would not help
+                raise
+            # Fail open: an uncoordinated export still hydrates correctly
+            self.logger.warning(
+                "Hydration single-flight unavailable (%s); exporting directly", exc
+            )
+            return await self._collect(export(), target_ids)
+
+    async def _get_states(
+        self,
+        key: str,
+        target_ids: set[str],
+        export: Callable[[], AsyncIterator[ProductState]],
+    ) -> dict[str, ProductState]:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(f"{key}:done")
+        try:
+            waited_since = time.monotonic()
+            while True:
+                states = await self._read_snapshot(key, target_ids)
+                if states is not None:
+                    self.logger.info(
+                        "Hydrated %s products from shared export snapshot (waited %.1fs)",
+                        len(states),
+                        time.monotonic() - waited_since,
+                    )
+                    return states
+
+                lock = self.redis.lock(
+                    f"{key}:leader", timeout=self.leader_ttl_seconds
+                )
+                if await lock.acquire(blocking=False):
+                    try:
+                        return await self._lead(key, target_ids, export)
+                    finally:
+                        try:
+                            await lock.release()
+                        except Exception as exc:
+                            self.logger.warning(
+                                "Failed to release hydration leader lock: %s", exc
+                            )
+
+                await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=self.POLL_INTERVAL_SECONDS,
+                )
+        finally:
+            try:
+                await pubsub.unsubscribe(f"{key}:done")
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def _lead(
+        self,
+        key: str,
+        target_ids: set[str],
+        export: Callable[[], AsyncIterator[ProductState]],
+    ) -> dict[str, ProductState]:
+        """Run the export, publishing every state as a snapshot for followers."""
+        staging_key = f"{key}:staging:{uuid.uuid4().hex}"
+        states: dict[str, ProductState] = {}
+        batch: dict[str, str] = {}
+        publishing = True
+        written = 0
+
+        async def flush() -> None:
+            nonlocal publishing, written
+            if not publishing or not batch:
+                return
+            try:
+                await self.redis.hset(staging_key, mapping=batch)
+                if not written:
+                    # Expire the partial snapshot if this leader dies mid-export
+                    await self.redis.expire(staging_key, self.leader_ttl_seconds)
+                written += len(batch)
+            except RedisError as exc:
+                publishing = False
+                self.logger.warning("Stopped publishing hydration snapshot: %s", exc)
+
+        async for state in export():
+            if state.id in target_ids:
+                states[state.id] = state
+            batch[state.id] = state.model_dump_json()
+            if len(batch) >= self.WRITE_BATCH_SIZE:
+                await flush()
+                batch = {}
+
+        # Followers treat a hash without the marker as no snapshot
+        batch[self.SNAPSHOT_MARKER_FIELD] = str(time.time())
+        await flush()
+
+        if publishing:
+            try:
+                # RENAME keeps the TTL, so set the short reuse window first
+                await self.redis.expire(staging_key, self.snapshot_ttl_seconds)
+                await self.redis.rename(staging_key, key)
+                await self.redis.publish(f"{key}:done", "ready")
+                self.logger.info(
+                    "Published hydration snapshot of %s products for %ss",
+                    written - 1,
+                    self.snapshot_ttl_seconds,
+                )
+            except RedisError as exc:
+                self.logger.warning("Failed to publish hydration snapshot: %s", exc)
+        else:
+            await self._delete_best_effort(staging_key)
+
+        return states
+
+    async def _read_snapshot(
+        self, key: str, target_ids: Iterable[str]
+    ) -> Optional[dict[str, ProductState]]:
+        """Read target states from a published snapshot, or None if there is none.
+
+        Every batch re-reads the marker field, so a snapshot that expires or is
+        replaced between batches is reported as a miss rather than as products
+        that do not exist.
+        """
+        ids = sorted(target_ids)
+        states: dict[str, ProductState] = {}
+        snapshot_at = None
+
+        for start in range(0, max(len(ids), 1), self.READ_BATCH_SIZE):
+            batch = ids[start : start + self.READ_BATCH_SIZE]
+            values = await self.redis.hmget(key, [self.SNAPSHOT_MARKER_FIELD, *batch])
+            if values[0] is None or (snapshot_at is not None and values[0] != snapshot_at):
+                return None
+            snapshot_at = values[0]
+            for product_id, value in zip(batch, values[1:]):
+                if value is not None:
+                    states[product_id] = ProductState.model_validate_json(value)
+
+        return states
+
+    @staticmethod
+    async def _collect(
+        states: AsyncIterator[ProductState], target_ids: set[str]
+    ) -> dict[str, ProductState]:
+        return {state.id: state async for state in states if state.id in target_ids}
+
+    async def _delete_best_effort(self, key: str) -> None:
+        try:
+            await self.redis.delete(key)
+        except Exception as exc:
+            self.logger.warning("Failed to delete %s: %s", key, exc)
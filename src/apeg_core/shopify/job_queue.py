@@ -0,0 +1,173 @@
+"""Redis-backed per-shop FIFO queue in front of the bulk operation locks.
+
+Shopify allows one bulk query and one bulk mutation per shop at a time. Rather
+than failing fast when the Redis lock is held, callers take a ticket in a
+sorted set (ordered by priority, then arrival) and wait their turn. Only the
+head ticket may try the lock; every release is published so the next waiter
+starts immediately. Tickets carry a heartbeat key with a visibility timeout,
+so a crashed waiter cannot block the queue for longer than that timeout.
+"""
+import logging
+import uuid
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.lock import Lock as AsyncRedisLock
+
+from .exceptions import ShopifyBulkQueueTimeoutError
+
+
+def lock_operation_key(lock_name: str) -> str:
+    """Key naming the bulk operation submitted under a held lock."""
+    return f"{lock_name}:operation"
+
+
+class ShopifyBulkJobQueue:
+    """Fair, priority-aware waiting room for per-shop bulk operation locks."""
+
+    PRIORITY_WEIGHT = 1e12  # keeps priority bands ahead of arrival order
+    VISIBILITY_TIMEOUT_SECONDS = 30
+    RECHECK_INTERVAL = 1.0  # seconds, fallback if a release message is missed
+    DEFAULT_WAIT_TIMEOUT = 3600.0  # 1 hour
+
+    def __init__(self, redis: Redis, logger: Optional[logging.Logger] = None):
+        """Initialize job queue.
+
+        Args:
+            redis: Injected redis.asyncio.Redis client
+            logger: Optional logger instance
+        """
+        self.redis = redis
+        self.logger = logger or logging.getLogger(__name__)
+        self._acquired_at: dict[int, float] = {}
+
+    @staticmethod
+    def queue_key(lock_name: str) -> str:
+        return f"{lock_name}:queue"
+
+    @staticmethod
+    def release_channel(lock_name: str) -> str:
+        return f"{lock_name}:released"
+
+    @staticmethod
+    def _ticket_key(lock_name: str, ticket: str) -> str:
+        return f"{lock_name}:ticket:{ticket}"
+
+    async def depth(self, lock_name: str) -> int:
+        """Return number of waiters queued for a lock."""
+        return int(await self.redis.zcard(self.queue_key(lock_name)))
+
+    async def acquire(
+        self,
+        lock: AsyncRedisLock,
+        priority: int = 0,
+        wait_timeout: float = DEFAULT_WAIT_TIMEOUT,
+    ) -> float:
+        """Queue for ``lock`` and return once it is held.
+
+        Args:
+            lock: Non-blocking Redis lock to acquire
+            priority: Higher values are served first; FIFO within a priority
+            wait_timeout: Maximum seconds to wait in the queue
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            ShopifyBulkQueueTimeoutError: If the lock was not reached in time
+        """
+        lock_name = lock.name
+        queue_key = self.queue_key(lock_name)
+        ticket = uuid.uuid4().hex
+        ticket_key = self._ticket_key(lock_name, ticket)
+
+        seq = await self.redis.incr(f"{lock_name}:seq")
+        score = -priority * self.PRIORITY_WEIGHT + seq
+        await self.redis.set(ticket_key, "1", ex=self.VISIBILITY_TIMEOUT_SECONDS)
+        await self.redis.zadd(queue_key, {ticket: score})
+
+        start = monotonic()
+        pubsub = self.redis.pubsub()
+        acquired = False
+        try:
+            await pubsub.subscribe(self.release_channel(lock_name))
+
+            while True:
+                await self.redis.set(
+                    ticket_key, "1", ex=self.VISIBILITY_TIMEOUT_SECONDS
+                )
+
+                head = await self._queue_head(queue_key, lock_name)
+                if head == ticket and await lock.acquire(blocking=False):
+                    acquired = True
+                    waited = monotonic() - start
+                    self._acquired_at[id(lock)] = monotonic()
+                    self.logger.info(
+                        "Acquired %s after %.2fs in queue (priority=%s)",
+                        lock_name,
+                        waited,
+                        priority,
+                    )
+                    return waited
+
+                remaining = wait_timeout - (monotonic() - start)
+                if remaining <= 0:
+                    raise ShopifyBulkQueueTimeoutError(
+                        f"Timed out after {wait_timeout:.0f}s waiting for {lock_name}"
+                    )
+
+                await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=min(self.RECHECK_INTERVAL, remaining),
+                )
+        finally:
+            try:
+                await self.redis.zrem(queue_key, ticket)
+                await self.redis.delete(ticket_key)
+            except Exception as exc:
+                self.logger.error(f"Failed to remove queue ticket: {exc}")
+            try:
+                await pubsub.unsubscribe(self.release_channel(lock_name))
+                await pubsub.aclose()
+            except Exception as exc:
+                self.logger.debug(f"Failed to close queue subscription: {exc}")
+            if not acquired:
+                self.logger.info("Left %s queue without acquiring", lock_name)
+
+    async def release(self, lock: AsyncRedisLock) -> Optional[float]:
+        """Release ``lock`` and wake the next waiter.
+
+        Returns:
+            Seconds the lock was held, if it was acquired through this queue
+        """
+        acquired_at = self._acquired_at.pop(id(lock), None)
+        held = monotonic() - acquired_at if acquired_at is not None else None
+
+        try:
+            await lock.release()
+        finally:
+            await self.redis.publish(self.release_channel(lock.name), "released")
+
+        if held is not None:
+            self.logger.info("Released %s after holding %.2fs", lock.name, held)
+        return held
+
+    async def _queue_head(self, queue_key: str, lock_name: str) -> Optional[str]:
+        """Return head ticket, evicting waiters whose heartbeat expired."""
+        while True:
+            head = await self.redis.zrange(queue_key, 0, 0)
+            if not head:
+                return None
+
+            ticket = head[0]
+            if isinstance(ticket, bytes):
+                ticket = ticket.decode("utf-8")
+
+            if await self.redis.exists(self._ticket_key(lock_name, ticket)):
+                return ticket
+
+            self.logger.warning(
+                "Evicting expired waiter %s from %s", ticket, queue_key
+            )
+            await self.redis.zrem(queue_key, ticket)
@@ -0,0 +1,197 @@
+"""Heartbeat leases for the per-shop bulk operation locks.
+
+A held lock is kept alive by a background heartbeat instead of a TTL long
+enough to outlast the slowest hydration or upload, so a crashed holder
+frees the shop within one short TTL. Every acquisition also takes a fencing
+token from a per-lock counter. Renewals and operation records only succeed
+while the lock still holds this holder's token and no later holder has
+taken a newer fence, so a holder that stalled past its TTL cannot submit
+alongside its successor: ``check`` raises and the job is aborted instead.
+"""
+import asyncio
+import logging
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.lock import Lock as AsyncRedisLock
+
+from .exceptions import ShopifyBulkLeaseLostError
+from .job_queue import lock_operation_key
+
+
+# Take the next fence and clear any operation recorded by a previous holder
+_START_SCRIPT = """
+local fence = redis.call('INCR', KEYS[1])
+redis.call('DEL', KEYS[2])
+return fence
+"""
+
+# Extend the lock and its operation record while both token and fence match
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] or redis.call('GET', KEYS[2]) ~= ARGV[2] then
+  return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+redis.call('PEXPIRE', KEYS[3], ARGV[3])
+return 1
+"""
+
+# Record the submitted operation while both token and fence match
+_RECORD_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] or redis.call('GET', KEYS[2]) ~= ARGV[2] then
+  return 0
+end
+redis.call('SET', KEYS[3], ARGV[4], 'PX', ARGV[3])
+return 1
+"""
+
+
+def fence_key(lock_name: str) -> str:
+    """Key holding the latest fencing token issued for a lock."""
+    return f"{lock_name}:fence"
+
+
+class LockLease:
+    """Keeps an acquired bulk lock alive and detects when it is lost."""
+
+    TTL_SECONDS = 30
+    HEARTBEAT_FRACTION = 1 / 3  # renew three times per TTL
+
+    def __init__(
+        self,
+        redis: Redis,
+        lock: AsyncRedisLock,
+        ttl_seconds: float = TTL_SECONDS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize lease.
+
+        Args:
+            redis: Injected redis.asyncio.Redis client holding the lock
+            lock: Lock that has just been acquired with ``ttl_seconds``
+            ttl_seconds: Lease TTL; a holder that stops renewing loses the
+                lock after this long
+            logger: Optional logger instance
+        """
+        self.redis = redis
+        self.lock = lock
+        self.ttl_seconds = ttl_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.fence: Optional[int] = None
+
+        self._keys = [lock.name, fence_key(lock.name), lock_operation_key(lock.name)]
+        self._lost = False
+        self._renewed_at = monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lost(self) -> bool:
+        return self._lost
+
+    async def start(self) -> int:
+        """Take a fencing token and start the heartbeat.
+
+        Returns:
+            Fencing token for this acquisition
+        """
+        self.fence = int(await self.redis.eval(_START_SCRIPT, 2, *self._keys[1:]))
+        self._renewed_at = monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        self.logger.debug("Leased %s with fence=%s", self.lock.name, self.fence)
+        return self.fence
+
+    async def check(self) -> None:
+        """Renew now and raise if the lease is gone.
+
+        Call before any step that must not run twice for the shop, such as
+        submitting a bulk operation.
+
+        Raises:
+            ShopifyBulkLeaseLostError: If the lock expired or a newer holder
+                took it
+        """
+        if not self._lost:
+            try:
+                if not await self._renew():
+                    self._mark_lost("lock no longer held with this fence")
+            except Exception as exc:
+                # Still ours if the last renewal has not expired yet
+                if monotonic() - self._renewed_at >= self.ttl_seconds:
+                    self._mark_lost(f"not renewed within {self.ttl_seconds}s ({exc})")
+        if self._lost:
+            raise ShopifyBulkLeaseLostError(self.lock.name, self.fence)
+
+    async def record_operation(self, operation_id: str) -> bool:
+        """Record the operation submitted under this lease for the reaper.
+
+        Returns:
+            False if the lease was lost before the record was written
+        """
+        try:
+            recorded = await self.redis.eval(
+                _RECORD_SCRIPT,
+                3,
+                *self._keys,
+                self.lock.local.token,
+                str(self.fence),
+                self._ttl_ms,
+                operation_id,
+            )
+        except Exception as exc:
+            self.logger.warning(
+                "Failed to record operation for %s: %s", self.lock.name, exc
+            )
+            return False
+        if not int(recorded or 0):
+            self._mark_lost("lock no longer held with this fence")
+            return False
+        return True
+
+    async def stop(self) -> None:
+        """Stop the heartbeat (before the lock is released)."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def _ttl_ms(self) -> int:
+        return int(self.ttl_seconds * 1000)
+
+    async def _renew(self) -> bool:
+        renewed = await self.redis.eval(
+            _RENEW_SCRIPT,
+            3,
+            *self._keys,
+            self.lock.local.token,
+            str(self.fence),
+            self._ttl_ms,
+        )
+        if int(renewed or 0):
+            self._renewed_at = monotonic()
+            return True
+        return False
+
+    async def _heartbeat(self) -> None:
+        interval = self.ttl_seconds * self.HEARTBEAT_FRACTION
+        while not self._lost:
+            await asyncio.sleep(interval)
+            try:
+                if not await self._renew():
+                    self._mark_lost("lock no longer held with this fence")
+            except Exception as exc:
+                # Redis hiccup: the lock survives until its TTL runs out
+                if monotonic() - self._renewed_at >= self.ttl_seconds:
+                    self._mark_lost(f"not renewed within {self.ttl_seconds}s ({exc})")
+                else:
+                    self.logger.warning(
+                        "Failed to renew lease on %s: %s", self.lock.name, exc
+                    )
+
+    def _mark_lost(self, reason: str) -> None:
+        if not self._lost:
+            self._lost = True
+            self.logger.error(
+                "Lost lease on %s (fence=%s): %s", self.lock.name, self.fence, reason
+            )
@@ -0,0 +1,339 @@
+"""Per-product outcomes ingested from bulk mutation result files.
+
+A completed bulk mutation only reports an ``objectCount``; what happened to
+each product is in the result JSONL behind ``url`` (or ``partialDataUrl``
+when the operation failed part way). Each result line carries the input
+``__lineNumber`` and the mutation payload, including ``userErrors`` with
+field paths. Lines are streamed into an indexed SQLite table keyed by
+bulk operation and line number so large runs can be audited by query.
+Inserts are batched and written from a worker thread so a large result file
+never blocks the event loop.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import aiohttp
+
+from ..schemas.bulk_ops import MutationOutcomeSummary
+from .bulk_reader import iter_jsonl_records, iter_response_chunks
+
+
+LINE_NUMBER_KEY = "__lineNumber"
+
+
+class OutcomeStatus:
+    """Per-line outcome states."""
+
+    SUCCESS = "success"
+    USER_ERROR = "user_error"
+    MISSING = "missing"
+
+
+def init_mutation_outcome_schema(db_conn: sqlite3.Connection) -> None:
+    """Initialize mutation outcome schema.
+
+    Args:
+        db_conn: SQLite connection
+    """
+    db_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bulk_mutation_outcomes (
+            bulk_op_id TEXT NOT NULL,
+            line_number INTEGER NOT NULL,
+            run_id TEXT NOT NULL,
+            shop_domain TEXT NOT NULL,
+            product_id TEXT,
+            status TEXT NOT NULL,
+            errors_json TEXT,
+            recorded_at TEXT NOT NULL,
+            PRIMARY KEY (bulk_op_id, line_number)
+        )
+        """
+    )
+
+    db_conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_bulk_mutation_outcomes_run
+        ON bulk_mutation_outcomes (run_id, status)
+        """
+    )
+
+    db_conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_bulk_mutation_outcomes_product
+        ON bulk_mutation_outcomes (product_id)
+        """
+    )
+
+    db_conn.commit()
+
+
+def parse_outcome_line(
+    record: dict[str, Any],
+    mutation_name: str = "productUpdate",
+) -> tuple[Optional[int], Optional[str], str, list[dict]]:
+    """Classify one result line.
+
+    Returns:
+        (line_number, product_id, status, errors) where errors are
+        ``{"field": [...], "message": ...}`` dicts
+    """
+    line_number = record.get(LINE_NUMBER_KEY)
+    payload = (record.get("data") or {}).get(mutation_name) or {}
+    product = payload.get("product") or {}
+
+    errors = [
+        {"field": error.get("field"), "message": error.get("message")}
+        for error in payload.get("userErrors") or []
+    ]
+    # Line-level GraphQL errors (e.g. invalid input) carry no field path
+    errors.extend(
+        {"field": None, "message": error.get("message")}
+        for error in record.get("errors") or []
+    )
+
+    status = OutcomeStatus.USER_ERROR if errors or not payload else OutcomeStatus.SUCCESS
+    return line_number, product.get("id"), status, errors
+
+
+async def iter_outcomes(
+    records: AsyncIterator[dict],
+    product_ids: Optional[Sequence[str]] = None,
+    logger: Optional[logging.Logger] = None,
+) -> AsyncIterator[tuple[int, Optional[str], str, list[dict]]]:
+    """Yield ``(line_number, product_id, status, errors)`` per input line.
+
+    Result lines come first, in file order; submitted lines that have no
+    result line (the operation stopped before reaching them) follow as
+    ``missing``.
+
+    Args:
+        records: Decoded result JSONL records
+        product_ids: Submitted product IDs in JSONL line order, if known
+        logger: Optional logger for malformed lines
+    """
+    logger = logger or logging.getLogger(__name__)
+    seen_lines: set[int] = set()
+
+    async for record in records:
+        line_number, product_id, status, errors = parse_outcome_line(record)
+        if line_number is None:
+            logger.warning("Result line without %s; skipping", LINE_NUMBER_KEY)
+            continue
+        if product_id is None and product_ids and line_number < len(product_ids):
+            product_id = product_ids[line_number]
+        seen_lines.add(line_number)
+        yield line_number, product_id, status, errors
+
+    for line_number, product_id in enumerate(product_ids or []):
+        if line_number not in seen_lines:
+            yield line_number, product_id, OutcomeStatus.MISSING, []
+
+
+async def diff_result_file(
+    session: aiohttp.ClientSession,
+    url: str,
+    bulk_op_id: str,
+    product_ids: Sequence[str],
+) -> MutationOutcomeSummary:
+    """Diff a result URL against the submitted input without persisting it."""
+    records = iter_jsonl_records(iter_response_chunks(session, url))
+    return await summarize_outcome_records(records, bulk_op_id, product_ids)
+
+
+async def summarize_outcome_records(
+    records: AsyncIterator[dict],
+    bulk_op_id: str,
+    product_ids: Sequence[str],
+) -> MutationOutcomeSummary:
+    """Count result-shaped records against the submitted input."""
+    summary = MutationOutcomeSummary(bulk_op_id=bulk_op_id)
+    async for _, product_id, status, _ in iter_outcomes(records, product_ids):
+        _count_outcome(summary, product_id, status)
+    return summary
+
+
+def _count_outcome(
+    summary: MutationOutcomeSummary, product_id: Optional[str], status: str
+) -> None:
+    if status == OutcomeStatus.SUCCESS:
+        summary.succeeded += 1
+    elif status == OutcomeStatus.MISSING:
+        summary.missing += 1
+        if product_id:
+            summary.missing_product_ids.append(product_id)
+    else:
+        summary.user_errors += 1
+        if product_id:
+            summary.rejected_product_ids.append(product_id)
+
+
+class MutationOutcomeStore:
+    """SQLite-backed per-product bulk mutation outcomes."""
+
+    INSERT_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        db_conn: sqlite3.Connection,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize outcome store.
+
+        Args:
+            db_conn: SQLite connection (schema created if missing); opened
+                with ``check_same_thread=False``, since inserts run in
+                worker threads
+            logger: Optional logger instance
+        """
+        self.db_conn = db_conn
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        init_mutation_outcome_schema(db_conn)
+
+    @classmethod
+    def open(cls, db_path: str | Path) -> "MutationOutcomeStore":
+        """Open (creating if needed) an outcome database file in WAL mode."""
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared with asyncio.to_thread workers; self._lock serializes use
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return cls(conn)
+
+    def close(self) -> None:
+        self.db_conn.close()
+
+    async def ingest(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        bulk_op_id: str,
+        run_id: str,
+        shop_domain: str,
+        product_ids: Optional[Sequence[str]] = None,
+    ) -> MutationOutcomeSummary:
+        """Stream a result URL into the outcome table.
+
+        Args:
+            session: aiohttp session used for the download
+            url: Bulk operation ``url`` or ``partialDataUrl``
+            bulk_op_id: Operation the results belong to
+            run_id: Client run identifier
+            shop_domain: Target store domain
+            product_ids: Submitted product IDs in JSONL line order; resolves
+                lines whose payload has no product and records input lines
+                with no result line as missing
+
+        Returns:
+            Outcome counts for the operation
+        """
+        records = iter_jsonl_records(iter_response_chunks(session, url))
+        return await self.ingest_records(
+            records, bulk_op_id, run_id, shop_domain, product_ids
+        )
+
+    async def ingest_records(
+        self,
+        records: AsyncIterator[dict],
+        bulk_op_id: str,
+        run_id: str,
+        shop_domain: str,
+        product_ids: Optional[Sequence[str]] = None,
+    ) -> MutationOutcomeSummary:
+        """Write decoded result lines to the outcome table (see ``ingest``)."""
+        summary = MutationOutcomeSummary(bulk_op_id=bulk_op_id)
+        recorded_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows: list[tuple] = []
+
+        async for line_number, product_id, status, errors in iter_outcomes(
+            records, product_ids, self.logger
+        ):
+            _count_outcome(summary, product_id, status)
+            rows.append(
+                (
+                    bulk_op_id,
+                    line_number,
+                    run_id,
+                    shop_domain,
+                    product_id,
+                    status,
+                    json.dumps(errors) if errors else None,
+                    recorded_at,
+                )
+            )
+            if len(rows) >= self.INSERT_BATCH_SIZE:
+                await asyncio.to_thread(self._insert, rows)
+                rows = []
+
+        if rows:
+            await asyncio.to_thread(self._insert, rows)
+
+        self.logger.info(
+            "Ingested outcomes for %s: succeeded=%s, user_errors=%s, missing=%s",
+            bulk_op_id,
+            summary.succeeded,
+            summary.user_errors,
+            summary.missing,
+        )
+        return summary
+
+    def get_outcomes(
+        self,
+        run_id: str,
+        status: Optional[str] = None,
+        limit: int = 1000,
+    ) -> list[dict[str, Any]]:
+        """Return outcome rows for a run, optionally filtered by status."""
+        query = (
+            "SELECT bulk_op_id, line_number, product_id, status, errors_json,"
+            " recorded_at FROM bulk_mutation_outcomes WHERE run_id = ?"
+        )
+        params: list[Any] = [run_id]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY bulk_op_id, line_number LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.db_conn.execute(query, params).fetchall()
+        return [
+            {
+                "bulk_op_id": bulk_op_id,
+                "line_number": line_number,
+                "product_id": product_id,
+                "status": row_status,
+                "errors": json.loads(errors_json) if errors_json else [],
+                "recorded_at": recorded_at,
+            }
+            for (
+                bulk_op_id,
+                line_number,
+                product_id,
+                row_status,
+                errors_json,
+                recorded_at,
+            ) in rows
+        ]
+
+    def _insert(self, rows: list[tuple]) -> None:
+        # Re-ingesting an operation overwrites its lines
+        with self._lock:
+            self.db_conn.executemany(
+                """
+                INSERT OR REPLACE INTO bulk_mutation_outcomes (
+                    bulk_op_id, line_number, run_id, shop_domain, product_id,
+                    status, errors_json, recorded_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self.db_conn.commit()
@@ -0,0 +1,431 @@
+"""Local SQLite mirror of product state (id, tags, SEO, updatedAt).
+
+Hydrating the safe-write merge from Shopify means a full-catalog bulk export
+per mutation. The mirror is seeded once from that export, kept current with
+incremental ``updated_at:>`` queries and ``products/update`` webhooks, and
+checked for freshness before each merge, so small jobs read current state
+from disk instead of exporting the whole store. Rows for products APEG
+mutates are invalidated on submission, so its own writes are never read
+back stale.
+
+Queries block, so async callers run them with ``asyncio.to_thread``; the
+connection is shared across those threads under a lock.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import aiofiles.os
+
+from ..schemas.bulk_ops import ProductSEO, ProductState
+from .bulk_client import ShopifyBulkClient
+from .bulk_download import BulkResultDownloader
+from .bulk_reader import iter_bulk_file
+from .graphql_strings import QUERY_PRODUCTS_MIRROR_STATE, QUERY_PRODUCTS_UPDATED_SINCE
+
+
+def _normalize_ts(value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO 8601 timestamp to UTC ``YYYY-MM-DDTHH:MM:SSZ``."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# Incoming row wins unless both sides have timestamps and it is older
+_NEWER_THAN_MIRRORED = (
+    "(product_mirror.updated_at IS NULL OR excluded.updated_at IS NULL"
+    " OR excluded.updated_at >= product_mirror.updated_at)"
+)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def product_state_from_node(node: dict) -> ProductState:
+    """Build a ProductState from a Product node (id, tags, seo, updatedAt)."""
+    seo = node.get("seo") or {}
+    return ProductState(
+        id=node["id"],
+        tags=node.get("tags") or [],
+        seo=ProductSEO(title=seo.get("title"), description=seo.get("description")),
+        updated_at=node.get("updatedAt"),
+    )
+
+
+def init_product_mirror_schema(db_conn: sqlite3.Connection) -> None:
+    """Initialize product mirror schema.
+
+    Args:
+        db_conn: SQLite connection
+    """
+    db_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS product_mirror (
+            shop_domain TEXT NOT NULL,
+            product_id TEXT NOT NULL,
+            tags_json TEXT NOT NULL,
+            seo_title TEXT,
+            seo_description TEXT,
+            seo_known INTEGER NOT NULL DEFAULT 1,
+            updated_at TEXT,
+            synced_at TEXT NOT NULL,
+            PRIMARY KEY (shop_domain, product_id)
+        )
+        """
+    )
+
+    db_conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS product_mirror_state (
+            shop_domain TEXT PRIMARY KEY,
+            seeded_at TEXT,
+            last_synced_at TEXT,
+            high_watermark TEXT
+        )
+        """
+    )
+
+    db_conn.commit()
+
+
+class ProductMirror:
+    """SQLite-backed product state mirror for one shop."""
+
+    UPSERT_BATCH_SIZE = 500
+    WATERMARK_OVERLAP_SECONDS = 60
+    DEFAULT_MAX_AGE_SECONDS = 300
+
+    def __init__(
+        self,
+        db_conn: sqlite3.Connection,
+        shop_domain: str,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize product mirror.
+
+        Args:
+            db_conn: SQLite connection (schema created if missing); opened
+                with ``check_same_thread=False`` if used from async code
+            shop_domain: e.g., "mystore.myshopify.com"
+            logger: Optional logger instance
+        """
+        self.db_conn = db_conn
+        self.shop_domain = shop_domain
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        init_product_mirror_schema(db_conn)
+
+    @classmethod
+    def open(cls, db_path: str | Path, shop_domain: str) -> "ProductMirror":
+        """Open (creating if needed) a mirror database file in WAL mode."""
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared with asyncio.to_thread workers; self._lock serializes use
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return cls(conn, shop_domain)
+
+    def close(self) -> None:
+        self.db_conn.close()
+
+    @property
+    def is_seeded(self) -> bool:
+        return self._sync_state()["seeded_at"] is not None
+
+    def is_fresh(self, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> bool:
+        """Check whether the last full or incremental sync is recent enough."""
+        last_synced = self._sync_state()["last_synced_at"]
+        if not last_synced:
+            return False
+        synced_at = datetime.fromisoformat(last_synced.replace("Z", "+00:00"))
+        return _utc_now() - synced_at <= timedelta(seconds=max_age_seconds)
+
+    def get_states(self, product_ids: Iterable[str]) -> dict[str, ProductState]:
+        """Return mirrored state for the requested products that are known."""
+        ids = list(dict.fromkeys(product_ids))
+        rows = []
+
+        # Stay well under SQLite's bound-parameter limit
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows.extend(
+                    self.db_conn.execute(
+                        f"""
+                        SELECT product_id, tags_json, seo_title, seo_description,
+                               seo_known, updated_at
+                        FROM product_mirror
+                        WHERE shop_domain=? AND product_id IN ({placeholders})
+                        """,
+                        (self.shop_domain, *chunk),
+                    )
+                )
+
+        return {
+            product_id: ProductState(
+                id=product_id,
+                tags=json.loads(tags_json),
+                seo=ProductSEO(title=title, description=description)
+                if seo_known
+                else None,
+                updated_at=updated,
+            )
+            for product_id, tags_json, title, description, seo_known, updated in rows
+        }
+
+    def upsert(self, states: Iterable[ProductState], synced_at: Optional[str] = None) -> int:
+        """Insert or update product rows, never regressing to older updatedAt."""
+        synced_at = synced_at or _utc_now().strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows = [
+            (
+                self.shop_domain,
+                state.id,
+                json.dumps(state.tags),
+                state.seo.title if state.seo else None,
+                state.seo.description if state.seo else None,
+                1 if state.seo is not None else 0,
+                _normalize_ts(state.updated_at),
+                synced_at,
+            )
+            for state in states
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.db_conn.executemany(
+                """
+                INSERT INTO product_mirror (
+                    shop_domain, product_id, tags_json, seo_title, seo_description,
+                    seo_known, updated_at, synced_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(shop_domain, product_id)
+                DO UPDATE SET
+                    tags_json=CASE WHEN {newer}
+                        THEN excluded.tags_json ELSE tags_json END,
+                    seo_title=CASE WHEN {newer} AND excluded.seo_known
+                        THEN excluded.seo_title ELSE seo_title END,
+                    seo_description=CASE WHEN {newer} AND excluded.seo_known
+                        THEN excluded.seo_description ELSE seo_description END,
+                    seo_known=CASE WHEN {newer}
+                        THEN excluded.seo_known ELSE seo_known END,
+                    updated_at=CASE WHEN {newer}
+                        THEN excluded.updated_at ELSE updated_at END,
+                    synced_at=excluded.synced_at
+                """.format(newer=_NEWER_THAN_MIRRORED),
+                rows,
+            )
+            self.db_conn.commit()
+        return len(rows)
+
+    def invalidate(self, product_ids: Iterable[str]) -> int:
+        """Drop mirrored rows so the next read hydrates them from Shopify.
+
+        Used for products APEG itself just wrote: their new state only
+        reaches the mirror with the next webhook or incremental refresh.
+
+        Returns:
+            Number of rows removed
+        """
+        ids = list(dict.fromkeys(product_ids))
+        removed = 0
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                cursor = self.db_conn.execute(
+                    f"""
+                    DELETE FROM product_mirror
+                    WHERE shop_domain=? AND product_id IN ({placeholders})
+                    """,
+                    (self.shop_domain, *chunk),
+                )
+                removed += cursor.rowcount
+            self.db_conn.commit()
+        return removed
+
+    def apply_webhook(self, payload: dict) -> bool:
+        """Apply a ``products/update`` webhook body (REST representation).
+
+        The REST payload carries tags but not SEO fields, so mirrored SEO is
+        marked unknown until the next sync re-reads it.
+
+        Returns:
+            True if the payload identified a product and was applied
+        """
+        product_id = payload.get("admin_graphql_api_id")
+        if not product_id:
+            return False
+
+        raw_tags = payload.get("tags") or ""
+        if isinstance(raw_tags, str):
+            tags = [t.strip() for t in raw_tags.split(",") if t.strip()]
+        else:
+            tags = list(raw_tags)
+
+        self.upsert(
+            [ProductState(id=product_id, tags=tags, updated_at=payload.get("updated_at"))]
+        )
+        return True
+
+    async def seed(
+        self,
+        bulk_client: ShopifyBulkClient,
+        spool_dir: Optional[str] = None,
+    ) -> int:
+        """Seed the mirror from one full-catalog bulk export.
+
+        Args:
+            bulk_client: Client used to run the bulk query
+            spool_dir: Directory for the downloaded result (temp dir if None)
+
+        Returns:
+            Number of products mirrored
+        """
+        started_at = _utc_now()
+        synced_at = started_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        operation = await bulk_client.submit_job(QUERY_PRODUCTS_MIRROR_STATE)
+        result = await bulk_client.poll_status(operation.id)
+
+        result_path = os.path.join(
+            spool_dir or tempfile.gettempdir(),
+            f"apeg_product_mirror_{uuid.uuid4().hex}.jsonl",
+        )
+        count = 0
+        try:
+            await BulkResultDownloader(bulk_client.session, logger=self.logger).download(
+                result.url, result_path
+            )
+
+            batch: list[ProductState] = []
+            async for node in iter_bulk_file(result_path):
+                batch.append(self._state_from_node(node))
+                if len(batch) >= self.UPSERT_BATCH_SIZE:
+                    count += await asyncio.to_thread(self.upsert, batch, synced_at)
+                    batch = []
+            count += await asyncio.to_thread(self.upsert, batch, synced_at)
+        finally:
+            try:
+                await aiofiles.os.remove(result_path)
+            except FileNotFoundError:
+                pass
+
+        # Rows not present in this export belong to deleted products
+        await asyncio.to_thread(self._delete_unsynced, synced_at)
+        await asyncio.to_thread(self._record_sync, started_at, True)
+
+        self.logger.info(
+            "Seeded product mirror: shop=%s, products=%s", self.shop_domain, count
+        )
+        return count
+
+    async def refresh_incremental(self, bulk_client: ShopifyBulkClient) -> int:
+        """Pull products updated since the last sync watermark.
+
+        Args:
+            bulk_client: Client whose throttled GraphQL transport is reused
+
+        Returns:
+            Number of products updated
+        """
+        watermark = (await asyncio.to_thread(self._sync_state))["high_watermark"]
+        if not watermark:
+            raise RuntimeError("Product mirror must be seeded before incremental refresh")
+
+        started_at = _utc_now()
+        query_filter = f"updated_at:>'{watermark}'"
+        cursor = None
+        count = 0
+
+        while True:
+            resp_data = await bulk_client.post_graphql(
+                {
+                    "query": QUERY_PRODUCTS_UPDATED_SINCE,
+                    "variables": {"query": query_filter, "cursor": cursor},
+                }
+            )
+            products = resp_data["data"]["products"]
+            count += await asyncio.to_thread(
+                self.upsert, [self._state_from_node(n) for n in products["nodes"]]
+            )
+
+            if not products["pageInfo"]["hasNextPage"]:
+                break
+            cursor = products["pageInfo"]["endCursor"]
+
+        await asyncio.to_thread(self._record_sync, started_at, False)
+        self.logger.info(
+            "Incremental mirror refresh: shop=%s, since=%s, products=%s",
+            self.shop_domain,
+            watermark,
+            count,
+        )
+        return count
+
+    def _delete_unsynced(self, synced_at: str) -> None:
+        with self._lock:
+            self.db_conn.execute(
+                "DELETE FROM product_mirror WHERE shop_domain=? AND synced_at<?",
+                (self.shop_domain, synced_at),
+            )
+
+    def _record_sync(self, started_at: datetime, seeded: bool) -> None:
+        """Advance sync timestamps; watermark overlaps to tolerate clock skew."""
+        synced = started_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        watermark = (
+            started_at - timedelta(seconds=self.WATERMARK_OVERLAP_SECONDS)
+        ).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        with self._lock:
+            self.db_conn.execute(
+                """
+                INSERT INTO product_mirror_state (
+                    shop_domain, seeded_at, last_synced_at, high_watermark
+                )
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(shop_domain)
+                DO UPDATE SET
+                    seeded_at=COALESCE(excluded.seeded_at, product_mirror_state.seeded_at),
+                    last_synced_at=excluded.last_synced_at,
+                    high_watermark=excluded.high_watermark
+                """,
+                (self.shop_domain, synced if seeded else None, synced, watermark),
+            )
+            self.db_conn.commit()
+
+    def _sync_state(self) -> dict[str, Optional[str]]:
+        with self._lock:
+            row = self.db_conn.execute(
+                """
+                SELECT seeded_at, last_synced_at, high_watermark
+                FROM product_mirror_state
+                WHERE shop_domain=?
+                """,
+                (self.shop_domain,),
+            ).fetchone()
+        if not row:
+            return {"seeded_at": None, "last_synced_at": None, "high_watermark": None}
+        return {"seeded_at": row[0], "last_synced_at": row[1], "high_watermark": row[2]}
+
+    @staticmethod
+    def _state_from_node(node: dict) -> ProductState:
+        return product_state_from_node(node)
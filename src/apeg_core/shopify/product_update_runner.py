@@ -0,0 +1,635 @@
+"""Executor choice, sharding, and retry orchestration for product updates.
+
+``ProductUpdateRunner`` decides how a safe-write product update reaches
+Shopify: small batches as direct ``productUpdate`` calls, larger ones as
+sequential bulk mutations split into shards, and a bounded number of
+follow-up passes for products a pass left unprocessed. It holds no
+connections of its own; the ``ShopifyBulkMutationClient`` it is given
+hydrates, merges, stages uploads, submits and polls mutations, holds the
+shop's mutation lock, and collects outcomes.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Optional
+
+from ..schemas.bulk_ops import (
+    BulkOperation,
+    BulkShardResult,
+    ProductUpdateInput,
+    ProductUpdateSpec,
+    ShardedBulkOperationRef,
+)
+from ..telemetry import tracing
+from ..telemetry.metrics import BULK_PHASE_SECONDS
+from .bulk_mutation_client import ShopifyBulkMutationClient
+from .exceptions import (
+    ShopifyBulkGraphQLError,
+    ShopifyBulkLeaseLostError,
+    ShopifyBulkOperationFailedError,
+)
+from .graphql_strings import MUTATION_PRODUCT_UPDATE
+from .mutation_outcomes import summarize_outcome_records
+
+
+class ProductUpdateRunner:
+    """Runs safe-write product updates as direct calls or sharded bulk mutations."""
+
+    SHARD_MAX_BYTES = 90 * 1024 * 1024  # below Shopify's 100MB variables file cap
+    SHARD_MAX_LINES = 100_000
+    RETRY_MAX_ATTEMPTS = 2  # follow-up passes for unprocessed products
+    DIRECT_MUTATION_THRESHOLD = 20  # at or below this, skip the bulk pipeline
+    DIRECT_MUTATION_CONCURRENCY = 4
+    POLL_TIMEOUT_SECONDS = 3600
+
+    def __init__(
+        self,
+        client: ShopifyBulkMutationClient,
+        shard_max_lines: int = SHARD_MAX_LINES,
+        shard_max_bytes: int = SHARD_MAX_BYTES,
+        direct_mutation_threshold: int = DIRECT_MUTATION_THRESHOLD,
+        max_retries: int = 0,
+        retry_user_errors: bool = False,
+        poll_timeout_s: int = POLL_TIMEOUT_SECONDS,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize product update runner.
+
+        Args:
+            client: Mutation client that hydrates, uploads, submits, and
+                polls on the runner's behalf
+            shard_max_lines: Most JSONL lines per sharded bulk mutation
+            shard_max_bytes: Most JSONL bytes per sharded bulk mutation
+            direct_mutation_threshold: Largest batch ``run`` sends as direct
+                productUpdate calls instead of a bulk mutation (0 always
+                uses bulk)
+            max_retries: Follow-up passes for unprocessed products
+            retry_user_errors: Also resubmit products Shopify rejected with
+                user errors (off by default: validation errors repeat)
+            poll_timeout_s: Per-shard polling timeout
+            logger: Optional logger instance
+        """
+        self.client = client
+        self.shard_max_lines = shard_max_lines
+        self.shard_max_bytes = shard_max_bytes
+        self.direct_mutation_threshold = direct_mutation_threshold
+        self.max_retries = max_retries
+        self.retry_user_errors = retry_user_errors
+        self.poll_timeout_s = poll_timeout_s
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def run(
+        self,
+        run_id: str,
+        updates: list[ProductUpdateSpec],
+        priority: int = 0,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_shard_submitted: Optional[
+            Callable[[BulkShardResult, int], Awaitable[None]]
+        ] = None,
+        check_canceled: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> ShardedBulkOperationRef:
+        """Run a safe-write update with the executor suited to its size.
+
+        Batches of at most ``direct_mutation_threshold`` products use
+        ``run_direct``; larger ones use ``run_sharded``. Both return the
+        same result shape.
+        """
+        direct = len(updates) <= self.direct_mutation_threshold
+        with tracing.span(
+            "shopify.run_product_update",
+            **{
+                "apeg.run_id": run_id,
+                "shopify.products": len(updates),
+                "shopify.executor": "direct" if direct else "sharded",
+            },
+        ):
+            if direct:
+                return await self.run_direct(
+                    run_id, updates, on_stage=on_stage, check_canceled=check_canceled
+                )
+            return await self.run_sharded(
+                run_id,
+                updates,
+                priority=priority,
+                on_stage=on_stage,
+                on_shard_submitted=on_shard_submitted,
+                check_canceled=check_canceled,
+            )
+
+    async def run_sharded(
+        self,
+        run_id: str,
+        updates: list[ProductUpdateSpec],
+        priority: int = 0,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_shard_submitted: Optional[
+            Callable[[BulkShardResult, int], Awaitable[None]]
+        ] = None,
+        check_canceled: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> ShardedBulkOperationRef:
+        """Execute a large safe-write update as sequential bulk mutations.
+
+        Merged updates are split into shards of at most ``shard_max_lines``
+        lines and ``shard_max_bytes`` bytes. Shopify runs one bulk mutation
+        per shop at a time, so shards run in order, but the staged upload
+        for shard N+1 is prepared while shard N runs. A shard that fails to
+        upload or submit, or ends FAILED or EXPIRED, is recorded and the run
+        moves on; a CANCELED shard, or a polling failure (timeout or no
+        answer, so Shopify's state is unknown), stops the remaining shards.
+        The mutation lock is held, under a heartbeat lease, until every
+        shard is done; if the lease is lost, no further shard is submitted.
+
+        With ``max_retries``, each finished shard's result file (or partial
+        data) is diffed against its input. Products that were not processed
+        are re-hydrated and resubmitted as a smaller follow-up pass, up to
+        ``max_retries`` times, so recovery cost scales with the failures.
+        Nothing is retried once a shard was canceled.
+
+        Args:
+            run_id: Client identifier for idempotency
+            updates: Product update specifications
+            priority: Queue priority (higher first) when a job queue is set
+            on_stage: Optional async callback invoked with "hydrating" and
+                "uploading" as the first pass reaches those steps
+            on_shard_submitted: Optional async callback invoked with each
+                shard's result and the shard count so far once Shopify
+                accepts it
+            check_canceled: Optional async callback awaited before each
+                shard is staged or submitted and before each retry pass; it
+                raises to stop the run
+
+        Returns:
+            ShardedBulkOperationRef with one result per shard, retry shards
+            appended after the first pass
+
+        Raises:
+            ShopifyBulkMutationLockedError: If lock unavailable (or the queue
+                wait timed out)
+            ShopifyBulkLeaseLostError: If the mutation lock was lost before a
+                shard was submitted
+            ShopifyBulkGraphQLError: On first-pass hydration errors
+        """
+        await self.client.acquire_mutation_lock(run_id, priority)
+
+        try:
+            summary = ShardedBulkOperationRef(
+                run_id=run_id, shop_domain=self.client.shop_domain
+            )
+            await self._run_shard_pass(
+                summary,
+                updates,
+                attempt=0,
+                collect_outcomes=self.max_retries > 0,
+                on_stage=on_stage,
+                on_shard_submitted=on_shard_submitted,
+                check_canceled=check_canceled,
+            )
+
+            async def retry_pass(retry_updates: list[ProductUpdateSpec], attempt: int):
+                await self._run_shard_pass(
+                    summary,
+                    retry_updates,
+                    attempt=attempt,
+                    collect_outcomes=True,
+                    on_shard_submitted=on_shard_submitted,
+                    check_canceled=check_canceled,
+                )
+
+            await self._retry_unprocessed(summary, updates, retry_pass, check_canceled)
+            return summary
+
+        finally:
+            await self.client.release_mutation_lock()
+
+    async def run_direct(
+        self,
+        run_id: str,
+        updates: list[ProductUpdateSpec],
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
+        check_canceled: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> ShardedBulkOperationRef:
+        """Execute a small safe-write update as concurrent productUpdate calls.
+
+        A bulk mutation carries minutes of fixed overhead (staged upload,
+        queueing, polling) and waits on the per-shop mutation lock. Small
+        batches skip both: each merged update is sent as its own
+        cost-throttled ``productUpdate`` with at most
+        ``DIRECT_MUTATION_CONCURRENCY`` in flight. Responses are shaped like
+        bulk result lines, so outcomes, no-op skipping, and retries of
+        unprocessed products behave as for bulk shards.
+
+        Args:
+            run_id: Client run identifier
+            updates: Product update specifications
+            on_stage: Optional async callback invoked with "hydrating" and
+                "running" as the pipeline reaches those steps
+            check_canceled: Optional async callback awaited before each
+                retry pass; it raises to stop the run
+
+        Returns:
+            ShardedBulkOperationRef with one direct shard per pass
+
+        Raises:
+            ShopifyBulkGraphQLError: On first-pass hydration errors
+        """
+        summary = ShardedBulkOperationRef(
+            run_id=run_id, shop_domain=self.client.shop_domain
+        )
+        await self._run_direct_pass(summary, updates, attempt=0, on_stage=on_stage)
+
+        async def retry_pass(retry_updates: list[ProductUpdateSpec], attempt: int):
+            await self._run_direct_pass(summary, retry_updates, attempt=attempt)
+
+        await self._retry_unprocessed(summary, updates, retry_pass, check_canceled)
+        return summary
+
+    async def _retry_unprocessed(
+        self,
+        summary: ShardedBulkOperationRef,
+        updates: list[ProductUpdateSpec],
+        run_pass: Callable[[list[ProductUpdateSpec], int], Awaitable[None]],
+        check_canceled: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """Resubmit products a pass left unprocessed, with backoff.
+
+        A run with a canceled shard is never retried, and ``check_canceled``
+        is awaited (outside the pass's error handling) before each pass.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            if summary.is_canceled:
+                self.logger.warning(
+                    "Not retrying run_id=%s: a shard was canceled", summary.run_id
+                )
+                break
+            retry_ids = set(summary.retry_product_ids(self.retry_user_errors))
+            if not retry_ids:
+                break
+            retry_updates = [spec for spec in updates if spec.product_id in retry_ids]
+            delay = self.client.bulk_client.calculate_backoff(attempt)
+            self.logger.warning(
+                "Retrying %s of %s products for run_id=%s in %.2fs "
+                "(attempt=%s/%s)",
+                len(retry_updates),
+                len(updates),
+                summary.run_id,
+                delay,
+                attempt,
+                self.max_retries,
+            )
+            await asyncio.sleep(delay)
+            if check_canceled is not None:
+                await check_canceled()
+            try:
+                await run_pass(retry_updates, attempt)
+            except Exception as exc:
+                # Keep the earlier results; the products stay failed
+                self.logger.error(
+                    f"Retry pass {attempt} for {summary.run_id} failed: {exc}"
+                )
+                break
+
+    async def _run_direct_pass(
+        self,
+        summary: ShardedBulkOperationRef,
+        updates: list[ProductUpdateSpec],
+        attempt: int,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> None:
+        """Hydrate and send ``updates`` directly, appending one shard to ``summary``."""
+        client = self.client
+        run_id = summary.run_id
+
+        if on_stage is not None:
+            await on_stage("hydrating")
+        merged_updates = await self._hydrate_and_merge(summary, updates, attempt)
+        if not merged_updates:
+            return
+
+        if on_stage is not None:
+            await on_stage("running")
+        semaphore = asyncio.Semaphore(self.DIRECT_MUTATION_CONCURRENCY)
+
+        async def update_one(line_number: int, update: ProductUpdateInput):
+            async with semaphore:
+                try:
+                    resp_data = await client.bulk_client.post_graphql(
+                        {
+                            "query": MUTATION_PRODUCT_UPDATE,
+                            "variables": update.to_jsonl_dict(),
+                        }
+                    )
+                except ShopifyBulkGraphQLError as exc:
+                    # Shopify answered and rejected the input
+                    return {"errors": [{"message": str(exc)}], "__lineNumber": line_number}
+                except Exception as exc:
+                    # No answer: left out, so the product counts as unprocessed
+                    self.logger.warning(
+                        f"Direct productUpdate for {update.id} failed: {exc}"
+                    )
+                    return None
+            return {"data": resp_data.get("data") or {}, "__lineNumber": line_number}
+
+        lines = await asyncio.gather(
+            *(update_one(i, update) for i, update in enumerate(merged_updates))
+        )
+        await client.invalidate_mirror(update.id for update in merged_updates)
+
+        async def result_records() -> AsyncIterator[dict]:
+            for line in lines:
+                if line is not None:
+                    yield line
+
+        op_id = f"direct:{run_id}:{attempt}"
+        product_ids = [update.id for update in merged_updates]
+        if client.outcome_store is not None:
+            outcomes = await client.outcome_store.ingest_records(
+                result_records(), op_id, run_id, client.shop_domain, product_ids
+            )
+        else:
+            outcomes = await summarize_outcome_records(
+                result_records(), op_id, product_ids
+            )
+
+        shard = BulkShardResult(
+            index=len(summary.shards),
+            attempt=attempt,
+            executor="direct",
+            product_ids=product_ids,
+            line_count=len(merged_updates),
+            status="COMPLETED" if not outcomes.missing else "FAILED",
+            object_count=outcomes.succeeded + outcomes.user_errors,
+            error=(
+                f"{outcomes.missing} of {len(merged_updates)} updates not sent"
+                if outcomes.missing
+                else None
+            ),
+            outcomes=outcomes,
+        )
+        summary.shards.append(shard)
+        self.logger.info(
+            "Direct update pass: run_id=%s, attempt=%s, succeeded=%s, "
+            "user_errors=%s, unsent=%s",
+            run_id,
+            attempt,
+            outcomes.succeeded,
+            outcomes.user_errors,
+            outcomes.missing,
+        )
+
+    async def _hydrate_and_merge(
+        self,
+        summary: ShardedBulkOperationRef,
+        updates: list[ProductUpdateSpec],
+        attempt: int,
+    ) -> list[ProductUpdateInput]:
+        """Fetch current state, merge, and drop products already up to date."""
+        client = self.client
+        product_ids = [spec.product_id for spec in updates]
+        with BULK_PHASE_SECONDS.time(operation_type="MUTATION", phase="hydrate"):
+            current_states = await client.fetch_current_state(product_ids)
+
+        merged_updates, unchanged = client.drop_unchanged_updates(
+            client.merge_product_updates(
+                updates,
+                {pid: state.tags for pid, state in current_states.items()},
+            ),
+            current_states,
+        )
+        for pid in unchanged:
+            summary.skipped_product_ids[pid] = attempt
+        if unchanged:
+            self.logger.info(
+                "Skipping %s unchanged products: run_id=%s, attempt=%s",
+                len(unchanged),
+                summary.run_id,
+                attempt,
+            )
+        return merged_updates
+
+    async def _run_shard_pass(
+        self,
+        summary: ShardedBulkOperationRef,
+        updates: list[ProductUpdateSpec],
+        attempt: int,
+        collect_outcomes: bool,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_shard_submitted: Optional[
+            Callable[[BulkShardResult, int], Awaitable[None]]
+        ] = None,
+        check_canceled: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """Hydrate, shard, and run ``updates``, appending shards to ``summary``.
+
+        ``check_canceled`` runs before the first shard is staged and before
+        each submission; if it raises, the staged next shard is dropped.
+        """
+        client = self.client
+        run_id = summary.run_id
+        next_upload: Optional[asyncio.Task] = None
+        outcome_tasks: list[asyncio.Task] = []
+
+        try:
+            if on_stage is not None:
+                await on_stage("hydrating")
+            merged_updates = await self._hydrate_and_merge(summary, updates, attempt)
+
+            if on_stage is not None:
+                await on_stage("uploading")
+            shards = self._split_into_shards(
+                merged_updates, first_index=len(summary.shards), attempt=attempt
+            )
+            summary.shards.extend(result for _, result in shards)
+
+            self.logger.info(
+                "Split %s updates into %s shards: run_id=%s, attempt=%s",
+                len(merged_updates),
+                len(shards),
+                run_id,
+                attempt,
+            )
+            if not shards:
+                return
+
+            shard_total = len(summary.shards)
+            if check_canceled is not None:
+                await check_canceled()
+            next_upload = asyncio.create_task(client.stage_upload(shards[0][0]))
+            for position, (_, result) in enumerate(shards):
+                upload, next_upload = next_upload, None
+                bulk_op: Optional[BulkOperation] = None
+                try:
+                    staged_target = await upload
+                except Exception as exc:
+                    result.status, result.error = "UPLOAD_FAILED", str(exc)
+                else:
+                    if check_canceled is not None:
+                        await check_canceled()
+                    try:
+                        bulk_op = await client.bulk_operation_run_mutation(
+                            mutation=MUTATION_PRODUCT_UPDATE,
+                            staged_upload_path=staged_target.staged_upload_path,
+                            client_identifier=self._shard_client_identifier(
+                                run_id, result.index, shard_total, attempt
+                            ),
+                        )
+                    except ShopifyBulkLeaseLostError:
+                        # Another worker may hold the shop now; stop the run
+                        raise
+                    except Exception as exc:
+                        result.status, result.error = "SUBMIT_FAILED", str(exc)
+
+                if position + 1 < len(shards):
+                    next_upload = asyncio.create_task(
+                        client.stage_upload(shards[position + 1][0])
+                    )
+
+                if bulk_op is None:
+                    self.logger.error(
+                        "Shard %s/%s not submitted: %s",
+                        result.index + 1,
+                        shard_total,
+                        result.error,
+                    )
+                    continue
+
+                result.bulk_op_id, result.status = bulk_op.id, bulk_op.status
+                await client.invalidate_mirror(result.product_ids)
+                self.logger.info(
+                    "Submitted shard %s/%s: op_id=%s, lines=%s, bytes=%s",
+                    result.index + 1,
+                    shard_total,
+                    bulk_op.id,
+                    result.line_count,
+                    result.byte_count,
+                )
+                if on_shard_submitted is not None:
+                    await on_shard_submitted(result, shard_total)
+
+                try:
+                    final = await client.bulk_client.poll_status(
+                        operation_id=bulk_op.id,
+                        poll_interval=5.0,
+                        timeout=self.poll_timeout_s,
+                        operation_type="MUTATION",
+                    )
+                except ShopifyBulkOperationFailedError as exc:
+                    # Shopify reported a terminal state; later shards still run
+                    # unless it was a cancel
+                    final = exc.operation
+                    self.logger.error(
+                        "Shard %s/%s ended %s: op_id=%s, error_code=%s",
+                        result.index + 1,
+                        shard_total,
+                        final.status,
+                        final.id,
+                        final.error_code,
+                    )
+                except Exception as exc:
+                    result.status, result.error = "POLL_FAILED", str(exc)
+                    for _, skipped in shards[position + 1:]:
+                        skipped.status = "SKIPPED"
+                    self.logger.error(
+                        "Stopping sharded run %s at shard %s/%s: %s",
+                        run_id,
+                        result.index + 1,
+                        shard_total,
+                        exc,
+                    )
+                    break
+
+                result.status = final.status
+                result.object_count = final.object_count
+                result.error = final.error_code
+                # Partial data of a failed shard is always diffed, so only
+                # the lines Shopify never processed count as unapplied
+                if (
+                    client.outcome_store is not None
+                    or collect_outcomes
+                    or (not result.is_success and final.partial_data_url)
+                ):
+                    # Runs alongside the next shard instead of delaying it
+                    outcome_tasks.append(
+                        asyncio.create_task(
+                            self._collect_shard_outcomes(run_id, result, final)
+                        )
+                    )
+                if result.is_canceled:
+                    # Canceled by request or by the reaper: write nothing more
+                    for _, skipped in shards[position + 1:]:
+                        skipped.status = "SKIPPED"
+                    self.logger.warning(
+                        "Stopping sharded run %s: shard %s/%s was canceled",
+                        run_id,
+                        result.index + 1,
+                        shard_total,
+                    )
+                    break
+
+            await asyncio.gather(*outcome_tasks)
+
+        finally:
+            pending = [t for t in [next_upload, *outcome_tasks] if t is not None]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _split_into_shards(
+        self,
+        updates: list[ProductUpdateInput],
+        first_index: int = 0,
+        attempt: int = 0,
+    ) -> list[tuple[list[ProductUpdateInput], BulkShardResult]]:
+        """Split updates by JSONL line count and byte size, preserving order."""
+        shards: list[tuple[list[ProductUpdateInput], BulkShardResult]] = []
+        current: list[ProductUpdateInput] = []
+        current_bytes = 0
+
+        def close_shard() -> None:
+            shards.append(
+                (
+                    current,
+                    BulkShardResult(
+                        index=first_index + len(shards),
+                        attempt=attempt,
+                        product_ids=[update.id for update in current],
+                        line_count=len(current),
+                        byte_count=current_bytes,
+                    ),
+                )
+            )
+
+        for update in updates:
+            line_bytes = (
+                len(json.dumps(update.to_jsonl_dict(), ensure_ascii=False).encode("utf-8"))
+                + 1
+            )
+            if current and (
+                len(current) >= self.shard_max_lines
+                or current_bytes + line_bytes > self.shard_max_bytes
+            ):
+                close_shard()
+                current, current_bytes = [], 0
+            current.append(update)
+            current_bytes += line_bytes
+
+        if current:
+            close_shard()
+        return shards
+
+    async def _collect_shard_outcomes(
+        self, run_id: str, result: BulkShardResult, operation: BulkOperation
+    ) -> None:
+        result.outcomes = await self.client.collect_outcomes(
+            operation, run_id, product_ids=result.product_ids
+        )
+
+    @staticmethod
+    def _shard_client_identifier(
+        run_id: str, index: int, shard_count: int, attempt: int = 0
+    ) -> str:
+        if shard_count == 1:
+            return f"apeg-phase2:{run_id}"
+        identifier = f"apeg-phase2:{run_id}:shard-{index + 1}-of-{shard_count}"
+        return f"{identifier}:retry-{attempt}" if attempt else identifier
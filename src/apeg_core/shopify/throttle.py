@@ -0,0 +1,196 @@
+"""Cost-aware GraphQL throttle governor for the Shopify Admin API.
+
+Shopify meters GraphQL calls with a leaky bucket per shop and reports its
+state in ``extensions.cost.throttleStatus`` on every response. The governor
+mirrors that bucket (in Redis when available, so every worker and collector
+hitting the same shop shares one view) and makes callers wait in advance,
+in proportion to the requested cost, instead of reacting to HTTP 429.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+
+
+# Atomically restore the bucket for elapsed time, then either reserve the
+# requested cost (return "0") or report how long the caller must wait. A cost
+# above the bucket size waits for a full bucket rather than forever.
+# Values are returned as strings because Lua numbers are truncated to ints.
+_RESERVE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'available', 'maximum', 'restore_rate', 'updated_at')
+if not state[1] then
+  return '0'
+end
+local now = tonumber(ARGV[2])
+local available = tonumber(state[1])
+local maximum = tonumber(state[2])
+local cost = math.min(tonumber(ARGV[1]), maximum)
+local restore_rate = tonumber(state[3])
+local updated_at = tonumber(state[4])
+local elapsed = math.max(0, now - updated_at)
+available = math.min(maximum, available + elapsed * restore_rate)
+if available >= cost or restore_rate <= 0 then
+  redis.call('HSET', KEYS[1], 'available', tostring(available - cost), 'updated_at', ARGV[2])
+  redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+  return '0'
+end
+return tostring((cost - available) / restore_rate)
+"""
+
+
+class ShopifyCostThrottle:
+    """Per-shop leaky-bucket model of Shopify's GraphQL cost limits.
+
+    State is shared through a Redis hash when a client is injected; otherwise
+    (or if Redis errors) an in-process model is used. The governor fails open:
+    until a response has reported ``throttleStatus`` no waiting happens.
+    """
+
+    DEFAULT_QUERY_COST = 10
+    STATE_TTL_SECONDS = 120
+    MAX_WAIT_SECONDS = 30.0
+
+    def __init__(
+        self,
+        shop_domain: str,
+        redis: Optional[Redis] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize throttle governor.
+
+        Args:
+            shop_domain: e.g., "mystore.myshopify.com"
+            redis: Optional redis.asyncio.Redis client for cross-process state
+            logger: Optional logger instance
+        """
+        self.shop_domain = shop_domain
+        self.redis = redis
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._state_key = f"apeg:shopify:throttle:{shop_domain}"
+        self._local_state: Optional[dict[str, float]] = None
+        self._local_lock = asyncio.Lock()
+        self._cost_estimates: dict[str, int] = {}
+
+    def estimate_cost(self, query: str) -> int:
+        """Return the last requested cost seen for this query text."""
+        return self._cost_estimates.get(
+            self._query_key(query), self.DEFAULT_QUERY_COST
+        )
+
+    async def acquire(self, query: str) -> float:
+        """Wait until the bucket can absorb the query's estimated cost.
+
+        Args:
+            query: GraphQL document about to be sent
+
+        Returns:
+            Total seconds spent waiting
+        """
+        cost = self.estimate_cost(query)
+        waited = 0.0
+
+        while True:
+            delay = await self._reserve(cost)
+            if delay <= 0:
+                return waited
+
+            delay = min(delay, self.MAX_WAIT_SECONDS)
+            self.logger.debug(
+                "Throttle wait: shop=%s, cost=%s, delay=%.2fs",
+                self.shop_domain,
+                cost,
+                delay,
+            )
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def record(self, query: str, response_data: dict) -> None:
+        """Update bucket state and cost estimate from a GraphQL response.
+
+        Args:
+            query: GraphQL document that was sent
+            response_data: Parsed JSON response body
+        """
+        extensions = response_data.get("extensions")
+        if not isinstance(extensions, dict):
+            return
+        cost = extensions.get("cost")
+        if not isinstance(cost, dict):
+            return
+
+        requested = cost.get("requestedQueryCost")
+        if isinstance(requested, (int, float)):
+            self._cost_estimates[self._query_key(query)] = int(requested)
+
+        throttle_status = cost.get("throttleStatus")
+        if not isinstance(throttle_status, dict):
+            return
+
+        try:
+            state = {
+                "available": float(throttle_status["currentlyAvailable"]),
+                "maximum": float(throttle_status["maximumAvailable"]),
+                "restore_rate": float(throttle_status["restoreRate"]),
+                "updated_at": time.time(),
+            }
+        except (KeyError, TypeError, ValueError):
+            return
+
+        async with self._local_lock:
+            self._local_state = dict(state)
+
+        if self.redis is not None:
+            try:
+                await self.redis.hset(
+                    self._state_key,
+                    mapping={k: repr(v) for k, v in state.items()},
+                )
+                await self.redis.expire(self._state_key, self.STATE_TTL_SECONDS)
+            except Exception as exc:
+                self.logger.warning(f"Failed to persist throttle state: {exc}")
+
+    async def _reserve(self, cost: int) -> float:
+        """Reserve cost from the bucket, or return seconds to wait."""
+        if self.redis is not None:
+            try:
+                result = await self.redis.eval(
+                    _RESERVE_SCRIPT,
+                    1,
+                    self._state_key,
+                    cost,
+                    repr(time.time()),
+                    self.STATE_TTL_SECONDS,
+                )
+                if isinstance(result, bytes):
+                    result = result.decode("utf-8")
+                return float(result)
+            except Exception as exc:
+                self.logger.warning(
+                    f"Throttle state unavailable in Redis, using local model: {exc}"
+                )
+
+        async with self._local_lock:
+            state = self._local_state
+            if state is None:
+                return 0.0
+
+            now = time.time()
+            elapsed = max(0.0, now - state["updated_at"])
+            available = min(
+                state["maximum"], state["available"] + elapsed * state["restore_rate"]
+            )
+            cost = min(cost, state["maximum"])
+            if available >= cost or state["restore_rate"] <= 0:
+                state["available"] = available - cost
+                state["updated_at"] = now
+                return 0.0
+
+            return (cost - available) / state["restore_rate"]
+
+    @staticmethod
+    def _query_key(query: str) -> str:
+        return hashlib.sha1(query.encode("utf-8")).hexdigest()
@@ -0,0 +1,10 @@
+"""APEG operational telemetry (Prometheus-style metrics and tracing spans)."""
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry
+
+__all__ = [
+    "REGISTRY",
+    "MetricsRegistry",
+    "Counter",
+    "Gauge",
+    "Histogram",
+]
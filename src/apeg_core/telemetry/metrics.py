@@ -0,0 +1,288 @@
+"""In-process metrics registry exported in Prometheus text format.
+
+Counters, gauges, and histograms live in process memory and are rendered on
+demand by ``GET /metrics``; nothing is pushed or sampled in the background.
+Recording is a label lookup, an add, and (for histograms) a bisect over the
+bucket bounds under an uncontended lock, so instrumentation stays on in
+production. Each process exports only what it recorded itself.
+
+The metrics APEG records are declared at the bottom of this module so their
+names, labels, and buckets are defined in one place.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from functools import lru_cache
+from time import monotonic
+from typing import Optional
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a fast GraphQL call up to an hour-long bulk operation
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0,
+)
+
+_OPERATION_NAME = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+_ROOT_FIELD = re.compile(r"\{\s*(\w+)")
+
+
+@lru_cache(maxsize=256)
+def graphql_operation_name(query: str) -> str:
+    """Return a GraphQL document's operation name, or its first root field."""
+    match = _OPERATION_NAME.match(query) or _ROOT_FIELD.search(query)
+    return match.group(1) if match else "anonymous"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Shared label handling for one metric family."""
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as exc:
+            raise ValueError(f"{self.name} is missing label {exc}") from None
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Add ``amount`` (must not be negative)."""
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    TYPE = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            state[0][index] += 1
+            state[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the seconds spent in the ``with`` block, even if it raises."""
+        started = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(monotonic() - started, **labels)
+
+    def count(self, **labels: object) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        names = (*self.labelnames, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metric families rendered together for scraping."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS)
+        )
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Shopify Admin GraphQL
+GRAPHQL_REQUEST_SECONDS = REGISTRY.histogram(
+    "apeg_shopify_graphql_request_seconds",
+    "Shopify GraphQL request latency per attempt, by operation name and HTTP status.",
+    ("operation", "status"),
+)
+GRAPHQL_RETRIES = REGISTRY.counter(
+    "apeg_shopify_graphql_retries_total",
+    "Shopify GraphQL retries, by operation name and reason.",
+    ("operation", "reason"),
+)
+THROTTLE_WAIT_SECONDS = REGISTRY.counter(
+    "apeg_shopify_throttle_wait_seconds_total",
+    "Seconds spent waiting on the cost throttle or a 429 before a GraphQL request.",
+    ("operation", "source"),
+)
+
+# Bulk operations and their per-shop locks
+BULK_PHASE_SECONDS = REGISTRY.histogram(
+    "apeg_bulk_phase_seconds",
+    "Bulk operation duration by operation type and phase.",
+    ("operation_type", "phase"),
+)
+BULK_LOCK_WAIT_SECONDS = REGISTRY.histogram(
+    "apeg_bulk_lock_wait_seconds",
+    "Seconds spent acquiring a per-shop bulk lock, by lock and outcome.",
+    ("lock", "outcome"),
+)
+BULK_LOCK_HOLD_SECONDS = REGISTRY.histogram(
+    "apeg_bulk_lock_hold_seconds",
+    "Seconds a per-shop bulk lock was held.",
+    ("lock",),
+)
+
+# Job API
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    "apeg_job_queue_depth",
+    "Jobs queued or running (shared queue length on the redis backend).",
+)
+JOB_INFLIGHT_BYTES = REGISTRY.gauge(
+    "apeg_job_inflight_request_bytes",
+    "Request bytes held by admitted jobs in this process.",
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "apeg_http_request_seconds",
+    "API request latency by method, route template, and status code.",
+    ("method", "route", "status"),
+)
+
+# Metrics collectors
+COLLECTOR_RUN_SECONDS = REGISTRY.histogram(
+    "apeg_collector_run_seconds",
+    "Daily collector run duration by collector and outcome.",
+    ("collector", "outcome"),
+)
@@ -0,0 +1,263 @@
+"""Context-propagated tracing spans with a local OTLP/JSON exporter.
+
+``span()`` opens a span whose parent is the span current in this task (via
+``contextvars``, so spans follow ``await`` and are inherited by tasks
+created inside them). Finished spans are appended to ``APEG_TRACE_FILE``,
+one OTLP/JSON ``ExportTraceServiceRequest`` per line: the format the
+OpenTelemetry Collector's ``otlpjsonfile`` receiver reads, so the file can
+be tailed into any tracing backend or inspected with ``jq``.
+
+``correlate()`` attaches attributes such as job IDs to every span opened
+beneath it, so one filter finds a job's spans from the runner down to each
+GraphQL call. With no exporter configured, ``span()`` and ``correlate()``
+return a shared no-op object and tracing costs one global lookup per call.
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Optional, Union
+
+
+logger = logging.getLogger(__name__)
+
+AttributeValue = Union[str, int, float, bool, list, tuple, None]
+
+
+class Span:
+    """One timed operation; use as a context manager."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: dict[str, AttributeValue],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token: Optional[Token] = None
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self)
+
+
+class _Correlation:
+    """Adds attributes to every span opened inside it."""
+
+    __slots__ = ("attributes", "_token")
+
+    def __init__(self, attributes: dict[str, AttributeValue]):
+        self.attributes = attributes
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> "_Correlation":
+        self._token = _correlation.set({**_correlation.get(), **self.attributes})
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _correlation.reset(self._token)
+
+
+class _NoopSpan:
+    """Stands in for spans and correlations while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+class JsonlSpanExporter:
+    """Appends finished spans to a file as OTLP/JSON lines.
+
+    Lines are buffered and flushed whenever a root span ends, so a trace is
+    on disk once its outermost operation finishes.
+    """
+
+    def __init__(self, path: str, service_name: str = "apeg"):
+        """Initialize exporter.
+
+        Args:
+            path: File to append to (created with its directory if missing)
+            service_name: ``service.name`` resource attribute
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._resource = {
+            "attributes": [_otlp_attribute("service.name", service_name)]
+        }
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": self._resource,
+                        "scopeSpans": [
+                            {"scope": {"name": "apeg"}, "spans": [_otlp_span(span)]}
+                        ],
+                    }
+                ]
+            },
+            separators=(",", ":"),
+        )
+        try:
+            with self._lock:
+                self._file.write(line + "\n")
+                if span.parent_id is None:
+                    self._file.flush()
+        except (OSError, ValueError) as exc:
+            logger.warning("Failed to export span %s: %s", span.name, exc)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attribute(key: str, value: AttributeValue) -> dict[str, Any]:
+    return {"key": key, "value": _otlp_value(value)}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            _otlp_attribute(key, value)
+            for key, value in span.attributes.items()
+            if value is not None
+        ],
+        "status": (
+            {"code": 2, "message": span.error} if span.error else {"code": 1}
+        ),
+    }
+    if span.parent_id is not None:
+        record["parentSpanId"] = span.parent_id
+    return record
+
+
+_NOOP = _NoopSpan()
+_exporter: Optional[JsonlSpanExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("apeg_current_span", default=None)
+_correlation: ContextVar[dict[str, AttributeValue]] = ContextVar(
+    "apeg_trace_correlation", default={}
+)
+
+
+def span(name: str, **attributes: AttributeValue) -> Union[Span, _NoopSpan]:
+    """Open a span under the current one (a new trace if there is none).
+
+    Attribute names use dots (``shopify.bulk_op_id``); pass them with
+    ``**{"a.b": value}`` or set them later with ``set_attribute``.
+    """
+    if _exporter is None:
+        return _NOOP
+    parent = _current_span.get()
+    return Span(
+        name,
+        parent.trace_id if parent is not None else secrets.token_hex(16),
+        parent.span_id if parent is not None else None,
+        {**_correlation.get(), **attributes},
+    )
+
+
+def correlate(**attributes: AttributeValue) -> Union[_Correlation, _NoopSpan]:
+    """Add ``attributes`` to every span opened in this context."""
+    if _exporter is None:
+        return _NOOP
+    return _Correlation(attributes)
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """Return the open span, or a no-op span to set attributes on."""
+    return _current_span.get() or _NOOP
+
+
+def is_enabled() -> bool:
+    return _exporter is not None
+
+
+def configure(exporter: Optional[JsonlSpanExporter]) -> None:
+    """Install ``exporter`` (None disables tracing), closing the previous one."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.close()
+
+
+def configure_from_env() -> None:
+    """Enable tracing if APEG_TRACE_FILE is set."""
+    path = os.getenv("APEG_TRACE_FILE")
+    if not path:
+        configure(None)
+        return
+    service_name = os.getenv("APEG_TRACE_SERVICE_NAME", "apeg")
+    configure(JsonlSpanExporter(path, service_name=service_name))
+    logger.info("Tracing enabled: exporting spans to %s", path)
+
+
+def shutdown() -> None:
+    """Flush and close the exporter."""
+    configure(None)
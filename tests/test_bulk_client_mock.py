@@ -17,6 +17,7 @@ from src.apeg_core.shopify.exceptions import (
 def mock_redis():
     """Mock Redis client."""
     redis = AsyncMock()
+    redis.eval.return_value = b"0"  # throttle reservations succeed at once
     return redis
 
 
@@ -226,7 +227,7 @@ async def test_poll_status_failed_with_partial_data(bulk_client):
 
 @pytest.mark.asyncio
 async def test_http_429_with_retry_after(bulk_client):
-    """Test _post_graphql respects Retry-After header on 429."""
+    """Test post_graphql respects Retry-After header on 429."""
     # First call: 429 with Retry-After
     mock_resp_429 = AsyncMock()
     mock_resp_429.status = 429
@@ -243,7 +244,7 @@ async def test_http_429_with_retry_after(bulk_client):
 
     bulk_client.session.post.side_effect = [mock_resp_429, mock_resp_200]
 
-    result = await bulk_client._post_graphql({"query": "test"}, retry=True)
+    result = await bulk_client.post_graphql({"query": "test"}, retry=True)
 
     assert result == {"data": {"test": "success"}}
     assert bulk_client.session.post.call_count == 2
@@ -251,7 +252,7 @@ async def test_http_429_with_retry_after(bulk_client):
 
 @pytest.mark.asyncio
 async def test_http_4xx_non_retryable(bulk_client):
-    """Test _post_graphql raises immediately on 4xx (except 429)."""
+    """Test post_graphql raises immediately on 4xx (except 429)."""
     mock_response = AsyncMock()
     mock_response.status = 403
     mock_response.text.return_value = "Forbidden"
@@ -260,7 +261,7 @@ async def test_http_4xx_non_retryable(bulk_client):
     bulk_client.session.post.return_value = mock_response
 
     with pytest.raises(ShopifyBulkApiError) as exc_info:
-        await bulk_client._post_graphql({"query": "test"}, retry=True)
+        await bulk_client.post_graphql({"query": "test"}, retry=True)
 
     assert "403" in str(exc_info.value)
     assert "non-retryable" in str(exc_info.value)
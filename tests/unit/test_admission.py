@@ -0,0 +1,101 @@
+"""Unit tests for job submission admission control."""
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.apeg_core.api.admission import AdmissionController
+from src.apeg_core.api.resources import AppResources
+from src.apeg_core.main import create_app
+
+
+SHOP = "test-shop.myshopify.com"
+
+
+def test_queue_limits_reject_with_retry_after_from_drain_rate():
+    """Test full queues answer 429 with a Retry-After from recent drains."""
+    admission = AdmissionController(max_queued_jobs=3, max_queued_jobs_per_shop=2)
+
+    first = admission.admit(SHOP, 10, 100)
+    admission.admit(SHOP, 10, 100)
+    admission.admit("other-shop.myshopify.com", 10, 100)
+
+    with pytest.raises(HTTPException) as exc_info:
+        admission.admit(SHOP, 10, 100)
+    assert exc_info.value.status_code == 429
+    # Nothing has drained yet
+    assert exc_info.value.headers["Retry-After"] == "30"
+
+    admission.release(first)
+    admission._started_at -= 9.5  # one job drained in the last ~10 seconds
+    admission.admit(SHOP, 10, 100)
+    with pytest.raises(HTTPException) as exc_info:
+        admission.admit(SHOP, 10, 100)
+    assert exc_info.value.headers["Retry-After"] == "10"
+    assert admission.stats()["queued_jobs"] == 3
+
+
+def test_size_and_bytes_limits():
+    """Test oversized jobs are 413 and bytes in flight are capped."""
+    admission = AdmissionController(max_products_per_job=100, max_inflight_bytes=1000)
+
+    with pytest.raises(HTTPException) as exc_info:
+        admission.admit(SHOP, 101, 10)
+    assert exc_info.value.status_code == 413
+
+    ticket = admission.admit(SHOP, 100, 800)
+    with pytest.raises(HTTPException) as exc_info:
+        admission.admit(SHOP, 1, 300)
+    assert exc_info.value.status_code == 429
+
+    admission.release(ticket)
+    admission.admit(SHOP, 1, 300)
+
+
+def test_shared_queue_depth_feeds_drain_rate():
+    """Test the Redis backend's queue depth is checked and its drain measured."""
+    admission = AdmissionController(max_queued_jobs=5)
+
+    admission.release(admission.admit(SHOP, 1, 10, queue_depth=4), drained=False)
+    with pytest.raises(HTTPException):
+        admission.admit(SHOP, 1, 10, queue_depth=5)
+
+    # 4 queued + 1 admitted, now 2 left: workers took 3
+    admission.admit(SHOP, 1, 10, queue_depth=2)
+    assert admission.drain_rate() == pytest.approx(3.0)
+
+
+@pytest.mark.asyncio
+async def test_submission_over_limit_returns_429(monkeypatch):
+    """Test the endpoint applies admission limits and exposes queue depth."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", SHOP)
+    monkeypatch.delenv("APEG_JOB_BACKEND", raising=False)
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+
+    app = create_app()
+    app.state.resources = AppResources(
+        redis_url="redis://localhost:6379",
+        admission=AdmissionController(max_products_per_job=1),
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/jobs/seo-update",
+            headers=headers,
+            json={
+                "run_id": "too-big",
+                "shop_domain": SHOP,
+                "dry_run": True,
+                "products": [
+                    {"product_id": "gid://shopify/Product/1"},
+                    {"product_id": "gid://shopify/Product/2"},
+                ],
+            },
+        )
+        stats = await client.get("/api/v1/stats/queue", headers=headers)
+    await app.state.resources.aclose()
+
+    assert response.status_code == 413
+    assert stats.status_code == 200
+    assert stats.json()["queued_jobs"] == 0
+    assert stats.json()["limits"]["max_products_per_job"] == 1
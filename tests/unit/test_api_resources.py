@@ -0,0 +1,62 @@
+"""Unit tests for pooled API resources."""
+import httpx
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.apeg_core.api.resources import AppResources
+from src.apeg_core.main import create_app
+
+
+async def _ping(request: web.Request) -> web.Response:
+    return web.json_response({"ok": True})
+
+
+@pytest.mark.asyncio
+async def test_shared_session_reuses_connections():
+    """Test repeated requests reuse pooled keep-alive connections."""
+    app = web.Application()
+    app.router.add_get("/ping", _ping)
+    server = TestServer(app)
+    await server.start_server()
+
+    resources = AppResources("redis://localhost:6379")
+    try:
+        session = resources.get_session()
+        assert resources.get_session() is session
+
+        for _ in range(5):
+            async with session.get(server.make_url("/ping")) as resp:
+                await resp.json()
+
+        stats = resources.pool_stats()
+        assert stats["http"]["open"]
+        assert stats["http"]["connections_created"] == 1
+        assert stats["http"]["connections_reused"] == 4
+        assert stats["http"]["idle"] == 1
+        assert not stats["redis"]["open"]
+    finally:
+        await resources.aclose()
+        await server.close()
+
+    assert not resources.pool_stats()["http"]["open"]
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(monkeypatch):
+    """Test pool stats are exposed behind API key auth."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("APEG_HTTP_POOL_LIMIT", "42")
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        unauthorized = await client.get("/api/v1/stats/pools")
+        response = await client.get(
+            "/api/v1/stats/pools", headers={"X-APEG-API-KEY": "test-api-key"}
+        )
+
+    assert unauthorized.status_code == 401
+    assert response.status_code == 200
+    assert response.json()["http"]["limit"] == 42
+    assert response.json()["redis"]["open"] is False
@@ -0,0 +1,165 @@
+"""Unit tests for resumable bulk result downloads (local aiohttp stand-in)."""
+import asyncio
+import json
+import re
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.apeg_core.shopify.bulk_download import BulkResultDownloader
+from src.apeg_core.shopify.bulk_reader import iter_bulk_file, iter_jsonl_records
+from src.apeg_core.shopify.exceptions import ShopifyBulkApiError
+
+
+# Tests patch asyncio.sleep to skip retry backoff; the stand-in server still
+# needs a real pause so the client reads the partial body before the drop.
+_real_sleep = asyncio.sleep
+
+
+def _bulk_result(count: int) -> bytes:
+    lines = []
+    for i in range(count):
+        lines.append({"id": f"gid://shopify/Product/{i}", "tags": [f"tag-{i}", "common"]})
+        lines.append(
+            {
+                "id": f"gid://shopify/ProductVariant/{i}",
+                "sku": f"SKU-{i}",
+                "__parentId": f"gid://shopify/Product/{i}",
+            }
+        )
+    return b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+
+
+class FlakyResultServer:
+    """Serves a bulk result, closing the connection mid-body on early requests."""
+
+    def __init__(self, data: bytes, drops: int, honor_range: bool = True):
+        self.data = data
+        self.drops = drops
+        self.honor_range = honor_range
+        self.range_headers: list[str | None] = []
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        range_header = request.headers.get("Range")
+        self.range_headers.append(range_header)
+
+        start = 0
+        if range_header and self.honor_range:
+            start = int(re.match(r"bytes=(\d+)-", range_header).group(1))
+
+        body = self.data[start:]
+        resp = web.StreamResponse(status=206 if start else 200)
+        resp.content_length = len(body)
+        if start:
+            resp.headers["Content-Range"] = (
+                f"bytes {start}-{len(self.data) - 1}/{len(self.data)}"
+            )
+        await resp.prepare(request)
+
+        if self.drops > 0:
+            self.drops -= 1
+            # Let the client consume part of the body before the connection dies
+            await resp.write(body[: len(body) // 3])
+            await _real_sleep(0.05)
+            request.transport.close()
+            return resp
+
+        await resp.write(body)
+        await resp.write_eof()
+        return resp
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/result.jsonl", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def _parse(path):
+    return [obj async for obj in iter_bulk_file(path)]
+
+
+@pytest.mark.asyncio
+async def test_download_resumes_with_range_after_drops(tmp_path):
+    """Test dropped connections resume via Range and yield identical output."""
+    data = _bulk_result(2000)
+    flaky = FlakyResultServer(data, drops=2)
+    server = await _serve(flaky.handle)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            downloader = BulkResultDownloader(session)
+            with patch(
+                "src.apeg_core.shopify.bulk_download.asyncio.sleep", new=AsyncMock()
+            ):
+                path = await downloader.download(
+                    str(server.make_url("/result.jsonl")), tmp_path / "result.jsonl"
+                )
+    finally:
+        await server.close()
+
+    assert path.read_bytes() == data
+    assert flaky.range_headers[0] is None
+    assert len(flaky.range_headers) == 3
+    assert all(h and h.startswith("bytes=") for h in flaky.range_headers[1:])
+    assert not (tmp_path / "result.jsonl.part").exists()
+    assert not (tmp_path / "result.jsonl.ckpt").exists()
+
+    async def _chunks():
+        yield data
+
+    expected = [r async for r in iter_jsonl_records(_chunks())]
+    parsed = await _parse(path)
+    assert len(parsed) == 2000
+    assert parsed[0]["productVariants"][0]["sku"] == "SKU-0"
+    assert sum(1 + len(obj["productVariants"]) for obj in parsed) == len(expected)
+
+
+@pytest.mark.asyncio
+async def test_download_restarts_when_range_ignored(tmp_path):
+    """Test server ignoring Range restarts from zero without duplicating bytes."""
+    data = _bulk_result(500)
+    flaky = FlakyResultServer(data, drops=1, honor_range=False)
+    server = await _serve(flaky.handle)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch(
+                "src.apeg_core.shopify.bulk_download.asyncio.sleep", new=AsyncMock()
+            ):
+                path = await BulkResultDownloader(session).download(
+                    str(server.make_url("/result.jsonl")), tmp_path / "result.jsonl"
+                )
+    finally:
+        await server.close()
+
+    assert path.read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_download_gives_up_after_max_attempts(tmp_path):
+    """Test persistent failures raise with checkpoint left for a later resume."""
+    data = _bulk_result(500)
+    flaky = FlakyResultServer(data, drops=10)
+    server = await _serve(flaky.handle)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch(
+                "src.apeg_core.shopify.bulk_download.asyncio.sleep", new=AsyncMock()
+            ):
+                with pytest.raises(ShopifyBulkApiError):
+                    await BulkResultDownloader(session, max_attempts=2).download(
+                        str(server.make_url("/result.jsonl")), tmp_path / "result.jsonl"
+                    )
+    finally:
+        await server.close()
+
+    checkpoint = json.loads((tmp_path / "result.jsonl.ckpt").read_text())
+    assert checkpoint["offset"] == (tmp_path / "result.jsonl.part").stat().st_size
+    assert checkpoint["offset"] > 0
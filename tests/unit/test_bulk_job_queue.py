@@ -0,0 +1,186 @@
+"""Unit tests for ShopifyBulkJobQueue ordering and eviction."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import (
+    ShopifyBulkMutationLockedError,
+    ShopifyBulkQueueTimeoutError,
+)
+from src.apeg_core.shopify.job_queue import ShopifyBulkJobQueue
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def subscribe(self, channel):
+        pass
+
+    async def unsubscribe(self, channel):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        event = self.redis.released
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return {"type": "message", "data": b"released"}
+
+
+class FakeRedis:
+    """Minimal in-memory subset of redis.asyncio used by the queue."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.released = asyncio.Event()
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zrange(self, key, start, stop):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        return [m.encode("utf-8") for m, _ in members[start : stop + 1]]
+
+    async def publish(self, channel, message):
+        self.released.set()
+        self.released = asyncio.Event()
+        return 1
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakeLock:
+    holder = None
+
+    def __init__(self, name, owner):
+        self.name = name
+        self.owner = owner
+
+    async def acquire(self, blocking=False):
+        if FakeLock.holder is None:
+            FakeLock.holder = self.owner
+            return True
+        return False
+
+    async def release(self):
+        FakeLock.holder = None
+
+
+@pytest.fixture(autouse=True)
+def reset_lock():
+    FakeLock.holder = None
+    yield
+    FakeLock.holder = None
+
+
+LOCK_NAME = "apeg:shopify:bulk_mutation_lock:test-shop.myshopify.com"
+
+
+@pytest.mark.asyncio
+async def test_waiters_served_by_priority_then_fifo():
+    """Test lock is handed over in priority order, FIFO within a priority."""
+    redis = FakeRedis()
+    queue = ShopifyBulkJobQueue(redis)
+    queue.RECHECK_INTERVAL = 0.05
+
+    holder = FakeLock(LOCK_NAME, "holder")
+    await queue.acquire(holder)
+
+    order = []
+
+    async def job(owner, priority):
+        lock = FakeLock(LOCK_NAME, owner)
+        await queue.acquire(lock, priority=priority, wait_timeout=5)
+        order.append(owner)
+        await asyncio.sleep(0.01)
+        await queue.release(lock)
+
+    tasks = []
+    for owner, priority in [("a", 0), ("b", 0), ("urgent", 5), ("c", 0)]:
+        tasks.append(asyncio.create_task(job(owner, priority)))
+        await asyncio.sleep(0.01)
+
+    assert await queue.depth(LOCK_NAME) == 4
+    await queue.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert order == ["urgent", "a", "b", "c"]
+    assert await queue.depth(LOCK_NAME) == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_waiter_is_evicted():
+    """Test a crashed waiter (expired heartbeat) does not block the queue."""
+    redis = FakeRedis()
+    queue = ShopifyBulkJobQueue(redis)
+
+    # Dead ticket at the head with no heartbeat key
+    await redis.zadd(ShopifyBulkJobQueue.queue_key(LOCK_NAME), {"dead": 0})
+
+    waited = await queue.acquire(FakeLock(LOCK_NAME, "live"), wait_timeout=1)
+
+    assert waited < 1
+    assert FakeLock.holder == "live"
+    assert await queue.depth(LOCK_NAME) == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out_and_leaves_queue():
+    """Test waiters give up after wait_timeout and remove their ticket."""
+    redis = FakeRedis()
+    queue = ShopifyBulkJobQueue(redis)
+    queue.RECHECK_INTERVAL = 0.02
+    FakeLock.holder = "someone-else"
+
+    with pytest.raises(ShopifyBulkQueueTimeoutError):
+        await queue.acquire(FakeLock(LOCK_NAME, "late"), wait_timeout=0.1)
+
+    assert await queue.depth(LOCK_NAME) == 0
+
+
+@pytest.mark.asyncio
+async def test_mutation_client_queue_timeout_maps_to_locked_error():
+    """Test queue timeout surfaces as ShopifyBulkMutationLockedError."""
+    job_queue = AsyncMock()
+    job_queue.acquire.side_effect = ShopifyBulkQueueTimeoutError("timed out")
+
+    client = ShopifyBulkMutationClient(
+        shop_domain="test-shop.myshopify.com",
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=AsyncMock(),
+        redis=AsyncMock(),
+        job_queue=job_queue,
+    )
+
+    with patch("src.apeg_core.shopify.bulk_mutation_client.AsyncRedisLock"):
+        with pytest.raises(ShopifyBulkMutationLockedError):
+            await client.run_product_update_bulk("test-run", [])
@@ -14,7 +14,7 @@ async def test_staged_uploads_create_user_errors():
     mock_redis = AsyncMock()
     mock_bulk_client = AsyncMock()
 
-    mock_bulk_client._post_graphql.return_value = {
+    mock_bulk_client.post_graphql.return_value = {
         "data": {
             "stagedUploadsCreate": {
                 "stagedTargets": [],
@@ -71,7 +71,7 @@ async def test_safe_write_tag_merge():
         )
     ]
 
-    merged = client._merge_product_updates(updates, current_tags_map)
+    merged = client.merge_product_updates(updates, current_tags_map)
 
     assert len(merged) == 1
     assert set(merged[0].tags) == {"tag2", "tag3"}
@@ -9,7 +9,9 @@ from src.apeg_core.shopify.exceptions import (
     ShopifyStagedUploadError,
 )
 from src.apeg_core.schemas.bulk_ops import (
+    BulkOperation,
     ProductSEO,
+    ProductState,
     ProductUpdateInput,
     ProductUpdateSpec,
     StagedTarget,
@@ -44,7 +46,7 @@ def mutation_client(mock_session, mock_redis):
 @pytest.mark.asyncio
 async def test_staged_uploads_create_success(mutation_client):
     """Test stagedUploadsCreate returns StagedTarget."""
-    mutation_client.bulk_client._post_graphql = AsyncMock(
+    mutation_client.bulk_client.post_graphql = AsyncMock(
         return_value={
             "data": {
                 "stagedUploadsCreate": {
@@ -75,7 +77,7 @@ async def test_staged_uploads_create_success(mutation_client):
 @pytest.mark.asyncio
 async def test_staged_uploads_create_user_errors(mutation_client):
     """Test stagedUploadsCreate raises on userErrors."""
-    mutation_client.bulk_client._post_graphql = AsyncMock(
+    mutation_client.bulk_client.post_graphql = AsyncMock(
         return_value={
             "data": {
                 "stagedUploadsCreate": {
@@ -172,12 +174,53 @@ async def test_merge_product_updates_safe_write(mutation_client):
         ),
     ]
 
-    merged = mutation_client._merge_product_updates(desired_updates, current_tags_map)
+    merged = mutation_client.merge_product_updates(desired_updates, current_tags_map)
 
     assert len(merged) == 1
     assert set(merged[0].tags) == {"existing-tag-2", "new-tag-1"}
 
 
+def test_drop_unchanged_updates_skips_no_op_writes(mutation_client):
+    """Test unchanged products are dropped and unchanged fields stripped."""
+    states = {
+        f"gid://shopify/Product/{i}": ProductState(
+            id=f"gid://shopify/Product/{i}",
+            tags=["a", "b"],
+            seo=ProductSEO(title="Same", description="Old"),
+        )
+        for i in (1, 2, 3)
+    }
+    # Mirror rows with unknown SEO must still be written
+    states["gid://shopify/Product/3"].seo = None
+    merged = [
+        ProductUpdateInput(
+            id="gid://shopify/Product/1", tags=["b", "a"], seo=ProductSEO(title="Same")
+        ),
+        ProductUpdateInput(
+            id="gid://shopify/Product/2",
+            tags=["a", "b"],
+            seo=ProductSEO(title="Same", description="New"),
+        ),
+        ProductUpdateInput(
+            id="gid://shopify/Product/3", tags=["a", "b"], seo=ProductSEO(title="Same")
+        ),
+        ProductUpdateInput(id="gid://shopify/Product/4", tags=["a"]),
+    ]
+
+    changed, unchanged = mutation_client.drop_unchanged_updates(merged, states)
+
+    assert unchanged == ["gid://shopify/Product/1"]
+    assert [(u.id, u.tags, u.seo) for u in changed] == [
+        (
+            "gid://shopify/Product/2",
+            None,
+            ProductSEO(title="Same", description="New"),
+        ),
+        ("gid://shopify/Product/3", None, ProductSEO(title="Same")),
+        ("gid://shopify/Product/4", ["a"], None),
+    ]
+
+
 @pytest.mark.asyncio
 async def test_product_update_input_to_jsonl_dict():
     """Test ProductUpdateInput.to_jsonl_dict() formatting."""
@@ -212,3 +255,66 @@ async def test_run_product_update_bulk_lock_failure(mutation_client):
             await mutation_client.run_product_update_bulk("test-run", [])
 
         assert "test-shop.myshopify.com" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_run_product_update_bulk_skips_unchanged_products(mutation_client):
+    """Test products already up to date are left out and reported as skipped."""
+    mutation_client.acquire_mutation_lock = AsyncMock()
+    mutation_client.release_mutation_lock = AsyncMock()
+    mutation_client.fetch_current_state = AsyncMock(
+        return_value={
+            "gid://shopify/Product/1": ProductState(
+                id="gid://shopify/Product/1", tags=["a", "b"]
+            ),
+            "gid://shopify/Product/2": ProductState(
+                id="gid://shopify/Product/2", tags=["a"]
+            ),
+        }
+    )
+    mutation_client.stage_upload = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    mutation_client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="gid://shopify/BulkOperation/1", status="CREATED")
+    )
+    updates = [
+        ProductUpdateSpec(product_id=f"gid://shopify/Product/{n}", tags_add=["b"])
+        for n in (1, 2)
+    ]
+
+    ref = await mutation_client.run_product_update_bulk("run-1", updates)
+
+    staged = mutation_client.stage_upload.await_args.args[0]
+    assert [update.id for update in staged] == ["gid://shopify/Product/2"]
+    assert ref.bulk_op_id == "gid://shopify/BulkOperation/1"
+    assert ref.skipped_product_ids == ["gid://shopify/Product/1"]
+    mutation_client.release_mutation_lock.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_product_update_bulk_without_changes_submits_nothing(mutation_client):
+    """Test a run with nothing to write releases the lock and polls as done."""
+    mutation_client.acquire_mutation_lock = AsyncMock()
+    mutation_client.release_mutation_lock = AsyncMock()
+    mutation_client.fetch_current_state = AsyncMock(
+        return_value={
+            "gid://shopify/Product/1": ProductState(
+                id="gid://shopify/Product/1", tags=["b"]
+            ),
+        }
+    )
+    mutation_client.stage_upload = AsyncMock()
+    updates = [ProductUpdateSpec(product_id="gid://shopify/Product/1", tags_add=["b"])]
+
+    ref = await mutation_client.run_product_update_bulk("run-1", updates)
+
+    mutation_client.stage_upload.assert_not_awaited()
+    mutation_client.release_mutation_lock.assert_awaited_once()
+    assert ref.bulk_op_id == ShopifyBulkMutationClient.NO_CHANGES_OP_ID
+    assert ref.skipped_product_ids == ["gid://shopify/Product/1"]
+    operation = await mutation_client.poll_to_terminal(ref.bulk_op_id)
+    assert operation.is_success
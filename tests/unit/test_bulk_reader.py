@@ -0,0 +1,127 @@
+"""Unit tests for the streaming bulk result reader."""
+import json
+
+import pytest
+
+from src.apeg_core.shopify.bulk_reader import (
+    iter_jsonl_records,
+    reassemble_bulk_objects,
+    resource_type,
+)
+
+
+def _jsonl(records: list[dict]) -> bytes:
+    return b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records)
+
+
+async def _chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def _collect(aiter):
+    return [item async for item in aiter]
+
+
+NESTED_RESULT = [
+    {"id": "gid://shopify/Order/1", "name": "#1001", "note": "big"},
+    {"id": "gid://shopify/LineItem/11", "quantity": 2, "__parentId": "gid://shopify/Order/1"},
+    {
+        "id": "gid://shopify/LineItemDiscount/111",
+        "amount": "1.00",
+        "__parentId": "gid://shopify/LineItem/11",
+    },
+    {"id": "gid://shopify/LineItem/12", "quantity": 1, "__parentId": "gid://shopify/Order/1"},
+    {"id": "gid://shopify/Order/2", "name": "#1002", "note": "small"},
+    {"id": "gid://shopify/LineItem/21", "quantity": 5, "__parentId": "gid://shopify/Order/2"},
+]
+
+
+def test_resource_type():
+    """Test GID resource type extraction."""
+    assert resource_type("gid://shopify/ProductVariant/42") == "ProductVariant"
+    assert resource_type("not-a-gid") is None
+    assert resource_type(None) is None
+
+
+@pytest.mark.asyncio
+async def test_jsonl_records_split_across_chunks():
+    """Test lines split across arbitrary chunk boundaries decode intact."""
+    data = _jsonl(NESTED_RESULT)
+
+    records = await _collect(iter_jsonl_records(_chunked(data, 7)))
+
+    assert records == NESTED_RESULT
+
+
+@pytest.mark.asyncio
+async def test_jsonl_records_without_trailing_newline():
+    """Test final line is emitted even without trailing newline."""
+    data = b'{"id": "gid://shopify/Product/1"}\n\n{"id": "gid://shopify/Product/2"}'
+
+    records = await _collect(iter_jsonl_records(_chunked(data, 5)))
+
+    assert [r["id"] for r in records] == [
+        "gid://shopify/Product/1",
+        "gid://shopify/Product/2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reassemble_nested_children():
+    """Test children and grandchildren are reattached via __parentId."""
+    records = iter_jsonl_records(_chunked(_jsonl(NESTED_RESULT), 64))
+
+    objects = await _collect(
+        reassemble_bulk_objects(records, connection_names={"LineItem": "lineItems"})
+    )
+
+    assert len(objects) == 2
+    first, second = objects
+    assert [li["id"] for li in first["lineItems"]] == [
+        "gid://shopify/LineItem/11",
+        "gid://shopify/LineItem/12",
+    ]
+    assert first["lineItems"][0]["lineItemDiscounts"] == [
+        {"id": "gid://shopify/LineItemDiscount/111", "amount": "1.00"}
+    ]
+    assert "__parentId" not in first["lineItems"][0]
+    assert second["lineItems"][0]["quantity"] == 5
+
+
+@pytest.mark.asyncio
+async def test_reassemble_applies_projections():
+    """Test per-type projections drop unrequested fields."""
+    records = iter_jsonl_records(_chunked(_jsonl(NESTED_RESULT), 64))
+
+    objects = await _collect(
+        reassemble_bulk_objects(
+            records,
+            projections={"Order": ("name",), "LineItem": ()},
+            connection_names={"LineItem": "lineItems"},
+        )
+    )
+
+    assert objects[0]["name"] == "#1001"
+    assert "note" not in objects[0]
+    assert objects[0]["lineItems"][1] == {"id": "gid://shopify/LineItem/12"}
+
+
+@pytest.mark.asyncio
+async def test_reassemble_skips_orphan_children():
+    """Test children whose parent is not in the current tree are skipped."""
+    records = iter_jsonl_records(
+        _chunked(
+            _jsonl(
+                [
+                    {"id": "gid://shopify/Product/1"},
+                    {"id": "gid://shopify/ProductVariant/9", "__parentId": "gid://shopify/Product/404"},
+                ]
+            ),
+            16,
+        )
+    )
+
+    objects = await _collect(reassemble_bulk_objects(records))
+
+    assert objects == [{"id": "gid://shopify/Product/1"}]
@@ -0,0 +1,97 @@
+"""Unit tests for the stuck bulk operation reaper."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.schemas.bulk_ops import BulkOperation
+from src.apeg_core.shopify.bulk_reaper import BulkOperationReaper
+
+
+SHOP = "test-shop.myshopify.com"
+MUTATION_LOCK = f"apeg:shopify:bulk_mutation_lock:{SHOP}"
+QUERY_LOCK = f"apeg:shopify:bulk_query_lock:{SHOP}"
+
+
+def _ago(seconds: float) -> str:
+    moment = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeRedis:
+    """Evaluates the reaper's compare-and-delete script in memory."""
+
+    def __init__(self, values=None):
+        self.values: dict[str, str] = dict(values or {})
+        self.published: list[str] = []
+
+    async def eval(self, script, numkeys, lock_key, operation_key, operation_id):
+        if self.values.get(operation_key) != operation_id:
+            return 0
+        self.values.pop(lock_key, None)
+        self.values.pop(operation_key, None)
+        return 1
+
+    async def publish(self, channel, message):
+        self.published.append(channel)
+        return 1
+
+
+def _reaper(redis, *states) -> BulkOperationReaper:
+    bulk_client = MagicMock()
+    bulk_client.shop_domain = SHOP
+    bulk_client.current_operations = AsyncMock(
+        side_effect=[{"QUERY": None, "MUTATION": state} for state in states]
+    )
+    bulk_client.cancel_operation = AsyncMock()
+    reaper = BulkOperationReaper(bulk_client, redis, max_runtime_seconds=600)
+    reaper.CANCEL_POLL_INTERVAL = 0
+    return reaper
+
+
+@pytest.mark.asyncio
+async def test_overdue_operation_is_canceled_and_its_lock_freed():
+    """Test a runaway mutation is canceled and queued jobs are woken."""
+    redis = FakeRedis(
+        {MUTATION_LOCK: "token", f"{MUTATION_LOCK}:operation": "op-1"}
+    )
+    running = BulkOperation(id="op-1", status="RUNNING", created_at=_ago(900))
+    canceling = BulkOperation(id="op-1", status="CANCELING", created_at=_ago(900))
+    canceled = BulkOperation(id="op-1", status="CANCELED", created_at=_ago(900))
+    reaper = _reaper(redis, running, canceling, canceled)
+
+    actions = await reaper.reconcile()
+
+    reaper.bulk_client.cancel_operation.assert_awaited_once_with("op-1")
+    assert actions == ["canceled op-1", f"freed {MUTATION_LOCK}"]
+    assert MUTATION_LOCK not in redis.values
+    assert redis.published == [f"{MUTATION_LOCK}:released"]
+
+
+@pytest.mark.asyncio
+async def test_lock_left_after_finish_is_freed_only_for_its_operation():
+    """Test a stranded lock is freed but a new holder's lock is untouched."""
+    finished = BulkOperation(id="op-1", status="COMPLETED", completed_at=_ago(600))
+
+    stranded = FakeRedis({MUTATION_LOCK: "token", f"{MUTATION_LOCK}:operation": "op-1"})
+    assert await _reaper(stranded, finished).reconcile() == [f"freed {MUTATION_LOCK}"]
+    assert MUTATION_LOCK not in stranded.values
+
+    # A new holder cleared the record when it took the lock and is still hydrating
+    new_holder = FakeRedis({MUTATION_LOCK: "token"})
+    assert await _reaper(new_holder, finished).reconcile() == []
+    assert MUTATION_LOCK in new_holder.values
+
+
+@pytest.mark.asyncio
+async def test_healthy_operations_are_left_alone():
+    """Test young running ops and recently finished ops are not reaped."""
+    redis = FakeRedis({MUTATION_LOCK: "token", f"{MUTATION_LOCK}:operation": "op-1"})
+    young = BulkOperation(id="op-1", status="RUNNING", created_at=_ago(60))
+    just_done = BulkOperation(id="op-1", status="COMPLETED", completed_at=_ago(5))
+    reaper = _reaper(redis, young, just_done)
+
+    assert await reaper.reconcile() == []
+    assert await reaper.reconcile() == []
+    reaper.bulk_client.cancel_operation.assert_not_awaited()
+    assert MUTATION_LOCK in redis.values
@@ -0,0 +1,481 @@
+"""Unit tests for sharded bulk mutations."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.schemas.bulk_ops import (
+    BulkOperation,
+    MutationOutcomeSummary,
+    ProductSEO,
+    ProductState,
+    ProductUpdateSpec,
+    StagedTarget,
+    StagedUploadParameter,
+)
+from src.apeg_core.shopify import mutation_outcomes
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import (
+    ShopifyBulkOperationFailedError,
+    ShopifyStagedUploadError,
+)
+from src.apeg_core.shopify.product_update_runner import ProductUpdateRunner
+
+
+def _specs(count: int) -> list[ProductUpdateSpec]:
+    return [
+        ProductUpdateSpec(
+            product_id=f"gid://shopify/Product/{i}",
+            tags_add=["new"],
+            seo=ProductSEO(title=f"Title {i}"),
+        )
+        for i in range(count)
+    ]
+
+
+def _runner(**kwargs) -> ProductUpdateRunner:
+    client = ShopifyBulkMutationClient(
+        shop_domain="test-shop.myshopify.com",
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        bulk_client=MagicMock(),
+    )
+    client.acquire_mutation_lock = AsyncMock()
+    client.release_mutation_lock = AsyncMock()
+    client.fetch_current_state = AsyncMock(return_value={})
+    return ProductUpdateRunner(client, **kwargs)
+
+
+def test_split_respects_line_and_byte_limits():
+    """Test shards close on whichever of lines or bytes is hit first."""
+    runner = _runner(shard_max_lines=4)
+    updates = runner.client.merge_product_updates(_specs(10), {})
+
+    shards = runner._split_into_shards(updates)
+    assert [result.line_count for _, result in shards] == [4, 4, 2]
+    assert [u.id for shard, _ in shards for u in shard] == [u.id for u in updates]
+
+    line_bytes = shards[0][1].byte_count // 4
+    runner.shard_max_bytes = line_bytes * 3
+    assert [r.line_count for _, r in runner._split_into_shards(updates)] == [
+        3,
+        3,
+        3,
+        1,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_next_shard_uploads_while_current_runs():
+    """Test shard N+1 is staged during shard N's poll and results combine."""
+    runner = _runner(shard_max_lines=2)
+    client = runner.client
+    events: list[str] = []
+    uploads = 0
+
+    async def staged_create():
+        nonlocal uploads
+        uploads += 1
+        return StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value=f"tmp/{uploads}.jsonl")],
+        )
+
+    async def upload(target, updates):
+        events.append(f"upload {target.staged_upload_path}")
+
+    async def run_mutation(mutation, staged_upload_path, client_identifier):
+        events.append(f"submit {staged_upload_path}")
+        return BulkOperation(id=f"op-{staged_upload_path}", status="CREATED")
+
+    async def poll_status(operation_id, poll_interval, timeout, **_):
+        await asyncio.sleep(0)
+        events.append(f"done {operation_id}")
+        return BulkOperation(id=operation_id, status="COMPLETED", object_count=2)
+
+    client._staged_uploads_create = AsyncMock(side_effect=staged_create)
+    client._upload_updates_to_staged_target = AsyncMock(side_effect=upload)
+    client.bulk_operation_run_mutation = AsyncMock(side_effect=run_mutation)
+    client.bulk_client.poll_status = AsyncMock(side_effect=poll_status)
+    submitted = AsyncMock()
+
+    result = await runner.run_sharded(
+        "run-1", _specs(4), on_shard_submitted=submitted
+    )
+
+    assert events == [
+        "upload tmp/1.jsonl",
+        "submit tmp/1.jsonl",
+        "upload tmp/2.jsonl",
+        "done op-tmp/1.jsonl",
+        "submit tmp/2.jsonl",
+        "done op-tmp/2.jsonl",
+    ]
+    assert result.is_success
+    assert result.object_count == 4
+    assert submitted.await_count == 2
+    identifiers = [
+        c.kwargs["client_identifier"]
+        for c in client.bulk_operation_run_mutation.await_args_list
+    ]
+    assert identifiers == [
+        "apeg-phase2:run-1:shard-1-of-2",
+        "apeg-phase2:run-1:shard-2-of-2",
+    ]
+    client.release_mutation_lock.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_shard_does_not_stop_later_shards():
+    """Test an upload failure is recorded and the remaining shards still run."""
+    runner = _runner(shard_max_lines=1)
+    client = runner.client
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock(
+        side_effect=[None, ShopifyStagedUploadError(403, "denied"), None]
+    )
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    client.bulk_client.poll_status = AsyncMock(
+        return_value=BulkOperation(id="op", status="COMPLETED", object_count=1)
+    )
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert [s.status for s in result.shards] == [
+        "COMPLETED",
+        "UPLOAD_FAILED",
+        "COMPLETED",
+    ]
+    assert result.failed_product_ids == ["gid://shopify/Product/1"]
+    assert client.bulk_operation_run_mutation.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_terminal_shard_failure_does_not_stop_later_shards():
+    """Test a shard Shopify reports FAILED is recorded and the run continues."""
+    runner = _runner(shard_max_lines=1)
+    client = runner.client
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock()
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    failed = BulkOperation(id="op", status="FAILED", error_code="INTERNAL_SERVER_ERROR")
+    completed = BulkOperation(id="op", status="COMPLETED", object_count=1)
+    client.bulk_client.poll_status = AsyncMock(
+        side_effect=[completed, ShopifyBulkOperationFailedError(failed), completed]
+    )
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert [s.status for s in result.shards] == ["COMPLETED", "FAILED", "COMPLETED"]
+    assert result.shards[1].error == "INTERNAL_SERVER_ERROR"
+    assert result.failed_product_ids == ["gid://shopify/Product/1"]
+    assert client.bulk_operation_run_mutation.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_canceled_shard_is_not_retried():
+    """Test a canceled shard's products are left failed, never resubmitted."""
+    runner = _runner(max_retries=2)
+    client = runner.client
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock()
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    canceled = BulkOperation(id="op", status="CANCELED")
+    client.bulk_client.poll_status = AsyncMock(
+        side_effect=ShopifyBulkOperationFailedError(canceled)
+    )
+    client.bulk_client.calculate_backoff = MagicMock(return_value=0.0)
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert client.bulk_operation_run_mutation.await_count == 1
+    assert result.is_canceled
+    assert len(result.failed_product_ids) == 3
+    assert result.retry_product_ids() == []
+
+
+@pytest.mark.asyncio
+async def test_canceled_shard_stops_later_shards():
+    """Test shards after a canceled one are skipped, not submitted."""
+    runner = _runner(shard_max_lines=1)
+    client = runner.client
+    client.stage_upload = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    canceled = BulkOperation(id="op", status="CANCELED")
+    client.bulk_client.poll_status = AsyncMock(
+        side_effect=ShopifyBulkOperationFailedError(canceled)
+    )
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert client.bulk_operation_run_mutation.await_count == 1
+    assert [shard.status for shard in result.shards] == [
+        "CANCELED",
+        "SKIPPED",
+        "SKIPPED",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_check_canceled_stops_before_next_submit():
+    """Test a cancel seen before a submit stops the run and its lock."""
+    runner = _runner(shard_max_lines=1)
+    client = runner.client
+    client.stage_upload = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    client.bulk_client.poll_status = AsyncMock(
+        return_value=BulkOperation(id="op", status="COMPLETED")
+    )
+    checks = 0
+
+    async def check_canceled():
+        nonlocal checks
+        checks += 1
+        if checks == 3:
+            raise RuntimeError("canceled")
+
+    with pytest.raises(RuntimeError, match="canceled"):
+        await runner.run_sharded("run-1", _specs(3), check_canceled=check_canceled)
+
+    assert client.bulk_operation_run_mutation.await_count == 1
+    assert client.stage_upload.await_count == 2
+    client.release_mutation_lock.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_shard_partial_data_limits_retry(monkeypatch):
+    """Test a FAILED shard's partialDataUrl is diffed so retries skip processed lines."""
+    runner = _runner(max_retries=1)
+    client = runner.client
+    client.bulk_client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+    )
+    client.bulk_client.calculate_backoff = MagicMock(return_value=0.0)
+    client.bulk_client.post_graphql = AsyncMock(
+        side_effect=[
+            {
+                "data": {
+                    "node": {
+                        "id": "op-1",
+                        "status": "FAILED",
+                        "errorCode": "INTERNAL_SERVER_ERROR",
+                        "partialDataUrl": "https://partial.test",
+                    }
+                }
+            },
+            {
+                "data": {
+                    "node": {"id": "op-2", "status": "COMPLETED", "url": "https://r.test"}
+                }
+            },
+        ]
+    )
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock()
+    client.bulk_operation_run_mutation = AsyncMock(
+        side_effect=[
+            BulkOperation(id="op-1", status="CREATED"),
+            BulkOperation(id="op-2", status="CREATED"),
+        ]
+    )
+    downloaded = []
+
+    async def response_chunks(session, url):
+        downloaded.append(url)
+        # Shopify processed the first two lines before the operation failed
+        lines = 2 if url == "https://partial.test" else 1
+        for line in range(lines):
+            yield b'{"data":{"productUpdate":{"userErrors":[]}},"__lineNumber":%d}\n' % line
+
+    monkeypatch.setattr(mutation_outcomes, "iter_response_chunks", response_chunks)
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert downloaded == ["https://partial.test", "https://r.test"]
+    assert [(s.status, s.error) for s in result.shards] == [
+        ("FAILED", "INTERNAL_SERVER_ERROR"),
+        ("COMPLETED", None),
+    ]
+    assert result.shards[1].product_ids == ["gid://shopify/Product/2"]
+    assert result.is_success
+
+
+@pytest.mark.asyncio
+async def test_poll_failure_skips_remaining_shards():
+    """Test an unknown shard outcome stops the run and skips later shards."""
+    runner = _runner(shard_max_lines=1)
+    client = runner.client
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock()
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    client.bulk_client.poll_status = AsyncMock(side_effect=TimeoutError("slow"))
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert [s.status for s in result.shards] == ["POLL_FAILED", "SKIPPED", "SKIPPED"]
+    assert len(result.failed_product_ids) == 3
+    client.release_mutation_lock.assert_awaited_once()
+
+
+def _completing_runner(outcomes_for, **kwargs) -> ProductUpdateRunner:
+    """Runner whose shards all complete; outcomes_for(product_ids) -> summary."""
+    runner = _runner(**kwargs)
+    client = runner.client
+    client._staged_uploads_create = AsyncMock(
+        return_value=StagedTarget(
+            url="https://upload.test",
+            parameters=[StagedUploadParameter(name="key", value="tmp/x.jsonl")],
+        )
+    )
+    client._upload_updates_to_staged_target = AsyncMock()
+    client.bulk_operation_run_mutation = AsyncMock(
+        return_value=BulkOperation(id="op", status="CREATED")
+    )
+    client.bulk_client.poll_status = AsyncMock(
+        return_value=BulkOperation(id="op", status="COMPLETED", url="https://r.test")
+    )
+    client.bulk_client.calculate_backoff = MagicMock(return_value=0.0)
+
+    async def collect(operation, run_id, product_ids=None):
+        return outcomes_for(product_ids)
+
+    client.collect_outcomes = AsyncMock(side_effect=collect)
+    return runner
+
+
+@pytest.mark.asyncio
+async def test_retry_resubmits_only_unprocessed_products():
+    """Test a retry pass re-hydrates and resubmits just the missing lines."""
+
+    def outcomes_for(product_ids):
+        # First pass: the operation stopped before the last two lines
+        missing = product_ids[-2:] if len(product_ids) == 5 else []
+        return MutationOutcomeSummary(
+            bulk_op_id="op",
+            succeeded=len(product_ids) - len(missing),
+            missing=len(missing),
+            missing_product_ids=missing,
+        )
+
+    runner = _completing_runner(outcomes_for, max_retries=2)
+    client = runner.client
+
+    result = await runner.run_sharded("run-1", _specs(5))
+
+    hydrated = [c.args[0] for c in client.fetch_current_state.await_args_list]
+    assert hydrated == [
+        [f"gid://shopify/Product/{i}" for i in range(5)],
+        ["gid://shopify/Product/3", "gid://shopify/Product/4"],
+    ]
+    assert [(s.index, s.attempt, s.line_count) for s in result.shards] == [
+        (0, 0, 5),
+        (1, 1, 2),
+    ]
+    assert result.is_success
+    assert result.attempts == 2
+    identifier = client.bulk_operation_run_mutation.await_args.kwargs[
+        "client_identifier"
+    ]
+    assert identifier == "apeg-phase2:run-1:shard-2-of-2:retry-1"
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_is_bounded_and_skips_user_errors():
+    """Test rejected products are not retried and passes stop at the budget."""
+
+    def outcomes_for(product_ids):
+        return MutationOutcomeSummary(
+            bulk_op_id="op",
+            user_errors=1,
+            missing=1,
+            rejected_product_ids=[pid for pid in product_ids if pid.endswith("/0")],
+            missing_product_ids=[pid for pid in product_ids if pid.endswith("/1")],
+        )
+
+    runner = _completing_runner(outcomes_for, max_retries=2)
+    client = runner.client
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    assert client.bulk_operation_run_mutation.await_count == 3
+    assert [s.line_count for s in result.shards] == [3, 1, 1]
+    assert result.failed_product_ids == ["gid://shopify/Product/1"]
+    assert result.rejected_product_ids == ["gid://shopify/Product/0"]
+    assert not result.is_success
+
+
+@pytest.mark.asyncio
+async def test_unchanged_products_are_not_uploaded():
+    """Test a re-sent job whose products already match submits nothing."""
+    runner = _runner()
+    client = runner.client
+    client.fetch_current_state = AsyncMock(
+        return_value={
+            spec.product_id: ProductState(
+                id=spec.product_id, tags=["new"], seo=ProductSEO(title=spec.seo.title)
+            )
+            for spec in _specs(3)
+        }
+    )
+    client._staged_uploads_create = AsyncMock()
+
+    result = await runner.run_sharded("run-1", _specs(3))
+
+    client._staged_uploads_create.assert_not_awaited()
+    assert result.shards == []
+    assert result.skipped_count == 3
+    assert result.is_success
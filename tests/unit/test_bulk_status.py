@@ -0,0 +1,230 @@
+"""Unit tests for the shared per-shop bulk status poller."""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+from src.apeg_core.shopify.bulk_status import BulkStatusMultiplexer
+from src.apeg_core.shopify.exceptions import ShopifyBulkApiError
+
+
+QUERY_OP = "gid://shopify/BulkOperation/1"
+MUTATION_OP = "gid://shopify/BulkOperation/2"
+STRAGGLER_OP = "gid://shopify/BulkOperation/7"
+
+
+def _node(op_id, status):
+    return {
+        "id": op_id,
+        "status": status,
+        "objectCount": "3",
+        "url": "https://results.test" if status == "COMPLETED" else None,
+    }
+
+
+class FakeShop:
+    """Serves currentBulkOperation; each op completes after ``rounds`` polls."""
+
+    def __init__(self, rounds=2):
+        self.rounds = rounds
+        self.requests = []
+
+    async def post_graphql(self, payload):
+        self.requests.append(payload["variables"]["ids"])
+        status = "COMPLETED" if len(self.requests) >= self.rounds else "RUNNING"
+        return {
+            "data": {
+                "currentQuery": _node(QUERY_OP, status),
+                "currentMutation": _node(MUTATION_OP, status),
+                "nodes": [
+                    None if op_id.endswith("/404") else _node(op_id, status)
+                    for op_id in payload["variables"]["ids"]
+                ],
+            }
+        }
+
+
+def _multiplexer(redis=None) -> BulkStatusMultiplexer:
+    multiplexer = BulkStatusMultiplexer("test-shop.myshopify.com", redis=redis)
+    multiplexer.MIN_INTERVAL = 0.01
+    multiplexer.MAX_INTERVAL = 0.01
+    return multiplexer
+
+
+@pytest.mark.asyncio
+async def test_one_request_per_interval_serves_every_waiter():
+    """Test concurrent waits share polls and only stragglers are looked up."""
+    shop = FakeShop(rounds=2)
+    multiplexer = _multiplexer()
+
+    results = await asyncio.gather(
+        *(
+            multiplexer.wait(op_id, shop.post_graphql, timeout=1)
+            for op_id in [QUERY_OP, QUERY_OP, MUTATION_OP, STRAGGLER_OP]
+        )
+    )
+
+    assert [r.status for r in results] == ["COMPLETED"] * 4
+    assert results[0].object_count == 3
+    assert multiplexer.poll_count == 2
+    # After the first poll, current operations are no longer looked up by ID
+    assert shop.requests[1] == [STRAGGLER_OP]
+
+
+@pytest.mark.asyncio
+async def test_unknown_operation_is_rejected():
+    """Test an ID that is neither current nor found raises like poll_status."""
+    shop = FakeShop()
+    multiplexer = _multiplexer()
+
+    with pytest.raises(ShopifyBulkApiError, match="not found"):
+        await multiplexer.wait(
+            "gid://shopify/BulkOperation/404", shop.post_graphql, timeout=1
+        )
+
+
+@pytest.mark.asyncio
+async def test_stored_finish_payload_is_waited_on_once():
+    """Test status lagging the finish webhook falls back to interval sleeps."""
+    shop = FakeShop(rounds=4)
+    multiplexer = _multiplexer()
+    multiplexer.notifier = AsyncMock()
+    multiplexer.notifier.wait_for_finish.return_value = {"status": "completed"}
+
+    result = await multiplexer.wait(MUTATION_OP, shop.post_graphql, timeout=1)
+
+    assert result.status == "COMPLETED"
+    assert multiplexer.poll_count == 4
+    multiplexer.notifier.wait_for_finish.assert_awaited_once()
+
+
+def test_interval_backs_off_with_wait_age():
+    """Test the poll interval is short at first and capped for long runs."""
+    multiplexer = BulkStatusMultiplexer("test-shop.myshopify.com")
+
+    multiplexer._since[QUERY_OP] = time.monotonic()
+    assert multiplexer.next_interval() == multiplexer.MIN_INTERVAL
+    multiplexer._since[QUERY_OP] = time.monotonic() - 100
+    assert multiplexer.next_interval() == pytest.approx(10.0, abs=0.1)
+    multiplexer._since[QUERY_OP] = time.monotonic() - 3600
+    assert multiplexer.next_interval() == multiplexer.MAX_INTERVAL
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+        redis.subscribers.append(self)
+
+    async def subscribe(self, channel):
+        pass
+
+    async def unsubscribe(self, channel):
+        self.redis.subscribers.remove(self)
+
+    async def aclose(self):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class FakeLock:
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    async def acquire(self, blocking=False):
+        if self.name in self.redis.locks:
+            return False
+        self.redis.locks.add(self.name)
+        return True
+
+    async def reacquire(self):
+        pass
+
+    async def release(self):
+        self.redis.locks.discard(self.name)
+
+
+class FakeRedis:
+    """Minimal in-memory subset of redis.asyncio used by the multiplexer."""
+
+    def __init__(self):
+        self.waiting: dict[str, float] = {}
+        self.locks: set[str] = set()
+        self.subscribers: list[FakePubSub] = []
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def lock(self, name, timeout=None):
+        return FakeLock(self, name)
+
+    async def zadd(self, key, mapping):
+        self.waiting.update(mapping)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def zremrangebyscore(self, key, low, high):
+        pass
+
+    async def zrangebyscore(self, key, low, high):
+        return [op_id.encode("utf-8") for op_id in self.waiting]
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.waiting.pop(member, None)
+
+    async def publish(self, channel, message):
+        for subscriber in self.subscribers:
+            subscriber.queue.put_nowait({"type": "message", "data": message.encode()})
+        return len(self.subscribers)
+
+
+@pytest.mark.asyncio
+async def test_processes_share_one_leader_through_redis():
+    """Test a follower process is served by the leader's published statuses."""
+    redis = FakeRedis()
+    leader_shop, follower_shop = FakeShop(rounds=3), FakeShop(rounds=3)
+    leader, follower = _multiplexer(redis), _multiplexer(redis)
+    follower_op = "gid://shopify/BulkOperation/9"
+
+    results = await asyncio.gather(
+        leader.wait(QUERY_OP, leader_shop.post_graphql, timeout=1),
+        follower.wait(follower_op, follower_shop.post_graphql, timeout=1),
+    )
+
+    assert [r.status for r in results] == ["COMPLETED", "COMPLETED"]
+    assert results[1].id == follower_op
+    assert follower_shop.requests == []
+    assert any(follower_op in ids for ids in leader_shop.requests)
+    # Leadership is released once no waits are left
+    await asyncio.gather(leader._task, follower._task)
+    assert redis.locks == set()
+
+
+@pytest.mark.asyncio
+async def test_bulk_client_waits_on_multiplexer():
+    """Test poll_status delegates to the shared poller and handles the result."""
+    shop = FakeShop(rounds=1)
+    client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        status_multiplexer=_multiplexer(),
+    )
+    client.post_graphql = AsyncMock(side_effect=shop.post_graphql)
+
+    operation = await client.poll_status(QUERY_OP)
+
+    assert operation.url == "https://results.test"
+    assert client.post_graphql.await_count == 1
@@ -0,0 +1,124 @@
+"""Unit tests for streamed staged uploads (local aiohttp stand-in)."""
+import json
+import os
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.apeg_core.schemas.bulk_ops import (
+    ProductSEO,
+    ProductUpdateInput,
+    StagedTarget,
+    StagedUploadParameter,
+)
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import ShopifyStagedUploadError
+
+
+class StagedUploadServer:
+    """Records multipart uploads; answers with queued status codes."""
+
+    def __init__(self, statuses: list[int]):
+        self.statuses = statuses
+        self.uploads: list[tuple[list[str], bytes]] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        reader = await request.multipart()
+        names, file_body = [], b""
+        async for part in reader:
+            names.append(part.name)
+            data = await part.read()
+            if part.name == "file":
+                file_body = data
+        self.uploads.append((names, file_body))
+        return web.Response(status=self.statuses.pop(0) if self.statuses else 204)
+
+
+def _updates(count: int) -> list[ProductUpdateInput]:
+    return [
+        ProductUpdateInput(
+            id=f"gid://shopify/Product/{i}",
+            tags=[f"tag-{i}", "ünïcode"],
+            seo=ProductSEO(title=f"Title {i}"),
+        )
+        for i in range(count)
+    ]
+
+
+async def _upload(statuses, updates, tmp_path):
+    server_state = StagedUploadServer(statuses)
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/upload", server_state.handle)
+    server = TestServer(app)
+    await server.start_server()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = ShopifyBulkMutationClient(
+                shop_domain="test-shop.myshopify.com",
+                access_token="shpat_fake_token",
+                api_version="2024-10",
+                session=session,
+                redis=AsyncMock(),
+            )
+            client.STREAM_CHUNK_SIZE_BYTES = 4096
+            target = StagedTarget(
+                url=str(server.make_url("/upload")),
+                parameters=[
+                    StagedUploadParameter(name="key", value="tmp/vars.jsonl"),
+                    StagedUploadParameter(name="acl", value="private"),
+                ],
+            )
+            with patch(
+                "src.apeg_core.shopify.bulk_mutation_client.tempfile.gettempdir",
+                return_value=str(tmp_path),
+            ), patch(
+                "src.apeg_core.shopify.bulk_mutation_client.asyncio.sleep",
+                new=AsyncMock(),
+            ):
+                await client._upload_updates_to_staged_target(target, updates)
+    finally:
+        await server.close()
+    return server_state.uploads
+
+
+@pytest.mark.asyncio
+async def test_streamed_upload_matches_per_line_jsonl(tmp_path):
+    """Test streamed body is byte-identical to line-by-line JSONL, file last."""
+    updates = _updates(500)
+
+    uploads = await _upload([], updates, tmp_path)
+
+    expected = "".join(
+        json.dumps(u.to_jsonl_dict(), ensure_ascii=False) + "\n" for u in updates
+    ).encode("utf-8")
+    assert len(uploads) == 1
+    names, body = uploads[0]
+    assert names == ["key", "acl", "file"]
+    assert body == expected
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_retryable_failure_spills_and_replays(tmp_path):
+    """Test a 503 replays identical bytes from a spill file, then cleans up."""
+    updates = _updates(200)
+
+    uploads = await _upload([503], updates, tmp_path)
+
+    assert len(uploads) == 2
+    assert uploads[0][1] == uploads[1][1]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_failure_is_not_replayed(tmp_path):
+    """Test a 403 raises immediately without spilling to disk."""
+    with pytest.raises(ShopifyStagedUploadError) as exc_info:
+        await _upload([403], _updates(10), tmp_path)
+
+    assert exc_info.value.status == 403
+    assert os.listdir(tmp_path) == []
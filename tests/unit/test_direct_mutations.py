@@ -0,0 +1,119 @@
+"""Unit tests for direct productUpdate execution of small batches."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.schemas.bulk_ops import ProductSEO, ProductUpdateSpec
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import ShopifyBulkApiError
+from src.apeg_core.shopify.product_update_runner import ProductUpdateRunner
+
+
+def _specs(count: int) -> list[ProductUpdateSpec]:
+    return [
+        ProductUpdateSpec(
+            product_id=f"gid://shopify/Product/{i}",
+            tags_add=["new"],
+            seo=ProductSEO(title=f"Title {i}"),
+        )
+        for i in range(count)
+    ]
+
+
+def _runner(post_graphql, **kwargs) -> ProductUpdateRunner:
+    bulk_client = MagicMock()
+    bulk_client.post_graphql = AsyncMock(side_effect=post_graphql)
+    bulk_client.calculate_backoff = MagicMock(return_value=0.0)
+    client = ShopifyBulkMutationClient(
+        shop_domain="test-shop.myshopify.com",
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        bulk_client=bulk_client,
+    )
+    client.acquire_mutation_lock = AsyncMock()
+    client.fetch_current_state = AsyncMock(return_value={})
+    return ProductUpdateRunner(client, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_small_batch_runs_direct_without_bulk_lock():
+    """Test direct results match bulk shape: errors kept, unsent retried."""
+    calls: dict[str, int] = {}
+
+    async def post_graphql(payload):
+        product_id = payload["variables"]["product"]["id"]
+        calls[product_id] = calls.get(product_id, 0) + 1
+        if product_id.endswith("/2") and calls[product_id] == 1:
+            raise ShopifyBulkApiError("Network error after 4 attempts")
+        user_errors = (
+            [{"field": ["product", "seo", "title"], "message": "is too long"}]
+            if product_id.endswith("/1")
+            else []
+        )
+        return {
+            "data": {
+                "productUpdate": {"product": {"id": product_id}, "userErrors": user_errors}
+            }
+        }
+
+    runner = _runner(post_graphql, max_retries=1)
+    stages = []
+
+    async def on_stage(stage):
+        stages.append(stage)
+
+    result = await runner.run("run-1", _specs(3), on_stage=on_stage)
+
+    runner.client.acquire_mutation_lock.assert_not_awaited()
+    assert stages == ["hydrating", "running"]
+    assert [(s.executor, s.attempt, s.status) for s in result.shards] == [
+        ("direct", 0, "FAILED"),
+        ("direct", 1, "COMPLETED"),
+    ]
+    assert result.shards[0].outcomes.missing_product_ids == ["gid://shopify/Product/2"]
+    assert result.shards[1].product_ids == ["gid://shopify/Product/2"]
+    assert result.rejected_product_ids == ["gid://shopify/Product/1"]
+    assert result.failed_product_ids == []
+    assert calls == {
+        "gid://shopify/Product/0": 1,
+        "gid://shopify/Product/1": 1,
+        "gid://shopify/Product/2": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_direct_calls_are_bounded():
+    """Test no more than DIRECT_MUTATION_CONCURRENCY calls are in flight."""
+    in_flight = 0
+    peak = 0
+
+    async def post_graphql(payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return {"data": {"productUpdate": {"product": None, "userErrors": []}}}
+
+    runner = _runner(post_graphql)
+
+    result = await runner.run_direct("run-1", _specs(12))
+
+    assert peak == runner.DIRECT_MUTATION_CONCURRENCY
+    assert result.shards[0].outcomes.succeeded == 12
+
+
+@pytest.mark.asyncio
+async def test_large_batch_uses_bulk_pipeline():
+    """Test batches above the threshold go through sharded bulk mutations."""
+    runner = _runner(None, direct_mutation_threshold=2)
+    runner.run_sharded = AsyncMock()
+    runner.run_direct = AsyncMock()
+
+    await runner.run("run-1", _specs(3))
+
+    runner.run_sharded.assert_awaited_once()
+    runner.run_direct.assert_not_awaited()
@@ -11,6 +11,7 @@ async def test_root_level_errors_trigger_exception():
     """Test that root ["errors"] raises ShopifyBulkGraphQLError before data access."""
     mock_session = MagicMock()
     mock_redis = AsyncMock()
+    mock_redis.eval.return_value = b"0"  # throttle reservations succeed at once
 
     client = ShopifyBulkClient(
         shop_domain="test.myshopify.com",
@@ -34,7 +35,7 @@ async def test_root_level_errors_trigger_exception():
     mock_session.post.return_value = mock_response
 
     with pytest.raises(ShopifyBulkGraphQLError) as exc_info:
-        await client._post_graphql({"query": "test"})
+        await client.post_graphql({"query": "test"})
 
     assert "Access denied" in str(exc_info.value)
     assert "Insufficient permissions" in str(exc_info.value)
@@ -0,0 +1,163 @@
+"""Unit tests for single-flight full-catalog hydration."""
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.apeg_core.schemas.bulk_ops import ProductState
+from src.apeg_core.shopify.hydration_singleflight import HydrationSingleFlight
+
+
+QUERY = "query { products { edges { node { id tags } } } }"
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def subscribe(self, channel):
+        pass
+
+    async def unsubscribe(self, channel):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            await asyncio.wait_for(self.redis.published.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return {"type": "message", "data": b"ready"}
+
+
+class FakeLock:
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    async def acquire(self, blocking=False):
+        if self.name in self.redis.locks:
+            return False
+        self.redis.locks.add(self.name)
+        return True
+
+    async def release(self):
+        self.redis.locks.discard(self.name)
+
+
+class FakeRedis:
+    """Minimal in-memory subset of redis.asyncio used by the single-flight."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.locks: set[str] = set()
+        self.published = asyncio.Event()
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def lock(self, name, timeout=None):
+        return FakeLock(self, name)
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {field: value.encode("utf-8") for field, value in mapping.items()}
+        )
+
+    async def hmget(self, key, fields):
+        values = self.hashes.get(key, {})
+        return [values.get(field) for field in fields]
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def rename(self, src, dst):
+        self.hashes[dst] = self.hashes.pop(src)
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.set()
+        self.published = asyncio.Event()
+        return 1
+
+
+def _catalog(count: int):
+    exports = []
+
+    def export():
+        async def states():
+            exports.append(1)
+            # Give followers a chance to queue behind the leader
+            await asyncio.sleep(0.01)
+            for i in range(count):
+                yield ProductState(id=f"gid://shopify/Product/{i}", tags=[f"t{i}"])
+
+        return states()
+
+    return export, exports
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_export():
+    """Test one export serves every concurrent caller's own products."""
+    flight = HydrationSingleFlight(FakeRedis(), "test-shop.myshopify.com")
+    flight.POLL_INTERVAL_SECONDS = 0.05
+    flight.WRITE_BATCH_SIZE = 2
+    export, exports = _catalog(5)
+
+    results = await asyncio.gather(
+        flight.get_states(QUERY, {"gid://shopify/Product/0"}, export),
+        flight.get_states(
+            QUERY, {"gid://shopify/Product/3", "gid://shopify/Product/9"}, export
+        ),
+        flight.get_states(QUERY, {"gid://shopify/Product/4"}, export),
+    )
+
+    assert len(exports) == 1
+    assert [sorted(r) for r in results] == [
+        ["gid://shopify/Product/0"],
+        ["gid://shopify/Product/3"],
+        ["gid://shopify/Product/4"],
+    ]
+    assert results[1]["gid://shopify/Product/3"].tags == ["t3"]
+
+
+@pytest.mark.asyncio
+async def test_recent_snapshot_is_reused():
+    """Test a caller arriving after the export finishes reads its snapshot."""
+    redis = FakeRedis()
+    flight = HydrationSingleFlight(redis, "test-shop.myshopify.com")
+    export, exports = _catalog(3)
+
+    await flight.get_states(QUERY, {"gid://shopify/Product/0"}, export)
+    states = await flight.get_states(QUERY, {"gid://shopify/Product/2"}, export)
+
+    assert len(exports) == 1
+    assert states["gid://shopify/Product/2"].tags == ["t2"]
+
+    # Once the snapshot has expired the next caller exports again
+    redis.hashes.clear()
+    await flight.get_states(QUERY, {"gid://shopify/Product/2"}, export)
+    assert len(exports) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_falls_back_to_direct_export():
+    """Test coordination errors do not block hydration."""
+    redis = FakeRedis()
+
+    async def unavailable(*args, **kwargs):
+        raise RedisConnectionError("connection refused")
+
+    redis.hmget = unavailable
+    flight = HydrationSingleFlight(redis, "test-shop.myshopify.com")
+    export, exports = _catalog(2)
+
+    states = await flight.get_states(QUERY, {"gid://shopify/Product/1"}, export)
+
+    assert len(exports) == 1
+    assert list(states) == ["gid://shopify/Product/1"]
@@ -0,0 +1,993 @@
+"""Unit tests for durable job store, runner, and job status API."""
+import hashlib
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from src.apeg_core.jobs.coalescer import collect_batch, merge_update_specs
+from src.apeg_core.api.resources import AppResources
+from src.apeg_core.jobs.runner import (
+    LiveJobResources,
+    build_update_specs,
+    run_seo_update_batch,
+    run_seo_update_job,
+)
+from src.apeg_core.jobs.store import MemoryJobStore, RedisJobStore
+from src.apeg_core.main import create_app
+from src.apeg_core.schemas.bulk_ops import (
+    BulkOperation,
+    BulkShardResult,
+    MutationOutcomeSummary,
+    ProductSEO,
+    ProductUpdateSpec,
+    ShardedBulkOperationRef,
+)
+from src.apeg_core.schemas.jobs import JobRecord, JobStatus
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import ShopifyBulkOperationFailedError
+
+
+class FakeListRedis:
+    """Minimal in-memory subset of redis.asyncio used by RedisJobStore."""
+
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.lists: dict[str, list[bytes]] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def eval(self, script, numkeys, key, *args):
+        # Stand-in for the record, run_id compare-and-set, and result TTL scripts
+        if numkeys == 2:
+            record_key, job_id, *args = args
+        else:
+            job_id, *args = args
+        owner = self.values.get(key)
+        if "sha1hex" in script:
+            expected, value = job_id, args[0]
+            if owner is None or hashlib.sha1(owner).hexdigest() != expected:
+                return 0
+            self.values[key] = value.encode("utf-8")
+            return 1
+        if "EXPIRE" in script:
+            if owner == job_id.encode("utf-8"):
+                self.ttls[key] = args[0]
+            return 0
+        if owner is None or owner == args[0].encode("utf-8"):
+            self.values[key] = job_id.encode("utf-8")
+            self.values[record_key] = args[2].encode("utf-8")
+            self.ttls[key] = args[1]
+            return None
+        return owner
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value.encode("utf-8"))
+
+    async def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    async def lmove(self, src, dest, wherefrom, whereto):
+        items = self.lists.get(src, [])
+        if not items:
+            return None
+        value = items.pop() if wherefrom == "RIGHT" else items.pop(0)
+        target = self.lists.setdefault(dest, [])
+        if whereto == "RIGHT":
+            target.append(value)
+        else:
+            target.insert(0, value)
+        return value
+
+    async def blmove(self, src, dest, timeout, wherefrom, whereto):
+        return await self.lmove(src, dest, wherefrom, whereto)
+
+    async def lrem(self, key, count, value):
+        self.lists.get(key, []).remove(value.encode("utf-8"))
+
+
+def _record(job_id: str, dry_run: bool = False) -> JobRecord:
+    return JobRecord(
+        job_id=job_id,
+        run_id=f"run-{job_id}",
+        shop_domain="test-shop.myshopify.com",
+        dry_run=dry_run,
+        product_count=1,
+        payload={
+            "products": [
+                {
+                    "product_id": "gid://shopify/Product/1",
+                    "tags_add": ["a"],
+                    "tags_remove": [],
+                    "seo": {"title": "T", "description": None},
+                }
+            ]
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_store_fifo_and_inflight_recovery():
+    """Test jobs dequeue FIFO and a dead slot's claimed job is re-queued first."""
+    store = RedisJobStore(FakeListRedis())
+    for job_id in ("j1", "j2", "j3"):
+        await store.enqueue(_record(job_id))
+
+    assert await store.dequeue("host:0") == "j1"
+    assert await store.dequeue("host:1") == "j2"
+    await store.ack("host:1", "j2")
+
+    # host:0 died holding j1; its restart puts j1 back ahead of j3
+    assert await store.requeue_inflight("host:0") == 1
+    assert await store.dequeue("host:0") == "j1"
+    assert await store.dequeue("host:0") == "j3"
+    assert await store.queue_depth() == 0
+    assert (await store.get("j3")).run_id == "run-j3"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "make_store", [MemoryJobStore, lambda: RedisJobStore(FakeListRedis())]
+)
+async def test_transition_never_overwrites_a_concurrent_cancel(make_store):
+    """Test a transition racing a cancel reloads and leaves the job canceled."""
+    store = make_store()
+    await store.save(_record("j1"))
+    load = store._load
+
+    async def load_then_cancel(job_id):
+        loaded = await load(job_id)
+        if loaded[0].status == JobStatus.QUEUED:
+            # The cancel lands between the runner's load and save
+            canceled = loaded[0].model_copy(deep=True)
+            canceled.transition(JobStatus.CANCELED)
+            await store.save(canceled)
+        return loaded
+
+    store._load = load_then_cancel
+
+    record = await store.transition("j1", JobStatus.RUNNING, bulk_op_id="op")
+
+    assert record.status == JobStatus.CANCELED
+    stored = await store.get("j1")
+    assert (stored.status, stored.bulk_op_id) == (JobStatus.CANCELED, None)
+
+
+@pytest.mark.asyncio
+async def test_run_id_claims_dedupe_retries_and_rerun_failures():
+    """Test a repeated run_id finds its job and a failed run is taken over."""
+    redis = FakeListRedis()
+    store = RedisJobStore(redis, result_ttl_seconds=60)
+    first, retry = _record("j1"), _record("j2")
+    first.payload_hash = retry.payload_hash = "hash-a"
+    retry.run_id = first.run_id
+
+    assert await store.claim_run(first) is None
+    await store.enqueue(first)
+    assert (await store.claim_run(retry)).job_id == "j1"
+
+    # A failed run is started again by the next identical submission
+    await store.transition("j1", JobStatus.FAILED, error="boom")
+    assert await store.claim_run(retry) is None
+    await store.enqueue(retry)
+
+    # Completion shortens the run entry to the result TTL
+    run_key = store.run_key(first.shop_domain, first.run_id)
+    await store.transition("j2", JobStatus.COMPLETED)
+    assert redis.ttls[run_key] == 60
+    other = _record("j3")
+    other.run_id, other.payload_hash = first.run_id, "hash-b"
+    existing = await store.claim_run(other)
+    assert (existing.job_id, existing.payload_hash) == ("j2", "hash-a")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "make_store", [MemoryJobStore, lambda: RedisJobStore(FakeListRedis())]
+)
+async def test_claimed_run_is_never_taken_over_before_enqueue(make_store):
+    """Test a claim saves its job, so a concurrent duplicate finds it."""
+    store = make_store()
+    first, duplicate = _record("j1"), _record("j2")
+    first.payload_hash = duplicate.payload_hash = "hash-a"
+    duplicate.run_id = first.run_id
+
+    assert await store.claim_run(first) is None
+    # first is still being admitted: nothing has been enqueued yet
+    assert (await store.claim_run(duplicate)).job_id == "j1"
+
+    # A claim given up before enqueueing frees the run for a retry
+    await store.release_run(first, "queue full")
+    assert (await store.get("j1")).status == JobStatus.FAILED
+    assert await store.claim_run(duplicate) is None
+
+
+@pytest.mark.asyncio
+async def test_runner_records_each_stage(monkeypatch):
+    """Test runner walks hydrating -> uploading -> running -> completed."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    await store.save(_record("j1"))
+    seen = []
+    original_transition = store.transition
+
+    async def tracking_transition(job_id, status, **fields):
+        seen.append(status)
+        return await original_transition(job_id, status, **fields)
+
+    store.transition = tracking_transition
+
+    async def fake_run(run_id, updates, on_stage=None, on_shard_submitted=None, **_):
+        assert updates[0].seo.title == "T"
+        await on_stage("hydrating")
+        await on_stage("uploading")
+        shard = BulkShardResult(
+            index=0,
+            product_ids=["gid://shopify/Product/1"],
+            bulk_op_id="gid://shopify/BulkOperation/9",
+            status="CREATED",
+        )
+        await on_shard_submitted(shard, 1)
+        shard.status, shard.object_count = "COMPLETED", 1
+        return ShardedBulkOperationRef(
+            run_id=run_id, shop_domain="test-shop.myshopify.com", shards=[shard]
+        )
+
+    updater = MagicMock()
+    updater.run = AsyncMock(side_effect=fake_run)
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        record = await run_seo_update_job("j1", store, MagicMock(), AsyncMock())
+
+    # The first transition only records the attempt
+    assert seen == ["queued", "hydrating", "uploading", "running", "completed"]
+    assert record.status == JobStatus.COMPLETED
+    assert record.bulk_op_id == "gid://shopify/BulkOperation/9"
+    assert record.attempts == 1
+    assert set(record.timings) == {"queued", "hydrating", "uploading", "running"}
+    assert record.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_runner_stops_canceled_job_and_cancels_its_operation(monkeypatch):
+    """Test a job canceled before submission cancels the submitted operation."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    await store.save(_record("j1"))
+
+    async def fake_run(run_id, updates, on_stage=None, on_shard_submitted=None, **_):
+        await on_stage("hydrating")
+        await store.transition("j1", JobStatus.CANCELED, error="Canceled by request")
+        shard = BulkShardResult(
+            index=0,
+            product_ids=["gid://shopify/Product/1"],
+            bulk_op_id="gid://shopify/BulkOperation/9",
+            status="CREATED",
+        )
+        await on_shard_submitted(shard, 1)
+        raise AssertionError("run should stop once the job is canceled")
+
+    updater = MagicMock()
+    updater.run = AsyncMock(side_effect=fake_run)
+    updater.client.bulk_client.cancel_operation = AsyncMock()
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        record = await run_seo_update_job("j1", store, MagicMock(), AsyncMock())
+
+    updater.client.bulk_client.cancel_operation.assert_awaited_once_with(
+        "gid://shopify/BulkOperation/9"
+    )
+    assert record.status == JobStatus.CANCELED
+    assert record.bulk_op_id is None
+    assert record.error == "Canceled by request"
+
+
+@pytest.mark.asyncio
+async def test_runner_skips_job_canceled_while_starting(monkeypatch):
+    """Test counting an attempt never overwrites a cancel that raced the read."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    await store.save(_record("j1"))
+    original_get = store.get
+
+    async def racing_get(job_id):
+        record = await original_get(job_id)
+        await store.transition(job_id, JobStatus.CANCELED, error="Canceled by request")
+        return record
+
+    store.get = racing_get
+    updater = MagicMock()
+    updater.run = AsyncMock()
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        record = await run_seo_update_job("j1", store, MagicMock(), AsyncMock())
+
+    updater.run.assert_not_awaited()
+    assert record.status == JobStatus.CANCELED
+    assert record.attempts == 0
+
+
+@pytest.mark.asyncio
+async def test_runner_records_failure(monkeypatch):
+    """Test exceptions mark the job failed with the error message."""
+    monkeypatch.delenv("SHOPIFY_STORE_DOMAIN", raising=False)
+    store = MemoryJobStore()
+    await store.save(_record("j1"))
+
+    record = await run_seo_update_job("j1", store, MagicMock(), AsyncMock())
+
+    assert record.status == JobStatus.FAILED
+    assert "SHOPIFY_STORE_DOMAIN" in record.error
+
+
+def test_merge_update_specs_applies_jobs_in_submission_order():
+    """Test merged spec equals running each job's update one after another."""
+    first, second = _record("a"), _record("b")
+    pid = "gid://shopify/Product/1"
+    batches = [
+        # Passed out of order; created_at decides
+        (
+            second,
+            [
+                ProductUpdateSpec(
+                    product_id=pid,
+                    tags_add=["x", "z"],
+                    tags_remove=["y"],
+                    seo=ProductSEO(description="second"),
+                )
+            ],
+        ),
+        (
+            first,
+            [
+                ProductUpdateSpec(
+                    product_id=pid,
+                    tags_add=["y"],
+                    tags_remove=["x", "old"],
+                    seo=ProductSEO(title="first", description="first"),
+                ),
+                ProductUpdateSpec(product_id="gid://shopify/Product/2", tags_add=["n"]),
+            ],
+        ),
+    ]
+
+    merged = {spec.product_id: spec for spec in merge_update_specs(batches)}
+
+    current = {"old", "keep", "y"}
+    spec = merged[pid]
+    assert sorted((current | set(spec.tags_add)) - set(spec.tags_remove)) == [
+        "keep",
+        "x",
+        "z",
+    ]
+    assert spec.seo == ProductSEO(title="first", description="second")
+    assert merged["gid://shopify/Product/2"].tags_add == ["n"]
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_gathers_within_limits():
+    """Test a slot claims queued jobs up to max_jobs."""
+    store = RedisJobStore(FakeListRedis())
+    for job_id in ("j1", "j2", "j3", "j4"):
+        await store.enqueue(_record(job_id))
+
+    first = await store.dequeue("host:0")
+    job_ids = await collect_batch(
+        store, "host:0", first, window_seconds=1.0, max_jobs=3, max_products=100
+    )
+
+    assert job_ids == ["j1", "j2", "j3"]
+    assert await store.queue_depth() == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_one_bulk_mutation_for_all_jobs(monkeypatch):
+    """Test coalesced jobs share one submission and each get a result."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    for job_id in ("j1", "j2"):
+        await store.save(_record(job_id))
+
+    async def fake_run(run_id, updates, on_shard_submitted=None, **_):
+        shard = BulkShardResult(
+            index=0,
+            product_ids=[u.product_id for u in updates],
+            bulk_op_id="gid://shopify/BulkOperation/9",
+            status="CREATED",
+        )
+        await on_shard_submitted(shard, 1)
+        shard.status, shard.object_count = "COMPLETED", 1
+        return ShardedBulkOperationRef(
+            run_id=run_id, shop_domain="test-shop.myshopify.com", shards=[shard]
+        )
+
+    updater = MagicMock()
+    updater.run = AsyncMock(side_effect=fake_run)
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        records = await run_seo_update_batch(
+            ["j1", "j2"], store, MagicMock(), AsyncMock()
+        )
+
+    updater.run.assert_awaited_once()
+    updates = updater.run.await_args.kwargs["updates"]
+    assert [u.product_id for u in updates] == ["gid://shopify/Product/1"]
+    assert [r.job_id for r in records] == ["j1", "j2"]
+    assert all(r.status == JobStatus.COMPLETED for r in records)
+    assert all(r.bulk_op_id == "gid://shopify/BulkOperation/9" for r in records)
+    assert all(r.batch_id == "j1" for r in records)
+
+
+@pytest.mark.asyncio
+async def test_batches_share_worker_resources(monkeypatch):
+    """Test batches given worker resources reuse them instead of rebuilding."""
+    monkeypatch.delenv("SHOPIFY_STORE_DOMAIN", raising=False)
+    store = MemoryJobStore()
+    for job_id in ("j1", "j2"):
+        await store.save(_record(job_id))
+    live = LiveJobResources(
+        MagicMock(), AsyncMock(), "test-shop.myshopify.com", "shpat_fake_token"
+    )
+    clients = []
+
+    def update_runner(client, **_):
+        clients.append(client)
+        updater = MagicMock()
+        updater.run = AsyncMock(
+            return_value=ShardedBulkOperationRef(
+                run_id="r", shop_domain="test-shop.myshopify.com", shards=[]
+            )
+        )
+        return updater
+
+    with patch("src.apeg_core.jobs.runner.ProductUpdateRunner", side_effect=update_runner):
+        for job_id in ("j1", "j2"):
+            await run_seo_update_batch([job_id], store, MagicMock(), AsyncMock(), live)
+
+    # No SHOPIFY_STORE_DOMAIN: only the shared resources could have run them
+    assert len(clients) == 2 and clients[0] is not clients[1]
+    assert all(
+        c.bulk_client.status_multiplexer is live.status_multiplexer for c in clients
+    )
+    assert all(c.hydration_flight is live.hydration_flight for c in clients)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "shopify_status,job_status",
+    [("FAILED", JobStatus.FAILED), ("CANCELED", JobStatus.CANCELED)],
+)
+async def test_resumed_poll_records_terminal_failure(
+    monkeypatch, shopify_status, job_status
+):
+    """Test a resumed job records how its operation ended, not a poll error."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+    store = MemoryJobStore()
+    record = _record("j1")
+    record.transition(JobStatus.RUNNING, bulk_op_id="gid://shopify/BulkOperation/9")
+    await store.save(record)
+    operation = BulkOperation(
+        id="gid://shopify/BulkOperation/9", status=shopify_status, error_code="X"
+    )
+
+    with patch.object(
+        ShopifyBulkMutationClient,
+        "poll_to_terminal",
+        AsyncMock(side_effect=ShopifyBulkOperationFailedError(operation)),
+    ), patch.object(
+        ShopifyBulkMutationClient, "ingest_outcomes", AsyncMock(return_value=None)
+    ):
+        final = await run_seo_update_job("j1", store, MagicMock(), AsyncMock())
+
+    assert final.status == job_status
+    assert final.error == f"Bulk operation {shopify_status}: X"
+
+
+@pytest.mark.asyncio
+async def test_job_canceled_before_submission_leaves_the_group(monkeypatch):
+    """Test canceling one coalesced job reruns the group without its products."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    first, second = _record("j1"), _record("j2")
+    second.payload["products"][0]["product_id"] = "gid://shopify/Product/2"
+    await store.save(first)
+    await store.save(second)
+    submitted = []
+
+    async def fake_run(run_id, updates, on_stage=None, on_shard_submitted=None, **_):
+        if not submitted:
+            await store.transition("j1", JobStatus.CANCELED, error="Canceled by request")
+        await on_stage("hydrating")
+        submitted.append([u.product_id for u in updates])
+        shard = BulkShardResult(
+            index=0,
+            product_ids=submitted[-1],
+            bulk_op_id="gid://shopify/BulkOperation/9",
+            status="CREATED",
+        )
+        await on_shard_submitted(shard, 1)
+        shard.status, shard.object_count = "COMPLETED", 1
+        return ShardedBulkOperationRef(
+            run_id=run_id, shop_domain="test-shop.myshopify.com", shards=[shard]
+        )
+
+    updater = MagicMock()
+    updater.run = AsyncMock(side_effect=fake_run)
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        records = await run_seo_update_batch(
+            ["j1", "j2"], store, MagicMock(), AsyncMock()
+        )
+
+    assert submitted == [["gid://shopify/Product/2"]]
+    assert updater.run.await_args.kwargs["run_id"] == "run-j2"
+    assert [r.status for r in records] == [JobStatus.CANCELED, JobStatus.COMPLETED]
+    assert records[0].bulk_op_id is None
+
+
+@pytest.mark.asyncio
+async def test_failed_shard_fails_only_jobs_with_products_in_it(monkeypatch):
+    """Test a failed shard fails the jobs it touched and records their products."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    first, second = _record("j1"), _record("j2")
+    second.payload["products"][0]["product_id"] = "gid://shopify/Product/2"
+    await store.save(first)
+    await store.save(second)
+
+    updater = MagicMock()
+    updater.run = AsyncMock(
+        return_value=ShardedBulkOperationRef(
+            run_id="run-j1",
+            shop_domain="test-shop.myshopify.com",
+            shards=[
+                BulkShardResult(
+                    index=0,
+                    product_ids=["gid://shopify/Product/1"],
+                    bulk_op_id="gid://shopify/BulkOperation/1",
+                    status="COMPLETED",
+                    object_count=1,
+                    outcomes=MutationOutcomeSummary(
+                        bulk_op_id="gid://shopify/BulkOperation/1", succeeded=1
+                    ),
+                ),
+                BulkShardResult(
+                    index=1,
+                    product_ids=["gid://shopify/Product/2"],
+                    status="UPLOAD_FAILED",
+                    error="Upload failed: 403",
+                ),
+            ],
+        )
+    )
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        records = await run_seo_update_batch(
+            ["j1", "j2"], store, MagicMock(), AsyncMock()
+        )
+
+    assert [r.status for r in records] == [JobStatus.COMPLETED, JobStatus.FAILED]
+    assert records[0].failed_product_ids == []
+    assert records[1].failed_product_ids == ["gid://shopify/Product/2"]
+    assert "shard 2/2 UPLOAD_FAILED" in records[1].error
+    assert all(r.shard_count == 2 for r in records)
+    assert records[0].outcome_summary == {
+        "succeeded": 1,
+        "user_errors": 0,
+        "not_applied": 0,
+        "unchanged": 0,
+    }
+    assert records[1].outcome_summary["not_applied"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_products_finish_job_as_partial(monkeypatch):
+    """Test a job with user-error rejections (and nothing unapplied) is partial."""
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("PRODUCT_MIRROR_DB_PATH", raising=False)
+
+    store = MemoryJobStore()
+    first, second = _record("j1"), _record("j2")
+    second.payload["products"][0]["product_id"] = "gid://shopify/Product/2"
+    await store.save(first)
+    await store.save(second)
+
+    updater = MagicMock()
+    updater.run = AsyncMock(
+        return_value=ShardedBulkOperationRef(
+            run_id="run-j1",
+            shop_domain="test-shop.myshopify.com",
+            shards=[
+                BulkShardResult(
+                    index=0,
+                    product_ids=["gid://shopify/Product/1", "gid://shopify/Product/2"],
+                    bulk_op_id="gid://shopify/BulkOperation/1",
+                    status="COMPLETED",
+                    object_count=2,
+                    outcomes=MutationOutcomeSummary(
+                        bulk_op_id="gid://shopify/BulkOperation/1",
+                        succeeded=1,
+                        user_errors=1,
+                        rejected_product_ids=["gid://shopify/Product/2"],
+                    ),
+                ),
+            ],
+        )
+    )
+
+    with patch(
+        "src.apeg_core.jobs.runner.ProductUpdateRunner", return_value=updater
+    ):
+        records = await run_seo_update_batch(
+            ["j1", "j2"], store, MagicMock(), AsyncMock()
+        )
+
+    assert [r.status for r in records] == [JobStatus.COMPLETED, JobStatus.PARTIAL]
+    assert records[1].is_terminal
+    assert records[1].failed_product_ids == ["gid://shopify/Product/2"]
+    assert records[1].outcome_summary["user_errors"] == 1
+    assert records[1].error is None
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    """Create async test client using the inline job backend."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.delenv("APEG_JOB_BACKEND", raising=False)
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    await app.state.resources.aclose()
+
+
+@pytest.mark.asyncio
+async def test_job_status_endpoint(client):
+    """Test submitted job can be looked up by job_id; unknown IDs 404."""
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+    submitted = await client.post(
+        "/api/v1/jobs/seo-update",
+        headers=headers,
+        json={
+            "run_id": "status-run",
+            "shop_domain": "test-shop.myshopify.com",
+            "dry_run": True,
+            "products": [{"product_id": "gid://shopify/Product/1"}],
+        },
+    )
+    job_id = submitted.json()["job_id"]
+
+    response = await client.get(f"/api/v1/jobs/{job_id}", headers=headers)
+    missing = await client.get("/api/v1/jobs/does-not-exist", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "completed"
+    assert body["run_id"] == "status-run"
+    assert "payload" not in body
+    assert "queued" in body["timings"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_repeated_run_id_returns_existing_job(client):
+    """Test a retried submission is not re-queued and a changed body is 409."""
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+    body = {
+        "run_id": "retried-run",
+        "shop_domain": "test-shop.myshopify.com",
+        "dry_run": True,
+        "products": [{"product_id": "gid://shopify/Product/1"}],
+    }
+
+    first = await client.post("/api/v1/jobs/seo-update", headers=headers, json=body)
+    retry = await client.post("/api/v1/jobs/seo-update", headers=headers, json=body)
+    body["products"].append({"product_id": "gid://shopify/Product/2"})
+    changed = await client.post("/api/v1/jobs/seo-update", headers=headers, json=body)
+
+    assert first.json()["duplicate"] is False
+    assert retry.status_code == 202
+    assert retry.json()["job_id"] == first.json()["job_id"]
+    assert retry.json()["duplicate"] is True
+    assert retry.json()["status"] == "completed"
+    assert changed.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_rejected_submission_frees_its_run_id(client):
+    """Test a submission refused after claiming its run_id can be retried."""
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+    body = {
+        "run_id": "rejected-run",
+        "shop_domain": "test-shop.myshopify.com",
+        "dry_run": True,
+        "products": [{"product_id": "gid://shopify/Product/1"}],
+    }
+
+    with patch(
+        "src.apeg_core.api.routes._admit",
+        AsyncMock(side_effect=HTTPException(status_code=429, detail="Queue full")),
+    ):
+        rejected = await client.post("/api/v1/jobs/seo-update", headers=headers, json=body)
+    retry = await client.post("/api/v1/jobs/seo-update", headers=headers, json=body)
+
+    assert rejected.status_code == 429
+    assert retry.status_code == 202
+    assert retry.json()["duplicate"] is False
+
+
+@pytest.mark.asyncio
+async def test_cancel_endpoint_cancels_bulk_operation(monkeypatch):
+    """Test DELETE cancels the job's operation once; finished jobs are 409."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("APEG_JOB_BACKEND", raising=False)
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+
+    app = create_app()
+    app.state.resources = AppResources.from_env()
+    running = _record("j1")
+    running.transition(JobStatus.RUNNING, bulk_op_id="gid://shopify/BulkOperation/9")
+    await app.state.resources.get_job_store().save(running)
+
+    cancel = AsyncMock()
+    transport = httpx.ASGITransport(app=app)
+    with patch(
+        "src.apeg_core.jobs.runner.ShopifyBulkClient.cancel_operation", new=cancel
+    ):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.delete("/api/v1/jobs/j1", headers=headers)
+            again = await client.delete("/api/v1/jobs/j1", headers=headers)
+            missing = await client.delete("/api/v1/jobs/nope", headers=headers)
+    await app.state.resources.aclose()
+
+    assert response.status_code == 200
+    assert response.json()["status"] == JobStatus.CANCELED
+    cancel.assert_awaited_once_with("gid://shopify/BulkOperation/9")
+    assert again.status_code == 409
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancel_endpoint_refuses_coalesced_operation(monkeypatch):
+    """Test a job sharing its operation with other jobs cannot cancel it."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_ACCESS_TOKEN", "shpat_fake_token")
+    monkeypatch.delenv("APEG_JOB_BACKEND", raising=False)
+
+    app = create_app()
+    app.state.resources = AppResources.from_env()
+    store = app.state.resources.get_job_store()
+    coalesced = _record("j1")
+    coalesced.transition(
+        JobStatus.RUNNING, bulk_op_id="gid://shopify/BulkOperation/9", batch_id="j0"
+    )
+    await store.save(coalesced)
+
+    cancel = AsyncMock()
+    transport = httpx.ASGITransport(app=app)
+    with patch(
+        "src.apeg_core.jobs.runner.ShopifyBulkClient.cancel_operation", new=cancel
+    ):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.delete(
+                "/api/v1/jobs/j1", headers={"X-APEG-API-KEY": "test-api-key"}
+            )
+    await app.state.resources.aclose()
+
+    assert response.status_code == 409
+    cancel.assert_not_awaited()
+    assert (await store.get("j1")).status == JobStatus.RUNNING
+
+
+def _ndjson(*lines: dict) -> bytes:
+    return "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_streamed_job_is_spooled_and_matches_json_submission(
+    client, tmp_path, monkeypatch
+):
+    """Test an NDJSON job is spooled, run, cleaned up, and deduped by run_id."""
+    monkeypatch.setenv("APEG_JOB_SPOOL_DIR", str(tmp_path))
+    headers = {"X-APEG-API-KEY": "test-api-key", "Content-Type": "application/x-ndjson"}
+    header = {
+        "run_id": "stream-run",
+        "shop_domain": "test-shop.myshopify.com",
+        "dry_run": True,
+    }
+    products = [
+        {"product_id": "gid://shopify/Product/1", "tags_add": ["a"]},
+        {"product_id": "gid://shopify/Product/2", "seo": {"title": "T"}},
+    ]
+
+    streamed = await client.post(
+        "/api/v1/jobs/seo-update:stream",
+        headers=headers,
+        content=_ndjson(header, *products),
+    )
+    job_id = streamed.json()["job_id"]
+    status_response = await client.get(f"/api/v1/jobs/{job_id}", headers=headers)
+    resubmitted = await client.post(
+        "/api/v1/jobs/seo-update",
+        headers={"X-APEG-API-KEY": "test-api-key"},
+        json={**header, "products": products},
+    )
+
+    assert streamed.status_code == 202
+    assert status_response.json()["status"] == "completed"
+    assert status_response.json()["product_count"] == 2
+    assert list(tmp_path.iterdir()) == []
+    assert resubmitted.json()["job_id"] == job_id
+    assert resubmitted.json()["duplicate"] is True
+
+
+@pytest.mark.asyncio
+async def test_streamed_repeat_is_checked_from_the_header(client, tmp_path, monkeypatch):
+    """Test a held run_id is answered without spooling, and a new header is 409."""
+    monkeypatch.setenv("APEG_JOB_SPOOL_DIR", str(tmp_path))
+    headers = {"X-APEG-API-KEY": "test-api-key", "Content-Type": "application/x-ndjson"}
+    header = {
+        "run_id": "stream-repeat",
+        "shop_domain": "test-shop.myshopify.com",
+        "dry_run": True,
+    }
+    product = {"product_id": "gid://shopify/Product/1", "tags_add": ["a"]}
+    first = await client.post(
+        "/api/v1/jobs/seo-update:stream", headers=headers, content=_ndjson(header, product)
+    )
+
+    spooled_sizes = []
+
+    def remove(path):
+        spooled_sizes.append(os.path.getsize(path))
+        os.remove(path)
+
+    with patch("src.apeg_core.api.routes.remove_spool_file", side_effect=remove):
+        repeat = await client.post(
+            "/api/v1/jobs/seo-update:stream",
+            headers=headers,
+            content=_ndjson(header, product),
+        )
+    conflict = await client.post(
+        "/api/v1/jobs/seo-update:stream",
+        headers=headers,
+        content=_ndjson({**header, "dry_run": False}, product, {"tags_add": []}),
+    )
+
+    assert repeat.json()["job_id"] == first.json()["job_id"]
+    assert repeat.json()["duplicate"] is True
+    assert spooled_sizes == [0]
+    assert conflict.status_code == 409
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_job_failing_to_queue_leaves_no_spool(client, tmp_path, monkeypatch):
+    """Test a stream whose job cannot be queued removes its spool file."""
+    monkeypatch.setenv("APEG_JOB_SPOOL_DIR", str(tmp_path))
+    headers = {"X-APEG-API-KEY": "test-api-key", "Content-Type": "application/x-ndjson"}
+    header = {"run_id": "unqueued-stream", "shop_domain": "test-shop.myshopify.com"}
+    product = {"product_id": "gid://shopify/Product/1", "tags_add": ["a"]}
+
+    with patch(
+        "src.apeg_core.api.routes._submit",
+        AsyncMock(side_effect=RuntimeError("redis down")),
+    ), pytest.raises(RuntimeError):
+        await client.post(
+            "/api/v1/jobs/seo-update:stream",
+            headers=headers,
+            content=_ndjson(header, product),
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_job_rejects_bad_lines(client, tmp_path, monkeypatch):
+    """Test an invalid line is reported by number and nothing is spooled."""
+    monkeypatch.setenv("APEG_JOB_SPOOL_DIR", str(tmp_path))
+    headers = {"X-APEG-API-KEY": "test-api-key", "Content-Type": "application/x-ndjson"}
+    header = {"run_id": "bad-stream", "shop_domain": "test-shop.myshopify.com"}
+
+    invalid = await client.post(
+        "/api/v1/jobs/seo-update:stream",
+        headers=headers,
+        content=_ndjson(
+            header, {"product_id": "gid://shopify/Product/1"}, {"tags_add": []}
+        ),
+    )
+    no_products = await client.post(
+        "/api/v1/jobs/seo-update:stream", headers=headers, content=_ndjson(header)
+    )
+    wrong_type = await client.post(
+        "/api/v1/jobs/seo-update:stream",
+        headers={"X-APEG-API-KEY": "test-api-key"},
+        json=header,
+    )
+
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["line"] == 3
+    assert no_products.status_code == 400
+    assert wrong_type.status_code == 415
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_job_rejects_long_line_in_any_chunk(client, tmp_path, monkeypatch):
+    """Test the line limit holds for lines that arrive complete in one chunk."""
+    monkeypatch.setenv("APEG_JOB_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr("src.apeg_core.api.routes.MAX_STREAM_LINE_BYTES", 200)
+    headers = {"X-APEG-API-KEY": "test-api-key", "Content-Type": "application/x-ndjson"}
+    header = {"run_id": "long-line", "shop_domain": "test-shop.myshopify.com"}
+    product = {"product_id": "gid://shopify/Product/1", "seo": {"title": "T" * 300}}
+
+    response = await client.post(
+        "/api/v1/jobs/seo-update:stream",
+        headers=headers,
+        content=_ndjson(header, product, {"product_id": "gid://shopify/Product/2"}),
+    )
+
+    assert response.status_code == 413
+    assert "Line 2" in response.json()["detail"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_build_update_specs_reads_spool_file(tmp_path):
+    """Test a streamed job's specs come from its spool file."""
+    spool = tmp_path / "j1.ndjson"
+    spool.write_text(
+        json.dumps({"product_id": "gid://shopify/Product/1", "seo": {"title": "T"}}) + "\n"
+    )
+    record = _record("j1")
+    record.payload = {"run_id": "r", "products_file": str(spool)}
+
+    specs = build_update_specs(record)
+
+    assert [spec.product_id for spec in specs] == ["gid://shopify/Product/1"]
+    assert specs[0].seo.title == "T"
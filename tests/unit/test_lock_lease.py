@@ -0,0 +1,124 @@
+"""Unit tests for heartbeat leases on the bulk operation locks."""
+import asyncio
+from time import monotonic
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.shopify import lock_lease
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.exceptions import ShopifyBulkLeaseLostError
+from src.apeg_core.shopify.lock_lease import LockLease
+
+
+LOCK = "apeg:shopify:bulk_mutation_lock:test-shop.myshopify.com"
+
+
+class FakeRedis:
+    """Evaluates the lease scripts against in-memory keys with expiry."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.expires: dict[str, float] = {}
+
+    def get(self, key):
+        if key in self.expires and monotonic() >= self.expires[key]:
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return self.values.get(key)
+
+    def set(self, key, value, ttl_ms=None):
+        self.values[key] = value
+        self.expires.pop(key, None)
+        if ttl_ms is not None:
+            self.expires[key] = monotonic() + int(ttl_ms) / 1000
+
+    def _owned(self, lock_key, fence_key, token, fence):
+        return self.get(lock_key) == token and self.get(fence_key) == fence
+
+    async def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        if script == lock_lease._START_SCRIPT:
+            fence = int(self.get(keys[0]) or 0) + 1
+            self.set(keys[0], str(fence))
+            self.values.pop(keys[1], None)
+            return fence
+        if not self._owned(keys[0], keys[1], argv[0], argv[1]):
+            return 0
+        if script == lock_lease._RENEW_SCRIPT:
+            for key in (keys[0], keys[2]):
+                if self.get(key) is not None:
+                    self.set(key, self.values[key], argv[2])
+        else:
+            self.set(keys[2], argv[3], argv[2])
+        return 1
+
+
+def _acquire(redis, token, ttl_seconds):
+    """Take the lock directly, as ``AsyncRedisLock.acquire`` would."""
+    redis.set(LOCK, token, ttl_seconds * 1000)
+    lock = MagicMock()
+    lock.name = LOCK
+    lock.local.token = token
+    return LockLease(redis, lock, ttl_seconds)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_lock_past_its_ttl():
+    """Test a held lock outlives its TTL only while the heartbeat runs."""
+    redis = FakeRedis()
+    lease = _acquire(redis, "worker-1", ttl_seconds=0.15)
+    assert await lease.start() == 1
+
+    await asyncio.sleep(0.4)
+    await lease.check()
+    assert await lease.record_operation("op-1")
+    assert redis.get(f"{LOCK}:operation") == "op-1"
+
+    # A holder that stops renewing frees the shop within one TTL
+    await lease.stop()
+    await asyncio.sleep(0.2)
+    assert redis.get(LOCK) is None
+
+
+@pytest.mark.asyncio
+async def test_stale_holder_is_fenced_out():
+    """Test a holder whose lock expired cannot record or submit."""
+    redis = FakeRedis()
+    stale = _acquire(redis, "worker-1", ttl_seconds=30)
+    await stale.start()
+
+    # The lock expires while worker-1 is stalled and worker-2 takes it
+    redis.values.pop(LOCK)
+    fresh = _acquire(redis, "worker-2", ttl_seconds=30)
+    assert await fresh.start() == 2
+
+    assert not await stale.record_operation("op-stale")
+    with pytest.raises(ShopifyBulkLeaseLostError):
+        await stale.check()
+    await fresh.check()
+    assert redis.get(f"{LOCK}:operation") is None
+
+    await asyncio.gather(stale.stop(), fresh.stop())
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_aborts_before_mutation_submit():
+    """Test the mutation client never submits once its lease is lost."""
+    client = ShopifyBulkMutationClient(
+        shop_domain="test-shop.myshopify.com",
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+    )
+    client.bulk_client.post_graphql = AsyncMock()
+    client._lease = MagicMock()
+    client._lease.check = AsyncMock(side_effect=ShopifyBulkLeaseLostError(LOCK, 1))
+
+    with pytest.raises(ShopifyBulkLeaseLostError):
+        await client.bulk_operation_run_mutation(
+            mutation="mutation", staged_upload_path="tmp/vars", client_identifier="run"
+        )
+
+    client.bulk_client.post_graphql.assert_not_awaited()
@@ -0,0 +1,141 @@
+"""Unit tests for bulk mutation outcome ingestion."""
+import sqlite3
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.schemas.bulk_ops import BulkOperation
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.mutation_outcomes import (
+    MutationOutcomeStore,
+    OutcomeStatus,
+)
+
+
+PRODUCT_IDS = [f"gid://shopify/Product/{i}" for i in range(4)]
+
+RESULT_LINES = [
+    {
+        "data": {
+            "productUpdate": {
+                "product": {"id": PRODUCT_IDS[0], "tags": ["a"]},
+                "userErrors": [],
+            }
+        },
+        "__lineNumber": 0,
+    },
+    {
+        "data": {
+            "productUpdate": {
+                "product": None,
+                "userErrors": [
+                    {"field": ["product", "seo", "title"], "message": "is too long"}
+                ],
+            }
+        },
+        "__lineNumber": 1,
+    },
+    {"errors": [{"message": "Invalid input"}], "__lineNumber": 3},
+]
+
+
+async def _records(lines):
+    for line in lines:
+        yield dict(line)
+
+
+@pytest.fixture
+def outcome_store():
+    store = MutationOutcomeStore(sqlite3.connect(":memory:", check_same_thread=False))
+    yield store
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_classifies_lines_and_records_missing(outcome_store):
+    """Test user errors keep field paths and unanswered lines are missing."""
+    summary = await outcome_store.ingest_records(
+        _records(RESULT_LINES),
+        bulk_op_id="gid://shopify/BulkOperation/1",
+        run_id="run-1",
+        shop_domain="test-shop.myshopify.com",
+        product_ids=PRODUCT_IDS,
+    )
+
+    assert (summary.succeeded, summary.user_errors, summary.missing) == (1, 2, 1)
+    assert summary.failed_product_ids == [
+        PRODUCT_IDS[1],
+        PRODUCT_IDS[3],
+        PRODUCT_IDS[2],
+    ]
+
+    errors = outcome_store.get_outcomes("run-1", status=OutcomeStatus.USER_ERROR)
+    assert [row["product_id"] for row in errors] == [PRODUCT_IDS[1], PRODUCT_IDS[3]]
+    assert errors[0]["errors"] == [
+        {"field": ["product", "seo", "title"], "message": "is too long"}
+    ]
+    assert errors[1]["errors"] == [{"field": None, "message": "Invalid input"}]
+    assert len(outcome_store.get_outcomes("run-1")) == 4
+
+
+@pytest.mark.asyncio
+async def test_ingest_writes_batches_off_the_event_loop(outcome_store):
+    """Test result lines are inserted in batches from worker threads."""
+    outcome_store.INSERT_BATCH_SIZE = 2
+    insert = outcome_store._insert
+    batches = []
+
+    def recording_insert(rows):
+        batches.append((len(rows), threading.get_ident()))
+        insert(rows)
+
+    outcome_store._insert = recording_insert
+
+    await outcome_store.ingest_records(
+        _records(RESULT_LINES),
+        bulk_op_id="gid://shopify/BulkOperation/1",
+        run_id="run-1",
+        shop_domain="test-shop.myshopify.com",
+        product_ids=PRODUCT_IDS,
+    )
+
+    assert [size for size, _ in batches] == [2, 2]
+    assert threading.get_ident() not in {thread for _, thread in batches}
+    assert len(outcome_store.get_outcomes("run-1")) == 4
+
+
+@pytest.mark.asyncio
+async def test_reingest_overwrites_rows(outcome_store):
+    """Test ingesting the same operation twice does not duplicate rows."""
+    for _ in range(2):
+        await outcome_store.ingest_records(
+            _records(RESULT_LINES[:1]),
+            bulk_op_id="gid://shopify/BulkOperation/1",
+            run_id="run-1",
+            shop_domain="test-shop.myshopify.com",
+        )
+
+    assert len(outcome_store.get_outcomes("run-1")) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_ingest_is_best_effort():
+    """Test download failures are logged and reported as no summary."""
+    store = MagicMock()
+    store.ingest = AsyncMock(side_effect=RuntimeError("403"))
+    client = ShopifyBulkMutationClient(
+        shop_domain="test-shop.myshopify.com",
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        outcome_store=store,
+    )
+
+    completed = BulkOperation(id="op", status="COMPLETED", url="https://results.test")
+    no_file = BulkOperation(id="op", status="FAILED")
+
+    assert await client.ingest_outcomes(completed, "run-1") is None
+    assert await client.ingest_outcomes(no_file, "run-1") is None
+    store.ingest.assert_awaited_once()
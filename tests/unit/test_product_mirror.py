@@ -0,0 +1,245 @@
+"""Unit tests for the local product state mirror."""
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.apeg_core.schemas.bulk_ops import ProductSEO, ProductState, ProductUpdateSpec
+from src.apeg_core.shopify.bulk_mutation_client import ShopifyBulkMutationClient
+from src.apeg_core.shopify.product_mirror import ProductMirror
+from src.apeg_core.shopify.product_update_runner import ProductUpdateRunner
+
+
+SHOP = "test-shop.myshopify.com"
+
+
+@pytest.fixture
+def mirror():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    yield ProductMirror(conn, SHOP)
+    conn.close()
+
+
+class ThreadRecordingConnection:
+    """SQLite connection wrapper recording which threads run queries."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.threads = set()
+
+    def execute(self, *args):
+        self.threads.add(threading.get_ident())
+        return self.conn.execute(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def _state(pid, tags, updated_at, title="Title"):
+    return ProductState(
+        id=f"gid://shopify/Product/{pid}",
+        tags=tags,
+        seo=ProductSEO(title=title, description=None),
+        updated_at=updated_at,
+    )
+
+
+def test_upsert_never_regresses_to_older_state(mirror):
+    """Test an older updatedAt does not overwrite newer mirrored state."""
+    mirror.upsert([_state(1, ["new"], "2024-06-01T12:00:00Z")])
+    mirror.upsert([_state(1, ["old"], "2024-06-01T11:00:00Z")])
+
+    # Offset timestamps are normalized before comparison
+    mirror.upsert([_state(1, ["newer"], "2024-06-01T08:30:00-04:00")])
+
+    state = mirror.get_states(["gid://shopify/Product/1"])["gid://shopify/Product/1"]
+    assert state.tags == ["newer"]
+    assert state.updated_at == "2024-06-01T12:30:00Z"
+
+
+def test_webhook_updates_tags_and_marks_seo_unknown(mirror):
+    """Test products/update payload updates tags and invalidates SEO."""
+    mirror.upsert([_state(1, ["a"], "2024-06-01T12:00:00Z")])
+
+    applied = mirror.apply_webhook(
+        {
+            "admin_graphql_api_id": "gid://shopify/Product/1",
+            "tags": "a, b",
+            "updated_at": "2024-06-01T13:00:00Z",
+        }
+    )
+
+    state = mirror.get_states(["gid://shopify/Product/1"])["gid://shopify/Product/1"]
+    assert applied
+    assert state.tags == ["a", "b"]
+    assert state.seo is None
+    assert not mirror.apply_webhook({"tags": "x"})
+
+
+@pytest.mark.asyncio
+async def test_refresh_incremental_pages_from_watermark(mirror):
+    """Test incremental refresh queries updated_at since the watermark."""
+    mirror._record_sync(datetime(2024, 6, 1, 12, 1, tzinfo=timezone.utc), seeded=True)
+    bulk_client = MagicMock()
+    bulk_client.post_graphql = AsyncMock(
+        side_effect=[
+            {
+                "data": {
+                    "products": {
+                        "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+                        "nodes": [{"id": "gid://shopify/Product/1", "tags": ["x"]}],
+                    }
+                }
+            },
+            {
+                "data": {
+                    "products": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": [{"id": "gid://shopify/Product/2", "tags": ["y"]}],
+                    }
+                }
+            },
+        ]
+    )
+
+    count = await mirror.refresh_incremental(bulk_client)
+
+    assert count == 2
+    first_vars = bulk_client.post_graphql.call_args_list[0].args[0]["variables"]
+    second_vars = bulk_client.post_graphql.call_args_list[1].args[0]["variables"]
+    assert first_vars == {"query": "updated_at:>'2024-06-01T12:00:00Z'", "cursor": None}
+    assert second_vars["cursor"] == "c1"
+    assert mirror.is_fresh(60)
+
+
+@pytest.mark.asyncio
+async def test_fetch_current_tags_uses_fresh_mirror(mirror):
+    """Test seeded, fresh mirror avoids remote hydration except for misses."""
+    mirror.upsert([_state(1, ["mirrored"], "2024-06-01T12:00:00Z")])
+    mirror._record_sync(datetime.now(timezone.utc), seeded=True)
+
+    client = ShopifyBulkMutationClient(
+        shop_domain=SHOP,
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=AsyncMock(),
+        redis=AsyncMock(),
+        product_mirror=mirror,
+    )
+
+    with patch.object(
+        client, "_fetch_state_via_nodes", new=AsyncMock(return_value={})
+    ) as nodes_query:
+        tags = await client.fetch_current_tags(["gid://shopify/Product/1"])
+        assert tags == {"gid://shopify/Product/1": ["mirrored"]}
+        nodes_query.assert_not_awaited()
+
+        nodes_query.return_value = {
+            "gid://shopify/Product/9": ProductState(
+                id="gid://shopify/Product/9", tags=["live"]
+            )
+        }
+        tags = await client.fetch_current_tags(
+            ["gid://shopify/Product/1", "gid://shopify/Product/9"]
+        )
+
+    assert tags == {
+        "gid://shopify/Product/1": ["mirrored"],
+        "gid://shopify/Product/9": ["live"],
+    }
+    nodes_query.assert_awaited_once_with({"gid://shopify/Product/9"})
+
+
+@pytest.mark.asyncio
+async def test_worker_mirror_queries_run_off_the_event_loop(mirror):
+    """Test hydration and invalidation touch SQLite from worker threads only."""
+    mirror.upsert([_state(1, ["mirrored"], "2024-06-01T12:00:00Z")])
+    mirror._record_sync(datetime.now(timezone.utc), seeded=True)
+    mirror.db_conn = ThreadRecordingConnection(mirror.db_conn)
+    client = ShopifyBulkMutationClient(
+        shop_domain=SHOP,
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=AsyncMock(),
+        redis=AsyncMock(),
+        product_mirror=mirror,
+    )
+
+    tags = await client.fetch_current_tags(["gid://shopify/Product/1"])
+    await client.invalidate_mirror(["gid://shopify/Product/1"])
+
+    assert tags == {"gid://shopify/Product/1": ["mirrored"]}
+    assert mirror.db_conn.threads
+    assert threading.get_ident() not in mirror.db_conn.threads
+
+
+@pytest.mark.asyncio
+async def test_fetch_current_tags_picks_strategy_by_batch_size():
+    """Test small batches use paged nodes(ids:) queries, large ones bulk export."""
+    bulk_client = MagicMock()
+    bulk_client.post_graphql = AsyncMock(
+        side_effect=lambda payload: {
+            "data": {
+                "nodes": [
+                    {"id": pid, "tags": ["t"]} if not pid.endswith("/0") else None
+                    for pid in payload["variables"]["ids"]
+                ]
+            }
+        }
+    )
+    client = ShopifyBulkMutationClient(
+        shop_domain=SHOP,
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=AsyncMock(),
+        redis=AsyncMock(),
+        bulk_client=bulk_client,
+        nodes_hydration_threshold=300,
+    )
+    ids = [f"gid://shopify/Product/{i}" for i in range(300)]
+
+    with patch.object(
+        client, "_fetch_state_via_bulk_query", new=AsyncMock(return_value={})
+    ) as bulk_query:
+        tags = await client.fetch_current_tags(ids)
+        bulk_query.assert_not_awaited()
+
+        await client.fetch_current_tags(ids + ["gid://shopify/Product/300"])
+        bulk_query.assert_awaited_once()
+
+    # 300 IDs -> pages of 250 and 50; null node for the unknown ID is skipped
+    pages = [c.args[0]["variables"]["ids"] for c in bulk_client.post_graphql.call_args_list]
+    assert sorted(len(p) for p in pages) == [50, 250]
+    assert len(tags) == 299
+    assert "gid://shopify/Product/0" not in tags
+
+
+@pytest.mark.asyncio
+async def test_own_mutations_invalidate_mirrored_rows(mirror):
+    """Test products APEG just wrote are re-hydrated instead of read stale."""
+    mirror.upsert([_state(1, ["old"], "2024-06-01T12:00:00Z")])
+    mirror.upsert([_state(2, ["other"], "2024-06-01T12:00:00Z")])
+    mirror._record_sync(datetime.now(timezone.utc), seeded=True)
+    bulk_client = MagicMock()
+    bulk_client.post_graphql = AsyncMock(
+        return_value={"data": {"productUpdate": {"userErrors": []}}}
+    )
+    client = ShopifyBulkMutationClient(
+        shop_domain=SHOP,
+        access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=AsyncMock(),
+        redis=AsyncMock(),
+        bulk_client=bulk_client,
+        product_mirror=mirror,
+    )
+
+    await ProductUpdateRunner(client).run_direct(
+        "run-1",
+        [ProductUpdateSpec(product_id="gid://shopify/Product/1", tags_add=["new"])],
+    )
+
+    states = mirror.get_states(["gid://shopify/Product/1", "gid://shopify/Product/2"])
+    assert list(states) == ["gid://shopify/Product/2"]
@@ -0,0 +1,185 @@
+"""Unit tests for ShopifyCostThrottle (in-process bucket model)."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+from src.apeg_core.shopify.throttle import ShopifyCostThrottle
+
+
+def _cost_extensions(available, maximum=1000.0, restore_rate=50.0, requested=100):
+    return {
+        "data": {},
+        "extensions": {
+            "cost": {
+                "requestedQueryCost": requested,
+                "actualQueryCost": requested,
+                "throttleStatus": {
+                    "maximumAvailable": maximum,
+                    "currentlyAvailable": available,
+                    "restoreRate": restore_rate,
+                },
+            }
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_acquire_without_state_does_not_wait():
+    """Test governor fails open before any throttleStatus is known."""
+    throttle = ShopifyCostThrottle("test-shop.myshopify.com")
+
+    with patch("src.apeg_core.shopify.throttle.asyncio.sleep") as mock_sleep:
+        waited = await throttle.acquire("{ shop { id } }")
+
+    assert waited == 0.0
+    assert not mock_sleep.called
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_in_proportion_to_cost():
+    """Test caller waits (cost - available) / restoreRate before sending."""
+    throttle = ShopifyCostThrottle("test-shop.myshopify.com")
+    query = "{ products(first: 250) { nodes { id } } }"
+
+    await throttle.record(query, _cost_extensions(available=20.0, requested=120))
+    assert throttle.estimate_cost(query) == 120
+
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        # Simulate the bucket restoring while we slept
+        throttle._local_state["updated_at"] -= delay + 0.01
+
+    with patch("src.apeg_core.shopify.throttle.asyncio.sleep", side_effect=fake_sleep):
+        waited = await throttle.acquire(query)
+
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(2.0, abs=0.05)
+    assert waited == pytest.approx(2.0, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_acquire_reserves_cost_from_bucket():
+    """Test consecutive reservations drain the local bucket."""
+    throttle = ShopifyCostThrottle("test-shop.myshopify.com")
+    query = "{ shop { id } }"
+
+    await throttle.record(query, _cost_extensions(available=100.0, requested=60))
+
+    assert await throttle._reserve(60) == 0.0
+    delay = await throttle._reserve(60)
+    assert delay == pytest.approx(20.0 / 50.0, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_cost_above_bucket_size_waits_for_a_full_bucket():
+    """Test a query costing more than the bucket holds is not blocked forever."""
+    throttle = ShopifyCostThrottle("test-shop.myshopify.com")
+
+    await throttle.record(
+        "{ shop { id } }", _cost_extensions(available=900.0, maximum=1000.0)
+    )
+
+    assert await throttle._reserve(1500) == pytest.approx(100.0 / 50.0, abs=0.05)
+    throttle._local_state["updated_at"] -= 2.1
+    assert await throttle._reserve(1500) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_local_model():
+    """Test governor keeps working if Redis is unavailable."""
+    redis = AsyncMock()
+    redis.eval.side_effect = ConnectionError("redis down")
+    throttle = ShopifyCostThrottle("test-shop.myshopify.com", redis=redis)
+
+    await throttle.record("{ shop { id } }", _cost_extensions(available=500.0))
+
+    assert redis.hset.called
+    assert await throttle._reserve(10) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_post_graphql_retries_throttled_response():
+    """Test post_graphql retries 200 responses carrying THROTTLED errors."""
+    client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        throttle=ShopifyCostThrottle("test-shop.myshopify.com"),
+    )
+
+    throttled = AsyncMock()
+    throttled.status = 200
+    throttled.raise_for_status = MagicMock()
+    throttled.json.return_value = {
+        "errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+        **_cost_extensions(available=0.0),
+    }
+    throttled.__aenter__.return_value = throttled
+
+    success = AsyncMock()
+    success.status = 200
+    success.raise_for_status = MagicMock()
+    success.json.return_value = {"data": {"ok": True}}
+    success.__aenter__.return_value = success
+
+    client.session.post.side_effect = [throttled, success]
+
+    with patch("src.apeg_core.shopify.bulk_client.asyncio.sleep", new=AsyncMock()):
+        with patch(
+            "src.apeg_core.shopify.throttle.asyncio.sleep", new=AsyncMock()
+        ) as throttle_sleep:
+            result = await client.post_graphql({"query": "{ shop { id } }"})
+
+    assert result == {"data": {"ok": True}}
+    assert client.session.post.call_count == 2
+    assert throttle_sleep.called
+
+
+def test_default_throttle_shares_the_client_redis():
+    """Test a client's own governor keeps its bucket in the shared Redis."""
+    redis = AsyncMock()
+    client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=redis,
+    )
+
+    assert client.throttle.redis is redis
+
+
+@pytest.mark.asyncio
+async def test_throttled_retries_back_off_by_attempt():
+    """Test repeated THROTTLED responses wait longer each attempt."""
+    client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        throttle=ShopifyCostThrottle("test-shop.myshopify.com"),
+    )
+    client.throttle.acquire = AsyncMock(return_value=0.0)
+    client.calculate_backoff = MagicMock(return_value=0.0)
+
+    throttled = AsyncMock(status=200)
+    throttled.raise_for_status = MagicMock()
+    throttled.json.return_value = {
+        "errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]
+    }
+    throttled.__aenter__.return_value = throttled
+    success = AsyncMock(status=200)
+    success.raise_for_status = MagicMock()
+    success.json.return_value = {"data": {"ok": True}}
+    success.__aenter__.return_value = success
+    client.session.post.side_effect = [throttled, throttled, success]
+
+    await client.post_graphql({"query": "{ shop { id } }"})
+
+    assert [c.args[0] for c in client.calculate_backoff.call_args_list] == [1, 2]
@@ -0,0 +1,205 @@
+"""Unit tests for bulk_operations/finish webhook handling."""
+import base64
+import hashlib
+import hmac
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from src.apeg_core.api.webhooks import verify_shopify_hmac
+from src.apeg_core.main import create_app
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+
+
+WEBHOOK_SECRET = "test-webhook-secret"
+
+
+def _sign(body: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    """Create async test client with webhook secret configured."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.setenv("SHOPIFY_STORE_DOMAIN", "test-shop.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_WEBHOOK_SHARED_SECRET", WEBHOOK_SECRET)
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def test_verify_shopify_hmac():
+    """Test HMAC verification accepts valid and rejects tampered bodies."""
+    body = b'{"admin_graphql_api_id":"gid://shopify/BulkOperation/1"}'
+
+    assert verify_shopify_hmac(body, _sign(body), WEBHOOK_SECRET)
+    assert not verify_shopify_hmac(body + b" ", _sign(body), WEBHOOK_SECRET)
+    assert not verify_shopify_hmac(body, None, WEBHOOK_SECRET)
+
+
+@pytest.mark.asyncio
+async def test_bulk_finish_webhook_publishes(client):
+    """Test valid webhook publishes finish notification to Redis."""
+    body = json.dumps(
+        {
+            "admin_graphql_api_id": "gid://shopify/BulkOperation/123",
+            "status": "completed",
+            "error_code": None,
+            "type": "mutation",
+        }
+    ).encode("utf-8")
+
+    mock_redis = AsyncMock()
+    with patch(
+        "src.apeg_core.api.resources.AppResources.get_redis", return_value=mock_redis
+    ):
+        response = await client.post(
+            "/webhooks/shopify/bulk-operations-finish",
+            content=body,
+            headers={
+                "X-Shopify-Hmac-Sha256": _sign(body),
+                "X-Shopify-Shop-Domain": "test-shop.myshopify.com",
+                "Content-Type": "application/json",
+            },
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "accepted"}
+    channel = "apeg:shopify:bulk_op_finished:gid://shopify/BulkOperation/123"
+    assert mock_redis.set.call_args[0][0] == channel
+    assert mock_redis.publish.call_args[0][0] == channel
+    # Shared pool: the webhook must not close the app's Redis client
+    assert not mock_redis.aclose.called
+
+
+@pytest.mark.asyncio
+async def test_bulk_finish_webhook_invalid_signature(client):
+    """Test webhook with bad HMAC is rejected (401)."""
+    body = b'{"admin_graphql_api_id":"gid://shopify/BulkOperation/123"}'
+
+    response = await client.post(
+        "/webhooks/shopify/bulk-operations-finish",
+        content=body,
+        headers={"X-Shopify-Hmac-Sha256": _sign(body, "wrong-secret")},
+    )
+
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_poll_status_wakes_on_notification():
+    """Test poll_status re-polls as soon as the notifier fires."""
+    notifier = AsyncMock()
+    notifier.wait_for_finish.return_value = {"status": "completed"}
+
+    bulk_client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        notifier=notifier,
+    )
+    bulk_client.post_graphql = AsyncMock(
+        side_effect=[
+            {"data": {"node": {"id": "gid://shopify/BulkOperation/1", "status": "RUNNING"}}},
+            {
+                "data": {
+                    "node": {
+                        "id": "gid://shopify/BulkOperation/1",
+                        "status": "COMPLETED",
+                        "url": "https://storage.shopifycloud.com/result.jsonl",
+                        "objectCount": "5",
+                    }
+                }
+            },
+        ]
+    )
+
+    result = await bulk_client.poll_status(
+        "gid://shopify/BulkOperation/1", poll_interval=30.0, timeout=60
+    )
+
+    assert result.status == "COMPLETED"
+    assert bulk_client.post_graphql.call_count == 2
+    notifier.wait_for_finish.assert_awaited_once_with(
+        "gid://shopify/BulkOperation/1", 30.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_poll_status_backs_off_without_notification():
+    """Test fallback polling interval grows exponentially."""
+    notifier = AsyncMock()
+    notifier.wait_for_finish.return_value = None
+
+    bulk_client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        notifier=notifier,
+    )
+    running = {"data": {"node": {"id": "gid://shopify/BulkOperation/1", "status": "RUNNING"}}}
+    completed = {
+        "data": {
+            "node": {
+                "id": "gid://shopify/BulkOperation/1",
+                "status": "COMPLETED",
+                "url": "https://storage.shopifycloud.com/result.jsonl",
+            }
+        }
+    }
+    bulk_client.post_graphql = AsyncMock(side_effect=[running, running, running, completed])
+
+    await bulk_client.poll_status(
+        "gid://shopify/BulkOperation/1", poll_interval=1.0, timeout=600
+    )
+
+    waits = [call.args[1] for call in notifier.wait_for_finish.await_args_list]
+    assert waits == [1.0, 2.0, 4.0]
+
+
+@pytest.mark.asyncio
+async def test_poll_status_sleeps_when_status_lags_the_webhook():
+    """Test a stored finish payload does not turn polling into a hot loop."""
+    notifier = AsyncMock()
+    notifier.wait_for_finish.return_value = {"status": "completed"}
+
+    bulk_client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        notifier=notifier,
+    )
+    running = {
+        "data": {"node": {"id": "gid://shopify/BulkOperation/1", "status": "RUNNING"}}
+    }
+    completed = {
+        "data": {
+            "node": {
+                "id": "gid://shopify/BulkOperation/1",
+                "status": "COMPLETED",
+                "url": "https://storage.shopifycloud.com/result.jsonl",
+            }
+        }
+    }
+    bulk_client.post_graphql = AsyncMock(side_effect=[running, running, running, completed])
+
+    sleep = AsyncMock()
+    with patch("src.apeg_core.shopify.bulk_client.asyncio.sleep", new=sleep):
+        await bulk_client.poll_status(
+            "gid://shopify/BulkOperation/1", poll_interval=5.0, timeout=600
+        )
+
+    notifier.wait_for_finish.assert_awaited_once()
+    assert [call.args[0] for call in sleep.await_args_list] == [5.0, 5.0]
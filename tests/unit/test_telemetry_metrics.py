@@ -0,0 +1,106 @@
+"""Unit tests for the in-process metrics registry and /metrics endpoint."""
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from src.apeg_core.main import create_app
+from src.apeg_core.shopify.bulk_client import ShopifyBulkClient
+from src.apeg_core.shopify.throttle import ShopifyCostThrottle
+from src.apeg_core.telemetry.metrics import (
+    GRAPHQL_REQUEST_SECONDS,
+    GRAPHQL_RETRIES,
+    MetricsRegistry,
+    graphql_operation_name,
+)
+
+
+def test_registry_renders_prometheus_text():
+    """Test counters, gauges, and cumulative histogram buckets render."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    depth = registry.gauge("queue_depth", "Depth.")
+    latency = registry.histogram("latency_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    depth.set(7)
+    depth.dec()
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, op="Q")
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a\\"b"} 3.0' in text
+    assert "queue_depth 6.0" in text
+    assert 'latency_seconds_bucket{op="Q",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{op="Q",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{op="Q",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{op="Q"} 4' in text
+    with pytest.raises(ValueError):
+        requests.inc(path="/a")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Again.")
+
+
+def test_graphql_operation_name():
+    """Test named operations use their name and anonymous ones the root field."""
+    assert graphql_operation_name("mutation BulkCancel($id: ID!) { x }") == "BulkCancel"
+    assert graphql_operation_name("\n query($q: String) {\n  orders { id } }") == "orders"
+
+
+@pytest.mark.asyncio
+async def test_post_graphql_records_latency_and_retries():
+    """Test each attempt is timed and a 429 counts as a rate-limited retry."""
+    client = ShopifyBulkClient(
+        shop_domain="test-shop.myshopify.com",
+        admin_access_token="shpat_fake_token",
+        api_version="2024-10",
+        session=MagicMock(),
+        redis=AsyncMock(),
+        throttle=ShopifyCostThrottle("test-shop.myshopify.com"),
+    )
+    limited = AsyncMock(status=429, headers={"Retry-After": "0"})
+    limited.text.return_value = "Rate limited"
+    limited.__aenter__.return_value = limited
+    ok = AsyncMock(status=200)
+    ok.json.return_value = {"data": {}}
+    ok.raise_for_status = MagicMock()
+    ok.__aenter__.return_value = ok
+    client.session.post.side_effect = [limited, ok]
+    retries = GRAPHQL_RETRIES.value(operation="MetricsProbe", reason="rate_limited")
+
+    await client.post_graphql({"query": "query MetricsProbe { shop { id } }"})
+
+    assert GRAPHQL_REQUEST_SECONDS.count(operation="MetricsProbe", status=429) == 1
+    assert GRAPHQL_REQUEST_SECONDS.count(operation="MetricsProbe", status=200) == 1
+    assert (
+        GRAPHQL_RETRIES.value(operation="MetricsProbe", reason="rate_limited")
+        == retries + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(monkeypatch):
+    """Test /metrics needs the API key and labels requests by route template."""
+    monkeypatch.setenv("APEG_API_KEY", "test-api-key")
+    monkeypatch.delenv("APEG_JOB_BACKEND", raising=False)
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-APEG-API-KEY": "test-api-key"}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/api/v1/jobs/some-job", headers=headers)
+        unauthorized = await client.get("/metrics")
+        response = await client.get("/metrics", headers=headers)
+    await app.state.resources.aclose()
+
+    assert unauthorized.status_code == 401
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "apeg_job_queue_depth 0.0" in response.text
+    assert (
+        'apeg_http_request_seconds_count{method="GET",'
+        'route="/api/v1/jobs/{job_id}",status="404"}'
+    ) in response.text
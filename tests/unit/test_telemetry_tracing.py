@@ -0,0 +1,94 @@
+"""Unit tests for context-propagated tracing spans and the JSONL exporter."""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.apeg_core.jobs.runner import run_seo_update_job
+from src.apeg_core.jobs.store import MemoryJobStore
+from src.apeg_core.schemas.jobs import JobRecord
+from src.apeg_core.telemetry import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Export spans to a temp file for the test, then disable tracing."""
+    path = tmp_path / "spans.jsonl"
+    tracing.configure(tracing.JsonlSpanExporter(str(path)))
+    yield path
+    tracing.shutdown()
+
+
+def _spans(path) -> dict[str, dict]:
+    tracing.shutdown()
+    spans = {}
+    for line in path.read_text().splitlines():
+        for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]:
+            span["attrs"] = {a["key"]: a["value"] for a in span["attributes"]}
+            spans[span["name"]] = span
+    return spans
+
+
+def test_disabled_tracing_is_a_no_op(tmp_path):
+    """Test spans and correlations are shared no-ops with no exporter."""
+    tracing.shutdown()
+    with tracing.correlate(job="j1"), tracing.span("work") as span:
+        span.set_attribute("k", "v")
+        assert tracing.current_span() is span
+
+    assert not tracing.is_enabled()
+    assert tracing.span("other") is span
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks_and_record_errors(trace_file):
+    """Test child spans (also in spawned tasks) share the trace and correlation."""
+
+    async def child():
+        with tracing.span("child", **{"shopify.bulk_op_id": "op-1"}):
+            await asyncio.sleep(0)
+
+    with tracing.correlate(**{"apeg.job_ids": ["j1"]}):
+        with tracing.span("root"):
+            await asyncio.create_task(child())
+            with pytest.raises(ValueError):
+                with tracing.span("failing"):
+                    raise ValueError("boom")
+
+    spans = _spans(trace_file)
+
+    assert "parentSpanId" not in spans["root"]
+    assert spans["child"]["traceId"] == spans["root"]["traceId"]
+    assert spans["child"]["parentSpanId"] == spans["root"]["spanId"]
+    assert spans["child"]["attrs"]["shopify.bulk_op_id"] == {"stringValue": "op-1"}
+    assert spans["child"]["attrs"]["apeg.job_ids"] == {
+        "arrayValue": {"values": [{"stringValue": "j1"}]}
+    }
+    assert spans["failing"]["status"] == {"code": 2, "message": "ValueError: boom"}
+    assert spans["root"]["status"] == {"code": 1}
+    assert int(spans["root"]["endTimeUnixNano"]) >= int(spans["child"]["endTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_job_run_spans_carry_job_id(trace_file):
+    """Test a job run's spans can be found by its job_id."""
+    store = MemoryJobStore()
+    await store.save(
+        JobRecord(
+            job_id="traced-job",
+            run_id="r1",
+            shop_domain="test-shop.myshopify.com",
+            dry_run=True,
+            product_count=1,
+            payload={"products": [{"product_id": "gid://shopify/Product/1"}]},
+        )
+    )
+
+    await run_seo_update_job("traced-job", store, MagicMock(), AsyncMock())
+
+    spans = _spans(trace_file)
+    job_ids = {"arrayValue": {"values": [{"stringValue": "traced-job"}]}}
+    assert spans["jobs.run_batch"]["attrs"]["apeg.job_ids"] == job_ids
+    assert spans["jobs.dry_run"]["attrs"]["apeg.job_ids"] == job_ids
+    assert spans["jobs.dry_run"]["parentSpanId"] == spans["jobs.run_batch"]["spanId"]